@@ -1,18 +1,39 @@
 from __future__ import annotations
 
 import argparse
-import json
 from pathlib import Path
 
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 
+from pipeline.constants import (
+    DEFAULT_BRANCH_DEFINITIONS,
+    DEFAULT_PHOENIX_ACCOUNTS,
+    DEFAULT_PHOENIX_WORKBOOK,
+    DEFAULT_TUCSON_ACCOUNTS,
+    DEFAULT_TUCSON_MAPPING,
+    OUT_MASTER_PROFILE_JSON,
+    OUT_MASTER_PROFILE_STACKS,
+    OUT_MASTER_REPORT,
+    OUT_MASTER_WORKBOOK,
+)
+from pipeline.geocode_validation import ZipPolygons
+from pipeline.master import (
+    MasterAssignments,
+    MasterInputPaths,
+    assign_phoenix_accounts,
+    assign_tucson_accounts,
+    build_master_workbook,
+    export_map_data,
+    load_master_inputs,
+    render_master_report,
+    standardize_master,
+)
+from pipeline.profiling import StageProfiler
+from pipeline.summary import compute_assignment_metrics
 from pipeline.utils import (
-    clean_zip_code,
-    load_excel_safe,
-    load_branch_definitions,
-    validate_dataframe,
+    resolve_path,
+    save_text_safe,
+    save_workbook_safe,
 )
 
 
@@ -24,27 +45,27 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument("--data-root", default=str(default_root), help="Root directory for input data files.")
     parser.add_argument(
         "--config",
-        default="config/branch_definitions.json",
+        default=DEFAULT_BRANCH_DEFINITIONS,
         help="Path to branch_definitions.json (relative to data root).",
     )
     parser.add_argument(
         "--phoenix-workbook",
-        default="Phoenix_3Branch_Final_Consolidation.xlsx",
+        default=DEFAULT_PHOENIX_WORKBOOK,
         help="Excel workbook with Phoenix ZIP Code Detail and Tucson Integration sheets.",
     )
     parser.add_argument(
         "--phoenix-accounts",
-        default="Uploads/Residential Data for Phoenix.xlsx",
+        default=DEFAULT_PHOENIX_ACCOUNTS,
         help="Phoenix accounts Excel file.",
     )
     parser.add_argument(
         "--tucson-accounts",
-        default="Uploads/Tucson CG Active List.csv",
+        default=DEFAULT_TUCSON_ACCOUNTS,
         help="Tucson accounts CSV file.",
     )
     parser.add_argument(
         "--tucson-mapping",
-        default="tucson_account_mapping.csv",
+        default=DEFAULT_TUCSON_MAPPING,
         help="Tucson account mapping CSV file.",
     )
     parser.add_argument(
@@ -52,81 +73,41 @@ def parse_args() -> argparse.Namespace:
         default=".",
         help="Output directory for generated files (relative to data root).",
     )
+    parser.add_argument(
+        "--zip-boundaries",
+        action="append",
+        help="ZIP boundary JSON (relative to data root); corrects account ZIPs from Latitude/Longitude before "
+        "assignment. Repeatable.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help=f"Record per-step wall/CPU time, peak memory and row counts to {OUT_MASTER_PROFILE_JSON}.",
+    )
+    parser.add_argument(
+        "--profile-stacks",
+        action="store_true",
+        help=f"With --profile, also write cProfile collapsed stacks to {OUT_MASTER_PROFILE_STACKS}.",
+    )
     return parser.parse_args()
 
 
-def resolve_path(data_root: Path, value: str) -> Path:
-    path = Path(value).expanduser()
-    return path if path.is_absolute() else data_root / path
-
-
-def load_csv_safe(path: Path, context: str) -> pd.DataFrame:
-    try:
-        return pd.read_csv(path)
-    except FileNotFoundError as exc:
-        raise FileNotFoundError(f"{context} file not found: {path}") from exc
-    except Exception as exc:  # pragma: no cover - defensive
-        raise RuntimeError(f"Failed to read {context} file: {path}\n{exc}") from exc
-
-
-def load_excel_file_safe(path: Path, context: str) -> pd.DataFrame:
-    try:
-        return pd.read_excel(path)
-    except FileNotFoundError as exc:
-        raise FileNotFoundError(f"{context} file not found: {path}") from exc
-    except Exception as exc:  # pragma: no cover - defensive
-        raise RuntimeError(f"Failed to read {context} file: {path}\n{exc}") from exc
-
-
-def save_csv_safe(df: pd.DataFrame, path: Path, context: str) -> None:
-    try:
-        df.to_csv(path, index=False)
-    except Exception as exc:  # pragma: no cover - defensive
-        raise RuntimeError(f"Failed to write {context} CSV: {path}\n{exc}") from exc
-
-
-def save_json_safe(payload: list[dict], path: Path, context: str) -> None:
-    try:
-        with path.open("w", encoding="utf-8") as handle:
-            json.dump(payload, handle, indent=2)
-    except Exception as exc:  # pragma: no cover - defensive
-        raise RuntimeError(f"Failed to write {context} JSON: {path}\n{exc}") from exc
-
-
-def save_workbook_safe(workbook: Workbook, path: Path, context: str) -> None:
-    try:
-        workbook.save(path)
-    except Exception as exc:  # pragma: no cover - defensive
-        raise RuntimeError(f"Failed to write {context} workbook: {path}\n{exc}") from exc
-
-
-def save_text_safe(path: Path, content: str, context: str) -> None:
-    try:
-        with path.open("w", encoding="utf-8") as handle:
-            handle.write(content)
-    except Exception as exc:  # pragma: no cover - defensive
-        raise RuntimeError(f"Failed to write {context} text: {path}\n{exc}") from exc
-
-
 def main() -> None:
     args = parse_args()
     data_root = Path(args.data_root).expanduser().resolve()
-    config_path = resolve_path(data_root, args.config)
     output_dir = resolve_path(data_root, args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    phoenix_workbook = resolve_path(data_root, args.phoenix_workbook)
-    phoenix_accounts_path = resolve_path(data_root, args.phoenix_accounts)
-    tucson_accounts_path = resolve_path(data_root, args.tucson_accounts)
-    tucson_mapping_path = resolve_path(data_root, args.tucson_mapping)
+    paths = MasterInputPaths.from_data_root(
+        data_root,
+        config=args.config,
+        phoenix_workbook=args.phoenix_workbook,
+        phoenix_accounts=args.phoenix_accounts,
+        tucson_accounts=args.tucson_accounts,
+        tucson_mapping=args.tucson_mapping,
+    )
 
-    branch_definitions = load_branch_definitions(config_path)
-    arizona_config = branch_definitions.get("locations", {}).get("arizona", {})
-    valid_areas = {
-        territory.get("area")
-        for territory in arizona_config.get("territories", [])
-        if isinstance(territory, dict)
-    }
+    profiler = StageProfiler(enabled=args.profile, cprofile=args.profile and args.profile_stacks)
 
     # Disable truncation
     pd.set_option('display.max_columns', None)
@@ -139,94 +120,39 @@ def main() -> None:
     print("=" * 80)
 
     # ============================================================================
-    # STEP 1: Load Phoenix zip code to area mappings
+    # STEP 1: Load inputs and Phoenix zip code to area mappings
     # ============================================================================
     print("\n" + "=" * 80)
     print("STEP 1: Loading Phoenix zip code to area mappings")
     print("=" * 80)
 
-    phoenix_zip_mapping = load_excel_safe(
-        phoenix_workbook,
-        sheet_name='ZIP Code Detail',
-    )
-    validate_dataframe(
-        phoenix_zip_mapping,
-        ['ShippingPostalCode', 'ConsolidatedArea', 'Source'],
-        context="Phoenix ZIP mapping",
-    )
-    phoenix_zip_mapping['ShippingPostalCode'] = clean_zip_code(
-        phoenix_zip_mapping['ShippingPostalCode']
-    )
+    zip_polygons = None
+    if args.zip_boundaries:
+        zip_polygons = ZipPolygons.load([resolve_path(data_root, path) for path in args.zip_boundaries])
 
-    print(f"Phoenix ZIP mapping loaded: {phoenix_zip_mapping.shape}")
-    print(f"Unique areas: {phoenix_zip_mapping['ConsolidatedArea'].unique()}")
-
-    zip_to_area: dict[str, dict[str, str]] = {}
-    for _, row in phoenix_zip_mapping.iterrows():
-        zip_code = str(row['ShippingPostalCode']).strip()
-        area = str(row['ConsolidatedArea']).strip()
-        source = str(row['Source']).strip()
-        if valid_areas and area not in valid_areas:
-            print(f"Warning: area '{area}' not found in branch_definitions.json")
-        zip_to_area[zip_code] = {
-            'area': area,
-            'source': source,
-        }
-
-    print(f"\nTotal ZIP codes mapped: {len(zip_to_area)}")
-
-    tucson_integration = load_excel_safe(
-        phoenix_workbook,
-        sheet_name='Tucson Integration',
-    )
-    validate_dataframe(
-        tucson_integration,
-        ['ShippingPostalCode'],
-        context="Tucson integration sheet",
-    )
-    tucson_integration['ShippingPostalCode'] = clean_zip_code(
-        tucson_integration['ShippingPostalCode']
-    )
-    tucson_peripheral_zips = set(tucson_integration['ShippingPostalCode'].astype(str).str.strip())
-    print(f"Tucson peripheral ZIP codes assigned to Phoenix East: {len(tucson_peripheral_zips)}")
-    print(f"Zips: {sorted(tucson_peripheral_zips)}")
+    with profiler.stage("load_inputs") as stage:
+        inputs = load_master_inputs(paths, zip_polygons=zip_polygons)
+        stage.rows = len(inputs.phoenix_accounts) + len(inputs.tucson_accounts)
+
+    print(f"Phoenix ZIP mapping loaded: {inputs.phoenix_zip_mapping.shape}")
+    print(f"Unique areas: {inputs.phoenix_zip_mapping['ConsolidatedArea'].unique()}")
+    for area in inputs.unknown_areas:
+        print(f"Warning: area '{area}' not found in branch_definitions.json")
+    print(f"\nTotal ZIP codes mapped: {len(inputs.zip_to_area)}")
+    print(f"Tucson peripheral ZIP codes assigned to Phoenix East: {len(inputs.tucson_peripheral_zips)}")
+    print(f"Zips: {sorted(inputs.tucson_peripheral_zips)}")
 
     # ============================================================================
-    # STEP 2: Load and process Phoenix active accounts
+    # STEP 2: Process Phoenix active accounts
     # ============================================================================
     print("\n" + "=" * 80)
     print("STEP 2: Processing Phoenix active accounts")
     print("=" * 80)
 
-    phoenix_accounts = load_excel_file_safe(phoenix_accounts_path, "Phoenix accounts")
-    print(f"Phoenix accounts loaded: {phoenix_accounts.shape}")
-    validate_dataframe(
-        phoenix_accounts,
-        ['ShippingPostalCode', 'ShippingStreet', 'ShippingCity', 'Display Name'],
-        context="Phoenix accounts",
-    )
-
-    phoenix_accounts['ZIP_Clean'] = clean_zip_code(phoenix_accounts['ShippingPostalCode'])
-
-    def map_phoenix_account(row: pd.Series) -> pd.Series:
-        zip_code = row['ZIP_Clean']
-        if zip_code in zip_to_area:
-            mapping = zip_to_area[zip_code]
-            return pd.Series({
-                'Branch_Assignment': f"Phoenix {mapping['area']}",
-                'Area': mapping['area'],
-                'Market': 'Phoenix',
-                'Special_Flag': 'Tucson-Associated (Phoenix East)' if mapping['source'] == 'Tucson-Unassigned' else ''
-            })
-        return pd.Series({
-            'Branch_Assignment': 'Unassigned',
-            'Area': 'Unassigned',
-            'Market': 'Phoenix',
-            'Special_Flag': 'Unassigned ZIP Code'
-        })
-
-    phoenix_assignments = phoenix_accounts.apply(map_phoenix_account, axis=1)
-    phoenix_master = pd.concat([phoenix_accounts, phoenix_assignments], axis=1)
+    print(f"Phoenix accounts loaded: {inputs.phoenix_accounts.shape}")
+    with profiler.stage("assign_phoenix") as stage:
+        phoenix_master = assign_phoenix_accounts(inputs.phoenix_accounts, inputs.zip_to_area)
+        stage.rows = len(phoenix_master)
 
     print("\nPhoenix account assignment summary:")
     print(phoenix_master['Branch_Assignment'].value_counts())
@@ -234,83 +160,21 @@ def main() -> None:
     print(phoenix_master['Special_Flag'].value_counts())
 
     # ============================================================================
-    # STEP 3: Load and process Tucson active accounts
+    # STEP 3: Process Tucson active accounts
     # ============================================================================
     print("\n" + "=" * 80)
     print("STEP 3: Processing Tucson active accounts")
     print("=" * 80)
 
-    tucson_accounts = load_csv_safe(tucson_accounts_path, "Tucson accounts")
-    print(f"Tucson accounts loaded: {tucson_accounts.shape}")
-    validate_dataframe(
-        tucson_accounts,
-        ['ShippingPostalCode', 'Customer_Number__c', 'Name'],
-        context="Tucson accounts",
-    )
-
-    tucson_accounts['ZIP_Clean'] = clean_zip_code(tucson_accounts['ShippingPostalCode'])
-
-    tucson_mapping = load_csv_safe(tucson_mapping_path, "Tucson mapping")
-    print(f"Tucson mapping loaded: {tucson_mapping.shape}")
-    validate_dataframe(
-        tucson_mapping,
-        ['Customer_Number__c', 'Proposed_Branch'],
-        context="Tucson mapping",
-    )
-
-    if 'ZIP_Clean' not in tucson_mapping.columns and 'ShippingPostalCode' in tucson_mapping.columns:
-        tucson_mapping['ZIP_Clean'] = clean_zip_code(tucson_mapping['ShippingPostalCode'])
-
-    customer_to_branch: dict[str, dict[str, str]] = {}
-    for _, row in tucson_mapping.iterrows():
-        customer_num = row['Customer_Number__c']
-        branch = row['Proposed_Branch']
-        zip_code = str(row.get('ZIP_Clean', '')).strip()
-        customer_to_branch[customer_num] = {
-            'branch': branch,
-            'zip': zip_code,
-        }
-
-    def map_tucson_account(row: pd.Series) -> pd.Series:
-        customer_num = row['Customer_Number__c']
-        zip_code = row['ZIP_Clean']
-
-        if zip_code in tucson_peripheral_zips:
-            return pd.Series({
-                'Branch_Assignment': 'Phoenix East',
-                'Area': 'East',
-                'Market': 'Phoenix',
-                'Special_Flag': 'Tucson-Associated (Phoenix East)'
-            })
-
-        if customer_num in customer_to_branch:
-            mapping = customer_to_branch[customer_num]
-            branch = mapping['branch']
-
-            if pd.notna(branch) and str(branch).strip():
-                if 'Branch 1' in str(branch):
-                    area_name = 'Area 1 - East & North'
-                elif 'Branch 2' in str(branch):
-                    area_name = 'Area 2 - West & Central'
-                else:
-                    area_name = 'Unassigned'
-
-                return pd.Series({
-                    'Branch_Assignment': f"Tucson {area_name}",
-                    'Area': area_name,
-                    'Market': 'Tucson',
-                    'Special_Flag': ''
-                })
-
-        return pd.Series({
-            'Branch_Assignment': 'Tucson Unassigned',
-            'Area': 'Unassigned',
-            'Market': 'Tucson',
-            'Special_Flag': 'No branch assignment found'
-        })
-
-    tucson_assignments = tucson_accounts.apply(map_tucson_account, axis=1)
-    tucson_master = pd.concat([tucson_accounts, tucson_assignments], axis=1)
+    print(f"Tucson accounts loaded: {inputs.tucson_accounts.shape}")
+    print(f"Tucson mapping loaded: {inputs.tucson_mapping.shape}")
+    with profiler.stage("assign_tucson") as stage:
+        tucson_master = assign_tucson_accounts(
+            inputs.tucson_accounts,
+            inputs.customer_to_branch,
+            inputs.tucson_peripheral_zips,
+        )
+        stage.rows = len(tucson_master)
 
     print("\nTucson account assignment summary:")
     print(tucson_master['Branch_Assignment'].value_counts())
@@ -324,47 +188,13 @@ def main() -> None:
     print("STEP 4: Creating standardized master account file")
     print("=" * 80)
 
-    phoenix_standardized = pd.DataFrame({
-        'Account_ID': phoenix_master['Display Name'],
-        'Customer_Number': '',
-        'Street_Address': phoenix_master['ShippingStreet'],
-        'City': phoenix_master['ShippingCity'],
-        'Zip_Code': phoenix_master['ZIP_Clean'],
-        'Status': 'Active',
-        'Market': phoenix_master['Market'],
-        'Branch_Assignment': phoenix_master['Branch_Assignment'],
-        'Area': phoenix_master['Area'],
-        'Service_Contract': phoenix_master.get('Service Contract Description', ''),
-        'Territory': phoenix_master.get('Territory', ''),
-        'Route': phoenix_master.get('Route Name', ''),
-        'Maintenance_Day': phoenix_master.get('Maintenance Plan Day of Week', ''),
-        'Special_Flag': phoenix_master['Special_Flag'],
-        'Email': phoenix_master.get('Invoice Bill To Email', '')
-    })
-
-    tucson_standardized = pd.DataFrame({
-        'Account_ID': tucson_master['Name'],
-        'Customer_Number': tucson_master['Customer_Number__c'],
-        'Street_Address': tucson_master.get('ShippingStreet', ''),
-        'City': tucson_master.get('ShippingCity', ''),
-        'Zip_Code': tucson_master['ZIP_Clean'],
-        'Status': tucson_master.get('Status', 'Active'),
-        'Market': tucson_master['Market'],
-        'Branch_Assignment': tucson_master['Branch_Assignment'],
-        'Area': tucson_master['Area'],
-        'Service_Contract': tucson_master.get('Name.1', ''),
-        'Territory': tucson_master.get('Short Branch Name', ''),
-        'Route': '',
-        'Maintenance_Day': '',
-        'Special_Flag': tucson_master['Special_Flag'],
-        'Email': ''
-    })
-
-    master_accounts = pd.concat([phoenix_standardized, tucson_standardized], ignore_index=True)
+    with profiler.stage("standardize") as stage:
+        master_accounts, account_source = standardize_master(phoenix_master, tucson_master)
+        stage.rows = len(master_accounts)
 
     print(f"\nTotal accounts in master file: {len(master_accounts)}")
-    print(f"Phoenix accounts: {len(phoenix_standardized)}")
-    print(f"Tucson accounts: {len(tucson_standardized)}")
+    print(f"Phoenix accounts: {account_source.count('Phoenix')}")
+    print(f"Tucson accounts: {account_source.count('Tucson')}")
 
     # ============================================================================
     # STEP 5: Create summary statistics
@@ -373,32 +203,29 @@ def main() -> None:
     print("STEP 5: Creating summary statistics")
     print("=" * 80)
 
-    summary_by_branch = master_accounts.groupby('Branch_Assignment').agg({
-        'Account_ID': 'count',
-        'Market': lambda x: x.mode()[0] if len(x.mode()) > 0 else ''
-    }).reset_index()
-    summary_by_branch.columns = ['Branch_Assignment', 'Account_Count', 'Primary_Market']
-    summary_by_branch = summary_by_branch.sort_values('Account_Count', ascending=False)
+    with profiler.stage("summary_metrics") as stage:
+        metrics = compute_assignment_metrics(
+            master_accounts,
+            source=account_source,
+            markets=['Phoenix', 'Tucson'],
+        )
+        stage.rows = len(master_accounts)
+    assignments = MasterAssignments(
+        phoenix_master=phoenix_master,
+        tucson_master=tucson_master,
+        master_accounts=master_accounts,
+        account_source=account_source,
+        metrics=metrics,
+    )
 
     print("\nSummary by Branch Assignment:")
-    print(summary_by_branch)
-
-    market_summary = master_accounts.groupby(['Market', 'Area']).agg({
-        'Account_ID': 'count'
-    }).reset_index()
-    market_summary.columns = ['Market', 'Area', 'Account_Count']
-    market_summary = market_summary.sort_values(['Market', 'Account_Count'], ascending=[True, False])
+    print(metrics.by_branch)
 
     print("\nSummary by Market and Area:")
-    print(market_summary)
-
-    special_flag_summary = master_accounts[master_accounts['Special_Flag'] != ''].groupby('Special_Flag').agg({
-        'Account_ID': 'count'
-    }).reset_index()
-    special_flag_summary.columns = ['Special_Flag', 'Account_Count']
+    print(metrics.by_market_area)
 
     print("\nSpecial Flag Summary:")
-    print(special_flag_summary)
+    print(metrics.special_flags)
 
     # ============================================================================
     # STEP 6: Create Excel file with formatting
@@ -407,109 +234,13 @@ def main() -> None:
     print("STEP 6: Creating formatted Excel file")
     print("=" * 80)
 
-    wb = Workbook()
-
-    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
-    header_font = Font(color='FFFFFF', bold=True, size=11)
-    special_fill = PatternFill(start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    ws1 = wb.active
-    ws1.title = 'All Accounts'
-
-    for col_idx, col_name in enumerate(master_accounts.columns, 1):
-        cell = ws1.cell(row=1, column=col_idx, value=col_name)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = thin_border
-
-    for row_idx, row_data in enumerate(master_accounts.itertuples(index=False), 2):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws1.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = thin_border
-            if col_idx == master_accounts.columns.get_loc('Special_Flag') + 1:
-                if 'Tucson-Associated' in str(value):
-                    cell.fill = special_fill
-
-    for column in ws1.columns:
-        max_length = 0
-        column_letter = column[0].column_letter
-        for cell in column:
-            try:
-                max_length = max(max_length, len(str(cell.value)))
-            except Exception:
-                continue
-        adjusted_width = min(max_length + 2, 50)
-        ws1.column_dimensions[column_letter].width = adjusted_width
-
-    ws2 = wb.create_sheet('Phoenix Accounts')
-    phoenix_data = master_accounts[master_accounts['Market'] == 'Phoenix']
-    for col_idx, col_name in enumerate(phoenix_data.columns, 1):
-        cell = ws2.cell(row=1, column=col_idx, value=col_name)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = thin_border
-
-    for row_idx, row_data in enumerate(phoenix_data.itertuples(index=False), 2):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws2.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = thin_border
-
-    ws3 = wb.create_sheet('Tucson Accounts')
-    tucson_data = master_accounts[master_accounts['Market'] == 'Tucson']
-    for col_idx, col_name in enumerate(tucson_data.columns, 1):
-        cell = ws3.cell(row=1, column=col_idx, value=col_name)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.alignment = Alignment(horizontal='center', vertical='center')
-        cell.border = thin_border
-
-    for row_idx, row_data in enumerate(tucson_data.itertuples(index=False), 2):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws3.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = thin_border
-
-    ws4 = wb.create_sheet('Summary Statistics')
-    ws4.cell(row=1, column=1, value='SUMMARY BY BRANCH ASSIGNMENT').font = Font(bold=True, size=14)
-    ws4.merge_cells('A1:C1')
-
-    row_offset = 3
-    for col_idx, col_name in enumerate(summary_by_branch.columns, 1):
-        cell = ws4.cell(row=row_offset, column=col_idx, value=col_name)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.border = thin_border
-
-    for row_idx, row_data in enumerate(summary_by_branch.itertuples(index=False), row_offset + 1):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws4.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = thin_border
-
-    row_offset = row_offset + len(summary_by_branch) + 3
-    ws4.cell(row=row_offset, column=1, value='SUMMARY BY MARKET AND AREA').font = Font(bold=True, size=14)
-    ws4.merge_cells(f'A{row_offset}:C{row_offset}')
-
-    row_offset += 2
-    for col_idx, col_name in enumerate(market_summary.columns, 1):
-        cell = ws4.cell(row=row_offset, column=col_idx, value=col_name)
-        cell.fill = header_fill
-        cell.font = header_font
-        cell.border = thin_border
-
-    for row_idx, row_data in enumerate(market_summary.itertuples(index=False), row_offset + 1):
-        for col_idx, value in enumerate(row_data, 1):
-            cell = ws4.cell(row=row_idx, column=col_idx, value=value)
-            cell.border = thin_border
-
-    excel_filename = output_dir / 'Master_Account_Branch_Assignments.xlsx'
-    save_workbook_safe(wb, excel_filename, "master assignments")
+    with profiler.stage("excel_workbook") as stage:
+        with profiler.stage("build_workbook"):
+            wb = build_master_workbook(master_accounts, metrics)
+        excel_filename = output_dir / OUT_MASTER_WORKBOOK
+        with profiler.stage("save_workbook"):
+            save_workbook_safe(wb, excel_filename, "master assignments")
+        stage.rows = len(master_accounts)
     print(f"\nExcel file saved: {excel_filename}")
 
     # ============================================================================
@@ -519,44 +250,17 @@ def main() -> None:
     print("STEP 7: Creating map visualization data files")
     print("=" * 80)
 
-    phoenix_map_data = master_accounts[master_accounts['Market'] == 'Phoenix'].groupby(
-        ['Zip_Code', 'Area', 'Branch_Assignment']
-    ).agg({
-        'Account_ID': 'count',
-        'Special_Flag': lambda x: (x != '').sum()
-    }).reset_index()
-    phoenix_map_data.columns = ['Zip_Code', 'Area', 'Branch_Assignment', 'Active_Accounts', 'Special_Flag_Count']
-    phoenix_map_data = phoenix_map_data.sort_values('Active_Accounts', ascending=False)
-
-    phoenix_json = phoenix_map_data.to_dict(orient='records')
-    phoenix_json_path = output_dir / 'Phoenix_Zip_Code_Map_Data.json'
-    phoenix_csv_path = output_dir / 'Phoenix_Zip_Code_Map_Data.csv'
-
-    save_json_safe(phoenix_json, phoenix_json_path, "Phoenix map data")
+    with profiler.stage("map_data") as stage:
+        phoenix_json_path, phoenix_csv_path, tucson_json_path, tucson_csv_path = export_map_data(
+            assignments,
+            output_dir,
+        )
+        stage.rows = len(metrics.zip_map('Phoenix')) + len(metrics.zip_map('Tucson'))
     print(f"Phoenix map data saved: {phoenix_json_path}")
-    print(f"Total Phoenix ZIP codes: {len(phoenix_map_data)}")
-
-    save_csv_safe(phoenix_map_data, phoenix_csv_path, "Phoenix map data")
+    print(f"Total Phoenix ZIP codes: {len(metrics.zip_map('Phoenix'))}")
     print(f"Phoenix map data CSV saved: {phoenix_csv_path}")
-
-    tucson_map_data = master_accounts[master_accounts['Market'] == 'Tucson'].groupby(
-        ['Zip_Code', 'Area', 'Branch_Assignment']
-    ).agg({
-        'Account_ID': 'count',
-        'Special_Flag': lambda x: (x != '').sum()
-    }).reset_index()
-    tucson_map_data.columns = ['Zip_Code', 'Area', 'Branch_Assignment', 'Active_Accounts', 'Special_Flag_Count']
-    tucson_map_data = tucson_map_data.sort_values('Active_Accounts', ascending=False)
-
-    tucson_json = tucson_map_data.to_dict(orient='records')
-    tucson_json_path = output_dir / 'Tucson_Zip_Code_Map_Data.json'
-    tucson_csv_path = output_dir / 'Tucson_Zip_Code_Map_Data.csv'
-
-    save_json_safe(tucson_json, tucson_json_path, "Tucson map data")
     print(f"Tucson map data saved: {tucson_json_path}")
-    print(f"Total Tucson ZIP codes: {len(tucson_map_data)}")
-
-    save_csv_safe(tucson_map_data, tucson_csv_path, "Tucson map data")
+    print(f"Total Tucson ZIP codes: {len(metrics.zip_map('Tucson'))}")
     print(f"Tucson map data CSV saved: {tucson_csv_path}")
 
     # ============================================================================
@@ -566,104 +270,10 @@ def main() -> None:
     print("STEP 8: Creating summary report")
     print("=" * 80)
 
-    report = f"""# MASTER ACCOUNT ASSIGNMENT REPORT
-Generated: {pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')}
-
-## Executive Summary
-
-This report documents the comprehensive account assignment process for the swimming pool service 
-company's branch reorganization initiative in Phoenix and Tucson markets.
-
-### Total Accounts Processed
-- **Total Accounts**: {len(master_accounts):,}
-- **Phoenix Market**: {len(phoenix_standardized):,}
-- **Tucson Market**: {len(tucson_standardized):,}
-
-### Phoenix 3-Area Structure
-{summary_by_branch[summary_by_branch['Primary_Market'] == 'Phoenix'].to_string(index=False)}
-
-### Tucson 2-Area Structure
-{summary_by_branch[summary_by_branch['Primary_Market'] == 'Tucson'].to_string(index=False)}
-
-### Special Assignments
-{special_flag_summary.to_string(index=False) if len(special_flag_summary) > 0 else 'No special assignments'}
-
-## Assignment Process
-
-### 1. Phoenix Assignments
-- Loaded {len(phoenix_accounts)} active Phoenix accounts
-- Matched accounts to branch areas based on ZIP code
-- Used the Phoenix 3-Branch Consolidation analysis for ZIP code to area mappings
-- Successfully assigned {len(phoenix_standardized[phoenix_standardized['Area'] != 'Unassigned'])} accounts
-- {len(phoenix_standardized[phoenix_standardized['Area'] == 'Unassigned'])} unassigned accounts (missing ZIP codes)
-
-### 2. Tucson Assignments
-- Loaded {len(tucson_accounts)} active Tucson accounts
-- Matched accounts using the Tucson branch decentralization plan
-- Identified {len(tucson_peripheral_zips)} peripheral ZIP codes reassigned to Phoenix East
-- Successfully assigned {len(tucson_standardized[tucson_standardized['Area'] != 'Unassigned'])} accounts
-
-### 3. Special Cases
-- **Tucson-Associated Accounts in Phoenix East**: {len(master_accounts[master_accounts['Special_Flag'].str.contains('Tucson-Associated', na=False)])} accounts
-  - These are accounts in peripheral areas (Casa Grande, Maricopa, San Tan Valley, etc.) 
-  - Assigned to Phoenix East Area for operational purposes
-  - Flagged as Tucson-associated for tracking
-
-## Deliverables
-
-### 1. Master Account Assignment File
-**File**: `Master_Account_Branch_Assignments.xlsx`
-
-Contains four sheets:
-- **All Accounts**: Complete list of all {len(master_accounts)} accounts
-- **Phoenix Accounts**: {len(phoenix_data)} Phoenix market accounts
-- **Tucson Accounts**: {len(tucson_data)} Tucson market accounts
-- **Summary Statistics**: Aggregated statistics by branch and market
-
-### 2. Map Visualization Data
-**Phoenix Data**: 
-- `Phoenix_Zip_Code_Map_Data.json` ({len(phoenix_map_data)} ZIP codes)
-- `Phoenix_Zip_Code_Map_Data.csv`
-
-**Tucson Data**:
-- `Tucson_Zip_Code_Map_Data.json` ({len(tucson_map_data)} ZIP codes)
-- `Tucson_Zip_Code_Map_Data.csv`
-
-These files contain:
-- ZIP code
-- Assigned area
-- Number of active accounts
-- Special flag counts
-
-## Data Quality Notes
-
-### Missing Data
-- {len(master_accounts[master_accounts['Email'] == ''])} accounts missing email addresses
-- {len(master_accounts[master_accounts['Route'] == ''])} accounts missing route assignments
-- {len(master_accounts[master_accounts['Maintenance_Day'] == ''])} accounts missing maintenance day
-
-### Unassigned Accounts
-- {len(master_accounts[master_accounts['Branch_Assignment'].str.contains('Unassigned', na=False)])} accounts without proper branch assignments
-- These accounts require manual review and assignment
-
-## Recommendations
-
-1. **Review Unassigned Accounts**: Investigate accounts with missing ZIP codes or branch assignments
-2. **Validate Special Assignments**: Review Tucson-associated accounts assigned to Phoenix East
-3. **Update Route Information**: Many accounts are missing route assignments
-4. **Email Collection**: Improve email address collection for customer communication
-
-## Next Steps
-
-1. Review and validate the master assignment file
-2. Use map visualization data to create geographic territory maps
-3. Communicate new assignments to field teams
-4. Update CRM systems with new branch assignments
-5. Monitor retention rates by new branch structure
-"""
-
-    report_path = output_dir / 'Master_Account_Assignment_Report.md'
-    save_text_safe(report_path, report, "master assignment report")
+    with profiler.stage("report"):
+        report = render_master_report(assignments, inputs)
+        report_path = output_dir / OUT_MASTER_REPORT
+        save_text_safe(report_path, report, "master assignment report")
     print(f"\nReport saved: {report_path}")
 
     print("\n" + "=" * 80)
@@ -678,6 +288,19 @@ These files contain:
     print(f"6. {report_path.name}")
     print(f"\nAll files saved to {output_dir}")
 
+    if args.profile:
+        print("\n" + "=" * 80)
+        print("STEP PROFILE")
+        print("=" * 80)
+        print(profiler.format_table())
+        profile_path = output_dir / OUT_MASTER_PROFILE_JSON
+        profiler.write_json(profile_path)
+        print(f"\nProfile saved: {profile_path}")
+        if args.profile_stacks:
+            stacks_path = output_dir / OUT_MASTER_PROFILE_STACKS
+            profiler.write_collapsed(stacks_path)
+            print(f"Collapsed stacks saved: {stacks_path} (render with flamegraph.pl or speedscope)")
+
 
 def run() -> None:
     try:
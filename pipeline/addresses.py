@@ -0,0 +1,268 @@
+"""Vectorized street-address normalization and deduplication.
+
+Customer exports spell the same location many ways ("123 N Main St.",
+"123 North Main Street", "123 N MAIN ST APT 4"). ``normalize_addresses``
+folds a Series of ``street, city, state, zip`` strings to one canonical
+form so each physical address is geocoded and cached once:
+
+* upper case, punctuation dropped, whitespace and comma runs collapsed
+* in the street segment, the leading and trailing directionals and the
+  final suffix abbreviated (NORTH -> N, STREET -> ST; see
+  ``STREET_ABBREVIATIONS``); words of the street name itself are kept,
+  so "10 E South St" -> "10 E SOUTH ST" and "500 Court Ave" -> "500 COURT AVE"
+* unit designators and their identifiers removed (APT 4, STE 100, #12)
+* ZIP+4 trimmed to five digits
+
+The normalized form is a lookup key (dedup, cache, journal), not a query:
+the geocoder is sent the joined address as written (``join_addresses``).
+
+Normalization runs once per distinct raw string, so a million-row list
+with heavy repetition costs little more than its unique values.
+``build_addresses`` joins address columns (ZIPs cleaned with
+``clean_zip_code``) before normalizing, and ``dedupe_addresses``
+factorizes the result:
+
+    codes, uniques, dedup = dedupe_addresses(build_addresses(frame, columns))
+    logger.info("%d rows -> %d addresses (%.1fx)", dedup.rows, dedup.unique, dedup.ratio)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import re
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pipeline.utils import clean_zip_code
+
+DIRECTIONAL_ABBREVIATIONS: dict[str, str] = {
+    "NORTH": "N",
+    "SOUTH": "S",
+    "EAST": "E",
+    "WEST": "W",
+    "NORTHEAST": "NE",
+    "NORTHWEST": "NW",
+    "SOUTHEAST": "SE",
+    "SOUTHWEST": "SW",
+}
+
+# USPS Publication 28 standard suffix abbreviations for the common cases.
+SUFFIX_ABBREVIATIONS: dict[str, str] = {
+    "ALLEY": "ALY",
+    "AV": "AVE",
+    "AVENUE": "AVE",
+    "BOULEVARD": "BLVD",
+    "CIRCLE": "CIR",
+    "COURT": "CT",
+    "CROSSING": "XING",
+    "DRIVE": "DR",
+    "EXPRESSWAY": "EXPY",
+    "FREEWAY": "FWY",
+    "HIGHWAY": "HWY",
+    "LANE": "LN",
+    "PARKWAY": "PKWY",
+    "PLACE": "PL",
+    "PLAZA": "PLZ",
+    "POINT": "PT",
+    "ROAD": "RD",
+    "SQUARE": "SQ",
+    "STREET": "ST",
+    "TERRACE": "TER",
+    "TRAIL": "TRL",
+}
+
+STREET_ABBREVIATIONS: dict[str, str] = {**DIRECTIONAL_ABBREVIATIONS, **SUFFIX_ABBREVIATIONS}
+
+UNIT_DESIGNATORS: tuple[str, ...] = (
+    "APARTMENT",
+    "APT",
+    "BLDG",
+    "BUILDING",
+    "LOT",
+    "RM",
+    "ROOM",
+    "SPACE",
+    "SPC",
+    "STE",
+    "SUITE",
+    "TRLR",
+    "UNIT",
+)
+
+_ZIP_PLUS_FOUR = re.compile(r"(?<=\b\d{5})-\d{4}\b")
+# A designator (or '#') followed by an identifier containing a digit
+# ("4B", "100", "B-2") or a lone letter ("UNIT A"); "SPACE CENTER DR" stays.
+_UNIT = re.compile(
+    r"(?:\b(?:" + "|".join(UNIT_DESIGNATORS) + r")\b\.?\s*#?|#)\s*(?:[A-Z]?\d[\w-]*|[A-Z]\b)"
+)
+_PUNCTUATION = re.compile(r"[^\w,]+")  # also collapses whitespace runs
+_COMMAS = re.compile(r" ?,[ ,]*")
+# Trailing ZIP after a comma or a two-letter state ("..., AZ, 85001", "... AZ 85001").
+_TRAILING_ZIP = re.compile(r"(?:,| [A-Z]{2}) (\d{5})$")
+_DIRECTIONALS: frozenset[str] = frozenset(DIRECTIONAL_ABBREVIATIONS) | frozenset(DIRECTIONAL_ABBREVIATIONS.values())
+_SUFFIXES: frozenset[str] = frozenset(SUFFIX_ABBREVIATIONS) | frozenset(SUFFIX_ABBREVIATIONS.values())
+
+
+def _abbreviate_street(street: str) -> str:
+    """Abbreviate the pre-directional, final suffix and post-directional of one street.
+
+    Each is only taken as such when a street name word remains, so in
+    "10 SOUTH ST" and "500 COURT" the words are the name and stay.
+    """
+    words = street.split()
+    start = 1 if words and any(char.isdigit() for char in words[0]) else 0
+    end = len(words)
+    if end - start >= 3 and words[end - 1] in _DIRECTIONALS and words[end - 2] in _SUFFIXES:
+        words[end - 1] = DIRECTIONAL_ABBREVIATIONS.get(words[end - 1], words[end - 1])
+        end -= 1
+    if end - start >= 2 and words[end - 1] in _SUFFIXES:
+        words[end - 1] = SUFFIX_ABBREVIATIONS.get(words[end - 1], words[end - 1])
+        end -= 1
+    if end - start >= 2 and words[start] in _DIRECTIONALS:
+        words[start] = DIRECTIONAL_ABBREVIATIONS.get(words[start], words[start])
+    return " ".join(words)
+
+
+@dataclass(frozen=True)
+class AddressDedup:
+    """How many rows collapsed onto how many distinct normalized addresses."""
+
+    rows: int
+    unique: int
+
+    @property
+    def ratio(self) -> float:
+        """Rows per unique address (1.0 means no duplicates)."""
+        return self.rows / self.unique if self.unique else 1.0
+
+
+def _normalize_unique(values: pd.Series) -> pd.Series:
+    # Each str.replace is a Python regex call per value, so keep passes few
+    # and skip the ZIP+4 pattern on values without a hyphen.
+    text = values.str.upper()
+    hyphenated = text.str.contains("-", regex=False).fillna(False).to_numpy(dtype=bool)
+    if hyphenated.any():
+        text[hyphenated] = text[hyphenated].str.replace(_ZIP_PLUS_FOUR, "", regex=True)
+    text = text.str.replace(_UNIT, " ", regex=True)
+    text = text.str.replace(_PUNCTUATION, " ", regex=True)
+    text = text.str.replace(_COMMAS, ", ", regex=True)
+    text = text.str.strip(" ,")
+
+    # Abbreviate only the street segment so city names ("Sun City West")
+    # pass through untouched.
+    parts = text.str.partition(",")
+    street = parts[0].map(_abbreviate_street, na_action="ignore").astype("string")
+    text = street + parts[1] + parts[2]
+    return text.where(text.str.len() > 0)
+
+
+def normalize_addresses(addresses: pd.Series) -> pd.Series:
+    """Canonical form of each address; blank or missing values -> NA."""
+    codes, uniques = pd.factorize(addresses.astype("string"))
+    if len(uniques) == 0:
+        return pd.Series(pd.NA, index=addresses.index, dtype="string", name=addresses.name)
+    normalized = _normalize_unique(pd.Series(uniques, dtype="string")).to_numpy()
+    result = pd.Series(normalized.take(np.maximum(codes, 0)), index=addresses.index, dtype="string")
+    result[codes < 0] = pd.NA
+    return result.rename(addresses.name)
+
+
+def normalize_address(address: object) -> str:
+    """Scalar ``normalize_addresses``; '' when nothing is left."""
+    if address is None or (not isinstance(address, str) and pd.isna(address)):
+        return ""
+    value = normalize_addresses(pd.Series([str(address)])).iloc[0]
+    return "" if pd.isna(value) else value
+
+
+def join_addresses(
+    frame: pd.DataFrame,
+    columns: Sequence[str],
+    *,
+    zip_column: str | None = None,
+) -> pd.Series:
+    """Join ``columns`` row-wise with ', ', blanks skipped, as text for the geocoder.
+
+    ``zip_column`` (one of ``columns``) is cleaned with ``clean_zip_code``
+    first so 85001.0 and 85001-1234 read as 85001. Each column is
+    factorized and strings are only built for distinct value combinations;
+    the result is categorical, missing where every column is blank.
+    """
+    combined: np.ndarray | None = None
+    column_codes: list[np.ndarray] = []
+    column_values: list[np.ndarray] = []
+    for column in columns:
+        codes, uniques = pd.factorize(frame[column])
+        values = pd.Series(uniques, dtype=object)
+        values = clean_zip_code(values) if column == zip_column else values.astype("string")
+        # Slot 0 holds '' for missing values (code -1).
+        column_values.append(np.concatenate([[""], values.fillna("").str.strip().to_numpy(dtype=object)]))
+        codes = codes.astype(np.int64) + 1
+        column_codes.append(codes)
+        combined = codes if combined is None else pd.factorize(combined * (len(uniques) + 1) + codes)[0]
+
+    if combined is None or len(combined) == 0:
+        return pd.Series(pd.Categorical([None] * len(frame), categories=[]), index=frame.index)
+
+    # First row of each distinct combination of column values.
+    combo_codes, combo_uniques = pd.factorize(combined)
+    first_rows = np.empty(len(combo_uniques), dtype=np.int64)
+    first_rows[combo_codes[::-1]] = np.arange(len(combo_codes) - 1, -1, -1)
+
+    # ', part' per non-blank part, then the leading separator dropped.
+    joined = pd.Series("", index=range(len(combo_uniques)), dtype="string")
+    for codes, values in zip(column_codes, column_values):
+        part = pd.Series(values[codes[first_rows]], dtype="string")
+        joined = joined + (", " + part).where(part != "", "")
+    joined = joined.str.slice(2)
+
+    address_codes, addresses = pd.factorize(joined.where(joined != ""))
+    return pd.Series(
+        pd.Categorical.from_codes(address_codes[combo_codes], categories=pd.Index(addresses, dtype=object)),
+        index=frame.index,
+    )
+
+
+def build_addresses(
+    frame: pd.DataFrame,
+    columns: Sequence[str],
+    *,
+    zip_column: str | None = None,
+) -> pd.Series:
+    """``join_addresses`` normalized: categorical, missing where nothing usable is left."""
+    joined = join_addresses(frame, columns, zip_column=zip_column)
+    normalized = normalize_addresses(pd.Series(joined.cat.categories, dtype=object))
+    # Distinct joined strings can normalize to the same address.
+    address_codes, addresses = pd.factorize(normalized)
+    codes = joined.cat.codes.to_numpy()
+    mapped = np.where(codes >= 0, address_codes[np.maximum(codes, 0)], -1) if len(address_codes) else codes
+    return pd.Series(
+        pd.Categorical.from_codes(mapped, categories=pd.Index(addresses, dtype=object)),
+        index=frame.index,
+    )
+
+
+def dedupe_addresses(addresses: pd.Series) -> tuple[np.ndarray, pd.Index, AddressDedup]:
+    """Factorize normalized ``addresses``: (codes, uniques, dedup stats).
+
+    ``codes`` index into ``uniques`` and are -1 for missing addresses.
+    """
+    codes, uniques = pd.factorize(addresses)
+    dedup = AddressDedup(rows=int((codes >= 0).sum()), unique=len(uniques))
+    return codes, pd.Index(uniques), dedup
+
+
+def address_zip_codes(addresses: pd.Series) -> pd.Series:
+    """Five-digit ZIP at the end of each normalized address (NA when absent)."""
+    return addresses.astype("string").str.extract(_TRAILING_ZIP, expand=False)
+
+
+def address_keys(addresses: Iterable[object]) -> list[str]:
+    """Comma-free lookup keys (e.g. for the geocode cache); '' for blanks."""
+    series = pd.Series(list(addresses), dtype=object)
+    if series.empty:
+        return []
+    keys = normalize_addresses(series).str.replace(",", "", regex=False)
+    return keys.fillna("").tolist()
@@ -0,0 +1,191 @@
+"""ZIP adjacency graphs built from the boundary files.
+
+``phoenix_zip_adjacency.json`` came from a one-off process and no other
+location has one. ``zip_adjacency`` derives adjacency for any
+``*-zip-boundaries.json``: every polygon edge is snapped to a
+``tolerance`` grid and keyed by its (unordered) endpoints, and one sort
+over those keys brings the two copies of each shared border segment next
+to each other. Two ZIPs are adjacent when they share at least one segment
+(rook contiguity; ZIPs touching at a single corner are not). That is
+O(E log E) in the number of edges, instead of comparing every pair of
+polygons.
+
+The result is a CSR graph: the neighbours of ``keys[i]`` are
+``keys[indices[indptr[i]:indptr[i + 1]]]``, and ``shared_km`` holds the
+length of each shared border. ``save`` writes one ``.npy`` per array, so
+contiguity-aware tools can ``load(path, mmap=True)`` without reading the
+whole graph:
+
+    adjacency = zip_adjacency(load_zip_polygons([boundaries]))
+    adjacency.neighbours("33137")          # ['33127', '33138', ...]
+    adjacency.save("miami_zip_adjacency")
+
+    python -m pipeline.adjacency build     # <location>_zip_adjacency/ + <location>_zip_adjacency.json
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+
+from pipeline.constants import DEFAULT_ADJACENCY_TOLERANCE_DEG, DEFAULT_WEB_PUBLIC_DIR, ZIP_BOUNDARY_GLOB
+from pipeline.geometry import KM_PER_DEGREE, PolygonTable, load_zip_polygons, polygon_edges
+from pipeline.utils import resolve_path
+
+_ARRAYS: tuple[str, ...] = ("keys", "indptr", "indices", "shared_km")
+
+
+@dataclass(frozen=True)
+class ZipAdjacency:
+    """Undirected ZIP adjacency in CSR form (each edge stored in both rows)."""
+
+    keys: np.ndarray
+    indptr: np.ndarray
+    indices: np.ndarray
+    shared_km: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def edge_count(self) -> int:
+        """Number of adjacent ZIP pairs."""
+        return len(self.indices) // 2
+
+    def degree(self) -> np.ndarray:
+        return np.diff(self.indptr)
+
+    def neighbours(self, zip_code: str) -> list[str]:
+        """Neighbouring ZIPs of ``zip_code`` (empty when it has no polygon)."""
+        position = np.flatnonzero(self.keys == zip_code)
+        if len(position) == 0:
+            return []
+        row = int(position[0])
+        return [str(key) for key in self.keys[self.indices[self.indptr[row] : self.indptr[row + 1]]]]
+
+    def to_dict(self) -> dict[str, list[str]]:
+        """``{zip: [neighbour, ...]}``, the layout of ``phoenix_zip_adjacency.json``."""
+        keys = [str(key) for key in self.keys]
+        return {
+            key: [keys[column] for column in self.indices[self.indptr[row] : self.indptr[row + 1]]]
+            for row, key in enumerate(keys)
+        }
+
+    def save(self, directory: str | Path) -> Path:
+        """Write ``keys/indptr/indices/shared_km.npy`` into ``directory``."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAYS:
+            np.save(directory / f"{name}.npy", getattr(self, name), allow_pickle=False)
+        return directory
+
+    @classmethod
+    def load(cls, directory: str | Path, *, mmap: bool = False) -> ZipAdjacency:
+        directory = Path(directory)
+        mode = "r" if mmap else None
+        return cls(**{
+            name: np.load(directory / f"{name}.npy", mmap_mode=mode, allow_pickle=False) for name in _ARRAYS
+        })
+
+
+def zip_adjacency(table: PolygonTable, *, tolerance: float = DEFAULT_ADJACENCY_TOLERANCE_DEG) -> ZipAdjacency:
+    """Adjacency of the shapes in ``table`` from shared, grid-snapped edge segments."""
+    if tolerance <= 0:
+        raise ValueError("tolerance must be positive")
+    shapes = len(table)
+    keys = table.keys.astype(str)
+    x0, y0, x1, y1, edge_shape = polygon_edges(table)
+
+    # Snap endpoints and pack each into one int64 so a segment is a pair of ints.
+    qx0, qy0, qx1, qy1 = (np.round(values / tolerance).astype(np.int64) for values in (x0, y0, x1, y1))
+    low_x = min(qx0.min(initial=0), qx1.min(initial=0))
+    low_y = min(qy0.min(initial=0), qy1.min(initial=0))
+    start = (qx0 - low_x) << 32 | (qy0 - low_y)
+    end = (qx1 - low_x) << 32 | (qy1 - low_y)
+    keep = start != end
+    a, b = np.minimum(start, end)[keep], np.maximum(start, end)[keep]
+    edge_shape = edge_shape[keep]
+    length = np.hypot(
+        (x1 - x0)[keep] * np.cos(np.radians((y0 + y1)[keep] / 2)), (y1 - y0)[keep]
+    ) * KM_PER_DEGREE
+
+    order = np.lexsort((edge_shape, b, a))
+    a, b, edge_shape, length = a[order], b[order], edge_shape[order], length[order]
+    new_run = np.r_[True, (a[1:] != a[:-1]) | (b[1:] != b[:-1])]
+    run = np.cumsum(new_run) - 1
+
+    # Pair every occurrence with the later occurrences of the same segment;
+    # runs are almost always two long (the two ZIPs on either side).
+    rows, columns, weights = [], [], []
+    run_length = np.bincount(run)
+    for step in range(1, int(run_length.max(initial=1))):
+        same = run[step:] == run[:-step]
+        left, right = edge_shape[:-step][same], edge_shape[step:][same]
+        differ = left != right
+        rows.append(left[differ])
+        columns.append(right[differ])
+        weights.append(length[:-step][same][differ])
+    rows = np.concatenate(rows or [np.empty(0, dtype=np.int64)])
+    columns = np.concatenate(columns or [np.empty(0, dtype=np.int64)])
+    weights = np.concatenate(weights or [np.empty(0)])
+
+    # Symmetrize, then sum segment lengths per (row, column) pair.
+    pair = np.r_[rows * shapes + columns, columns * shapes + rows]
+    unique, inverse = np.unique(pair, return_inverse=True)
+    shared = np.bincount(inverse, weights=np.r_[weights, weights], minlength=len(unique))
+    row, column = unique // shapes, unique % shapes
+    indptr = np.zeros(shapes + 1, dtype=np.int64)
+    np.cumsum(np.bincount(row, minlength=shapes), out=indptr[1:])
+    return ZipAdjacency(
+        keys=keys,
+        indptr=indptr,
+        indices=column.astype(np.int32),
+        shared_km=shared.astype(np.float32),
+    )
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def adjacency_name(boundary_path: Path) -> str:
+    """``miami-zip-boundaries.json`` -> ``miami_zip_adjacency``."""
+    return boundary_path.name.split("-zip-boundaries")[0].replace("-", "_") + "_zip_adjacency"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build ZIP adjacency graphs from boundary files.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Write <location>_zip_adjacency/ and .json per boundary file.")
+    build.add_argument("--boundaries", action="append", help="ZIP boundary JSON (default: web public dir).")
+    build.add_argument("--output-dir", help="Directory for adjacency artifacts (default: data root).")
+    build.add_argument("--tolerance", type=float, default=DEFAULT_ADJACENCY_TOLERANCE_DEG)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+    if args.boundaries:
+        boundaries = [resolve_path(data_root, path) for path in args.boundaries]
+    else:
+        boundaries = sorted((data_root / DEFAULT_WEB_PUBLIC_DIR).glob(ZIP_BOUNDARY_GLOB))
+    output_dir = resolve_path(data_root, args.output_dir) if args.output_dir else data_root
+
+    for path in boundaries:
+        adjacency = zip_adjacency(load_zip_polygons([path]), tolerance=args.tolerance)
+        name = adjacency_name(path)
+        adjacency.save(output_dir / name)
+        (output_dir / f"{name}.json").write_text(json.dumps(adjacency.to_dict(), indent=2), encoding="utf-8")
+        isolated = int((adjacency.degree() == 0).sum())
+        print(f"{name}: {len(adjacency)} ZIPs, {adjacency.edge_count} adjacent pairs, {isolated} without neighbours")
+
+
+if __name__ == "__main__":
+    main()
@@ -127,6 +127,8 @@ MASTER_COL_ROUTE: str = "Route"
 MASTER_COL_MAINTENANCE_DAY: str = "Maintenance_Day"
 MASTER_COL_SPECIAL_FLAG: str = "Special_Flag"
 MASTER_COL_EMAIL: str = "Email"
+# Encoded frames only: text of Special_Flag labels outside SPECIAL_FLAG_BITS
+MASTER_COL_SPECIAL_FLAG_OTHER: str = "Special_Flag_Other"
 
 MASTER_SCHEMA: list[str] = [
     MASTER_COL_ACCOUNT_ID,
@@ -146,6 +148,19 @@ MASTER_SCHEMA: list[str] = [
     MASTER_COL_EMAIL,
 ]
 
+# Low-cardinality master columns materialized as pandas categoricals
+MASTER_CATEGORICAL_COLS: list[str] = [
+    MASTER_COL_ZIP_CODE,
+    MASTER_COL_STATUS,
+    MASTER_COL_MARKET,
+    MASTER_COL_BRANCH_ASSIGNMENT,
+    MASTER_COL_AREA,
+    MASTER_COL_SERVICE_CONTRACT,
+    MASTER_COL_TERRITORY,
+    MASTER_COL_ROUTE,
+    MASTER_COL_MAINTENANCE_DAY,
+]
+
 # Summary / map-data output columns
 SUMMARY_COLS: list[str] = [
     MASTER_COL_BRANCH_ASSIGNMENT,
@@ -189,6 +204,18 @@ OPTIMIZE_OUTPUT_COLS: list[str] = [
 FLAG_TUCSON_ASSOCIATED: str = "Tucson-Associated (Phoenix East)"
 FLAG_UNASSIGNED_ZIP: str = "Unassigned ZIP Code"
 FLAG_NO_BRANCH: str = "No branch assignment found"
+FLAG_OTHER: str = "Other special flag"
+
+# Special_Flag is held as a uint8 bitmask in the master frame and decoded to
+# these labels only when writing outputs. 0 means no flag; any label not
+# listed here sets the FLAG_OTHER bit and keeps its text in
+# MASTER_COL_SPECIAL_FLAG_OTHER, which decodes back to the original label.
+SPECIAL_FLAG_BITS: dict[str, int] = {
+    FLAG_TUCSON_ASSOCIATED: 1 << 0,
+    FLAG_UNASSIGNED_ZIP: 1 << 1,
+    FLAG_NO_BRANCH: 1 << 2,
+    FLAG_OTHER: 1 << 7,
+}
 
 # ---------------------------------------------------------------------------
 # Source Tags
@@ -227,6 +254,12 @@ OUT_TERRITORY_CHANGES_CSV: str = "Territory_Changes.csv"
 OUT_OPTIMIZATION_REPORT: str = "Optimization_Report.txt"
 OUT_MAP_DATA_JSON: str = "map_data.json"
 
+# --profile outputs (written next to the other outputs)
+OUT_MASTER_PROFILE_JSON: str = "Master_Assignment_Profile.json"
+OUT_MASTER_PROFILE_STACKS: str = "Master_Assignment_Profile.collapsed"
+OUT_OPTIMIZE_PROFILE_JSON: str = "Optimization_Profile.json"
+OUT_OPTIMIZE_PROFILE_STACKS: str = "Optimization_Profile.collapsed"
+
 # ---------------------------------------------------------------------------
 # Default Input File Names (used as argparse defaults)
 # ---------------------------------------------------------------------------
@@ -236,3 +269,73 @@ DEFAULT_PHOENIX_ACCOUNTS: str = "Uploads/Residential Data for Phoenix.xlsx"
 DEFAULT_TUCSON_ACCOUNTS: str = "Uploads/Tucson CG Active List.csv"
 DEFAULT_TUCSON_MAPPING: str = "tucson_account_mapping.csv"
 DEFAULT_BRANCH_DEFINITIONS: str = "config/branch_definitions.json"
+DEFAULT_OPTIMIZE_PHOENIX_ACCOUNTS: str = "Uploads/Phoenix Account List 10 29.csv"
+DEFAULT_ANALYSIS_WORKBOOK: str = "Uploads/SJ Proposed Phoenix Branch Analysis By Zip Code (1).xlsx"
+DEFAULT_ANALYSIS_SHEET: str = "#3 - Analysis by Zip Code"
+DEFAULT_OPTIMIZE_OUTPUT_DIR: str = "phoenix_territory_optimization/outputs"
+DEFAULT_COMMERCIAL_GEOCODED_CSV: str = "commercial_accounts_geocoded.csv"
+DEFAULT_ROUTE_ASSIGNMENTS_JSON: str = "phoenix_territory_map/nextjs_space/public/route-assignments.json"
+DEFAULT_WEB_PUBLIC_DIR: str = "phoenix_territory_map/nextjs_space/public"
+DEFAULT_PIPELINE_OUTPUT_DIR: str = "pipeline_outputs"  # analysis outputs; public/ is for files the web app loads
+DEFAULT_DISTANCE_CACHE_DIR: str = ".cache/distance_matrices"
+
+# ---------------------------------------------------------------------------
+# Geocoding
+# ---------------------------------------------------------------------------
+
+DEFAULT_GEOCODE_URL: str = "https://maps.googleapis.com/maps/api/geocode/json"
+DEFAULT_GEOCODE_WORKERS: int = 8
+DEFAULT_GEOCODE_RATE_PER_SECOND: float = 45.0  # headroom under the 50 QPS quota
+
+DEFAULT_GEOCODE_CACHE_DB: str = ".cache/geocode_cache.sqlite"
+DEFAULT_GEOCODE_TTL_DAYS: float = 365.0
+DEFAULT_GEOCODE_NEGATIVE_TTL_DAYS: float = 30.0
+DEFAULT_GEOCODE_JOURNAL: str = ".cache/geocode_journal.jsonl"
+
+# Offline fallback: ZIP centroids from boundary polygons, else ZIP-level points
+DEFAULT_ZIP_CENTROIDS_CSV: str = "zip_centroids.csv"
+ZIP_BOUNDARY_GLOB: str = "*-zip-boundaries.json"
+ZIP_POINT_GLOBS: tuple[str, ...] = ("*density-data.json", "*map-data*.json", "ancillary-sales-data.json")
+DEFAULT_ZIP_POINT_CSVS: tuple[str, ...] = ("phoenix_territory_assignments.csv",)
+
+GEOCODE_PRECISION_ADDRESS: str = "address"
+GEOCODE_PRECISION_ZIP_CENTROID: str = "zip_centroid"
+
+# Point-in-ZIP-polygon validation of geocodes
+DEFAULT_GEOCODE_TOLERANCE_KM: float = 0.5  # outside but this close to the boundary still passes
+GEOCODE_CHECK_INSIDE: str = "inside"
+GEOCODE_CHECK_NEAR_BOUNDARY: str = "near_boundary"
+GEOCODE_CHECK_OUTSIDE: str = "outside"
+GEOCODE_CHECK_NO_POLYGON: str = "no_polygon"
+GEOCODE_CHECK_MISSING: str = "missing"
+
+# ---------------------------------------------------------------------------
+# ZIP boundary topology (web map payloads)
+# ---------------------------------------------------------------------------
+
+DEFAULT_TOPOLOGY_ZOOMS: tuple[int, ...] = (9, 11, 13)
+DEFAULT_TOPOLOGY_QUANTIZATION: int = 100_000  # grid steps across the file's bbox
+DEFAULT_TOPOLOGY_TOLERANCE_PX: float = 0.5  # drop detail smaller than this at each zoom
+
+# Hexagon sizes (center to corner, miles) for multi-resolution density bins
+DEFAULT_HEX_SIZES_MILES: tuple[float, ...] = (0.25, 0.5, 1.0, 2.0, 4.0)
+
+# Account point tiles: zoom range and thinning cell (pixels) below max zoom
+DEFAULT_TILE_MIN_ZOOM: int = 8
+DEFAULT_TILE_MAX_ZOOM: int = 14
+DEFAULT_TILE_CELL_PX: int = 8
+
+# Route workload balancing: slack over the per-day mean, nearby stops considered per move
+DEFAULT_BALANCE_TOLERANCE: float = 0.10
+DEFAULT_BALANCE_NEIGHBOURS: int = 8
+
+# Road miles per straight-line mile when estimating route drive distance
+DEFAULT_CIRCUITY_FACTOR: float = 1.3
+
+# Snapshot diff: rows per hash partition of the customer-number join
+DEFAULT_DIFF_PARTITION_ROWS: int = 250_000
+# ... and rows per chunk when reading a CSV snapshot
+DEFAULT_SNAPSHOT_CHUNK_ROWS: int = 200_000
+
+# Edge endpoints are snapped to this grid (degrees, ~0.1 m) before matching shared borders
+DEFAULT_ADJACENCY_TOLERANCE_DEG: float = 1e-6
@@ -0,0 +1,404 @@
+"""Warm local daemon for repeated pipeline runs.
+
+Every script invocation pays for interpreter start-up, the pandas import,
+Excel parsing and config parsing before any assignment work happens. The
+daemon keeps parsed ``MasterInputs``/``TerritoryInputs`` in memory and
+serves recompute requests over local HTTP (TCP on 127.0.0.1 or a Unix
+socket), so a what-if run only pays for the assignment/optimization itself.
+
+Inputs are re-read automatically when any input file's mtime or size
+changes, or explicitly via ``POST /reload``.
+
+Endpoints (JSON in, JSON out):
+
+    GET  /health     cache state
+    POST /optimize   {"targets": {"West": 510, ...}, "max_iterations": 1000,
+                      "output_dir": "optional/path"}
+    POST /master     {"output_dir": "optional/path"}
+    POST /reload     drop cached inputs
+
+A relative ``output_dir`` is resolved against the daemon's ``--data-root``.
+
+Run with ``python -m pipeline.daemon --data-root . [--port 8765 | --socket PATH]``.
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import os
+from pathlib import Path
+import socketserver
+import threading
+import time
+from typing import Callable, Generic, TypeVar
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import (
+    DEFAULT_ANALYSIS_SHEET,
+    DEFAULT_ANALYSIS_WORKBOOK,
+    DEFAULT_BRANCH_DEFINITIONS,
+    DEFAULT_MAX_ITERATIONS,
+    DEFAULT_OPTIMIZE_PHOENIX_ACCOUNTS,
+    DEFAULT_PHOENIX_ACCOUNTS,
+    DEFAULT_PHOENIX_WORKBOOK,
+    DEFAULT_TUCSON_ACCOUNTS,
+    DEFAULT_TUCSON_MAPPING,
+)
+from pipeline.master import (
+    MasterInputPaths,
+    MasterInputs,
+    build_master_assignments,
+    export_master_outputs,
+    load_master_inputs,
+)
+from pipeline.territories import (
+    TerritoryInputPaths,
+    TerritoryInputs,
+    export_territory_outputs,
+    load_territory_inputs,
+    optimize_territories,
+)
+from pipeline.utils import resolve_path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST: str = "127.0.0.1"
+DEFAULT_PORT: int = 8765
+
+T = TypeVar("T")
+FileSignature = tuple[tuple[str, int, int], ...]
+
+
+def file_signature(paths: list[Path]) -> FileSignature:
+    """(path, mtime_ns, size) for each file; missing files sign as (-1, -1)."""
+    signature = []
+    for path in paths:
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            signature.append((str(path), -1, -1))
+        else:
+            signature.append((str(path), stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+
+class _InputCache(Generic[T]):
+    """Loaded inputs plus the file signature they were loaded from."""
+
+    def __init__(self, files: Callable[[], list[Path]], loader: Callable[[], T]) -> None:
+        self._files = files
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._signature: FileSignature | None = None
+        self._value: T | None = None
+        self.loads = 0
+
+    def get(self) -> T:
+        with self._lock:
+            signature = file_signature(self._files())
+            if self._value is None or signature != self._signature:
+                self._value = self._loader()
+                self._signature = signature
+                self.loads += 1
+            return self._value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._value = None
+            self._signature = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._value is not None
+
+
+@dataclass
+class PipelineSession:
+    """In-process pipeline with warm, mtime-validated input caches."""
+
+    master_paths: MasterInputPaths
+    territory_paths: TerritoryInputPaths
+    data_root: Path = field(default_factory=Path.cwd)  # relative output_dir values resolve against this
+
+    def __post_init__(self) -> None:
+        self._master = _InputCache(
+            self.master_paths.files,
+            lambda: load_master_inputs(self.master_paths),
+        )
+        self._territory = _InputCache(
+            self.territory_paths.files,
+            lambda: load_territory_inputs(self.territory_paths),
+        )
+
+    def master_inputs(self) -> MasterInputs:
+        return self._master.get()
+
+    def territory_inputs(self) -> TerritoryInputs:
+        return self._territory.get()
+
+    def reload(self) -> None:
+        self._master.clear()
+        self._territory.clear()
+
+    def health(self) -> dict[str, object]:
+        return {
+            "status": "ok",
+            "master_loaded": self._master.loaded,
+            "master_loads": self._master.loads,
+            "territory_loaded": self._territory.loaded,
+            "territory_loads": self._territory.loads,
+        }
+
+    def run_optimize(
+        self,
+        targets: dict[str, int] | None = None,
+        *,
+        max_iterations: int = DEFAULT_MAX_ITERATIONS,
+        output_dir: Path | None = None,
+    ) -> dict[str, object]:
+        started = time.perf_counter()
+        inputs = self.territory_inputs()
+        result = optimize_territories(inputs, targets, max_iterations=max_iterations)
+
+        payload: dict[str, object] = {
+            "targets": result.targets,
+            "current_distribution": result.current_distribution,
+            "final_distribution": result.final_distribution,
+            "score": result.optimization.best_score,
+            "moves": [
+                {
+                    "zip": move.zip_code,
+                    "accounts": move.count,
+                    "from": move.from_area,
+                    "to": move.to_area,
+                    "score": move.score,
+                }
+                for move in result.optimization.moves
+            ],
+            "changes": result.changes,
+            "areas": {
+                area: {"accounts": count, "zip_codes": zips}
+                for area, (count, zips) in result.groups.area_totals().items()
+            },
+        }
+        if output_dir is not None:
+            outputs = export_territory_outputs(result, output_dir)
+            payload["files"] = [str(path) for path in outputs.files()]
+        payload["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return payload
+
+    def run_master(self, *, output_dir: Path | None = None) -> dict[str, object]:
+        started = time.perf_counter()
+        inputs = self.master_inputs()
+        assignments = build_master_assignments(inputs)
+        metrics = assignments.metrics
+
+        payload: dict[str, object] = {
+            "total_accounts": metrics.total_accounts,
+            "source_counts": metrics.source_counts,
+            "market_counts": metrics.market_counts,
+            "by_branch": metrics.by_branch.to_dict(orient="records"),
+            "by_market_area": metrics.by_market_area.to_dict(orient="records"),
+            "special_flags": metrics.special_flags.to_dict(orient="records"),
+            "missing": metrics.missing,
+            "unassigned_branch_accounts": metrics.unassigned_branch_accounts,
+        }
+        if output_dir is not None:
+            outputs = export_master_outputs(assignments, inputs, output_dir)
+            payload["files"] = [str(path) for path in outputs.files()]
+        payload["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        return payload
+
+
+def _json_default(value: object) -> object:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Path):
+        return str(value)
+    if value is pd.NA or value is pd.NaT:
+        return None
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class PipelineRequestHandler(BaseHTTPRequestHandler):
+    """HTTP front end for a ``PipelineSession`` (set on the server)."""
+
+    server_version = "PipelineDaemon/1.0"
+
+    @property
+    def session(self) -> PipelineSession:
+        return self.server.session  # type: ignore[attr-defined]
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        if self.path.rstrip("/") == "/health":
+            self._send(HTTPStatus.OK, self.session.health())
+        else:
+            self._send(HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint: {self.path}"})
+
+    def do_POST(self) -> None:  # noqa: N802 - http.server naming
+        try:
+            body = self._read_json()
+            route = self.path.rstrip("/")
+            if route == "/optimize":
+                payload = self.session.run_optimize(
+                    _parse_targets(body.get("targets")),
+                    max_iterations=int(body.get("max_iterations", DEFAULT_MAX_ITERATIONS)),
+                    output_dir=self._output_dir(body),
+                )
+            elif route == "/master":
+                payload = self.session.run_master(output_dir=self._output_dir(body))
+            elif route == "/reload":
+                self.session.reload()
+                payload = self.session.health()
+            else:
+                self._send(HTTPStatus.NOT_FOUND, {"error": f"Unknown endpoint: {self.path}"})
+                return
+        except (ValueError, TypeError, KeyError) as exc:
+            self._send(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+            return
+        except Exception as exc:  # noqa: BLE001 - keep the daemon alive
+            logger.exception("Pipeline request failed: %s", self.path)
+            self._send(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(exc)})
+            return
+        self._send(HTTPStatus.OK, payload)
+
+    def address_string(self) -> str:
+        # Unix-socket peers have no (host, port) tuple.
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def _output_dir(self, body: dict) -> Path | None:
+        value = body.get("output_dir")
+        return None if value in (None, "") else resolve_path(self.session.data_root, str(value))
+
+    def _read_json(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length == 0:
+            return {}
+        body = json.loads(self.rfile.read(length).decode("utf-8"))
+        if not isinstance(body, dict):
+            raise ValueError("Request body must be a JSON object")
+        return body
+
+    def _send(self, status: HTTPStatus, payload: object) -> None:
+        data = json.dumps(payload, default=_json_default).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def _parse_targets(value: object) -> dict[str, int] | None:
+    if value is None:
+        return None
+    if not isinstance(value, dict):
+        raise ValueError("targets must be an object of area -> account count")
+    targets = {str(area): int(count) for area, count in value.items()}
+    missing = {"West", "Central", "East"} - set(targets)
+    if missing:
+        raise ValueError(f"targets is missing areas: {sorted(missing)}")
+    return targets
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def create_server(
+    session: PipelineSession,
+    *,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: str | Path | None = None,
+) -> socketserver.BaseServer:
+    """Bind (but do not start) a daemon server for ``session``."""
+    server: socketserver.BaseServer
+    if socket_path is not None:
+        socket_path = Path(socket_path)
+        if socket_path.exists():
+            socket_path.unlink()
+        server = UnixHTTPServer(str(socket_path), PipelineRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), PipelineRequestHandler)
+        server.daemon_threads = True
+    server.session = session  # type: ignore[attr-defined]
+    return server
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve warm pipeline recomputes over local HTTP.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for input data files.")
+    parser.add_argument("--config", default=DEFAULT_BRANCH_DEFINITIONS)
+    parser.add_argument("--phoenix-workbook", default=DEFAULT_PHOENIX_WORKBOOK)
+    parser.add_argument("--phoenix-accounts", default=DEFAULT_PHOENIX_ACCOUNTS)
+    parser.add_argument("--tucson-accounts", default=DEFAULT_TUCSON_ACCOUNTS)
+    parser.add_argument("--tucson-mapping", default=DEFAULT_TUCSON_MAPPING)
+    parser.add_argument(
+        "--optimize-phoenix-accounts",
+        default=DEFAULT_OPTIMIZE_PHOENIX_ACCOUNTS,
+        help="Phoenix accounts CSV used by the territory optimizer.",
+    )
+    parser.add_argument("--analysis-workbook", default=DEFAULT_ANALYSIS_WORKBOOK)
+    parser.add_argument("--analysis-sheet", default=DEFAULT_ANALYSIS_SHEET)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", default=None, help="Serve on a Unix socket instead of TCP.")
+    parser.add_argument("--preload", action="store_true", help="Parse all inputs before serving.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s")
+    data_root = Path(args.data_root).expanduser().resolve()
+
+    session = PipelineSession(
+        data_root=data_root,
+        master_paths=MasterInputPaths.from_data_root(
+            data_root,
+            config=args.config,
+            phoenix_workbook=args.phoenix_workbook,
+            phoenix_accounts=args.phoenix_accounts,
+            tucson_accounts=args.tucson_accounts,
+            tucson_mapping=args.tucson_mapping,
+        ),
+        territory_paths=TerritoryInputPaths.from_data_root(
+            data_root,
+            config=args.config,
+            phoenix_accounts=args.optimize_phoenix_accounts,
+            tucson_accounts=args.tucson_accounts,
+            analysis_workbook=args.analysis_workbook,
+            analysis_sheet=args.analysis_sheet,
+        ),
+    )
+    if args.preload:
+        session.master_inputs()
+        session.territory_inputs()
+
+    server = create_server(session, host=args.host, port=args.port, socket_path=args.socket)
+    where = args.socket or f"http://{args.host}:{server.server_address[1]}"
+    logger.info("Pipeline daemon listening on %s", where)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if args.socket:
+            Path(args.socket).unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""Dissolve ZIP polygons into one outline per territory.
+
+The map colours every ZIP polygon by territory, so a territory outline is
+really dozens of ZIP shapes drawn on top of each other. ``TerritoryDissolver``
+unions them by shared-edge cancellation over the shared arcs of
+``pipeline.topology``: an arc used by two ZIPs of the same territory is an
+interior border and cancels; the arcs used once are stitched end to end
+into the territory's outer rings and holes.
+
+    dissolver = TerritoryDissolver.from_files(boundaries, assignments)
+    outlines = dissolver.outlines()               # {territory: GeoJSON MultiPolygon}
+    dissolver.move("33137", "Central")            # only South and Central are re-stitched
+    write_outlines(path, dissolver.outlines())
+
+Assignments are the ``{zip, territory}`` records of the map data files
+(``miami-map-data.json``); scenario files (``scenarios/*.json``) apply
+their ``reassignments`` on top as ZIP moves:
+
+    python -m pipeline.dissolve phoenix_territory_map/nextjs_space/public/miami-map-data.json \\
+        --scenario phoenix_territory_map/nextjs_space/public/scenarios/miami-zip-optimized.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import DEFAULT_TOPOLOGY_QUANTIZATION
+from pipeline.geometry import read_zip_geometries
+from pipeline.topology import ArcTopology, extract_arcs
+from pipeline.utils import clean_zip_code, resolve_path
+
+# Record keys that carry the ZIP / territory in assignment and scenario files.
+ZIP_KEYS: tuple[str, ...] = ("zip", "zipCode", "ZIP")
+TERRITORY_KEYS: tuple[str, ...] = ("territory", "newTerritory", "toTerritory", "branch", "area")
+UNASSIGNED: str = "unassigned"
+
+
+def _first(record: Mapping[str, object], keys: Iterable[str]) -> object:
+    return next((record[key] for key in keys if record.get(key) not in (None, "")), None)
+
+
+def _territory(value: object) -> str | None:
+    if value is None or str(value).strip().lower() in ("", UNASSIGNED):
+        return None
+    return str(value)
+
+
+def _load_records(path: Path) -> object:
+    with Path(path).open(encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def _zip_pairs(records: Iterable[Mapping[str, object]], territory_keys: Iterable[str]) -> list[tuple[str, str | None]]:
+    records = [record for record in records if isinstance(record, Mapping)]
+    zips = clean_zip_code(pd.Series([_first(record, ZIP_KEYS) for record in records], dtype=object))
+    return [
+        (zip_code, _territory(_first(record, territory_keys)))
+        for zip_code, record in zip(zips, records)
+        if not pd.isna(zip_code)
+    ]
+
+
+def read_zip_territories(path: Path) -> dict[str, str]:
+    """``{zip: territory}`` from a map data file (records or a mapping); first record wins."""
+    payload = _load_records(path)
+    if isinstance(payload, Mapping):
+        records = [{"zip": key, "territory": value} for key, value in payload.items()]
+    elif isinstance(payload, list):
+        records = payload
+    else:
+        raise ValueError(f"Unrecognized territory assignment layout: {path}")
+
+    territories: dict[str, str] = {}
+    for zip_code, territory in _zip_pairs(records, TERRITORY_KEYS):
+        if territory is not None:
+            territories.setdefault(zip_code, territory)
+    return territories
+
+
+def read_scenario_moves(path: Path) -> dict[str, str | None]:
+    """``{zip: new territory}`` from a scenario's ``reassignments`` (None = unassigned)."""
+    payload = _load_records(path)
+    if not isinstance(payload, Mapping):
+        raise ValueError(f"Scenario file is not a JSON object: {path}")
+    return dict(_zip_pairs(payload.get("reassignments") or [], ("toTerritory",)))
+
+
+# ---------------------------------------------------------------------------
+# Dissolve
+# ---------------------------------------------------------------------------
+
+def _arc_shoelace(topology: ArcTopology) -> np.ndarray:
+    """Twice the signed area each arc contributes to a ring walking it forward."""
+    partial = np.empty(len(topology.arcs))
+    for position, points in enumerate(topology.arcs):
+        x, y = points[:, 0].astype(np.float64), points[:, 1].astype(np.float64)
+        partial[position] = float((x[:-1] * y[1:] - x[1:] * y[:-1]).sum())
+    return partial
+
+
+def _ring_area2(ring: list[int], shoelace: np.ndarray) -> float:
+    return float(sum(shoelace[arc] if arc >= 0 else -shoelace[~arc] for arc in ring))
+
+
+def _contains(ring: np.ndarray, x: float, y: float) -> bool:
+    """Even-odd test of one point against one closed ring."""
+    x0, y0, x1, y1 = ring[:-1, 0], ring[:-1, 1], ring[1:, 0], ring[1:, 1]
+    crosses = (y0 > y) != (y1 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        at = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return bool(np.count_nonzero(crosses & (x < at)) % 2)
+
+
+class TerritoryDissolver:
+    """Territory outlines over one set of ZIP arcs, re-stitched only where ZIPs moved."""
+
+    def __init__(
+        self,
+        topology: ArcTopology,
+        territories: Mapping[str, str],
+        *,
+        threshold: float = 0.0,
+    ) -> None:
+        self.topology = topology
+        self.threshold = threshold
+        shoelace = _arc_shoelace(topology)
+        # Orient every ZIP ring one way (outer rings counter-clockwise, holes
+        # clockwise) so cancelled borders leave consistently directed arcs.
+        self._rings: dict[str, list[list[int]]] = {}
+        for key, polygons in topology.shapes.items():
+            rings = []
+            for polygon in polygons:
+                for position, ring in enumerate(polygon):
+                    area = _ring_area2(ring, shoelace)
+                    if area == 0:
+                        continue
+                    if (area > 0) != (position == 0):
+                        ring = [~arc for arc in reversed(ring)]
+                    rings.append(ring)
+            self._rings[key] = rings
+        self.missing = sorted(zip_code for zip_code in territories if zip_code not in self._rings)
+
+        self._members: dict[str, set[str]] = {}
+        self._uses: dict[str, np.ndarray] = {}
+        self._territory: dict[str, str] = {}
+        self._cache: dict[str, dict] = {}
+        for zip_code, territory in territories.items():
+            self.move(zip_code, territory)
+
+    @classmethod
+    def from_files(
+        cls,
+        boundaries: Iterable[Path],
+        assignments: Path,
+        *,
+        quantization: int = DEFAULT_TOPOLOGY_QUANTIZATION,
+        threshold: float = 0.0,
+    ) -> TerritoryDissolver:
+        geometries: dict[str, Mapping[str, object]] = {}
+        for path in boundaries:
+            for zip_code, geometry in read_zip_geometries(path).items():
+                geometries.setdefault(zip_code, geometry)
+        return cls(
+            extract_arcs(geometries, quantization=quantization),
+            read_zip_territories(assignments),
+            threshold=threshold,
+        )
+
+    @property
+    def territories(self) -> list[str]:
+        return sorted(territory for territory, members in self._members.items() if members)
+
+    def territory_of(self, zip_code: str) -> str | None:
+        return self._territory.get(zip_code)
+
+    def assignments(self) -> dict[str, str]:
+        """Current ``{zip: territory}`` of every ZIP with a polygon."""
+        return dict(self._territory)
+
+    def _arcs_of(self, zip_code: str) -> np.ndarray:
+        arcs = [arc if arc >= 0 else ~arc for ring in self._rings[zip_code] for arc in ring]
+        return np.asarray(arcs, dtype=np.int64)
+
+    def move(self, zip_code: str, territory: str | None) -> None:
+        """Assign ``zip_code`` to ``territory`` (None removes it); marks both territories stale."""
+        if zip_code not in self._rings:
+            return
+        old = self._territory.pop(zip_code, None)
+        if old == territory:
+            if old is not None:
+                self._territory[zip_code] = old
+            return
+        arcs = self._arcs_of(zip_code)
+        count = len(self.topology.arcs)
+        if old is not None:
+            self._members[old].discard(zip_code)
+            self._uses[old] -= np.bincount(arcs, minlength=count)
+            self._cache.pop(old, None)
+        if territory is not None:
+            self._members.setdefault(territory, set()).add(zip_code)
+            uses = self._uses.setdefault(territory, np.zeros(count, dtype=np.int32))
+            uses += np.bincount(arcs, minlength=count).astype(np.int32)
+            self._territory[zip_code] = territory
+            self._cache.pop(territory, None)
+
+    def apply(self, moves: Mapping[str, str | None]) -> None:
+        for zip_code, territory in moves.items():
+            self.move(zip_code, territory)
+
+    def outline(self, territory: str) -> dict:
+        """GeoJSON MultiPolygon of ``territory`` (cached until one of its ZIPs moves)."""
+        if territory not in self._cache:
+            self._cache[territory] = self._dissolve(territory)
+        return self._cache[territory]
+
+    def outlines(self) -> dict[str, dict]:
+        return {territory: self.outline(territory) for territory in self.territories}
+
+    def _dissolve(self, territory: str) -> dict:
+        uses = self._uses.get(territory)
+        if uses is None:
+            return {"type": "MultiPolygon", "coordinates": []}
+        boundary = [
+            arc
+            for zip_code in sorted(self._members.get(territory, ()))
+            for ring in self._rings[zip_code]
+            for arc in ring
+            if uses[arc if arc >= 0 else ~arc] == 1
+        ]
+        rings = [self._points(ring) for ring in self._stitch(boundary)]
+        return {"type": "MultiPolygon", "coordinates": self._nest(rings)}
+
+    def _directed(self, arc: int) -> np.ndarray:
+        points = self.topology.arcs[arc if arc >= 0 else ~arc]
+        return points if arc >= 0 else points[::-1]
+
+    def _stitch(self, arcs: list[int]) -> list[list[int]]:
+        """Chain directed arcs end to start into closed rings.
+
+        Where several boundary arcs leave one point (ZIPs touching at a
+        corner) the sharpest left turn is taken, which keeps the interior
+        on the left and splits touching rings instead of joining them into
+        a figure eight.
+        """
+        starting: dict[tuple[int, int], list[int]] = {}
+        for arc in arcs:
+            starting.setdefault(tuple(self._directed(arc)[0].tolist()), []).append(arc)
+
+        def turn(incoming: np.ndarray, arc: int) -> float:
+            points = self._directed(arc)
+            dx, dy = (points[1] - points[0]).astype(np.float64)
+            ix, iy = (incoming[-1] - incoming[-2]).astype(np.float64)
+            return float(np.arctan2(ix * dy - iy * dx, ix * dx + iy * dy))
+
+        rings = []
+        for arc in arcs:
+            points = self._directed(arc)
+            start, end = tuple(points[0].tolist()), tuple(points[-1].tolist())
+            if arc not in starting.get(start, ()):
+                continue
+            starting[start].remove(arc)
+            ring = [arc]
+            while end != start and starting.get(end):
+                candidates = starting[end]
+                following = max(candidates, key=lambda candidate: turn(points, candidate))
+                candidates.remove(following)
+                ring.append(following)
+                points = self._directed(following)
+                end = tuple(points[-1].tolist())
+            rings.append(ring)
+        return rings
+
+    def _points(self, ring: list[int]) -> np.ndarray:
+        points = []
+        for arc in ring:
+            kept = self.topology.arcs[arc if arc >= 0 else ~arc]
+            weights = self.topology.weights[arc if arc >= 0 else ~arc]
+            kept = kept[weights >= self.threshold]
+            kept = kept if arc >= 0 else kept[::-1]
+            points.append(kept if not points else kept[1:])
+        scale = np.asarray(self.topology.scale)
+        translate = np.asarray(self.topology.translate)
+        return np.vstack(points) * scale + translate
+
+    @staticmethod
+    def _nest(rings: list[np.ndarray]) -> list[list[list[list[float]]]]:
+        """Counter-clockwise rings become polygons; clockwise holes join the smallest outer containing them."""
+        def area(ring: np.ndarray) -> float:
+            x, y = ring[:, 0], ring[:, 1]
+            return float((x[:-1] * y[1:] - x[1:] * y[:-1]).sum()) / 2.0
+
+        areas = [area(ring) for ring in rings]
+        outers = sorted((index for index, value in enumerate(areas) if value > 0), key=lambda index: areas[index])
+        polygons: dict[int, list[np.ndarray]] = {index: [rings[index]] for index in outers}
+        for index, value in enumerate(areas):
+            if value >= 0:
+                continue
+            x, y = rings[index][0]
+            host = next((outer for outer in outers if _contains(rings[outer], x, y)), None)
+            if host is not None:
+                polygons[host].append(rings[index])
+        return [
+            [np.round(ring, 6).tolist() for ring in polygons[index]]
+            for index in sorted(polygons, key=lambda index: -areas[index])
+        ]
+
+
+def outlines_feature_collection(outlines: Mapping[str, Mapping[str, object]]) -> dict:
+    return {
+        "type": "FeatureCollection",
+        "features": [
+            {"type": "Feature", "properties": {"territory": territory}, "geometry": geometry}
+            for territory, geometry in outlines.items()
+        ],
+    }
+
+
+def write_outlines(path: Path, outlines: Mapping[str, Mapping[str, object]]) -> Path:
+    """Write outlines as a GeoJSON FeatureCollection with a ``territory`` property."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(outlines_feature_collection(outlines), separators=(",", ":")), encoding="utf-8")
+    return path
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def outlines_path(assignments: Path, scenario: Path | None = None, output_dir: Path | None = None) -> Path:
+    """``miami-map-data.json`` -> ``miami-map-data.outlines.json`` (``.<scenario>.outlines.json``)."""
+    directory = output_dir or assignments.parent
+    suffix = f".{scenario.stem}" if scenario is not None else ""
+    return directory / f"{assignments.stem}{suffix}.outlines.json"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Dissolve ZIP polygons into territory outlines.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("assignments", help="Map data JSON with zip/territory records.")
+    parser.add_argument(
+        "--boundaries",
+        action="append",
+        help="ZIP boundary JSON (default: <location>-zip-boundaries.json next to the assignments).",
+    )
+    parser.add_argument("--scenario", action="append", default=[], help="Scenario JSON with reassignments.")
+    parser.add_argument("--output-dir", help="Directory for outline files (default: next to the assignments).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+    assignments = resolve_path(data_root, args.assignments)
+    if args.boundaries:
+        boundaries = [resolve_path(data_root, path) for path in args.boundaries]
+    else:
+        location = assignments.name.split("-")[0]
+        boundaries = [assignments.parent / f"{location}-zip-boundaries.json"]
+    output_dir = resolve_path(data_root, args.output_dir) if args.output_dir else None
+
+    dissolver = TerritoryDissolver.from_files(boundaries, assignments)
+    if dissolver.missing:
+        print(f"{len(dissolver.missing)} assigned ZIPs have no boundary polygon: {', '.join(dissolver.missing[:10])}")
+    base = dissolver.assignments()
+    path = write_outlines(outlines_path(assignments, output_dir=output_dir), dissolver.outlines())
+    print(f"{path.name}: {len(dissolver.territories)} territories from {len(base)} ZIPs")
+
+    for scenario in (resolve_path(data_root, path) for path in args.scenario):
+        moves = read_scenario_moves(scenario)
+        dissolver.apply(moves)
+        path = write_outlines(outlines_path(assignments, scenario, output_dir), dissolver.outlines())
+        print(f"{path.name}: {len(moves)} ZIP moves, {len(dissolver.territories)} territories")
+        dissolver.apply(base | {zip_code: None for zip_code in moves if zip_code not in base})
+
+
+if __name__ == "__main__":
+    main()
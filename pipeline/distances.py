@@ -0,0 +1,309 @@
+"""Accounts x offices distance matrices for current and future offices.
+
+``commercial_accounts_geocoded.csv`` carries ``Distance_to_West/East/
+Central`` and ``Closest_Office`` columns that one-off scripts computed for
+the three current offices. ``load_offices`` reads every office of a
+location from ``branch_definitions.json``: the territory offices, any
+``offices`` list, and the ``futureOffices`` (Mesa, Goodyear, Cave Creek).
+``distance_matrix`` then computes all account-office distances in one
+broadcast haversine pass, stored as float32 miles:
+
+    offices = load_offices(load_branch_definitions(path), "arizona")
+    matrix = distance_matrix(frame["Latitude"], frame["Longitude"], offices)
+    closest = closest_offices(matrix)          # nearest + second nearest via argpartition
+    frame = office_distance_columns(frame, offices, cache=DistanceMatrixCache(".cache/distances"))
+
+``Closest_Office`` and ``Second_Closest_Office`` only name open offices:
+current ones by default, and in the CLI the offices the input already has
+``Distance_to_*`` columns for (West, East and Central in the existing
+file; the Tucson office is configured but opens later). The remaining
+offices get their own ``Closest_Future_Office`` / ``Distance_to_Closest_Future``
+columns.
+
+``DistanceMatrixCache`` keys each matrix by a digest of the account
+coordinates and the office set, so adding or moving an office (or editing
+the accounts) recomputes it and everything else is read back from disk.
+
+    python -m pipeline.distances --location arizona     # -> commercial_accounts_geocoded-office-distances.csv
+    python -m pipeline.distances --in-place             # rewrite commercial_accounts_geocoded.csv itself
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import hashlib
+import os
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import (
+    DEFAULT_BRANCH_DEFINITIONS,
+    DEFAULT_COMMERCIAL_GEOCODED_CSV,
+    DEFAULT_DISTANCE_CACHE_DIR,
+)
+from pipeline.spatial_index import haversine_miles
+from pipeline.utils import load_branch_definitions, load_csv_safe, resolve_path, save_csv_safe
+
+OFFICE_CURRENT: str = "current"
+OFFICE_FUTURE: str = "future"
+
+# Rows per broadcast block; bounds float64 temporaries to ~block x offices.
+_BLOCK_ROWS: int = 262_144
+
+
+@dataclass(frozen=True)
+class Office:
+    """One office location from ``branch_definitions.json``."""
+
+    key: str
+    name: str
+    lat: float
+    lng: float
+    status: str = OFFICE_CURRENT
+
+    @property
+    def column(self) -> str:
+        """Distance column name, e.g. ``Distance_to_Cave_Creek``."""
+        return "Distance_to_" + self.name.replace(" ", "_")
+
+
+def _office_name(record: Mapping[str, object], fallback: str) -> str:
+    label = str(record.get("label") or fallback)
+    return label.removeprefix("APS of ").split(" - ")[0].strip() or fallback
+
+
+def load_offices(
+    branch_definitions: Mapping[str, object],
+    location: str,
+    *,
+    include_future: bool = True,
+) -> list[Office]:
+    """Offices of ``location``: territory offices, then ``offices``, then future ones.
+
+    Territory offices are named after their area (West, Central, ...),
+    matching the existing ``Distance_to_<Area>`` columns; the rest after
+    their label without the "APS of" prefix. Duplicate keys keep the first.
+    """
+    locations = branch_definitions.get("locations") or {}
+    config = locations.get(location) if isinstance(locations, Mapping) else None
+    if not isinstance(config, Mapping):
+        raise ValueError(f"Unknown location in branch definitions: {location!r}")
+
+    offices: dict[str, Office] = {}
+
+    def add(key: object, name: str, record: Mapping[str, object], status: str) -> None:
+        key = str(key or name).lower()
+        if key in offices or record.get("lat") is None or record.get("lng") is None:
+            return
+        offices[key] = Office(key, name, float(record["lat"]), float(record["lng"]), status)
+
+    for territory in config.get("territories") or []:
+        office = territory.get("office") if isinstance(territory, Mapping) else None
+        if isinstance(office, Mapping):
+            add(territory.get("key"), str(territory.get("area") or _office_name(territory, "")), office, OFFICE_CURRENT)
+    for office in config.get("offices") or []:
+        if isinstance(office, Mapping):
+            name = _office_name(office, str(office.get("zipCode", "")))
+            add(office.get("key") or office.get("zipCode"), name, office, OFFICE_CURRENT)
+    if include_future:
+        for office in config.get("futureOffices") or []:
+            if isinstance(office, Mapping):
+                add(office.get("key"), _office_name(office, str(office.get("key", ""))), office, OFFICE_FUTURE)
+    return list(offices.values())
+
+
+def distance_matrix(lat: Iterable[float], lng: Iterable[float], offices: Sequence[Office]) -> np.ndarray:
+    """(accounts, offices) float32 haversine miles; NaN rows for missing coordinates."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    office_lat = np.array([office.lat for office in offices], dtype=np.float64)
+    office_lng = np.array([office.lng for office in offices], dtype=np.float64)
+    matrix = np.empty((len(lat), len(offices)), dtype=np.float32)
+    for start in range(0, len(lat), _BLOCK_ROWS):
+        rows = slice(start, start + _BLOCK_ROWS)
+        matrix[rows] = haversine_miles(lat[rows, None], lng[rows, None], office_lat, office_lng)
+    return matrix
+
+
+@dataclass(frozen=True)
+class ClosestOffices:
+    """Nearest and second-nearest office per account (-1 / NaN when unknown)."""
+
+    first: np.ndarray
+    first_miles: np.ndarray
+    second: np.ndarray
+    second_miles: np.ndarray
+
+
+def closest_offices(matrix: np.ndarray) -> ClosestOffices:
+    """Two nearest offices per row using ``np.argpartition`` (no full sort)."""
+    rows, columns = matrix.shape
+    first = np.full(rows, -1, dtype=np.int64)
+    second = np.full(rows, -1, dtype=np.int64)
+    first_miles = np.full(rows, np.nan, dtype=np.float32)
+    second_miles = np.full(rows, np.nan, dtype=np.float32)
+    valid = np.flatnonzero(~np.isnan(matrix).any(axis=1)) if columns else np.empty(0, dtype=np.int64)
+    if len(valid) == 0:
+        return ClosestOffices(first, first_miles, second, second_miles)
+
+    distances = matrix[valid]
+    take = min(2, columns)
+    candidates = np.argpartition(distances, take - 1, axis=1)[:, :take]
+    candidate_miles = np.take_along_axis(distances, candidates, axis=1)
+    ranked = np.argsort(candidate_miles, axis=1, kind="stable")
+    candidates = np.take_along_axis(candidates, ranked, axis=1)
+    candidate_miles = np.take_along_axis(candidate_miles, ranked, axis=1)
+
+    first[valid], first_miles[valid] = candidates[:, 0], candidate_miles[:, 0]
+    if take == 2:
+        second[valid], second_miles[valid] = candidates[:, 1], candidate_miles[:, 1]
+    return ClosestOffices(first, first_miles, second, second_miles)
+
+
+# ---------------------------------------------------------------------------
+# Caching
+# ---------------------------------------------------------------------------
+
+def matrix_key(lat: np.ndarray, lng: np.ndarray, offices: Sequence[Office]) -> str:
+    """Digest of the account coordinates and the (ordered) office set."""
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(lat, dtype=np.float64).tobytes())
+    digest.update(np.ascontiguousarray(lng, dtype=np.float64).tobytes())
+    for office in offices:
+        digest.update(f"{office.key}:{office.lat!r}:{office.lng!r};".encode())
+    return digest.hexdigest()
+
+
+class DistanceMatrixCache:
+    """Distance matrices on disk (``<key>.npy``), memoized in process."""
+
+    def __init__(self, directory: str | Path) -> None:
+        self.directory = Path(directory)
+        self._memory: dict[str, np.ndarray] = {}
+
+    def get(self, lat: Iterable[float], lng: Iterable[float], offices: Sequence[Office]) -> np.ndarray:
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        key = matrix_key(lat, lng, offices)
+        if key in self._memory:
+            return self._memory[key]
+        path = self.directory / f"{key}.npy"
+        if path.exists():
+            matrix = np.load(path, allow_pickle=False)
+        else:
+            matrix = distance_matrix(lat, lng, offices)
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # Write then rename so a concurrent reader never sees a partial file.
+            partial = path.with_suffix(".partial.npy")
+            np.save(partial, matrix)
+            partial.replace(path)
+        self._memory[key] = matrix
+        return matrix
+
+
+# ---------------------------------------------------------------------------
+# Frame columns
+# ---------------------------------------------------------------------------
+
+def office_distance_columns(
+    df: pd.DataFrame,
+    offices: Sequence[Office],
+    *,
+    lat_column: str = "Latitude",
+    lng_column: str = "Longitude",
+    cache: DistanceMatrixCache | None = None,
+    decimals: int = 1,
+    closest_among: Iterable[str] | None = None,
+) -> pd.DataFrame:
+    """Copy of ``df`` with ``Distance_to_<Office>``, closest and second-closest columns.
+
+    Column names follow ``commercial_accounts_geocoded.csv``:
+    ``Closest_Office``/``Distance_to_Closest`` plus
+    ``Second_Closest_Office``/``Distance_to_Second_Closest``, ranked over
+    the offices named in ``closest_among`` (default: current offices). When
+    other offices remain, the nearest of those goes to
+    ``Closest_Future_Office``/``Distance_to_Closest_Future``.
+    """
+    if not offices:
+        raise ValueError("No offices to measure distances to")
+    lat = pd.to_numeric(df[lat_column], errors="coerce").to_numpy(dtype=np.float64)
+    lng = pd.to_numeric(df[lng_column], errors="coerce").to_numpy(dtype=np.float64)
+    matrix = cache.get(lat, lng, offices) if cache is not None else distance_matrix(lat, lng, offices)
+
+    output = df.copy()
+    for position, office in enumerate(offices):
+        output[office.column] = matrix[:, position].astype(np.float64).round(decimals)
+
+    if closest_among is None:
+        current = np.array([office.status != OFFICE_FUTURE for office in offices])
+    else:
+        eligible = set(closest_among)
+        current = np.array([office.name in eligible for office in offices])
+    names = np.array([office.name for office in offices], dtype=object)
+    current_names = np.append(names[current], None)
+    closest = closest_offices(matrix[:, current])
+    output["Closest_Office"] = current_names[closest.first]
+    output["Distance_to_Closest"] = closest.first_miles.astype(np.float64).round(decimals)
+    output["Second_Closest_Office"] = current_names[closest.second]
+    output["Distance_to_Second_Closest"] = closest.second_miles.astype(np.float64).round(decimals)
+    if not current.all():
+        future = closest_offices(matrix[:, ~current])
+        output["Closest_Future_Office"] = np.append(names[~current], None)[future.first]
+        output["Distance_to_Closest_Future"] = future.first_miles.astype(np.float64).round(decimals)
+    return output
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Recompute account-to-office distance columns.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("--config", default=DEFAULT_BRANCH_DEFINITIONS, help="Branch definitions JSON.")
+    parser.add_argument("--location", default="arizona", help="Location key in the branch definitions.")
+    parser.add_argument("--input", default=DEFAULT_COMMERCIAL_GEOCODED_CSV, help="Geocoded accounts CSV.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--output", help="CSV to write (default: <input stem>-office-distances.csv).")
+    target.add_argument("--in-place", action="store_true", help="Overwrite --input with the new columns.")
+    parser.add_argument("--current-only", action="store_true", help="Skip futureOffices.")
+    parser.add_argument("--cache-dir", default=DEFAULT_DISTANCE_CACHE_DIR, help="Distance matrix cache.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+
+    definitions = load_branch_definitions(resolve_path(data_root, args.config))
+    offices = load_offices(definitions, args.location, include_future=not args.current_only)
+    input_path = resolve_path(data_root, args.input)
+    frame = load_csv_safe(input_path, "geocoded accounts")
+    # Keep Closest_Office over the offices the file was built for, if it has any.
+    existing = [office.name for office in offices if office.column in frame.columns] or None
+    output = office_distance_columns(
+        frame,
+        offices,
+        cache=DistanceMatrixCache(resolve_path(data_root, args.cache_dir)),
+        closest_among=existing,
+    )
+    output_path = input_path.with_name(f"{input_path.stem}-office-distances.csv")
+    if args.output:
+        output_path = resolve_path(data_root, args.output)
+    elif args.in_place:
+        output_path = input_path
+    save_csv_safe(output, output_path, "office distance")
+    summaries = []
+    for column in ("Closest_Office", "Closest_Future_Office"):
+        if column in output.columns:
+            counts = output[column].value_counts()
+            summaries.append(f"{column}: " + ", ".join(f"{name} {count}" for name, count in counts.items()))
+    print(f"Wrote {len(output)} rows x {len(offices)} offices to {output_path} ({'; '.join(summaries)})")
+
+
+if __name__ == "__main__":
+    main()
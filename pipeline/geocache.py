@@ -0,0 +1,515 @@
+"""Persistent SQLite geocode cache shared across runs and scripts.
+
+``geocode_batch`` only memoizes within one call, so every run re-pays the
+Geocoding API for addresses resolved last week. ``GeocodeCache`` keeps one
+row per normalized address (coordinates, status, source, timestamp and hit
+counters) in a single SQLite file:
+
+    with GeocodeCache(data_root / DEFAULT_GEOCODE_CACHE_DB) as cache:
+        geocoded, stats = geocode_batch(frame, cache=cache)
+
+Lookups are batched (one ``IN (...)`` query per chunk of addresses, not one
+per row). Entries older than their TTL are treated as misses and refreshed
+by the next API call. Addresses Google answered ZERO_RESULTS for are cached
+as NOT_FOUND with a shorter TTL so bad addresses are not retried on every
+run; failed requests (denied key, quota, network) are never cached, since
+they say nothing about the address.
+
+The cache can be bulk-seeded from artifacts that already carry coordinates
+(``commercial_accounts_geocoded.csv`` and the ``*route-assignments.json``
+files the web app serves):
+
+    python -m pipeline.geocache seed
+    python -m pipeline.geocache stats
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, Mapping, Sequence
+
+import pandas as pd
+
+from pipeline.addresses import address_keys
+from pipeline.constants import (
+    DEFAULT_COMMERCIAL_GEOCODED_CSV,
+    DEFAULT_GEOCODE_CACHE_DB,
+    DEFAULT_GEOCODE_NEGATIVE_TTL_DAYS,
+    DEFAULT_GEOCODE_TTL_DAYS,
+    DEFAULT_ROUTE_ASSIGNMENTS_JSON,
+    DEFAULT_STATE_CODE,
+)
+from pipeline.geocoder import GeocodeResponse
+from pipeline.utils import load_csv_safe, resolve_path
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK: str = "OK"
+STATUS_NOT_FOUND: str = "NOT_FOUND"
+
+SOURCE_API: str = "google"
+SEED_SOURCE_PREFIX: str = "seed:"
+
+# Stay well under SQLite's default 999 bound-parameter limit.
+LOOKUP_CHUNK_SIZE: int = 900
+
+# 2: keys built by pipeline.addresses (abbreviations, units and ZIP+4 folded)
+# 3: only directionals and the final suffix abbreviated ("10 E SOUTH ST", not "10 E S ST")
+SCHEMA_VERSION: int = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS geocodes (
+    address_key TEXT PRIMARY KEY,
+    address     TEXT NOT NULL,
+    latitude    REAL,
+    longitude   REAL,
+    status      TEXT NOT NULL,
+    source      TEXT NOT NULL,
+    updated_at  REAL NOT NULL,
+    hits        INTEGER NOT NULL DEFAULT 0,
+    last_hit_at REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_geocodes_updated_at ON geocodes (updated_at);
+"""
+
+def normalize_address(address: str) -> str:
+    """Cache key for ``address``: ``pipeline.addresses`` canonical form without commas."""
+    return address_keys([address])[0]
+
+
+@dataclass(frozen=True)
+class CachedGeocode:
+    latitude: float | None
+    longitude: float | None
+    status: str
+    source: str
+    updated_at: float
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK and self.latitude is not None and self.longitude is not None
+
+    @property
+    def coords(self) -> tuple[float, float] | None:
+        return (self.latitude, self.longitude) if self.ok else None  # type: ignore[return-value]
+
+
+@dataclass(frozen=True)
+class GeocodeCacheStats:
+    entries: int
+    ok: int
+    not_found: int
+    expired: int
+    seeded: int
+    total_hits: int
+
+
+class GeocodeCache:
+    """SQLite-backed geocode store keyed by ``normalize_address``.
+
+    Safe to share between threads; writes are serialized by an internal lock
+    and the database runs in WAL mode so other processes can read meanwhile.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        ttl_days: float = DEFAULT_GEOCODE_TTL_DAYS,
+        negative_ttl_days: float = DEFAULT_GEOCODE_NEGATIVE_TTL_DAYS,
+    ) -> None:
+        self.path = Path(path)
+        self.ttl_seconds = ttl_days * 86_400
+        self.negative_ttl_seconds = negative_ttl_days * 86_400
+        if str(self.path) != ":memory:":
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if 0 < version < SCHEMA_VERSION:
+            self._rekey()
+        self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._conn.commit()
+
+    def _rekey(self) -> None:
+        """Recompute every key after a change to address normalization.
+
+        Rows whose addresses now share a key keep the most recent entry.
+        """
+        rows = self._conn.execute(
+            "SELECT address, latitude, longitude, status, source, updated_at, hits, last_hit_at "
+            "FROM geocodes ORDER BY updated_at"
+        ).fetchall()
+        keys = address_keys(row[0] for row in rows)
+        self._conn.execute("DELETE FROM geocodes")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO geocodes "
+            "(address_key, address, latitude, longitude, status, source, updated_at, hits, last_hit_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [(key,) + tuple(row) for key, row in zip(keys, rows) if key],
+        )
+        logger.info("Re-keyed %d geocode cache entries", len(rows))
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> GeocodeCache:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def _is_fresh(self, status: str, updated_at: float, now: float) -> bool:
+        ttl = self.ttl_seconds if status == STATUS_OK else self.negative_ttl_seconds
+        return now - updated_at <= ttl
+
+    def get_many(
+        self,
+        addresses: Iterable[str],
+        *,
+        count_hits: bool = True,
+        normalized: bool = False,
+    ) -> dict[str, CachedGeocode]:
+        """Fresh cache entries for ``addresses``, keyed by the address as given.
+
+        Expired entries are omitted (callers treat them as misses). Each
+        distinct key found bumps its hit counter once. Pass
+        ``normalized=True`` when the addresses already come from
+        ``pipeline.addresses.normalize_addresses``.
+        """
+        addresses = list(addresses)
+        by_key: dict[str, list[str]] = {}
+        for key, address in zip(_keys(addresses, normalized), addresses):
+            by_key.setdefault(key, []).append(address)
+        by_key.pop("", None)
+        if not by_key:
+            return {}
+
+        now = time.time()
+        found: dict[str, CachedGeocode] = {}
+        hit_keys: list[str] = []
+        keys = list(by_key)
+
+        with self._lock:
+            for chunk in _chunks(keys, LOOKUP_CHUNK_SIZE):
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    "SELECT address_key, latitude, longitude, status, source, updated_at "
+                    f"FROM geocodes WHERE address_key IN ({placeholders})",
+                    chunk,
+                ).fetchall()
+                for key, lat, lng, status, source, updated_at in rows:
+                    if not self._is_fresh(status, updated_at, now):
+                        continue
+                    entry = CachedGeocode(lat, lng, status, source, updated_at)
+                    for address in by_key[key]:
+                        found[address] = entry
+                    hit_keys.append(key)
+
+            if count_hits and hit_keys:
+                self._conn.executemany(
+                    "UPDATE geocodes SET hits = hits + 1, last_hit_at = ? WHERE address_key = ?",
+                    [(now, key) for key in hit_keys],
+                )
+                self._conn.commit()
+
+        return found
+
+    def get(self, address: str) -> CachedGeocode | None:
+        return self.get_many([address]).get(address)
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def put_many(
+        self,
+        results: Iterable[tuple[str, GeocodeResponse]],
+        *,
+        source: str = SOURCE_API,
+        normalized: bool = False,
+    ) -> int:
+        """Store API responses; returns the number of rows written.
+
+        OK responses are cached with their coordinates and ZERO_RESULTS as
+        NOT_FOUND. Any other status is a failed request and is skipped.
+        """
+        now = time.time()
+        results = list(results)
+        rows = []
+        for key, (address, response) in zip(_keys([address for address, _ in results], normalized), results):
+            if not key:
+                continue
+            if response.ok:
+                lat, lng = response.coords
+                rows.append((key, address, float(lat), float(lng), STATUS_OK, source, now))
+            elif response.not_found:
+                rows.append((key, address, None, None, STATUS_NOT_FOUND, source, now))
+        if not rows:
+            return 0
+
+        with self._lock:
+            self._conn.executemany(
+                """
+                INSERT INTO geocodes (address_key, address, latitude, longitude, status, source, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (address_key) DO UPDATE SET
+                    address = excluded.address,
+                    latitude = excluded.latitude,
+                    longitude = excluded.longitude,
+                    status = excluded.status,
+                    source = excluded.source,
+                    updated_at = excluded.updated_at
+                """,
+                rows,
+            )
+            self._conn.commit()
+        return len(rows)
+
+    def put(self, address: str, coords: tuple[float, float], *, source: str = SOURCE_API) -> None:
+        """Store one resolved address."""
+        self.put_many([(address, GeocodeResponse(STATUS_OK, coords))], source=source)
+
+    def seed(self, records: Iterable[tuple[str, float, float]], *, source: str) -> int:
+        """Bulk-load known coordinates without overwriting fresh OK entries.
+
+        Returns the number of rows inserted or replaced.
+        """
+        now = time.time()
+        fresh_after = now - self.ttl_seconds
+        records = list(records)
+        rows = []
+        for key, (address, lat, lng) in zip(address_keys(record[0] for record in records), records):
+            if key and pd.notna(lat) and pd.notna(lng):
+                rows.append((key, address, float(lat), float(lng), STATUS_OK, f"{SEED_SOURCE_PREFIX}{source}", now))
+        if not rows:
+            return 0
+
+        with self._lock:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                """
+                INSERT INTO geocodes (address_key, address, latitude, longitude, status, source, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (address_key) DO UPDATE SET
+                    address = excluded.address,
+                    latitude = excluded.latitude,
+                    longitude = excluded.longitude,
+                    status = excluded.status,
+                    source = excluded.source,
+                    updated_at = excluded.updated_at
+                WHERE geocodes.status != 'OK' OR geocodes.updated_at < ?
+                """,
+                [row + (fresh_after,) for row in rows],
+            )
+            self._conn.commit()
+            return self._conn.total_changes - before
+
+    def purge_expired(self) -> int:
+        """Delete entries past their TTL; returns the number removed."""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM geocodes WHERE (status = ? AND updated_at < ?) OR (status != ? AND updated_at < ?)",
+                (STATUS_OK, now - self.ttl_seconds, STATUS_OK, now - self.negative_ttl_seconds),
+            )
+            self._conn.commit()
+            return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def stats(self) -> GeocodeCacheStats:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT
+                    COUNT(*),
+                    COALESCE(SUM(status = ?), 0),
+                    COALESCE(SUM(status != ?), 0),
+                    COALESCE(SUM((status = ? AND updated_at < ?) OR (status != ? AND updated_at < ?)), 0),
+                    COALESCE(SUM(source LIKE ?), 0),
+                    COALESCE(SUM(hits), 0)
+                FROM geocodes
+                """,
+                (
+                    STATUS_OK,
+                    STATUS_OK,
+                    STATUS_OK,
+                    now - self.ttl_seconds,
+                    STATUS_OK,
+                    now - self.negative_ttl_seconds,
+                    f"{SEED_SOURCE_PREFIX}%",
+                ),
+            ).fetchone()
+        return GeocodeCacheStats(*(int(value) for value in row))
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM geocodes").fetchone()[0])
+
+
+def _keys(addresses: Sequence[str], normalized: bool) -> list[str]:
+    if normalized:
+        return [address.replace(",", "") for address in addresses]
+    return address_keys(addresses)
+
+
+def _chunks(items: Sequence[str], size: int) -> Iterator[Sequence[str]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+# ---------------------------------------------------------------------------
+# Seeding from existing geocoded artifacts
+# ---------------------------------------------------------------------------
+
+def join_address(street: object, city: object, state: object, zip_code: object) -> str:
+    """``street, city, state, zip`` with blanks dropped, as geocode_batch builds it."""
+    parts = [str(part).strip() for part in (street, city, state, zip_code) if pd.notna(part)]
+    return ", ".join(part for part in parts if part)
+
+
+def geocoded_csv_records(
+    path: Path,
+    *,
+    street_column: str = "Shipping Street",
+    city_column: str = "City",
+    state_column: str = "State",
+    zip_column: str = "Zip",
+    lat_column: str = "Latitude",
+    lng_column: str = "Longitude",
+) -> list[tuple[str, float, float]]:
+    """(address, lat, lng) rows from a CSV such as commercial_accounts_geocoded.csv."""
+    frame = load_csv_safe(path, "geocoded accounts")
+    frame = frame[frame[lat_column].notna() & frame[lng_column].notna()]
+    state = frame[state_column] if state_column in frame.columns else DEFAULT_STATE_CODE
+    return [
+        (join_address(street, city, st, zip_code), lat, lng)
+        for street, city, st, zip_code, lat, lng in zip(
+            frame[street_column],
+            frame[city_column],
+            state if isinstance(state, pd.Series) else [state] * len(frame),
+            frame[zip_column],
+            frame[lat_column],
+            frame[lng_column],
+        )
+    ]
+
+
+def route_assignment_records(path: Path) -> list[tuple[str, float, float]]:
+    """(address, lat, lng) rows from a ``*route-assignments.json`` list."""
+    with path.open(encoding="utf-8") as handle:
+        payload = json.load(handle)
+    if not isinstance(payload, list):
+        raise ValueError(f"Expected a list of accounts in {path}")
+
+    records = []
+    for account in payload:
+        if not isinstance(account, Mapping):
+            continue
+        lat, lng = account.get("latitude"), account.get("longitude")
+        street = account.get("address")
+        if lat is None or lng is None or not street:
+            continue
+        address = join_address(
+            street,
+            account.get("city"),
+            account.get("state") or DEFAULT_STATE_CODE,
+            account.get("zipCode") or account.get("zip"),
+        )
+        records.append((address, lat, lng))
+    return records
+
+
+def seed_cache(
+    cache: GeocodeCache,
+    *,
+    geocoded_csvs: Sequence[Path] = (),
+    route_assignments: Sequence[Path] = (),
+) -> dict[str, int]:
+    """Seed ``cache`` from every given artifact; returns rows written per file."""
+    written: dict[str, int] = {}
+    for path in geocoded_csvs:
+        written[str(path)] = cache.seed(geocoded_csv_records(path), source=path.name)
+    for path in route_assignments:
+        written[str(path)] = cache.seed(route_assignment_records(path), source=path.name)
+    return written
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Manage the persistent geocode cache.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("--db", default=DEFAULT_GEOCODE_CACHE_DB, help="Cache database (relative to data root).")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    seed = subparsers.add_parser("seed", help="Bulk-load coordinates from geocoded artifacts.")
+    seed.add_argument(
+        "--geocoded-csv",
+        action="append",
+        help=f"CSV with Latitude/Longitude columns (default: {DEFAULT_COMMERCIAL_GEOCODED_CSV}).",
+    )
+    seed.add_argument(
+        "--route-assignments",
+        action="append",
+        help=f"route-assignments JSON file (default: {DEFAULT_ROUTE_ASSIGNMENTS_JSON}).",
+    )
+
+    subparsers.add_parser("stats", help="Print cache statistics.")
+    subparsers.add_parser("purge", help="Delete entries past their TTL.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+
+    with GeocodeCache(resolve_path(data_root, args.db)) as cache:
+        if args.command == "seed":
+            csvs = args.geocoded_csv or [DEFAULT_COMMERCIAL_GEOCODED_CSV]
+            routes = args.route_assignments or [DEFAULT_ROUTE_ASSIGNMENTS_JSON]
+            written = seed_cache(
+                cache,
+                geocoded_csvs=[resolve_path(data_root, path) for path in csvs],
+                route_assignments=[resolve_path(data_root, path) for path in routes],
+            )
+            for path, count in written.items():
+                print(f"Seeded {count} addresses from {path}")
+        elif args.command == "purge":
+            print(f"Purged {cache.purge_expired()} expired entries")
+
+        stats = cache.stats()
+        print(
+            f"{cache.path}: {stats.entries} entries ({stats.ok} OK, {stats.not_found} not found, "
+            f"{stats.expired} expired, {stats.seeded} seeded), {stats.total_hits} hits"
+        )
+
+
+if __name__ == "__main__":
+    main()
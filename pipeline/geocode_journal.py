@@ -0,0 +1,122 @@
+"""Append-only, crash-safe journal of geocoding results.
+
+A long ``geocode_batch`` run that dies halfway used to lose every result
+held in memory. With a journal, each API batch is appended to a JSON Lines
+file and fsynced before the next batch starts:
+
+    {"address": "1 N MAIN ST, MESA, AZ, 85201", "status": "OK", "latitude": 33.4, "longitude": -111.8}
+    {"address": "9 NOWHERE RD, MESA, AZ, 85201", "status": "ZERO_RESULTS", "latitude": null, "longitude": null}
+
+Only answers are journaled: coordinates and ZERO_RESULTS. Failed requests
+(quota, network, denied key) are left out, so a run restarted after such
+a failure asks for them again. Lines without a status (written before the
+status was recorded) count only when they carry coordinates.
+
+On restart ``geocode_batch(..., journal=path)`` loads the journal and only
+requests addresses it does not already hold. When the run finishes the
+journal is compacted into the persistent ``GeocodeCache`` (one bulk write)
+and removed; without a cache it is kept, since it is then the only copy of
+the results. A torn final line from a crash mid-write is discarded.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable
+
+from pipeline.geocoder import STATUS_OK, GeocodeResponse
+
+if TYPE_CHECKING:
+    from pipeline.geocache import GeocodeCache
+
+logger = logging.getLogger(__name__)
+
+
+class GeocodeJournal:
+    """JSON Lines write-ahead log of ``address -> GeocodeResponse`` answers."""
+
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self._entries: dict[str, GeocodeResponse] | None = None
+
+    def __len__(self) -> int:
+        return len(self.entries())
+
+    def entries(self) -> dict[str, GeocodeResponse]:
+        """Results recorded so far (read from disk on first use)."""
+        if self._entries is None:
+            self._entries = self._read()
+        return self._entries
+
+    def _read(self) -> dict[str, GeocodeResponse]:
+        entries: dict[str, GeocodeResponse] = {}
+        if not self.path.exists():
+            return entries
+
+        good_bytes = 0
+        with self.path.open("rb") as handle:
+            for line_number, raw in enumerate(handle, start=1):
+                if not raw.endswith(b"\n"):
+                    # Torn write from a crash: drop it so later appends stay valid.
+                    logger.warning("Discarding incomplete final line %d of %s", line_number, self.path)
+                    with self.path.open("r+b") as truncate:
+                        truncate.truncate(good_bytes)
+                    break
+                good_bytes += len(raw)
+                try:
+                    record = json.loads(raw)
+                    address = record["address"]
+                    lat, lng = record["latitude"], record["longitude"]
+                    coords = None if lat is None or lng is None else (float(lat), float(lng))
+                    response = GeocodeResponse(record.get("status") or STATUS_OK, coords)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    logger.warning("Skipping unreadable line %d of %s", line_number, self.path)
+                    continue
+                if _is_answer(response):
+                    entries[address] = response
+        return entries
+
+    def append(self, results: Iterable[tuple[str, GeocodeResponse]]) -> int:
+        """Append the answers in one batch and fsync them; returns the number of records written.
+
+        Failed requests are skipped so a later run retries them.
+        """
+        results = [(address, response) for address, response in results if _is_answer(response)]
+        if not results:
+            return 0
+        lines = []
+        for address, response in results:
+            lat, lng = response.coords if response.coords else (None, None)
+            record = {"address": address, "status": response.status, "latitude": lat, "longitude": lng}
+            lines.append(json.dumps(record) + "\n")
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a", encoding="utf-8") as handle:
+            handle.write("".join(lines))
+            handle.flush()
+            os.fsync(handle.fileno())
+        self.entries().update(results)
+        return len(results)
+
+    def compact(self, cache: GeocodeCache | None = None) -> int:
+        """Flush every entry into ``cache`` and delete the journal.
+
+        Addresses must be in ``pipeline.addresses`` normalized form, as
+        ``geocode_batch`` writes them. Returns the number of entries moved;
+        without a cache nothing is moved and the journal is left in place.
+        """
+        if cache is None:
+            return 0
+        entries = self.entries()
+        if entries:
+            cache.put_many(entries.items(), normalized=True)
+        self.path.unlink(missing_ok=True)
+        self._entries = {}
+        return len(entries)
+
+
+def _is_answer(response: GeocodeResponse) -> bool:
+    return response.ok or response.not_found
@@ -0,0 +1,223 @@
+"""Check geocoded points against their ZIP's boundary polygon.
+
+A geocode for an 85209 account that lands in Tucson skews density maps
+and every distance computed from it. ``ZipPolygons`` holds the local
+``*-zip-boundaries.json`` outlines as flat arrays (``pipeline.geometry``)
+and classifies each point in two vectorized passes: a bounding-box
+prefilter, then even-odd ray casting against the polygon edges of the
+point's horizontal strip. Points outside their polygon but within
+``tolerance_km`` of its boundary (curb-side geocodes, simplified outlines)
+still pass:
+
+    polygons = ZipPolygons.load(public_dir.glob("*-zip-boundaries.json"))
+    checked, report = validate_geocodes(frame, polygons, zip_column="Zip")
+    requeued = requeue_mismatches(checked)   # coordinates cleared for "outside"
+    geocoded, stats = geocode_batch(requeued, cache=cache, polygons=polygons)
+
+``geocode_batch(..., polygons=...)`` applies the same check to cached and
+freshly geocoded addresses: a cached mismatch is re-requested from the
+API, and an API result that still misses its ZIP is treated as not found.
+
+    python -m pipeline.geocode_validation check commercial_accounts_geocoded.csv \\
+        --zip-column Zip --lat-column Latitude --lng-column Longitude
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import os
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import (
+    DEFAULT_GEOCODE_TOLERANCE_KM,
+    DEFAULT_WEB_PUBLIC_DIR,
+    GEOCODE_CHECK_INSIDE,
+    GEOCODE_CHECK_MISSING,
+    GEOCODE_CHECK_NEAR_BOUNDARY,
+    GEOCODE_CHECK_NO_POLYGON,
+    GEOCODE_CHECK_OUTSIDE,
+    ZIP_BOUNDARY_GLOB,
+)
+from pipeline.geometry import (
+    EdgeStrips,
+    PolygonTable,
+    ShapeGrid,
+    boundary_distance_km,
+    load_zip_polygons,
+    locate_points,
+    points_in_shapes,
+)
+from pipeline.spatial_index import read_points
+from pipeline.utils import clean_zip_code, resolve_path, save_csv_safe
+
+
+class ZipPolygons:
+    """ZIP boundary polygons prepared for repeated point-in-polygon checks."""
+
+    def __init__(self, table: PolygonTable) -> None:
+        self.table = table
+        self.strips = EdgeStrips.from_table(table)
+        self.grid = ShapeGrid.from_table(table)
+
+    @classmethod
+    def load(cls, paths: Iterable[Path]) -> ZipPolygons:
+        return cls(load_zip_polygons(paths))
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def locate(self, latitude: np.ndarray, longitude: np.ndarray) -> np.ndarray:
+        """ZIP whose polygon contains each point (None outside every polygon)."""
+        shapes = locate_points(
+            self.strips,
+            self.grid,
+            np.asarray(longitude, dtype=np.float64),
+            np.asarray(latitude, dtype=np.float64),
+        )
+        keys = np.append(self.table.keys.astype(object), None)
+        return keys[shapes]
+
+    def check(
+        self,
+        zips: Iterable[object],
+        latitude: np.ndarray,
+        longitude: np.ndarray,
+        *,
+        tolerance_km: float = DEFAULT_GEOCODE_TOLERANCE_KM,
+    ) -> np.ndarray:
+        """``GEOCODE_CHECK_*`` status of each (zip, latitude, longitude)."""
+        lat = np.asarray(latitude, dtype=np.float64)
+        lng = np.asarray(longitude, dtype=np.float64)
+        cleaned = clean_zip_code(pd.Series(list(zips), dtype=object))
+        shapes = self.table.lookup(cleaned.fillna("").to_numpy(dtype=object))
+
+        status = np.full(len(lat), GEOCODE_CHECK_NO_POLYGON, dtype=object)
+        status[~(np.isfinite(lat) & np.isfinite(lng))] = GEOCODE_CHECK_MISSING
+        testable = (shapes >= 0) & (status != GEOCODE_CHECK_MISSING)
+        inside = points_in_shapes(self.strips, lng, lat, np.where(testable, shapes, -1))
+        status[inside] = GEOCODE_CHECK_INSIDE
+
+        outside = np.flatnonzero(testable & ~inside)
+        status[outside] = GEOCODE_CHECK_OUTSIDE
+        if len(outside) and tolerance_km > 0:
+            distance = boundary_distance_km(self.strips, lng[outside], lat[outside], shapes[outside])
+            status[outside[distance <= tolerance_km]] = GEOCODE_CHECK_NEAR_BOUNDARY
+        return status
+
+
+@dataclass(frozen=True)
+class GeocodeValidation:
+    """Row counts per ``GEOCODE_CHECK_*`` status."""
+
+    checked: int
+    inside: int
+    near_boundary: int
+    outside: int
+    no_polygon: int
+    missing: int
+
+    @property
+    def mismatch_rate(self) -> float:
+        """Share of rows with a polygon and coordinates that fell outside it."""
+        tested = self.inside + self.near_boundary + self.outside
+        return self.outside / tested if tested else 0.0
+
+
+def validate_geocodes(
+    df: pd.DataFrame,
+    polygons: ZipPolygons,
+    *,
+    zip_column: str = "zip",
+    lat_column: str = "latitude",
+    lng_column: str = "longitude",
+    status_column: str = "geocode_check",
+    tolerance_km: float = DEFAULT_GEOCODE_TOLERANCE_KM,
+) -> tuple[pd.DataFrame, GeocodeValidation]:
+    """Copy of ``df`` with ``status_column`` flagging each row's geocode."""
+    output = df.copy()
+    status = polygons.check(
+        output[zip_column],
+        pd.to_numeric(output[lat_column], errors="coerce").to_numpy(dtype=np.float64),
+        pd.to_numeric(output[lng_column], errors="coerce").to_numpy(dtype=np.float64),
+        tolerance_km=tolerance_km,
+    )
+    output[status_column] = status
+    counts = pd.Series(status, dtype=object).value_counts()
+    return output, GeocodeValidation(
+        checked=len(output),
+        inside=int(counts.get(GEOCODE_CHECK_INSIDE, 0)),
+        near_boundary=int(counts.get(GEOCODE_CHECK_NEAR_BOUNDARY, 0)),
+        outside=int(counts.get(GEOCODE_CHECK_OUTSIDE, 0)),
+        no_polygon=int(counts.get(GEOCODE_CHECK_NO_POLYGON, 0)),
+        missing=int(counts.get(GEOCODE_CHECK_MISSING, 0)),
+    )
+
+
+def requeue_mismatches(
+    df: pd.DataFrame,
+    *,
+    status_column: str = "geocode_check",
+    lat_column: str = "latitude",
+    lng_column: str = "longitude",
+) -> pd.DataFrame:
+    """Clear coordinates of ``outside`` rows so ``geocode_batch`` resolves them again."""
+    output = df.copy()
+    outside = output[status_column] == GEOCODE_CHECK_OUTSIDE
+    output.loc[outside, [lat_column, lng_column]] = np.nan
+    return output
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Check geocoded rows against ZIP boundary polygons.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    check = subparsers.add_parser("check", help="Flag rows whose coordinates fall outside their ZIP.")
+    check.add_argument("csv", help="Geocoded CSV or JSON list of records (relative to data root).")
+    check.add_argument("--zip-column", default="Zip")
+    check.add_argument("--lat-column", default="Latitude")
+    check.add_argument("--lng-column", default="Longitude")
+    check.add_argument("--tolerance-km", type=float, default=DEFAULT_GEOCODE_TOLERANCE_KM)
+    check.add_argument("--boundaries", action="append", help="ZIP boundary JSON (default: web public dir).")
+    check.add_argument("--output", help="Write the CSV with a geocode_check column here.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+
+    if args.boundaries:
+        boundaries = [resolve_path(data_root, path) for path in args.boundaries]
+    else:
+        boundaries = sorted((data_root / DEFAULT_WEB_PUBLIC_DIR).glob(ZIP_BOUNDARY_GLOB))
+    polygons = ZipPolygons.load(boundaries)
+
+    frame = read_points(resolve_path(data_root, args.csv))
+    checked, report = validate_geocodes(
+        frame,
+        polygons,
+        zip_column=args.zip_column,
+        lat_column=args.lat_column,
+        lng_column=args.lng_column,
+        tolerance_km=args.tolerance_km,
+    )
+    print(
+        f"{report.checked} rows: {report.inside} inside, {report.near_boundary} near boundary, "
+        f"{report.outside} outside ({report.mismatch_rate:.1%}), "
+        f"{report.no_polygon} without a polygon, {report.missing} without coordinates"
+    )
+    if args.output:
+        save_csv_safe(checked, resolve_path(data_root, args.output), "geocode check")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+"""Concurrent Google Geocoding client with rate limiting and keep-alive.
+
+``ConcurrentGeocoder`` resolves many addresses through a bounded thread
+pool. Each worker keeps one persistent ``http.client`` connection, so TLS
+is negotiated once per worker instead of once per request. All workers share
+a ``TokenBucket`` that caps the request rate at the API quota:
+
+    with ConcurrentGeocoder(api_key, rate_per_second=45) as geocoder:
+        responses = geocoder.geocode_many(addresses)   # same order as addresses
+
+The rate adapts AIMD-style. Each OVER_QUERY_LIMIT response (or HTTP 429)
+halves the bucket rate and retries the address after a backoff. Successful
+responses raise the rate back toward the configured ceiling a little at a
+time. ZERO_RESULTS and other definitive statuses are not retried.
+
+Every address comes back as a ``GeocodeResponse``: coordinates with status
+OK, ZERO_RESULTS when Google has no such address, or the status of the
+failure (REQUEST_DENIED, INVALID_REQUEST, TRANSPORT_ERROR, or the last
+retryable status once retries are exhausted). Only ZERO_RESULTS is a
+negative answer about the address; a failed request says nothing about it.
+
+``base_url`` defaults to the Google endpoint; tests point it at a local HTTP
+server.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import http.client
+import json
+import logging
+import ssl
+import threading
+import time
+from typing import Callable, Sequence
+from urllib.parse import urlencode, urlsplit
+
+from pipeline.constants import (
+    DEFAULT_GEOCODE_RATE_PER_SECOND,
+    DEFAULT_GEOCODE_URL,
+    DEFAULT_GEOCODE_WORKERS,
+)
+
+logger = logging.getLogger(__name__)
+
+STATUS_OK: str = "OK"
+STATUS_ZERO_RESULTS: str = "ZERO_RESULTS"
+STATUS_OVER_QUERY_LIMIT: str = "OVER_QUERY_LIMIT"
+STATUS_TRANSPORT_ERROR: str = "TRANSPORT_ERROR"
+
+# Worth another attempt; everything else (ZERO_RESULTS, INVALID_REQUEST,
+# REQUEST_DENIED, ...) is final.
+RETRYABLE_STATUSES: frozenset[str] = frozenset(
+    {STATUS_OVER_QUERY_LIMIT, "UNKNOWN_ERROR", STATUS_TRANSPORT_ERROR}
+)
+
+Coords = tuple[float, float]
+
+
+class TokenBucket:
+    """Thread-safe token bucket: ``acquire`` blocks until a token is available."""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        *,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self._rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> float:
+        return self._rate
+
+    def set_rate(self, rate: float, *, drain: bool = False) -> None:
+        with self._lock:
+            self._refill()
+            self._rate = max(float(rate), 1e-3)
+            if drain:
+                self._tokens = 0.0
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last) * self._rate)
+        self._last = now
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                wait = (1.0 - self._tokens) / self._rate
+            self._sleep(wait)
+
+
+@dataclass(frozen=True)
+class GeocodeResponse:
+    status: str
+    coords: Coords | None = None
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK and self.coords is not None
+
+    @property
+    def not_found(self) -> bool:
+        """Google answered that the address does not exist (as opposed to a failed request)."""
+        return self.status == STATUS_ZERO_RESULTS
+
+
+@dataclass
+class GeocoderStats:
+    requests: int = 0
+    over_query_limit: int = 0
+    retries: int = 0
+    connections_opened: int = 0
+
+
+class ConcurrentGeocoder:
+    """Bounded-concurrency geocoder with shared rate limit and per-thread keep-alive."""
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        base_url: str = DEFAULT_GEOCODE_URL,
+        max_workers: int = DEFAULT_GEOCODE_WORKERS,
+        rate_per_second: float = DEFAULT_GEOCODE_RATE_PER_SECOND,
+        min_rate_per_second: float = 1.0,
+        max_retries: int = 2,
+        backoff_seconds: float = 0.5,
+        max_backoff_seconds: float = 8.0,
+        timeout: float = 10.0,
+    ) -> None:
+        parts = urlsplit(base_url)
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            raise ValueError(f"Unsupported geocoding URL: {base_url}")
+        self.api_key = api_key
+        self._scheme = parts.scheme
+        self._host = parts.hostname
+        self._port = parts.port
+        self._path = parts.path or "/"
+        self.max_workers = max(1, max_workers)
+        self.target_rate = float(rate_per_second)
+        self.min_rate = min(float(min_rate_per_second), self.target_rate)
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout = timeout
+
+        self.bucket = TokenBucket(self.target_rate)
+        self.stats = GeocoderStats()
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+        self._connections: list[http.client.HTTPConnection] = []
+        self._ssl_context = ssl.create_default_context() if self._scheme == "https" else None
+        self._executor: ThreadPoolExecutor | None = None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    def __enter__(self) -> ConcurrentGeocoder:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._stats_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def geocode_many(self, addresses: Sequence[str]) -> list[GeocodeResponse]:
+        """Response for each address, in input order; duplicates are requested once."""
+        unique = list(dict.fromkeys(addresses))
+        if not unique:
+            return []
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="geocoder",
+            )
+        resolved = dict(zip(unique, self._executor.map(self.geocode, unique)))
+        return [resolved[address] for address in addresses]
+
+    def geocode(self, address: str) -> GeocodeResponse:
+        """Resolve one address, retrying transient failures with backoff.
+
+        Returns the final response: OK, ZERO_RESULTS, a non-retryable error
+        status, or the last retryable status once retries are exhausted.
+        """
+        delay = self.backoff_seconds
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            response = self._request(address)
+
+            if response.status == STATUS_OK:
+                self._on_success()
+                return response
+            if response.status not in RETRYABLE_STATUSES:
+                if response.status != STATUS_ZERO_RESULTS:
+                    logger.warning("Geocoding status for %s: %s", address, response.status)
+                return response
+
+            if response.status == STATUS_OVER_QUERY_LIMIT:
+                self._on_over_query_limit()
+            if attempt < self.max_retries:
+                with self._stats_lock:
+                    self.stats.retries += 1
+                time.sleep(delay)
+                delay = min(delay * 2, self.max_backoff_seconds)
+
+        logger.warning("Geocoding failed for address after retries (%s): %s", response.status, address)
+        return response
+
+    # ------------------------------------------------------------------
+    # Rate adaptation
+    # ------------------------------------------------------------------
+
+    def _on_over_query_limit(self) -> None:
+        with self._stats_lock:
+            self.stats.over_query_limit += 1
+        new_rate = max(self.min_rate, self.bucket.rate / 2)
+        self.bucket.set_rate(new_rate, drain=True)
+        logger.info("OVER_QUERY_LIMIT: geocoding rate lowered to %.1f/s", new_rate)
+
+    def _on_success(self) -> None:
+        rate = self.bucket.rate
+        if rate < self.target_rate:
+            step = max(self.target_rate / 50, 0.1)
+            self.bucket.set_rate(min(self.target_rate, rate + step))
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if self._scheme == "https":
+                connection = http.client.HTTPSConnection(
+                    self._host, self._port, timeout=self.timeout, context=self._ssl_context
+                )
+            else:
+                connection = http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+            self._local.connection = connection
+            with self._stats_lock:
+                self._connections.append(connection)
+                self.stats.connections_opened += 1
+        return connection
+
+    def _drop_connection(self) -> None:
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+            with self._stats_lock:
+                if connection in self._connections:
+                    self._connections.remove(connection)
+
+    def _request(self, address: str) -> GeocodeResponse:
+        target = f"{self._path}?{urlencode({'address': address, 'key': self.api_key})}"
+        with self._stats_lock:
+            self.stats.requests += 1
+
+        # A pooled connection may have been closed by the server while idle;
+        # retry once on a fresh connection before reporting a transport error.
+        for reconnect in (False, True):
+            try:
+                connection = self._connection()
+                connection.request("GET", target, headers={"Accept": "application/json"})
+                response = connection.getresponse()
+                body = response.read()
+                if response.will_close:
+                    self._drop_connection()
+                break
+            except (http.client.HTTPException, OSError) as exc:
+                self._drop_connection()
+                if reconnect:
+                    logger.warning("Geocoding request failed for %s: %s", address, exc)
+                    return GeocodeResponse(STATUS_TRANSPORT_ERROR)
+
+        if response.status == 429:
+            return GeocodeResponse(STATUS_OVER_QUERY_LIMIT)
+        if response.status >= 500:
+            return GeocodeResponse(STATUS_TRANSPORT_ERROR)
+        return parse_geocode_payload(body)
+
+
+def parse_geocode_payload(body: bytes) -> GeocodeResponse:
+    """Status and first-result coordinates from a Geocoding API JSON body."""
+    try:
+        payload = json.loads(body.decode("utf-8"))
+    except (UnicodeDecodeError, json.JSONDecodeError):
+        return GeocodeResponse(STATUS_TRANSPORT_ERROR)
+
+    status = payload.get("status") or STATUS_TRANSPORT_ERROR
+    if status != STATUS_OK:
+        return GeocodeResponse(status)
+
+    results = payload.get("results") or []
+    if not results:
+        return GeocodeResponse(STATUS_ZERO_RESULTS)
+
+    location = results[0].get("geometry", {}).get("location", {})
+    lat = location.get("lat")
+    lng = location.get("lng")
+    if lat is None or lng is None:
+        return GeocodeResponse(STATUS_ZERO_RESULTS)
+    return GeocodeResponse(STATUS_OK, (float(lat), float(lng)))
@@ -0,0 +1,555 @@
+"""ZIP boundary polygons as flat NumPy arrays.
+
+The web app ships ZIP outlines in three layouts: a ``{zip: geometry}``
+mapping (``miami-zip-boundaries.json``), a list of ``{"zipCode", "geometry"}``
+records (``portcharlotte-zip-boundaries.json``) and a GeoJSON
+FeatureCollection (``az-zip-boundaries.json``). ``read_zip_geometries``
+accepts any of them and ``PolygonTable.from_geometries`` flattens the
+rings of every Polygon/MultiPolygon into contiguous coordinate arrays:
+
+    table = load_zip_polygons(public_dir.glob("*-zip-boundaries.json"))
+    centroids = polygon_centroids(table)      # zip, latitude, longitude, area_km2
+
+Each ring is closed (first vertex repeated) and addressed through
+``ring_offsets``, so per-edge work is a single vectorized pass followed by
+``np.add.reduceat`` / ``np.bincount`` roll-ups to rings and ZIPs.
+Coordinates stay in degrees (x = longitude, y = latitude).
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+from pathlib import Path
+from typing import Iterable, Mapping
+
+import numpy as np
+import pandas as pd
+
+# Kilometres per degree of latitude (mean Earth radius 6371.0088 km).
+KM_PER_DEGREE: float = 111.195
+
+# Feature property names that carry the ZIP in GeoJSON exports.
+ZIP_PROPERTY_KEYS: tuple[str, ...] = (
+    "zipCode",
+    "zip",
+    "ZIP",
+    "ZCTA5CE20",
+    "ZCTA5CE10",
+    "GEOID20",
+    "GEOID10",
+    "postalCode",
+)
+
+
+@dataclass(frozen=True)
+class PolygonTable:
+    """Rings of many (multi)polygons in flat arrays.
+
+    ``x``/``y`` hold every vertex; ring ``r`` spans
+    ``ring_offsets[r]:ring_offsets[r + 1]`` and belongs to shape
+    ``ring_shape[r]`` (an index into ``keys``). ``bbox`` is
+    ``(min_x, min_y, max_x, max_y)`` per shape.
+    """
+
+    keys: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    ring_offsets: np.ndarray
+    ring_shape: np.ndarray
+    ring_hole: np.ndarray
+    bbox: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    @property
+    def ring_count(self) -> int:
+        return len(self.ring_shape)
+
+    def lookup(self, keys: Iterable[object]) -> np.ndarray:
+        """Shape index of each key (-1 when the table has no such shape)."""
+        return pd.Index(self.keys).get_indexer(pd.Index(list(keys), dtype=object))
+
+    @classmethod
+    def from_geometries(cls, geometries: Mapping[str, Mapping[str, object]]) -> PolygonTable:
+        keys: list[str] = []
+        rings: list[np.ndarray] = []
+        ring_shape: list[int] = []
+        ring_hole: list[bool] = []
+
+        for key, geometry in geometries.items():
+            polygons = _polygons(geometry)
+            if not polygons:
+                continue
+            shape_index = len(keys)
+            keys.append(str(key))
+            for polygon in polygons:
+                for ring_index, ring in enumerate(polygon):
+                    points = np.asarray(ring, dtype=np.float64).reshape(-1, 2)[:, :2]
+                    if len(points) < 3:
+                        continue
+                    if not np.array_equal(points[0], points[-1]):
+                        points = np.vstack([points, points[:1]])
+                    rings.append(points)
+                    ring_shape.append(shape_index)
+                    ring_hole.append(ring_index > 0)
+
+        lengths = np.array([len(ring) for ring in rings], dtype=np.int64)
+        offsets = np.zeros(len(rings) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        vertices = np.vstack(rings) if rings else np.empty((0, 2))
+        shapes = np.asarray(ring_shape, dtype=np.int64)
+
+        bbox = np.full((len(keys), 4), np.nan)
+        if len(rings):
+            vertex_shape = np.repeat(shapes, lengths)
+            x, y = vertices[:, 0], vertices[:, 1]
+            bbox[:, :2] = np.inf
+            bbox[:, 2:] = -np.inf
+            np.minimum.at(bbox[:, 0], vertex_shape, x)
+            np.minimum.at(bbox[:, 1], vertex_shape, y)
+            np.maximum.at(bbox[:, 2], vertex_shape, x)
+            np.maximum.at(bbox[:, 3], vertex_shape, y)
+
+        return cls(
+            keys=np.asarray(keys, dtype=object),
+            x=np.ascontiguousarray(vertices[:, 0]),
+            y=np.ascontiguousarray(vertices[:, 1]),
+            ring_offsets=offsets,
+            ring_shape=shapes,
+            ring_hole=np.asarray(ring_hole, dtype=bool),
+            bbox=bbox,
+        )
+
+
+def _polygons(geometry: Mapping[str, object]) -> list:
+    """Polygon coordinate lists of a GeoJSON Polygon/MultiPolygon (else [])."""
+    if not isinstance(geometry, Mapping):
+        return []
+    kind = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+    if kind == "Polygon":
+        return [coordinates]
+    if kind == "MultiPolygon":
+        return list(coordinates)
+    return []
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+
+def read_zip_geometries(path: Path) -> dict[str, Mapping[str, object]]:
+    """``{zip: geometry}`` from any of the boundary file layouts."""
+    with Path(path).open(encoding="utf-8") as handle:
+        payload = json.load(handle)
+
+    if isinstance(payload, Mapping) and payload.get("type") == "FeatureCollection":
+        records: Iterable[object] = payload.get("features") or []
+    elif isinstance(payload, Mapping):
+        return {
+            str(zip_code): geometry
+            for zip_code, geometry in payload.items()
+            if isinstance(geometry, Mapping) and "coordinates" in geometry
+        }
+    elif isinstance(payload, list):
+        records = payload
+    else:
+        raise ValueError(f"Unrecognized ZIP boundary file layout: {path}")
+
+    geometries: dict[str, Mapping[str, object]] = {}
+    for record in records:
+        if not isinstance(record, Mapping):
+            continue
+        properties = record.get("properties") or {}
+        zip_code = next(
+            (
+                source[key]
+                for source in (record, properties)
+                if isinstance(source, Mapping)
+                for key in ZIP_PROPERTY_KEYS
+                if source.get(key) not in (None, "")
+            ),
+            None,
+        )
+        geometry = record.get("geometry")
+        if zip_code is not None and isinstance(geometry, Mapping):
+            geometries.setdefault(str(zip_code).zfill(5), geometry)
+    return geometries
+
+
+def load_zip_polygons(paths: Iterable[Path]) -> PolygonTable:
+    """One table from several boundary files; the first file wins on duplicates."""
+    geometries: dict[str, Mapping[str, object]] = {}
+    for path in paths:
+        for zip_code, geometry in read_zip_geometries(path).items():
+            geometries.setdefault(zip_code, geometry)
+    return PolygonTable.from_geometries(geometries)
+
+
+# ---------------------------------------------------------------------------
+# Area-weighted centroids
+# ---------------------------------------------------------------------------
+
+def _ring_moments(table: PolygonTable) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-ring (area, x moment, y moment), signed +outer / -hole."""
+    x, y = table.x, table.y
+    if len(x) == 0:
+        empty = np.zeros(0)
+        return empty, empty, empty
+
+    # Edge i runs from vertex i to i + 1; the last vertex of a ring closes it,
+    # so the edge leaving it (into the next ring) is zeroed.
+    cross = np.zeros(len(x))
+    cross[:-1] = x[:-1] * y[1:] - x[1:] * y[:-1]
+    cross[table.ring_offsets[1:] - 1] = 0.0
+    sum_x = np.zeros(len(x))
+    sum_y = np.zeros(len(x))
+    sum_x[:-1] = (x[:-1] + x[1:]) * cross[:-1]
+    sum_y[:-1] = (y[:-1] + y[1:]) * cross[:-1]
+
+    starts = table.ring_offsets[:-1]
+    area = np.add.reduceat(cross, starts) / 2.0
+    moment_x = np.add.reduceat(sum_x, starts) / 6.0
+    moment_y = np.add.reduceat(sum_y, starts) / 6.0
+
+    # Normalize winding: outer rings count positive, holes negative.
+    sign = np.where(area < 0, -1.0, 1.0) * np.where(table.ring_hole, -1.0, 1.0)
+    return area * sign, moment_x * sign, moment_y * sign
+
+
+def polygon_centroids(table: PolygonTable) -> pd.DataFrame:
+    """Area-weighted centroid and approximate area (km²) of every shape.
+
+    Shapes whose rings enclose no area fall back to the mean of their
+    vertices.
+    """
+    area, moment_x, moment_y = _ring_moments(table)
+    shapes = len(table)
+    total_area = np.bincount(table.ring_shape, weights=area, minlength=shapes)
+    total_x = np.bincount(table.ring_shape, weights=moment_x, minlength=shapes)
+    total_y = np.bincount(table.ring_shape, weights=moment_y, minlength=shapes)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        longitude = total_x / total_area
+        latitude = total_y / total_area
+
+    degenerate = ~(np.abs(total_area) > 0)
+    if degenerate.any():
+        lengths = np.diff(table.ring_offsets)
+        vertex_shape = np.repeat(table.ring_shape, lengths)
+        counts = np.bincount(vertex_shape, minlength=shapes)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            mean_x = np.bincount(vertex_shape, weights=table.x, minlength=shapes) / counts
+            mean_y = np.bincount(vertex_shape, weights=table.y, minlength=shapes) / counts
+        longitude = np.where(degenerate, mean_x, longitude)
+        latitude = np.where(degenerate, mean_y, latitude)
+
+    area_km2 = np.abs(total_area) * KM_PER_DEGREE**2 * np.cos(np.radians(latitude))
+    return pd.DataFrame(
+        {
+            "zip": table.keys.astype(object),
+            "latitude": latitude,
+            "longitude": longitude,
+            "area_km2": area_km2,
+        }
+    )
+
+
+# ---------------------------------------------------------------------------
+# Point in polygon
+# ---------------------------------------------------------------------------
+
+def polygon_edges(table: PolygonTable) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """``(x0, y0, x1, y1, edge_shape)`` of every ring edge in the table."""
+    # Edge i joins vertex i and i + 1; the closing vertex of a ring starts none.
+    starts = np.ones(len(table.x), dtype=bool)
+    starts[table.ring_offsets[1:] - 1] = False
+    first = np.flatnonzero(starts)
+    lengths = np.diff(table.ring_offsets)
+    edge_shape = np.repeat(table.ring_shape, lengths)[first]
+    return table.x[first], table.y[first], table.x[first + 1], table.y[first + 1], edge_shape
+
+
+@dataclass(frozen=True)
+class EdgeStrips:
+    """Polygon edges bucketed into horizontal strips for ray casting.
+
+    Each shape's bbox is cut into strips holding about ``edges_per_strip``
+    edges; edges are listed (CSR style, ``offsets``/``edges``) under every
+    strip their y-range touches. A horizontal ray from a point can only
+    cross edges in the point's strip, so a test costs a handful of edges
+    instead of the whole ring.
+    """
+
+    x0: np.ndarray
+    y0: np.ndarray
+    x1: np.ndarray
+    y1: np.ndarray
+    edge_shape: np.ndarray
+    bbox: np.ndarray
+    strip_base: np.ndarray
+    strip_height: np.ndarray
+    offsets: np.ndarray
+    edges: np.ndarray
+
+    @classmethod
+    def from_table(cls, table: PolygonTable, *, edges_per_strip: int = 4) -> EdgeStrips:
+        if edges_per_strip < 1:
+            raise ValueError("edges_per_strip must be at least 1")
+        x0, y0, x1, y1, edge_shape = polygon_edges(table)
+
+        shapes = len(table)
+        counts = np.bincount(edge_shape, minlength=shapes)
+        strip_count = np.maximum(counts // edges_per_strip, 1)
+        strip_base = np.zeros(shapes + 1, dtype=np.int64)
+        np.cumsum(strip_count, out=strip_base[1:])
+        span = np.nan_to_num(table.bbox[:, 3] - table.bbox[:, 1])
+        strip_height = np.where(span > 0, span / strip_count, 1.0)
+
+        low = _strip_of(np.minimum(y0, y1), edge_shape, table.bbox, strip_height, strip_count)
+        high = _strip_of(np.maximum(y0, y1), edge_shape, table.bbox, strip_height, strip_count)
+        spans = high - low + 1
+        pair_edge = np.repeat(np.arange(len(x0)), spans)
+        pair_start = np.repeat(np.cumsum(spans) - spans, spans)
+        pair_strip = strip_base[edge_shape][pair_edge] + low[pair_edge] + (np.arange(len(pair_edge)) - pair_start)
+
+        order = np.argsort(pair_strip, kind="stable")
+        offsets = np.zeros(strip_base[-1] + 1, dtype=np.int64)
+        np.cumsum(np.bincount(pair_strip, minlength=strip_base[-1]), out=offsets[1:])
+        return cls(
+            x0=x0,
+            y0=y0,
+            x1=x1,
+            y1=y1,
+            edge_shape=edge_shape,
+            bbox=table.bbox,
+            strip_base=strip_base,
+            strip_height=strip_height,
+            offsets=offsets,
+            edges=pair_edge[order],
+        )
+
+
+def _strip_of(
+    y: np.ndarray,
+    shapes: np.ndarray,
+    bbox: np.ndarray,
+    strip_height: np.ndarray,
+    strip_count: np.ndarray,
+) -> np.ndarray:
+    """Shape-local strip index of each y (clipped into the shape's bbox)."""
+    local = np.floor((y - bbox[shapes, 1]) / strip_height[shapes])
+    return np.clip(np.nan_to_num(local), 0, strip_count[shapes] - 1).astype(np.int64)
+
+
+def _in_bbox(bbox: np.ndarray, x: np.ndarray, y: np.ndarray, shapes: np.ndarray, margin: float = 0.0) -> np.ndarray:
+    box = bbox[shapes]
+    return (
+        (x >= box[:, 0] - margin)
+        & (x <= box[:, 2] + margin)
+        & (y >= box[:, 1] - margin)
+        & (y <= box[:, 3] + margin)
+    )
+
+
+def points_in_shapes(
+    strips: EdgeStrips,
+    x: np.ndarray,
+    y: np.ndarray,
+    shapes: np.ndarray,
+    *,
+    chunk_pairs: int = 4_000_000,
+) -> np.ndarray:
+    """Whether point i lies inside shape ``shapes[i]`` (even-odd rule).
+
+    ``shapes`` indexes ``PolygonTable.keys``; -1 (unknown shape) and
+    non-finite coordinates give False. Points outside their shape's bbox
+    are rejected first; the rest are ray cast against the edges of their
+    strip only, in chunks of at most ``chunk_pairs`` point-edge pairs.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    shapes = np.asarray(shapes, dtype=np.int64)
+    inside = np.zeros(len(x), dtype=bool)
+
+    candidates = np.flatnonzero((shapes >= 0) & np.isfinite(x) & np.isfinite(y))
+    candidates = candidates[_in_bbox(strips.bbox, x[candidates], y[candidates], shapes[candidates])]
+    if len(candidates) == 0:
+        return inside
+
+    strip_count = np.diff(strips.strip_base)
+    local = _strip_of(y[candidates], shapes[candidates], strips.bbox, strips.strip_height, strip_count)
+    strip = strips.strip_base[shapes[candidates]] + local
+    first = strips.offsets[strip]
+    counts = strips.offsets[strip + 1] - first
+
+    ends = np.cumsum(counts)
+    start = 0
+    while start < len(candidates):
+        # Take points until the chunk would expand past chunk_pairs pairs.
+        done = ends[start - 1] if start else 0
+        stop = max(start + 1, int(np.searchsorted(ends, done + chunk_pairs, side="right")))
+        chunk = slice(start, stop)
+        chunk_counts = counts[chunk]
+        point = np.repeat(np.arange(stop - start), chunk_counts)
+        pair_start = np.repeat(np.cumsum(chunk_counts) - chunk_counts, chunk_counts)
+        edge = strips.edges[np.repeat(first[chunk], chunk_counts) + np.arange(len(point)) - pair_start]
+
+        px = x[candidates[chunk]][point]
+        py = y[candidates[chunk]][point]
+        ex0, ey0, ex1, ey1 = strips.x0[edge], strips.y0[edge], strips.x1[edge], strips.y1[edge]
+        straddles = (ey0 > py) != (ey1 > py)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            crossing = ex0 + (py - ey0) * (ex1 - ex0) / (ey1 - ey0)
+        hits = straddles & (px < crossing)
+        inside[candidates[chunk]] = np.bincount(point, weights=hits, minlength=stop - start) % 2 == 1
+        start = stop
+    return inside
+
+
+def boundary_distance_km(
+    strips: EdgeStrips,
+    x: np.ndarray,
+    y: np.ndarray,
+    shapes: np.ndarray,
+    *,
+    chunk_pairs: int = 4_000_000,
+) -> np.ndarray:
+    """Approximate km from each point to the nearest edge of ``shapes[i]``.
+
+    Uses a local equirectangular projection, which is accurate to well
+    under 1% at ZIP scale. Unknown shapes and non-finite points give inf.
+    Every edge of the shape is checked, so call it for the few points that
+    failed ``points_in_shapes`` rather than for whole datasets.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    shapes = np.asarray(shapes, dtype=np.int64)
+    distance = np.full(len(x), np.inf)
+
+    valid = np.flatnonzero((shapes >= 0) & np.isfinite(x) & np.isfinite(y))
+    order = np.argsort(shapes[valid], kind="stable")
+    edge_order = np.argsort(strips.edge_shape, kind="stable")
+    edge_bounds = np.searchsorted(strips.edge_shape[edge_order], np.arange(len(strips.bbox) + 1))
+
+    for shape, members in _groups(shapes[valid][order], valid[order]):
+        edge = edge_order[edge_bounds[shape] : edge_bounds[shape + 1]]
+        if len(edge) == 0:
+            continue
+        ex0, ey0 = strips.x0[edge], strips.y0[edge]
+        dx_edge, dy_edge = strips.x1[edge] - ex0, strips.y1[edge] - ey0
+        scale = np.cos(np.radians(np.mean(y[members])))
+        step = max(1, chunk_pairs // len(edge))
+        for chunk_start in range(0, len(members), step):
+            rows = members[chunk_start : chunk_start + step]
+            px = x[rows][:, None] - ex0
+            py = y[rows][:, None] - ey0
+            length2 = dx_edge**2 + dy_edge**2
+            with np.errstate(invalid="ignore", divide="ignore"):
+                t = np.clip((px * dx_edge + py * dy_edge) / length2, 0.0, 1.0)
+            t = np.nan_to_num(t)
+            gap_x = (px - t * dx_edge) * scale
+            gap_y = py - t * dy_edge
+            distance[rows] = np.sqrt((gap_x**2 + gap_y**2).min(axis=1)) * KM_PER_DEGREE
+    return distance
+
+
+@dataclass(frozen=True)
+class ShapeGrid:
+    """Shapes listed (CSR style) under every grid cell their bbox overlaps.
+
+    A point's candidate shapes are those registered in its cell, so a
+    lookup against hundreds of ZIPs tests only the two or three whose
+    bounding boxes cover the point.
+    """
+
+    origin: tuple[float, float]
+    cell: float
+    shape: tuple[int, int]
+    offsets: np.ndarray
+    shapes: np.ndarray
+
+    @classmethod
+    def from_table(cls, table: PolygonTable, *, cell: float | None = None) -> ShapeGrid:
+        valid = np.flatnonzero(np.isfinite(table.bbox).all(axis=1))
+        bbox = table.bbox[valid]
+        if len(valid) == 0:
+            return cls((0.0, 0.0), 1.0, (1, 1), np.zeros(2, dtype=np.int64), np.empty(0, dtype=np.int64))
+        if cell is None:
+            # About one typical shape per cell.
+            sides = np.maximum(bbox[:, 2] - bbox[:, 0], bbox[:, 3] - bbox[:, 1])
+            cell = float(np.median(sides)) or 1.0
+        origin = (float(bbox[:, 0].min()), float(bbox[:, 1].min()))
+        nx = int((bbox[:, 2].max() - origin[0]) // cell) + 1
+        ny = int((bbox[:, 3].max() - origin[1]) // cell) + 1
+
+        x0 = ((bbox[:, 0] - origin[0]) // cell).astype(np.int64)
+        y0 = ((bbox[:, 1] - origin[1]) // cell).astype(np.int64)
+        width = np.minimum(((bbox[:, 2] - origin[0]) // cell).astype(np.int64), nx - 1) - x0 + 1
+        height = np.minimum(((bbox[:, 3] - origin[1]) // cell).astype(np.int64), ny - 1) - y0 + 1
+        counts = width * height
+        owner = np.repeat(np.arange(len(valid)), counts)
+        local = np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+        cells = (y0[owner] + local // width[owner]) * nx + x0[owner] + local % width[owner]
+
+        order = np.argsort(cells, kind="stable")
+        offsets = np.zeros(nx * ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cells, minlength=nx * ny), out=offsets[1:])
+        return cls(origin, float(cell), (nx, ny), offsets, valid[owner[order]])
+
+    def candidates(self, x: np.ndarray, y: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """(point, shape) pairs whose shape bbox may contain the point."""
+        x = np.asarray(x, dtype=np.float64)
+        y = np.asarray(y, dtype=np.float64)
+        nx, ny = self.shape
+        with np.errstate(invalid="ignore"):
+            cx = np.floor((x - self.origin[0]) / self.cell)
+            cy = np.floor((y - self.origin[1]) / self.cell)
+        inside = (cx >= 0) & (cx < nx) & (cy >= 0) & (cy < ny)
+        points = np.flatnonzero(inside)
+        cell = (cy[points] * nx + cx[points]).astype(np.int64)
+        starts = self.offsets[cell]
+        counts = self.offsets[cell + 1] - starts
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        pair_point = np.repeat(points, counts)
+        pair_shape = self.shapes[np.repeat(starts, counts) + np.arange(len(pair_point)) - first]
+        return pair_point, pair_shape
+
+
+def locate_points(
+    strips: EdgeStrips,
+    grid: ShapeGrid,
+    x: np.ndarray,
+    y: np.ndarray,
+    *,
+    chunk_size: int = 250_000,
+) -> np.ndarray:
+    """Index of the shape containing each point (-1 when none does).
+
+    Candidates come from ``grid``, then every (point, candidate) pair is
+    ray cast in one ``points_in_shapes`` call per chunk of points. Where
+    shapes overlap, the lowest shape index wins.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    located = np.full(len(x), -1, dtype=np.int64)
+    for start in range(0, len(x), chunk_size):
+        stop = min(start + chunk_size, len(x))
+        point, shape = grid.candidates(x[start:stop], y[start:stop])
+        hit = points_in_shapes(strips, x[start:stop][point], y[start:stop][point], shape)
+        order = np.lexsort((shape[hit], point[hit]))
+        point, shape = point[hit][order], shape[hit][order]
+        first = np.r_[True, point[1:] != point[:-1]] if len(point) else np.empty(0, dtype=bool)
+        located[start + point[first]] = shape[first]
+    return located
+
+
+def _groups(keys: np.ndarray, values: np.ndarray) -> Iterable[tuple[int, np.ndarray]]:
+    """(key, values) runs of a ``keys``-sorted pair of arrays."""
+    if len(keys) == 0:
+        return
+    breaks = np.flatnonzero(np.diff(keys)) + 1
+    for run_start, run_stop in zip(np.append(0, breaks), np.append(breaks, len(keys))):
+        yield int(keys[run_start]), values[run_start:run_stop]
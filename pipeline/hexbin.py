@@ -0,0 +1,235 @@
+"""Multi-resolution hexagonal binning of geocoded accounts for density maps.
+
+``density-data.json`` and its per-city variants aggregate by ZIP, which
+hides hot spots inside large ZIPs. ``hexbin_accounts`` bins account points
+into pointy-top hexagons of several sizes at once: points are projected
+equirectangularly (miles about a fixed reference latitude), converted to
+axial ``(q, r)`` coordinates with cube rounding for every size in one
+broadcast, and active/terminated counts and revenue are summed with a
+single ``np.unique`` + ``np.bincount`` over the packed (size, q, r) keys:
+
+    bins = hexbin_frame(accounts, sizes=(0.5, 1.0, 2.0), revenue_column="monthlyPrice")
+    bins[1.0].to_dict()       # columnar {"q": [...], "lat": [...], "active": [...], ...}
+
+Each size is written to its own compact columnar file, so the density view
+can switch resolution with zoom without binning in the browser:
+
+    python -m pipeline.hexbin phoenix_territory_map/nextjs_space/public/customer-lookup.json
+    # -> customer-lookup.hex-0.25mi.json, customer-lookup.hex-0.5mi.json, ...
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import DEFAULT_HEX_SIZES_MILES
+from pipeline.spatial_index import MILES_PER_DEGREE, read_points
+from pipeline.utils import resolve_path
+
+ACTIVE_STATUS: str = "active"
+
+_SQRT3: float = float(np.sqrt(3.0))
+# Axial coordinates are offset into 21 unsigned bits each when packed.
+_AXIAL_OFFSET: int = 1 << 20
+
+
+def hex_axial(x: np.ndarray, y: np.ndarray, size: np.ndarray | float) -> tuple[np.ndarray, np.ndarray]:
+    """Axial ``(q, r)`` of the pointy-top hexagon (center-to-corner ``size``) containing each point."""
+    qf = (_SQRT3 / 3.0 * x - y / 3.0) / size
+    rf = (2.0 / 3.0 * y) / size
+    sf = -qf - rf
+    q, r, s = np.round(qf), np.round(rf), np.round(sf)
+    dq, dr, ds = np.abs(q - qf), np.abs(r - rf), np.abs(s - sf)
+    # Cube rounding: the coordinate that moved most is recomputed from the other two.
+    fix_q = (dq > dr) & (dq > ds)
+    fix_r = ~fix_q & (dr > ds)
+    q = np.where(fix_q, -r - s, q)
+    r = np.where(fix_r, -q - s, r)
+    return q.astype(np.int64), r.astype(np.int64)
+
+
+def hex_center(q: np.ndarray, r: np.ndarray, size: float) -> tuple[np.ndarray, np.ndarray]:
+    """Projected ``(x, y)`` center of axial hexagons."""
+    return size * _SQRT3 * (q + r / 2.0), size * 1.5 * r
+
+
+@dataclass(frozen=True)
+class HexBins:
+    """Occupied hexagons of one size (miles, center to corner) with their totals."""
+
+    size_miles: float
+    ref_lat: float
+    q: np.ndarray
+    r: np.ndarray
+    lat: np.ndarray
+    lng: np.ndarray
+    active: np.ndarray
+    terminated: np.ndarray
+    revenue: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.q)
+
+    def to_dict(self, decimals: int = 5) -> dict:
+        """Columnar JSON layout; ``lat``/``lng`` are hexagon centers."""
+        return {
+            "sizeMiles": self.size_miles,
+            "refLat": self.ref_lat,
+            "orientation": "pointy",
+            "q": self.q.tolist(),
+            "r": self.r.tolist(),
+            "lat": np.round(self.lat, decimals).tolist(),
+            "lng": np.round(self.lng, decimals).tolist(),
+            "active": self.active.tolist(),
+            "terminated": self.terminated.tolist(),
+            "revenue": np.round(self.revenue, 2).tolist(),
+        }
+
+
+def hexbin_accounts(
+    lat: Iterable[float],
+    lng: Iterable[float],
+    *,
+    active: Iterable[bool] | None = None,
+    revenue: Iterable[float] | None = None,
+    sizes: Sequence[float] = DEFAULT_HEX_SIZES_MILES,
+    ref_lat: float | None = None,
+) -> dict[float, HexBins]:
+    """``{size: HexBins}`` for every size, binned in one pass.
+
+    ``active`` marks active accounts (the rest count as terminated; all
+    active when omitted). ``ref_lat`` fixes the projection so hexagon ids
+    are stable between runs; it defaults to the points' median latitude
+    rounded to a whole degree. Points without coordinates are skipped.
+    """
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    sizes = np.asarray(sizes, dtype=np.float64)
+    if len(sizes) == 0 or (sizes <= 0).any():
+        raise ValueError("Hexagon sizes must be positive")
+    is_active = np.ones(len(lat), dtype=bool) if active is None else np.asarray(active, dtype=bool)
+    amount = np.zeros(len(lat)) if revenue is None else np.nan_to_num(np.asarray(revenue, dtype=np.float64))
+
+    valid = np.isfinite(lat) & np.isfinite(lng)
+    lat, lng, is_active, amount = lat[valid], lng[valid], is_active[valid], amount[valid]
+    if ref_lat is None:
+        ref_lat = float(np.round(np.median(lat))) if len(lat) else 0.0
+    shrink = np.cos(np.radians(ref_lat))
+    x = lng * MILES_PER_DEGREE * shrink
+    y = lat * MILES_PER_DEGREE
+
+    q, r = hex_axial(x[None, :], y[None, :], sizes[:, None])
+    level = np.repeat(np.arange(len(sizes), dtype=np.int64), len(lat))
+    keys = level << 42 | (q.ravel() + _AXIAL_OFFSET) << 21 | (r.ravel() + _AXIAL_OFFSET)
+    unique, inverse = np.unique(keys, return_inverse=True)
+    active_all = np.tile(is_active, len(sizes))
+    active_count = np.bincount(inverse, weights=active_all, minlength=len(unique)).astype(np.int64)
+    total_count = np.bincount(inverse, minlength=len(unique)).astype(np.int64)
+    revenue_sum = np.bincount(inverse, weights=np.tile(amount, len(sizes)), minlength=len(unique))
+
+    unique_level = unique >> 42
+    unique_q = (unique >> 21 & (1 << 21) - 1) - _AXIAL_OFFSET
+    unique_r = (unique & (1 << 21) - 1) - _AXIAL_OFFSET
+    bins = {}
+    for position, size in enumerate(sizes.tolist()):
+        rows = unique_level == position
+        cx, cy = hex_center(unique_q[rows], unique_r[rows], size)
+        bins[size] = HexBins(
+            size_miles=size,
+            ref_lat=ref_lat,
+            q=unique_q[rows],
+            r=unique_r[rows],
+            lat=cy / MILES_PER_DEGREE,
+            lng=cx / (MILES_PER_DEGREE * shrink),
+            active=active_count[rows],
+            terminated=total_count[rows] - active_count[rows],
+            revenue=revenue_sum[rows],
+        )
+    return bins
+
+
+def hexbin_frame(
+    df: pd.DataFrame,
+    *,
+    lat_column: str = "latitude",
+    lng_column: str = "longitude",
+    status_column: str | None = "status",
+    revenue_column: str | None = None,
+    sizes: Sequence[float] = DEFAULT_HEX_SIZES_MILES,
+    ref_lat: float | None = None,
+) -> dict[float, HexBins]:
+    """``hexbin_accounts`` over a frame; a missing status column counts every row active."""
+    active = None
+    if status_column and status_column in df.columns:
+        active = df[status_column].astype("string").str.strip().str.lower().eq(ACTIVE_STATUS).fillna(False)
+    revenue = None
+    if revenue_column:
+        revenue = pd.to_numeric(df[revenue_column], errors="coerce")
+    return hexbin_accounts(
+        pd.to_numeric(df[lat_column], errors="coerce"),
+        pd.to_numeric(df[lng_column], errors="coerce"),
+        active=active,
+        revenue=revenue,
+        sizes=sizes,
+        ref_lat=ref_lat,
+    )
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def hexbin_path(source: Path, size: float, output_dir: Path | None = None) -> Path:
+    """``customer-lookup.json`` -> ``customer-lookup.hex-0.5mi.json``."""
+    return (output_dir or source.parent) / f"{source.stem}.hex-{size:g}mi.json"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Bin geocoded accounts into multi-resolution hexagons.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("input", help="Accounts JSON (list of records) or CSV.")
+    parser.add_argument("--lat-column", default="latitude")
+    parser.add_argument("--lng-column", default="longitude")
+    parser.add_argument("--status-column", default="status", help="Active/terminated status (optional).")
+    parser.add_argument("--revenue-column", help="Revenue to sum per hexagon, e.g. monthlyPrice.")
+    parser.add_argument("--sizes", type=float, nargs="+", default=list(DEFAULT_HEX_SIZES_MILES))
+    parser.add_argument("--ref-lat", type=float, help="Projection latitude (default: median, whole degree).")
+    parser.add_argument("--output-dir", help="Directory for hexbin files (default: next to the input).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+    source = resolve_path(data_root, args.input)
+    output_dir = resolve_path(data_root, args.output_dir) if args.output_dir else None
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    frame = read_points(source)
+    bins = hexbin_frame(
+        frame,
+        lat_column=args.lat_column,
+        lng_column=args.lng_column,
+        status_column=args.status_column,
+        revenue_column=args.revenue_column,
+        sizes=args.sizes,
+        ref_lat=args.ref_lat,
+    )
+    for size, hexes in bins.items():
+        path = hexbin_path(source, size, output_dir)
+        path.write_text(json.dumps(hexes.to_dict(), separators=(",", ":")), encoding="utf-8")
+        print(f"{path.name}: {len(hexes)} hexagons, {int(hexes.active.sum())} active, "
+              f"{int(hexes.terminated.sum())} terminated")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,720 @@
+"""Library API behind create_master_assignments.py.
+
+The pipeline is split into load -> assign -> export stages so it can be
+driven in-process (tests, notebooks, the warm daemon in
+``pipeline.daemon``) without re-reading inputs for every run:
+
+    inputs = load_master_inputs(paths)
+    assignments = build_master_assignments(inputs)
+    outputs = export_master_outputs(assignments, inputs, output_dir)
+
+Stage functions never mutate their inputs, so one ``MasterInputs`` can be
+reused across any number of runs.
+
+``load_master_inputs(paths, zip_polygons=polygons)`` repairs ``ZIP_Clean``
+before assignment: accounts with ``Latitude``/``Longitude`` get the ZIP of
+the polygon that contains them (``pipeline.zip_assignment``). Account
+files without coordinate columns keep their cleaned postal code.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+import logging
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import pandas as pd
+from openpyxl import Workbook
+from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+from pipeline.constants import (
+    DEFAULT_BRANCH_DEFINITIONS,
+    DEFAULT_PHOENIX_ACCOUNTS,
+    DEFAULT_PHOENIX_WORKBOOK,
+    DEFAULT_TUCSON_ACCOUNTS,
+    DEFAULT_TUCSON_MAPPING,
+    OUT_MASTER_REPORT,
+    OUT_MASTER_WORKBOOK,
+    OUT_PHOENIX_MAP_CSV,
+    OUT_PHOENIX_MAP_JSON,
+    OUT_TUCSON_MAP_CSV,
+    OUT_TUCSON_MAP_JSON,
+    PHOENIX_ACCOUNTS_COLS,
+    PHOENIX_ZIP_DETAIL_COLS,
+    SHEET_TUCSON_INTEGRATION,
+    SHEET_ZIP_CODE_DETAIL,
+    TUCSON_ACCOUNTS_COLS,
+    TUCSON_MAPPING_COLS,
+)
+from pipeline.encoding import concat_master_frames, decode_master_frame
+from pipeline.summary import AssignmentMetrics, compute_assignment_metrics
+from pipeline.utils import (
+    clean_zip_code,
+    load_branch_definitions,
+    load_csv_safe,
+    load_excel_file_safe,
+    load_excel_safe,
+    resolve_path,
+    save_csv_safe,
+    save_json_safe,
+    save_text_safe,
+    save_workbook_safe,
+    validate_dataframe,
+)
+from pipeline.zip_assignment import COL_ZIP_CLEAN, assign_zip_codes
+
+if TYPE_CHECKING:
+    from pipeline.geocode_validation import ZipPolygons
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class MasterInputPaths:
+    """Input files for the master assignment pipeline."""
+
+    config: Path
+    phoenix_workbook: Path
+    phoenix_accounts: Path
+    tucson_accounts: Path
+    tucson_mapping: Path
+
+    @classmethod
+    def from_data_root(
+        cls,
+        data_root: Path,
+        *,
+        config: str | Path = DEFAULT_BRANCH_DEFINITIONS,
+        phoenix_workbook: str | Path = DEFAULT_PHOENIX_WORKBOOK,
+        phoenix_accounts: str | Path = DEFAULT_PHOENIX_ACCOUNTS,
+        tucson_accounts: str | Path = DEFAULT_TUCSON_ACCOUNTS,
+        tucson_mapping: str | Path = DEFAULT_TUCSON_MAPPING,
+    ) -> MasterInputPaths:
+        return cls(
+            config=resolve_path(data_root, config),
+            phoenix_workbook=resolve_path(data_root, phoenix_workbook),
+            phoenix_accounts=resolve_path(data_root, phoenix_accounts),
+            tucson_accounts=resolve_path(data_root, tucson_accounts),
+            tucson_mapping=resolve_path(data_root, tucson_mapping),
+        )
+
+    def files(self) -> list[Path]:
+        return [
+            self.config,
+            self.phoenix_workbook,
+            self.phoenix_accounts,
+            self.tucson_accounts,
+            self.tucson_mapping,
+        ]
+
+
+@dataclass(frozen=True)
+class MasterInputs:
+    """Parsed and cleaned inputs plus the lookup tables built from them."""
+
+    valid_areas: set[str]
+    phoenix_zip_mapping: pd.DataFrame
+    zip_to_area: dict[str, dict[str, str]]
+    unknown_areas: list[str]
+    tucson_peripheral_zips: set[str]
+    phoenix_accounts: pd.DataFrame
+    tucson_accounts: pd.DataFrame
+    tucson_mapping: pd.DataFrame
+    customer_to_branch: dict[object, dict[str, object]]
+
+
+@dataclass(frozen=True)
+class MasterAssignments:
+    """Per-market assignment frames, the standardized master and its metrics."""
+
+    phoenix_master: pd.DataFrame
+    tucson_master: pd.DataFrame
+    master_accounts: pd.DataFrame
+    account_source: list[str]
+    metrics: AssignmentMetrics
+
+
+@dataclass(frozen=True)
+class MasterOutputs:
+    workbook: Path
+    phoenix_map_json: Path
+    phoenix_map_csv: Path
+    tucson_map_json: Path
+    tucson_map_csv: Path
+    report: Path
+    generated_at: pd.Timestamp = field(default_factory=pd.Timestamp.now)
+
+    def files(self) -> list[Path]:
+        return [
+            self.workbook,
+            self.phoenix_map_json,
+            self.phoenix_map_csv,
+            self.tucson_map_json,
+            self.tucson_map_csv,
+            self.report,
+        ]
+
+
+# ---------------------------------------------------------------------------
+# Load
+# ---------------------------------------------------------------------------
+
+def load_valid_areas(branch_definitions: dict) -> set[str]:
+    """Territory area names declared for Arizona in branch_definitions.json."""
+    arizona_config = branch_definitions.get("locations", {}).get("arizona", {})
+    return {
+        territory.get("area")
+        for territory in arizona_config.get("territories", [])
+        if isinstance(territory, dict)
+    }
+
+
+def load_phoenix_zip_mapping(workbook: Path) -> pd.DataFrame:
+    zip_mapping = load_excel_safe(workbook, sheet_name=SHEET_ZIP_CODE_DETAIL)
+    validate_dataframe(zip_mapping, PHOENIX_ZIP_DETAIL_COLS, context="Phoenix ZIP mapping")
+    zip_mapping["ShippingPostalCode"] = clean_zip_code(zip_mapping["ShippingPostalCode"])
+    return zip_mapping
+
+
+def build_zip_to_area(
+    zip_mapping: pd.DataFrame,
+    valid_areas: set[str],
+) -> tuple[dict[str, dict[str, str]], list[str]]:
+    """Map ZIP -> {area, source}; also return areas unknown to the config."""
+    zip_to_area: dict[str, dict[str, str]] = {}
+    unknown_areas: list[str] = []
+    for zip_value, area_value, source_value in zip(
+        zip_mapping["ShippingPostalCode"],
+        zip_mapping["ConsolidatedArea"],
+        zip_mapping["Source"],
+    ):
+        zip_code = str(zip_value).strip()
+        area = str(area_value).strip()
+        source = str(source_value).strip()
+        if valid_areas and area not in valid_areas:
+            unknown_areas.append(area)
+        zip_to_area[zip_code] = {
+            'area': area,
+            'source': source,
+        }
+    return zip_to_area, unknown_areas
+
+
+def load_tucson_peripheral_zips(workbook: Path) -> set[str]:
+    tucson_integration = load_excel_safe(workbook, sheet_name=SHEET_TUCSON_INTEGRATION)
+    validate_dataframe(
+        tucson_integration,
+        ['ShippingPostalCode'],
+        context="Tucson integration sheet",
+    )
+    zips = clean_zip_code(tucson_integration['ShippingPostalCode'])
+    return set(zips.astype(str).str.strip())
+
+
+def build_customer_to_branch(tucson_mapping: pd.DataFrame) -> dict[object, dict[str, object]]:
+    zips = (
+        tucson_mapping['ZIP_Clean']
+        if 'ZIP_Clean' in tucson_mapping.columns
+        else pd.Series('', index=tucson_mapping.index)
+    )
+    return {
+        customer_num: {'branch': branch, 'zip': str(zip_code).strip()}
+        for customer_num, branch, zip_code in zip(
+            tucson_mapping['Customer_Number__c'],
+            tucson_mapping['Proposed_Branch'],
+            zips,
+        )
+    }
+
+
+def account_zip_codes(accounts: pd.DataFrame, zip_polygons: ZipPolygons | None, context: str) -> pd.Series:
+    """Cleaned ``ShippingPostalCode``, replaced by the containing polygon's ZIP when ``zip_polygons`` is given."""
+    postal = clean_zip_code(accounts['ShippingPostalCode'])
+    if zip_polygons is None:
+        return postal
+    if not {'Latitude', 'Longitude'} <= set(accounts.columns):
+        logger.warning("%s have no Latitude/Longitude columns; keeping their postal codes.", context)
+        return postal
+    assigned, report = assign_zip_codes(accounts, zip_polygons, override=True)
+    logger.info("%s: %d of %d located ZIPs corrected from polygons", context, report.overridden, report.located)
+    return pd.Series(assigned[COL_ZIP_CLEAN].to_numpy(), index=accounts.index, dtype="string")
+
+
+def load_master_inputs(paths: MasterInputPaths, *, zip_polygons: ZipPolygons | None = None) -> MasterInputs:
+    """Read, validate and index every input file.
+
+    With ``zip_polygons``, account ZIPs are corrected from their coordinates
+    (``account_zip_codes``) before any assignment reads them.
+    """
+    valid_areas = load_valid_areas(load_branch_definitions(paths.config))
+
+    phoenix_zip_mapping = load_phoenix_zip_mapping(paths.phoenix_workbook)
+    zip_to_area, unknown_areas = build_zip_to_area(phoenix_zip_mapping, valid_areas)
+    tucson_peripheral_zips = load_tucson_peripheral_zips(paths.phoenix_workbook)
+
+    phoenix_accounts = load_excel_file_safe(paths.phoenix_accounts, "Phoenix accounts")
+    validate_dataframe(phoenix_accounts, PHOENIX_ACCOUNTS_COLS, context="Phoenix accounts")
+    phoenix_accounts['ZIP_Clean'] = account_zip_codes(phoenix_accounts, zip_polygons, "Phoenix accounts")
+
+    tucson_accounts = load_csv_safe(paths.tucson_accounts, "Tucson accounts")
+    validate_dataframe(tucson_accounts, TUCSON_ACCOUNTS_COLS, context="Tucson accounts")
+    tucson_accounts['ZIP_Clean'] = account_zip_codes(tucson_accounts, zip_polygons, "Tucson accounts")
+
+    tucson_mapping = load_csv_safe(paths.tucson_mapping, "Tucson mapping")
+    validate_dataframe(tucson_mapping, TUCSON_MAPPING_COLS, context="Tucson mapping")
+    if 'ZIP_Clean' not in tucson_mapping.columns and 'ShippingPostalCode' in tucson_mapping.columns:
+        tucson_mapping['ZIP_Clean'] = clean_zip_code(tucson_mapping['ShippingPostalCode'])
+
+    return MasterInputs(
+        valid_areas=valid_areas,
+        phoenix_zip_mapping=phoenix_zip_mapping,
+        zip_to_area=zip_to_area,
+        unknown_areas=unknown_areas,
+        tucson_peripheral_zips=tucson_peripheral_zips,
+        phoenix_accounts=phoenix_accounts,
+        tucson_accounts=tucson_accounts,
+        tucson_mapping=tucson_mapping,
+        customer_to_branch=build_customer_to_branch(tucson_mapping),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Assign
+# ---------------------------------------------------------------------------
+
+def assign_phoenix_accounts(
+    phoenix_accounts: pd.DataFrame,
+    zip_to_area: dict[str, dict[str, str]],
+) -> pd.DataFrame:
+    """Attach branch/area/market/flag columns to Phoenix accounts by ZIP."""
+
+    def map_phoenix_account(row: pd.Series) -> pd.Series:
+        zip_code = row['ZIP_Clean']
+        if zip_code in zip_to_area:
+            mapping = zip_to_area[zip_code]
+            return pd.Series({
+                'Branch_Assignment': f"Phoenix {mapping['area']}",
+                'Area': mapping['area'],
+                'Market': 'Phoenix',
+                'Special_Flag': 'Tucson-Associated (Phoenix East)' if mapping['source'] == 'Tucson-Unassigned' else ''
+            })
+        return pd.Series({
+            'Branch_Assignment': 'Unassigned',
+            'Area': 'Unassigned',
+            'Market': 'Phoenix',
+            'Special_Flag': 'Unassigned ZIP Code'
+        })
+
+    phoenix_assignments = phoenix_accounts.apply(map_phoenix_account, axis=1)
+    return pd.concat([phoenix_accounts, phoenix_assignments], axis=1)
+
+
+def assign_tucson_accounts(
+    tucson_accounts: pd.DataFrame,
+    customer_to_branch: dict[object, dict[str, object]],
+    tucson_peripheral_zips: set[str],
+) -> pd.DataFrame:
+    """Attach branch/area/market/flag columns to Tucson accounts."""
+
+    def map_tucson_account(row: pd.Series) -> pd.Series:
+        customer_num = row['Customer_Number__c']
+        zip_code = row['ZIP_Clean']
+
+        if zip_code in tucson_peripheral_zips:
+            return pd.Series({
+                'Branch_Assignment': 'Phoenix East',
+                'Area': 'East',
+                'Market': 'Phoenix',
+                'Special_Flag': 'Tucson-Associated (Phoenix East)'
+            })
+
+        if customer_num in customer_to_branch:
+            mapping = customer_to_branch[customer_num]
+            branch = mapping['branch']
+
+            if pd.notna(branch) and str(branch).strip():
+                if 'Branch 1' in str(branch):
+                    area_name = 'Area 1 - East & North'
+                elif 'Branch 2' in str(branch):
+                    area_name = 'Area 2 - West & Central'
+                else:
+                    area_name = 'Unassigned'
+
+                return pd.Series({
+                    'Branch_Assignment': f"Tucson {area_name}",
+                    'Area': area_name,
+                    'Market': 'Tucson',
+                    'Special_Flag': ''
+                })
+
+        return pd.Series({
+            'Branch_Assignment': 'Tucson Unassigned',
+            'Area': 'Unassigned',
+            'Market': 'Tucson',
+            'Special_Flag': 'No branch assignment found'
+        })
+
+    tucson_assignments = tucson_accounts.apply(map_tucson_account, axis=1)
+    return pd.concat([tucson_accounts, tucson_assignments], axis=1)
+
+
+def standardize_master(
+    phoenix_master: pd.DataFrame,
+    tucson_master: pd.DataFrame,
+) -> tuple[pd.DataFrame, list[str]]:
+    """Project both markets onto MASTER_SCHEMA; also return each row's source file.
+
+    The result uses the compact encoding from ``pipeline.encoding``
+    (categorical ``MASTER_CATEGORICAL_COLS``, bitmask Special_Flag), applied
+    to each market before the concat; ``decode_master_frame`` restores the
+    label columns.
+    """
+    phoenix_standardized = pd.DataFrame({
+        'Account_ID': phoenix_master['Display Name'],
+        'Customer_Number': '',
+        'Street_Address': phoenix_master['ShippingStreet'],
+        'City': phoenix_master['ShippingCity'],
+        'Zip_Code': phoenix_master['ZIP_Clean'],
+        'Status': 'Active',
+        'Market': phoenix_master['Market'],
+        'Branch_Assignment': phoenix_master['Branch_Assignment'],
+        'Area': phoenix_master['Area'],
+        'Service_Contract': phoenix_master.get('Service Contract Description', ''),
+        'Territory': phoenix_master.get('Territory', ''),
+        'Route': phoenix_master.get('Route Name', ''),
+        'Maintenance_Day': phoenix_master.get('Maintenance Plan Day of Week', ''),
+        'Special_Flag': phoenix_master['Special_Flag'],
+        'Email': phoenix_master.get('Invoice Bill To Email', '')
+    })
+
+    tucson_standardized = pd.DataFrame({
+        'Account_ID': tucson_master['Name'],
+        'Customer_Number': tucson_master['Customer_Number__c'],
+        'Street_Address': tucson_master.get('ShippingStreet', ''),
+        'City': tucson_master.get('ShippingCity', ''),
+        'Zip_Code': tucson_master['ZIP_Clean'],
+        'Status': tucson_master.get('Status', 'Active'),
+        'Market': tucson_master['Market'],
+        'Branch_Assignment': tucson_master['Branch_Assignment'],
+        'Area': tucson_master['Area'],
+        'Service_Contract': tucson_master.get('Name.1', ''),
+        'Territory': tucson_master.get('Short Branch Name', ''),
+        'Route': '',
+        'Maintenance_Day': '',
+        'Special_Flag': tucson_master['Special_Flag'],
+        'Email': ''
+    })
+
+    master_accounts = concat_master_frames([phoenix_standardized, tucson_standardized])
+    account_source = ['Phoenix'] * len(phoenix_standardized) + ['Tucson'] * len(tucson_standardized)
+    return master_accounts, account_source
+
+
+def build_master_assignments(inputs: MasterInputs) -> MasterAssignments:
+    """Assign every account and compute summary metrics."""
+    phoenix_master = assign_phoenix_accounts(inputs.phoenix_accounts, inputs.zip_to_area)
+    tucson_master = assign_tucson_accounts(
+        inputs.tucson_accounts,
+        inputs.customer_to_branch,
+        inputs.tucson_peripheral_zips,
+    )
+    master_accounts, account_source = standardize_master(phoenix_master, tucson_master)
+    metrics = compute_assignment_metrics(
+        master_accounts,
+        source=account_source,
+        markets=['Phoenix', 'Tucson'],
+    )
+    return MasterAssignments(
+        phoenix_master=phoenix_master,
+        tucson_master=tucson_master,
+        master_accounts=master_accounts,
+        account_source=account_source,
+        metrics=metrics,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def build_master_workbook(master_accounts: pd.DataFrame, metrics: AssignmentMetrics) -> Workbook:
+    """Formatted workbook: all accounts, per-market sheets and summary statistics."""
+    master_accounts = decode_master_frame(master_accounts)
+    summary_by_branch = metrics.by_branch
+    market_summary = metrics.by_market_area
+
+    wb = Workbook()
+
+    header_fill = PatternFill(start_color='366092', end_color='366092', fill_type='solid')
+    header_font = Font(color='FFFFFF', bold=True, size=11)
+    special_fill = PatternFill(start_color='FFF2CC', end_color='FFF2CC', fill_type='solid')
+    thin_border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    ws1 = wb.active
+    ws1.title = 'All Accounts'
+
+    for col_idx, col_name in enumerate(master_accounts.columns, 1):
+        cell = ws1.cell(row=1, column=col_idx, value=col_name)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        cell.border = thin_border
+
+    for row_idx, row_data in enumerate(master_accounts.itertuples(index=False), 2):
+        for col_idx, value in enumerate(row_data, 1):
+            cell = ws1.cell(row=row_idx, column=col_idx, value=value)
+            cell.border = thin_border
+            if col_idx == master_accounts.columns.get_loc('Special_Flag') + 1:
+                if 'Tucson-Associated' in str(value):
+                    cell.fill = special_fill
+
+    for column in ws1.columns:
+        max_length = 0
+        column_letter = column[0].column_letter
+        for cell in column:
+            try:
+                max_length = max(max_length, len(str(cell.value)))
+            except Exception:
+                continue
+        adjusted_width = min(max_length + 2, 50)
+        ws1.column_dimensions[column_letter].width = adjusted_width
+
+    ws2 = wb.create_sheet('Phoenix Accounts')
+    phoenix_data = master_accounts[master_accounts['Market'] == 'Phoenix']
+    for col_idx, col_name in enumerate(phoenix_data.columns, 1):
+        cell = ws2.cell(row=1, column=col_idx, value=col_name)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        cell.border = thin_border
+
+    for row_idx, row_data in enumerate(phoenix_data.itertuples(index=False), 2):
+        for col_idx, value in enumerate(row_data, 1):
+            cell = ws2.cell(row=row_idx, column=col_idx, value=value)
+            cell.border = thin_border
+
+    ws3 = wb.create_sheet('Tucson Accounts')
+    tucson_data = master_accounts[master_accounts['Market'] == 'Tucson']
+    for col_idx, col_name in enumerate(tucson_data.columns, 1):
+        cell = ws3.cell(row=1, column=col_idx, value=col_name)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal='center', vertical='center')
+        cell.border = thin_border
+
+    for row_idx, row_data in enumerate(tucson_data.itertuples(index=False), 2):
+        for col_idx, value in enumerate(row_data, 1):
+            cell = ws3.cell(row=row_idx, column=col_idx, value=value)
+            cell.border = thin_border
+
+    ws4 = wb.create_sheet('Summary Statistics')
+    ws4.cell(row=1, column=1, value='SUMMARY BY BRANCH ASSIGNMENT').font = Font(bold=True, size=14)
+    ws4.merge_cells('A1:C1')
+
+    row_offset = 3
+    for col_idx, col_name in enumerate(summary_by_branch.columns, 1):
+        cell = ws4.cell(row=row_offset, column=col_idx, value=col_name)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.border = thin_border
+
+    for row_idx, row_data in enumerate(summary_by_branch.itertuples(index=False), row_offset + 1):
+        for col_idx, value in enumerate(row_data, 1):
+            cell = ws4.cell(row=row_idx, column=col_idx, value=value)
+            cell.border = thin_border
+
+    row_offset = row_offset + len(summary_by_branch) + 3
+    ws4.cell(row=row_offset, column=1, value='SUMMARY BY MARKET AND AREA').font = Font(bold=True, size=14)
+    ws4.merge_cells(f'A{row_offset}:C{row_offset}')
+
+    row_offset += 2
+    for col_idx, col_name in enumerate(market_summary.columns, 1):
+        cell = ws4.cell(row=row_offset, column=col_idx, value=col_name)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.border = thin_border
+
+    for row_idx, row_data in enumerate(market_summary.itertuples(index=False), row_offset + 1):
+        for col_idx, value in enumerate(row_data, 1):
+            cell = ws4.cell(row=row_idx, column=col_idx, value=value)
+            cell.border = thin_border
+
+    return wb
+
+
+def render_master_report(
+    assignments: MasterAssignments,
+    inputs: MasterInputs,
+    *,
+    generated_at: pd.Timestamp | None = None,
+) -> str:
+    """Markdown summary report for the master assignment run."""
+    metrics = assignments.metrics
+    special_flag_summary = metrics.special_flags
+    phoenix_map_data = metrics.zip_map('Phoenix')
+    tucson_map_data = metrics.zip_map('Tucson')
+    generated_at = generated_at if generated_at is not None else pd.Timestamp.now()
+
+    # \x20 keeps the report's trailing spaces from being stripped by editors.
+    return f"""# MASTER ACCOUNT ASSIGNMENT REPORT
+Generated: {generated_at.strftime('%Y-%m-%d %H:%M:%S')}
+
+## Executive Summary
+
+This report documents the comprehensive account assignment process for the swimming pool service\x20
+company's branch reorganization initiative in Phoenix and Tucson markets.
+
+### Total Accounts Processed
+- **Total Accounts**: {metrics.total_accounts:,}
+- **Phoenix Market**: {metrics.source_counts.get('Phoenix', 0):,}
+- **Tucson Market**: {metrics.source_counts.get('Tucson', 0):,}
+
+### Phoenix 3-Area Structure
+{metrics.branches_for_market('Phoenix').to_string(index=False)}
+
+### Tucson 2-Area Structure
+{metrics.branches_for_market('Tucson').to_string(index=False)}
+
+### Special Assignments
+{special_flag_summary.to_string(index=False) if len(special_flag_summary) > 0 else 'No special assignments'}
+
+## Assignment Process
+
+### 1. Phoenix Assignments
+- Loaded {len(inputs.phoenix_accounts)} active Phoenix accounts
+- Matched accounts to branch areas based on ZIP code
+- Used the Phoenix 3-Branch Consolidation analysis for ZIP code to area mappings
+- Successfully assigned {metrics.source_assigned.get('Phoenix', 0)} accounts
+- {metrics.source_unassigned.get('Phoenix', 0)} unassigned accounts (missing ZIP codes)
+
+### 2. Tucson Assignments
+- Loaded {len(inputs.tucson_accounts)} active Tucson accounts
+- Matched accounts using the Tucson branch decentralization plan
+- Identified {len(inputs.tucson_peripheral_zips)} peripheral ZIP codes reassigned to Phoenix East
+- Successfully assigned {metrics.source_assigned.get('Tucson', 0)} accounts
+
+### 3. Special Cases
+- **Tucson-Associated Accounts in Phoenix East**: {metrics.tucson_associated_accounts} accounts
+  - These are accounts in peripheral areas (Casa Grande, Maricopa, San Tan Valley, etc.)\x20
+  - Assigned to Phoenix East Area for operational purposes
+  - Flagged as Tucson-associated for tracking
+
+## Deliverables
+
+### 1. Master Account Assignment File
+**File**: `Master_Account_Branch_Assignments.xlsx`
+
+Contains four sheets:
+- **All Accounts**: Complete list of all {metrics.total_accounts} accounts
+- **Phoenix Accounts**: {metrics.market_counts.get('Phoenix', 0)} Phoenix market accounts
+- **Tucson Accounts**: {metrics.market_counts.get('Tucson', 0)} Tucson market accounts
+- **Summary Statistics**: Aggregated statistics by branch and market
+
+### 2. Map Visualization Data
+**Phoenix Data**:\x20
+- `Phoenix_Zip_Code_Map_Data.json` ({len(phoenix_map_data)} ZIP codes)
+- `Phoenix_Zip_Code_Map_Data.csv`
+
+**Tucson Data**:
+- `Tucson_Zip_Code_Map_Data.json` ({len(tucson_map_data)} ZIP codes)
+- `Tucson_Zip_Code_Map_Data.csv`
+
+These files contain:
+- ZIP code
+- Assigned area
+- Number of active accounts
+- Special flag counts
+
+## Data Quality Notes
+
+### Missing Data
+- {metrics.missing['Email']} accounts missing email addresses
+- {metrics.missing['Route']} accounts missing route assignments
+- {metrics.missing['Maintenance_Day']} accounts missing maintenance day
+
+### Unassigned Accounts
+- {metrics.unassigned_branch_accounts} accounts without proper branch assignments
+- These accounts require manual review and assignment
+
+## Recommendations
+
+1. **Review Unassigned Accounts**: Investigate accounts with missing ZIP codes or branch assignments
+2. **Validate Special Assignments**: Review Tucson-associated accounts assigned to Phoenix East
+3. **Update Route Information**: Many accounts are missing route assignments
+4. **Email Collection**: Improve email address collection for customer communication
+
+## Next Steps
+
+1. Review and validate the master assignment file
+2. Use map visualization data to create geographic territory maps
+3. Communicate new assignments to field teams
+4. Update CRM systems with new branch assignments
+5. Monitor retention rates by new branch structure
+"""
+
+
+def export_map_data(
+    assignments: MasterAssignments,
+    output_dir: Path,
+) -> tuple[Path, Path, Path, Path]:
+    """Write per-market ZIP map JSON/CSV files."""
+    paths: list[Path] = []
+    for market, json_name, csv_name in (
+        ('Phoenix', OUT_PHOENIX_MAP_JSON, OUT_PHOENIX_MAP_CSV),
+        ('Tucson', OUT_TUCSON_MAP_JSON, OUT_TUCSON_MAP_CSV),
+    ):
+        map_data = assignments.metrics.zip_map(market)
+        json_path = output_dir / json_name
+        csv_path = output_dir / csv_name
+        save_json_safe(map_data.to_dict(orient='records'), json_path, f"{market} map data")
+        save_csv_safe(map_data, csv_path, f"{market} map data")
+        paths.extend([json_path, csv_path])
+    return paths[0], paths[1], paths[2], paths[3]
+
+
+def export_master_outputs(
+    assignments: MasterAssignments,
+    inputs: MasterInputs,
+    output_dir: Path,
+) -> MasterOutputs:
+    """Write the workbook, map files and report into ``output_dir``."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    workbook_path = output_dir / OUT_MASTER_WORKBOOK
+    workbook = build_master_workbook(assignments.master_accounts, assignments.metrics)
+    save_workbook_safe(workbook, workbook_path, "master assignments")
+
+    phoenix_json, phoenix_csv, tucson_json, tucson_csv = export_map_data(assignments, output_dir)
+
+    generated_at = pd.Timestamp.now()
+    report_path = output_dir / OUT_MASTER_REPORT
+    report = render_master_report(assignments, inputs, generated_at=generated_at)
+    save_text_safe(report_path, report, "master assignment report")
+
+    return MasterOutputs(
+        workbook=workbook_path,
+        phoenix_map_json=phoenix_json,
+        phoenix_map_csv=phoenix_csv,
+        tucson_map_json=tucson_json,
+        tucson_map_csv=tucson_csv,
+        report=report_path,
+        generated_at=generated_at,
+    )
+
+
+def run_master_pipeline(
+    paths: MasterInputPaths,
+    output_dir: Path,
+    *,
+    zip_polygons: ZipPolygons | None = None,
+) -> MasterOutputs:
+    """Load, assign and export in one call."""
+    inputs = load_master_inputs(paths, zip_polygons=zip_polygons)
+    assignments = build_master_assignments(inputs)
+    return export_master_outputs(assignments, inputs, output_dir)
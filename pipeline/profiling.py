@@ -0,0 +1,262 @@
+"""Per-stage instrumentation for the pipeline scripts.
+
+``StageProfiler.stage`` wraps one pipeline step and records wall time, CPU
+time, tracemalloc peak and (optionally) the number of rows it handled:
+
+    profiler = StageProfiler(enabled=args.profile, cprofile=args.profile_stacks)
+    with profiler.stage("assign_phoenix") as stage:
+        phoenix_master = assign_phoenix_accounts(...)
+        stage.rows = len(phoenix_master)
+    profiler.write_json(output_dir / OUT_MASTER_PROFILE_JSON)
+
+A disabled profiler still yields a stage handle but measures nothing, so
+scripts can wrap their steps unconditionally.
+
+With ``cprofile=True`` each top-level stage also runs under ``cProfile``;
+``write_collapsed`` turns the call graph into collapsed-stack lines
+(``stage;caller;callee <microseconds>``) that flamegraph.pl, speedscope or
+inferno render directly. cProfile only records caller -> callee edges, so
+time is split across call paths in proportion to each edge's cumulative
+time.
+"""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+import cProfile
+from dataclasses import asdict, dataclass, field
+import json
+import pstats
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Iterator
+
+from pipeline.utils import save_text_safe
+
+MAX_STACK_DEPTH: int = 64
+MIN_STACK_FRACTION: float = 1e-4
+
+# pstats function key: (filename, line number, function name)
+FunctionKey = tuple[str, int, str]
+
+
+@dataclass
+class StageRecord:
+    """Measurements for one profiled stage."""
+
+    name: str
+    depth: int
+    wall_s: float = 0.0
+    cpu_s: float = 0.0
+    peak_bytes: int | None = None
+    alloc_bytes: int | None = None
+    rows: int | None = None
+
+    @property
+    def rows_per_s(self) -> float | None:
+        if self.rows is None or self.wall_s <= 0:
+            return None
+        return self.rows / self.wall_s
+
+
+@dataclass
+class _Frame:
+    record: StageRecord
+    wall_start: float
+    cpu_start: float
+    mem_start: int = 0
+    child_peak: int = 0
+    profile: cProfile.Profile | None = None
+
+
+@dataclass
+class StageProfiler:
+    """Collects ``StageRecord`` entries for nested ``with profiler.stage(...)`` blocks."""
+
+    enabled: bool = True
+    trace_memory: bool = True
+    cprofile: bool = False
+    records: list[StageRecord] = field(default_factory=list)
+    _stack: list[_Frame] = field(default_factory=list, repr=False)
+    _stats: dict[str, pstats.Stats] = field(default_factory=dict, repr=False)
+    _started_tracemalloc: bool = field(default=False, repr=False)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageRecord]:
+        record = StageRecord(name=name, depth=len(self._stack))
+        if not self.enabled:
+            yield record
+            return
+
+        self.records.append(record)
+        frame = self._enter(record)
+        try:
+            yield record
+        finally:
+            self._exit(frame)
+
+    # ------------------------------------------------------------------
+    # Measurement
+    # ------------------------------------------------------------------
+
+    def _enter(self, record: StageRecord) -> _Frame:
+        mem_start = 0
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracemalloc = True
+            if self._stack:
+                # Fold the parent's peak so far before resetting it for the child.
+                parent = self._stack[-1]
+                parent.child_peak = max(parent.child_peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+            mem_start = tracemalloc.get_traced_memory()[0]
+
+        profile = None
+        if self.cprofile and not self._stack:
+            profile = cProfile.Profile()
+
+        frame = _Frame(
+            record=record,
+            wall_start=time.perf_counter(),
+            cpu_start=time.process_time(),
+            mem_start=mem_start,
+            profile=profile,
+        )
+        self._stack.append(frame)
+        if profile is not None:
+            profile.enable()
+        return frame
+
+    def _exit(self, frame: _Frame) -> None:
+        if frame.profile is not None:
+            frame.profile.disable()
+
+        record = frame.record
+        record.wall_s = time.perf_counter() - frame.wall_start
+        record.cpu_s = time.process_time() - frame.cpu_start
+
+        self._stack.pop()
+        if self.trace_memory and tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            peak = max(peak, frame.child_peak)
+            record.peak_bytes = max(peak - frame.mem_start, 0)
+            record.alloc_bytes = current - frame.mem_start
+            if self._stack:
+                parent = self._stack[-1]
+                parent.child_peak = max(parent.child_peak, peak)
+            elif self._started_tracemalloc:
+                tracemalloc.stop()
+                self._started_tracemalloc = False
+
+        if frame.profile is not None:
+            stats = pstats.Stats(frame.profile)
+            if record.name in self._stats:
+                self._stats[record.name].add(stats)
+            else:
+                self._stats[record.name] = stats
+
+    # ------------------------------------------------------------------
+    # Reporting
+    # ------------------------------------------------------------------
+
+    def to_dict(self) -> dict[str, object]:
+        stages = []
+        for record in self.records:
+            entry = asdict(record)
+            entry["rows_per_s"] = record.rows_per_s
+            stages.append(entry)
+        top_level = [record for record in self.records if record.depth == 0]
+        return {
+            "total_wall_s": sum(record.wall_s for record in top_level),
+            "total_cpu_s": sum(record.cpu_s for record in top_level),
+            "stages": stages,
+        }
+
+    def format_table(self) -> str:
+        lines = [f"{'Stage':<32} {'Wall s':>9} {'CPU s':>9} {'Peak MB':>9} {'Rows':>9}"]
+        for record in self.records:
+            peak = "-" if record.peak_bytes is None else f"{record.peak_bytes / 1_048_576:.1f}"
+            rows = "-" if record.rows is None else str(record.rows)
+            name = "  " * record.depth + record.name
+            lines.append(
+                f"{name:<32} {record.wall_s:>9.3f} {record.cpu_s:>9.3f} {peak:>9} {rows:>9}"
+            )
+        return "\n".join(lines)
+
+    def write_json(self, path: Path) -> None:
+        save_text_safe(path, json.dumps(self.to_dict(), indent=2) + "\n", "profile")
+
+    def collapsed_stacks(self) -> list[str]:
+        lines: list[str] = []
+        for stage_name, stats in self._stats.items():
+            lines.extend(collapse_stats(stats, prefix=stage_name))
+        return lines
+
+    def write_collapsed(self, path: Path) -> None:
+        save_text_safe(path, "".join(f"{line}\n" for line in self.collapsed_stacks()), "profile stacks")
+
+
+def _label(key: FunctionKey) -> str:
+    filename, line, name = key
+    if filename == "~":
+        return name  # built-in, e.g. "<built-in method time.perf_counter>"
+    return f"{name} ({Path(filename).name}:{line})"
+
+
+def collapse_stats(
+    stats: pstats.Stats,
+    *,
+    prefix: str = "",
+    min_fraction: float = MIN_STACK_FRACTION,
+) -> list[str]:
+    """Convert cProfile call-graph stats into collapsed-stack lines.
+
+    Each function's self time is attributed to the call paths reaching it
+    in proportion to the cumulative time of the edges along that path.
+    Recursive cycles are cut at their first repeat. A call graph can have
+    exponentially many paths, so paths carrying less than ``min_fraction``
+    of the total time are folded into their caller's self time.
+    """
+    raw: dict[FunctionKey, tuple] = stats.stats  # type: ignore[attr-defined]
+    callees: dict[FunctionKey, dict[FunctionKey, float]] = {}
+    for callee, (_, _, _, _, callers) in raw.items():
+        for caller, edge in callers.items():
+            if caller in raw:
+                callees.setdefault(caller, {})[callee] = edge[3]
+
+    roots = [
+        key for key, (_, _, _, _, callers) in raw.items()
+        if not any(caller in raw for caller in callers)
+    ]
+    threshold = sum(raw[root][3] for root in roots) * min_fraction
+
+    totals: dict[str, int] = {}
+
+    def walk(key: FunctionKey, path: tuple[str, ...], on_path: frozenset, inclusive: float) -> None:
+        _, _, tottime, cumtime, _ = raw[key]
+        fraction = inclusive / cumtime if cumtime > 0 else 0.0
+        path = path + (_label(key),)
+        self_time = tottime * fraction
+
+        on_path = on_path | {key}
+        for child, edge_cumtime in callees.get(key, {}).items():
+            if child in on_path:
+                continue
+            child_time = edge_cumtime * fraction
+            if child_time < threshold or len(path) >= MAX_STACK_DEPTH:
+                self_time += child_time
+            else:
+                walk(child, path, on_path, child_time)
+
+        self_us = int(round(self_time * 1_000_000))
+        if self_us > 0:
+            stack = ";".join(path)
+            totals[stack] = totals.get(stack, 0) + self_us
+
+    base = (prefix,) if prefix else ()
+    for root in roots:
+        walk(root, base, frozenset(), raw[root][3])
+
+    return [f"{stack} {value}" for stack, value in sorted(totals.items())]
@@ -0,0 +1,323 @@
+"""Rebalance stops between technicians toward per-day capacity targets.
+
+Routes are rebalanced by hand today (``miami-radical-reroute.json``).
+``balance_routes`` does it as a greedy local search over technician-day
+groups. Each service day has a stop target and a revenue target: the mean
+per technician that day plus ``tolerance``, unless absolute
+``max_stops``/``max_revenue`` are given. While a group is over target, its
+movable stops are offered to the technicians of their ``neighbours``
+nearest stops on the same day (``SpatialIndex`` per day). A move is
+feasible when the receiving group stays within its targets, and the move
+with the smallest detour (distance to the receiving group's centroid
+minus distance to the current one) is applied. Group loads and centroid
+sums live in flat arrays updated per move, and candidate moves for a
+group are scored in one vectorized pass.
+
+Only single-day stops of assigned technicians move: a multi-day account
+has one technician field for all its days, and ``Unassigned``/``Unknown``
+stops have no route to balance. Because targets are per day and pinned
+multi-day stops can keep a technician-day over target, the result is
+judged per day (``BalanceResult.day_summary``: groups over target and
+stop spread, before and after) rather than by the overall maximum.
+``moves`` is the search log; ``changes``/``reassignments`` report the net
+change per stop, so a stop that ends up back with its technician is not
+listed.
+
+    routes = RouteAssignments.read(public_dir / "route-assignments.json")
+    result = balance_routes(routes.stops, tolerance=0.1)
+    write_records(path, routes.reassigned(result.reassignments()))
+
+    python -m pipeline.route_balance phoenix_territory_map/nextjs_space/public/route-assignments.json
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import DEFAULT_BALANCE_NEIGHBOURS, DEFAULT_BALANCE_TOLERANCE, DEFAULT_PIPELINE_OUTPUT_DIR
+from pipeline.routes import UNASSIGNED_TECHNICIAN, UNKNOWN_DAY, WEEKDAYS, RouteAssignments, write_records
+from pipeline.spatial_index import SpatialIndex, haversine_miles
+from pipeline.utils import resolve_path, save_csv_safe
+
+
+@dataclass(frozen=True)
+class RouteMove:
+    """One stop handed from one technician to another on its service day."""
+
+    stop: int
+    record: int
+    customer: object
+    day: str
+    from_technician: str
+    to_technician: str
+    detour_miles: float
+
+
+@dataclass(frozen=True)
+class BalanceResult:
+    technicians: np.ndarray  # technician per stop after balancing
+    moves: list[RouteMove]  # every move applied, in order
+    before: pd.DataFrame
+    after: pd.DataFrame
+    targets: pd.DataFrame  # day, maxStops, maxRevenue
+
+    def net_moves(self) -> list[RouteMove]:
+        """One move per stop from its original to its final technician (detours summed).
+
+        Stops that were moved and ended up back with their original
+        technician are left out.
+        """
+        net: dict[int, RouteMove] = {}
+        for move in self.moves:
+            first = net.get(move.stop)
+            if first is not None:
+                move = RouteMove(
+                    stop=move.stop,
+                    record=move.record,
+                    customer=move.customer,
+                    day=move.day,
+                    from_technician=first.from_technician,
+                    to_technician=move.to_technician,
+                    detour_miles=first.detour_miles + move.detour_miles,
+                )
+            net[move.stop] = move
+        return [move for move in net.values() if move.from_technician != move.to_technician]
+
+    def reassignments(self) -> dict[int, str]:
+        """``{record: technician}`` for ``RouteAssignments.reassigned``."""
+        return {move.record: move.to_technician for move in self.net_moves()}
+
+    def changes(self) -> pd.DataFrame:
+        return pd.DataFrame(
+            [
+                {
+                    "customerNumber": move.customer,
+                    "day": move.day,
+                    "fromTechnician": move.from_technician,
+                    "toTechnician": move.to_technician,
+                    "detourMiles": round(move.detour_miles, 2),
+                }
+                for move in self.net_moves()
+            ],
+            columns=["customerNumber", "day", "fromTechnician", "toTechnician", "detourMiles"],
+        )
+
+    def day_summary(self) -> pd.DataFrame:
+        """Per day: technicians, targets, groups over target and stop spread, before and after.
+
+        Spread is ``(max - min) / mean`` stops per technician that day.
+        """
+        rows = []
+        for target in self.targets.itertuples(index=False):
+            row = {"day": target.day, "maxStops": target.maxStops, "maxRevenue": target.maxRevenue}
+            for label, frame in (("Before", self.before), ("After", self.after)):
+                day = frame.loc[frame["day"] == target.day]
+                over = (day["stops"] > target.maxStops + 1e-9) | (day["revenue"] > target.maxRevenue + 1e-9)
+                row["technicians"] = len(day)
+                row[f"over{label}"] = int(over.sum())
+                mean = day["stops"].mean()
+                row[f"stopSpread{label}"] = float((day["stops"].max() - day["stops"].min()) / mean) if mean else 0.0
+            rows.append(row)
+        columns = [
+            "day", "technicians", "maxStops", "maxRevenue",
+            "overBefore", "overAfter", "stopSpreadBefore", "stopSpreadAfter",
+        ]
+        return pd.DataFrame(rows, columns=columns)
+
+
+def workload(stops: pd.DataFrame, technicians: np.ndarray | None = None) -> pd.DataFrame:
+    """Stops and revenue per (technician, day), excluding unassigned/unknown stops."""
+    frame = stops.assign(technician=stops["technician"] if technicians is None else technicians)
+    frame = frame.loc[(frame["technician"] != UNASSIGNED_TECHNICIAN) & (frame["day"] != UNKNOWN_DAY)]
+    return (
+        frame.groupby(["technician", "day"], sort=True)
+        .agg(stops=("record", "size"), revenue=("revenue", "sum"))
+        .reset_index()
+    )
+
+
+def _excess(load: np.ndarray, cap: np.ndarray) -> np.ndarray:
+    """Load over target as a fraction of the target (infinite over a zero target)."""
+    return np.divide(load - cap, cap, out=np.where(load > cap, np.inf, 0.0), where=cap > 0)
+
+
+def balance_routes(
+    stops: pd.DataFrame,
+    *,
+    tolerance: float = DEFAULT_BALANCE_TOLERANCE,
+    max_stops: float | None = None,
+    max_revenue: float | None = None,
+    neighbours: int = DEFAULT_BALANCE_NEIGHBOURS,
+    max_moves: int | None = None,
+) -> BalanceResult:
+    """Greedy nearby-stop moves until no technician-day exceeds its targets."""
+    if tolerance < 0:
+        raise ValueError("tolerance must be non-negative")
+    technician = stops["technician"].to_numpy(dtype=object)
+    day = stops["day"].to_numpy(dtype=object)
+    lat = stops["latitude"].to_numpy(dtype=np.float64)
+    lng = stops["longitude"].to_numpy(dtype=np.float64)
+    revenue = stops["revenue"].to_numpy(dtype=np.float64)
+    located = np.isfinite(lat) & np.isfinite(lng)
+    balanced = (technician != UNASSIGNED_TECHNICIAN) & (day != UNKNOWN_DAY)
+    movable = balanced & located & (stops["days"].to_numpy() == 1)
+
+    # Technician-day groups as flat arrays.
+    group_code = np.full(len(stops), -1, dtype=np.int64)
+    group_code[balanced], groups = pd.factorize(pd.MultiIndex.from_arrays([technician[balanced], day[balanced]]))
+    group_count = len(groups)
+    group_technician = np.array([key[0] for key in groups], dtype=object)
+    group_day = np.array([key[1] for key in groups], dtype=object)
+    in_group = group_code >= 0
+    load_stops = np.bincount(group_code[in_group], minlength=group_count).astype(np.float64)
+    load_revenue = np.bincount(group_code[in_group], weights=revenue[in_group], minlength=group_count)
+    centroid_weight = np.bincount(group_code[in_group & located], minlength=group_count).astype(np.float64)
+    sum_lat = np.bincount(group_code[in_group & located], weights=lat[in_group & located], minlength=group_count)
+    sum_lng = np.bincount(group_code[in_group & located], weights=lng[in_group & located], minlength=group_count)
+
+    cap_stops = np.empty(group_count)
+    cap_revenue = np.empty(group_count)
+    for name in set(group_day.tolist()):
+        members = group_day == name
+        cap_stops[members] = max_stops if max_stops is not None else load_stops[members].mean() * (1 + tolerance)
+        cap_revenue[members] = (
+            max_revenue if max_revenue is not None else load_revenue[members].mean() * (1 + tolerance)
+        )
+
+    # Nearby stops on the same day, as stop positions (-1 padding).
+    nearby = np.full((len(stops), neighbours), -1, dtype=np.int64)
+    for name in set(group_day.tolist()):
+        members = np.flatnonzero(balanced & located & (day == name))
+        index = SpatialIndex.build(lat[members], lng[members])
+        for stop in np.flatnonzero(movable & (day == name)):
+            rows, _ = index.nearest(lat[stop], lng[stop], neighbours + 1)
+            found = members[rows][members[rows] != stop][:neighbours]
+            nearby[stop, : len(found)] = found
+
+    before = workload(stops)
+    moves: list[RouteMove] = []
+    stuck = np.zeros(group_count, dtype=bool)
+    while max_moves is None or len(moves) < max_moves:
+        excess = np.maximum(_excess(load_stops, cap_stops), _excess(load_revenue, cap_revenue))
+        excess[stuck] = 0
+        source = int(np.argmax(excess)) if group_count else 0
+        if group_count == 0 or excess[source] <= 0:
+            break
+
+        candidates = np.flatnonzero(movable & (group_code == source))
+        pair_stop = np.repeat(candidates, neighbours)
+        pair_target = nearby[candidates].ravel()
+        valid = pair_target >= 0
+        pair_stop, pair_group = pair_stop[valid], group_code[pair_target[valid]]
+        feasible = (
+            (pair_group >= 0)
+            & (pair_group != source)
+            & (load_stops[np.maximum(pair_group, 0)] + 1 <= cap_stops[np.maximum(pair_group, 0)])
+            & (load_revenue[np.maximum(pair_group, 0)] + revenue[pair_stop] <= cap_revenue[np.maximum(pair_group, 0)])
+        )
+        if not feasible.any():
+            stuck[source] = True
+            continue
+        pair_stop, pair_group = pair_stop[feasible], pair_group[feasible]
+        to_target = haversine_miles(
+            lat[pair_stop], lng[pair_stop],
+            sum_lat[pair_group] / centroid_weight[pair_group], sum_lng[pair_group] / centroid_weight[pair_group],
+        )
+        to_source = haversine_miles(
+            lat[pair_stop], lng[pair_stop],
+            sum_lat[source] / centroid_weight[source], sum_lng[source] / centroid_weight[source],
+        )
+        detour = to_target - to_source
+        best = int(np.argmin(detour))
+        stop, target = int(pair_stop[best]), int(pair_group[best])
+
+        group_code[stop] = target
+        for group, sign in ((source, -1.0), (target, 1.0)):
+            load_stops[group] += sign
+            load_revenue[group] += sign * revenue[stop]
+            centroid_weight[group] += sign
+            sum_lat[group] += sign * lat[stop]
+            sum_lng[group] += sign * lng[stop]
+        moves.append(RouteMove(
+            stop=stop,
+            record=int(stops["record"].iat[stop]),
+            customer=stops["customer"].iat[stop],
+            day=str(day[stop]),
+            from_technician=str(group_technician[source]),
+            to_technician=str(group_technician[target]),
+            detour_miles=float(detour[best]),
+        ))
+        stuck[:] = False
+
+    technicians = technician.copy()
+    technicians[in_group] = group_technician[group_code[in_group]]
+    days = sorted(set(group_day.tolist()), key=lambda name: (WEEKDAYS.index(name) if name in WEEKDAYS else 7, name))
+    first_member = [int(np.flatnonzero(group_day == name)[0]) for name in days]
+    targets = pd.DataFrame({
+        "day": days,
+        "maxStops": cap_stops[first_member] if days else [],
+        "maxRevenue": cap_revenue[first_member] if days else [],
+    })
+    return BalanceResult(technicians, moves, before, workload(stops, technicians), targets)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Rebalance route stops between technicians per service day.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("input", help="Route assignments JSON.")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_BALANCE_TOLERANCE)
+    parser.add_argument("--max-stops", type=float, help="Absolute stop target per technician-day.")
+    parser.add_argument("--max-revenue", type=float, help="Absolute monthly revenue target per technician-day.")
+    parser.add_argument("--neighbours", type=int, default=DEFAULT_BALANCE_NEIGHBOURS)
+    parser.add_argument("--output",
+                        help="Rebalanced route assignments JSON (default: pipeline_outputs/<input>-balanced.json).")
+    parser.add_argument("--changes", help="CSV of moved stops (default: pipeline_outputs/<input>-changes.csv).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+    source = resolve_path(data_root, args.input)
+    output_dir = data_root / DEFAULT_PIPELINE_OUTPUT_DIR
+    output = resolve_path(data_root, args.output) if args.output else output_dir / f"{source.stem}-balanced.json"
+    changes = resolve_path(data_root, args.changes) if args.changes else output_dir / f"{source.stem}-changes.csv"
+    changes.parent.mkdir(parents=True, exist_ok=True)
+
+    routes = RouteAssignments.read(source)
+    result = balance_routes(
+        routes.stops,
+        tolerance=args.tolerance,
+        max_stops=args.max_stops,
+        max_revenue=args.max_revenue,
+        neighbours=args.neighbours,
+    )
+    write_records(output, routes.reassigned(result.reassignments()))
+    changed = result.changes()
+    save_csv_safe(changed, changes, "route change")
+    summary = result.day_summary()
+    over_before, over_after = int(summary["overBefore"].sum()), int(summary["overAfter"].sum())
+    print(
+        f"{len(changed)} stops reassigned; technician-days over their day's target "
+        f"{over_before} -> {over_after} of {int(summary['technicians'].sum())}"
+    )
+    for row in summary.itertuples(index=False):
+        print(
+            f"  {row.day}: over target {row.overBefore} -> {row.overAfter} of {row.technicians} "
+            f"(target {row.maxStops:.1f} stops, ${row.maxRevenue:,.0f}); "
+            f"stop spread {row.stopSpreadBefore:.2f} -> {row.stopSpreadAfter:.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""Overlapping technician routes per service day.
+
+``miami-route-conflicts.json`` lists routes that span several territories;
+routes of different technicians that cover the same ground on the same day
+are still spotted by eye on the map. ``route_hulls`` builds the convex
+hull and bounding box of every (technician, day) route of
+``RouteAssignments.stops`` in local equirectangular miles.
+``route_conflicts`` then finds the overlapping pairs in two passes:
+
+- a sweep over bounding boxes sorted by west edge. A box can only overlap
+  the boxes whose west edge lies before its east edge, which is one
+  ``searchsorted`` per day, and the north/south overlap test is
+  vectorized over the resulting candidate pairs;
+- exact convex hull intersection (polygon clipping) only on the candidate
+  pairs, plus a count of each route's stops inside the other's hull.
+
+    routes = RouteAssignments.read(public_dir / "miami-route-assignments.json")
+    conflicts = route_conflicts(route_hulls(routes.stops))
+    conflicts_frame(conflicts)    # day, technicianA, technicianB, overlapSqMiles, ...
+
+    python -m pipeline.route_conflicts phoenix_territory_map/nextjs_space/public/miami-route-assignments.json
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import DEFAULT_PIPELINE_OUTPUT_DIR
+from pipeline.routes import UNASSIGNED_TECHNICIAN, UNKNOWN_DAY, RouteAssignments
+from pipeline.spatial_index import MILES_PER_DEGREE
+from pipeline.utils import resolve_path, save_json_safe
+
+# Cross products within this many square miles count as on the edge.
+_EPSILON: float = 1e-12
+
+
+def convex_hull(points: np.ndarray) -> np.ndarray:
+    """Counter-clockwise hull vertices of (n, 2) points (monotone chain).
+
+    Fewer than three distinct, non-collinear points give a degenerate hull:
+    the point itself or the two ends of the segment.
+    """
+    points = np.unique(np.asarray(points, dtype=np.float64), axis=0)  # sorted by x, then y
+    if len(points) < 3:
+        return points
+
+    def chain(ordered: np.ndarray) -> list[np.ndarray]:
+        hull: list[np.ndarray] = []
+        for point in ordered:
+            while len(hull) >= 2 and _cross(hull[-2], hull[-1], point) <= _EPSILON:
+                hull.pop()
+            hull.append(point)
+        return hull
+
+    lower, upper = chain(points), chain(points[::-1])
+    return np.array(lower[:-1] + upper[:-1])
+
+
+def _cross(o: np.ndarray, a: np.ndarray, b: np.ndarray) -> float:
+    return float((a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0]))
+
+
+def polygon_area(polygon: np.ndarray) -> float:
+    """Shoelace area of a simple polygon (0 for fewer than three vertices)."""
+    if len(polygon) < 3:
+        return 0.0
+    x, y = polygon[:, 0], polygon[:, 1]
+    return float(abs(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1))) / 2.0)
+
+
+def clip_convex(subject: np.ndarray, clip: np.ndarray) -> np.ndarray:
+    """Intersection of two counter-clockwise convex polygons (Sutherland-Hodgman).
+
+    Hulls have a handful of vertices, so this works on plain float tuples:
+    per-edge numpy calls would cost more than the arithmetic.
+    """
+    output = [(float(x), float(y)) for x, y in subject]
+    clip_points = [(float(x), float(y)) for x, y in clip]
+    for (sx, sy), (ex, ey) in zip(clip_points, clip_points[1:] + clip_points[:1]):
+        if not output:
+            break
+        dx, dy = ex - sx, ey - sy
+        sides = [dx * (y - sy) - dy * (x - sx) for x, y in output]
+        vertices = []
+        previous, previous_side = output[-1], sides[-1]
+        for point, side in zip(output, sides):
+            if (side >= -_EPSILON) != (previous_side >= -_EPSILON):
+                t = previous_side / (previous_side - side)
+                vertices.append((
+                    previous[0] + t * (point[0] - previous[0]),
+                    previous[1] + t * (point[1] - previous[1]),
+                ))
+            if side >= -_EPSILON:
+                vertices.append(point)
+            previous, previous_side = point, side
+        output = vertices
+    return np.array(output, dtype=np.float64).reshape(-1, 2)
+
+
+def points_in_convex(points: np.ndarray, polygon: np.ndarray) -> np.ndarray:
+    """Mask of points inside or on a counter-clockwise convex polygon (3+ vertices)."""
+    if len(polygon) < 3:
+        return np.zeros(len(points), dtype=bool)
+    start, edge = polygon, np.roll(polygon, -1, axis=0) - polygon
+    side = (
+        edge[None, :, 0] * (points[:, None, 1] - start[None, :, 1])
+        - edge[None, :, 1] * (points[:, None, 0] - start[None, :, 0])
+    )
+    return (side >= -_EPSILON).all(axis=1)
+
+
+@dataclass(frozen=True)
+class RouteHull:
+    """Convex hull (local miles) of one technician-day route."""
+
+    technician: str
+    day: str
+    points: np.ndarray  # (n, 2) stop coordinates in miles
+    hull: np.ndarray  # (k, 2) counter-clockwise
+    bbox: tuple[float, float, float, float]  # min x, min y, max x, max y
+    area: float
+
+
+@dataclass(frozen=True)
+class RouteHulls:
+    hulls: list[RouteHull]
+    ref_lat: float
+
+    def to_lat_lng(self, xy: np.ndarray) -> np.ndarray:
+        """(n, 2) miles back to (lng, lat) degrees."""
+        shrink = np.cos(np.radians(self.ref_lat))
+        return np.column_stack([xy[:, 0] / (MILES_PER_DEGREE * shrink), xy[:, 1] / MILES_PER_DEGREE])
+
+
+def route_hulls(stops: pd.DataFrame, *, ref_lat: float | None = None) -> RouteHulls:
+    """Hull and bounding box of every (technician, day) route.
+
+    ``Unassigned`` technicians, ``Unknown`` days and stops without
+    coordinates are left out. Coordinates are projected to miles about
+    ``ref_lat`` (default: the mean stop latitude).
+    """
+    lat = stops["latitude"].to_numpy(dtype=np.float64)
+    lng = stops["longitude"].to_numpy(dtype=np.float64)
+    usable = (
+        (stops["technician"] != UNASSIGNED_TECHNICIAN).to_numpy()
+        & (stops["day"] != UNKNOWN_DAY).to_numpy()
+        & np.isfinite(lat)
+        & np.isfinite(lng)
+    )
+    if ref_lat is None:
+        ref_lat = float(lat[usable].mean()) if usable.any() else 0.0
+    xy = np.column_stack([lng * MILES_PER_DEGREE * np.cos(np.radians(ref_lat)), lat * MILES_PER_DEGREE])
+
+    hulls = []
+    rows = np.flatnonzero(usable)
+    for (technician, day), members in stops.loc[usable].groupby(["technician", "day"], sort=True).indices.items():
+        points = xy[rows[members]]
+        hull = convex_hull(points)
+        low, high = points.min(axis=0), points.max(axis=0)
+        hulls.append(RouteHull(
+            str(technician), str(day), points, hull, (low[0], low[1], high[0], high[1]), polygon_area(hull)
+        ))
+    return RouteHulls(hulls, ref_lat)
+
+
+def bbox_candidates(bboxes: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Index pairs ``(i, j)``, ``i < j``, of overlapping (n, 4) bounding boxes.
+
+    Sweep along x: with boxes sorted by west edge, the boxes that can
+    overlap box ``k`` are the ones after it whose west edge is at most its
+    east edge, a contiguous run found with one ``searchsorted``.
+    """
+    if len(bboxes) < 2:
+        empty = np.empty(0, dtype=np.int64)
+        return empty, empty
+    order = np.argsort(bboxes[:, 0], kind="stable")
+    boxes = bboxes[order]
+    ends = np.searchsorted(boxes[:, 0], boxes[:, 2], side="right")
+    counts = np.maximum(ends - np.arange(len(boxes)) - 1, 0)
+    first = np.repeat(np.arange(len(boxes)), counts)
+    second = first + 1 + np.arange(int(counts.sum())) - np.repeat(np.cumsum(counts) - counts, counts)
+    overlap = (boxes[first, 1] <= boxes[second, 3]) & (boxes[second, 1] <= boxes[first, 3])
+    first, second = order[first[overlap]], order[second[overlap]]
+    return np.minimum(first, second), np.maximum(first, second)
+
+
+@dataclass(frozen=True)
+class RouteConflict:
+    """Two technicians' routes overlapping on the same service day."""
+
+    day: str
+    first: str
+    second: str
+    overlap_sq_miles: float
+    overlap_share: float  # overlap over the smaller hull's area
+    first_stops_in_second: int
+    second_stops_in_first: int
+    overlap: np.ndarray  # (k, 2) miles
+
+
+def route_conflicts(route_hulls: RouteHulls, *, min_overlap_sq_miles: float = 0.0) -> list[RouteConflict]:
+    """Same-day route pairs whose hulls overlap or that have stops in each other's hull.
+
+    Pairs whose overlap is at most ``min_overlap_sq_miles`` and that have no
+    stops inside the other hull are dropped.
+    """
+    hulls = route_hulls.hulls
+    days = np.array([hull.day for hull in hulls], dtype=object)
+    bboxes = np.array([hull.bbox for hull in hulls], dtype=np.float64).reshape(-1, 4)
+    conflicts = []
+    for day in sorted(set(days.tolist())):
+        members = np.flatnonzero(days == day)
+        first, second = bbox_candidates(bboxes[members])
+        for i, j in zip(members[first], members[second]):
+            a, b = hulls[i], hulls[j]
+            overlap = clip_convex(a.hull, b.hull) if len(a.hull) >= 3 and len(b.hull) >= 3 else np.empty((0, 2))
+            area = polygon_area(overlap)
+            a_in_b = int(points_in_convex(a.points, b.hull).sum())
+            b_in_a = int(points_in_convex(b.points, a.hull).sum())
+            if area <= min_overlap_sq_miles and not (a_in_b or b_in_a):
+                continue
+            smaller = min(a.area, b.area)
+            share = area / smaller if smaller > 0 else 0.0
+            conflicts.append(RouteConflict(str(day), a.technician, b.technician, area, share, a_in_b, b_in_a, overlap))
+    conflicts.sort(key=lambda conflict: (-conflict.overlap_sq_miles, conflict.day, conflict.first, conflict.second))
+    return conflicts
+
+
+def conflicts_frame(conflicts: list[RouteConflict]) -> pd.DataFrame:
+    columns = ["day", "technicianA", "technicianB", "overlapSqMiles", "overlapShare", "stopsAInB", "stopsBInA"]
+    return pd.DataFrame(
+        [
+            [
+                conflict.day,
+                conflict.first,
+                conflict.second,
+                round(conflict.overlap_sq_miles, 3),
+                round(conflict.overlap_share, 3),
+                conflict.first_stops_in_second,
+                conflict.second_stops_in_first,
+            ]
+            for conflict in conflicts
+        ],
+        columns=columns,
+    )
+
+
+def hulls_geojson(route_hulls: RouteHulls, conflicts: list[RouteConflict] = ()) -> dict:
+    """Route hulls (and conflict overlaps) as a FeatureCollection for the map."""
+    features = []
+    for hull in route_hulls.hulls:
+        if len(hull.hull) < 3:
+            continue
+        ring = route_hulls.to_lat_lng(np.vstack([hull.hull, hull.hull[:1]]))
+        features.append({
+            "type": "Feature",
+            "properties": {"kind": "route", "technician": hull.technician, "day": hull.day, "stops": len(hull.points)},
+            "geometry": {"type": "Polygon", "coordinates": [np.round(ring, 6).tolist()]},
+        })
+    for conflict in conflicts:
+        if len(conflict.overlap) < 3:
+            continue
+        ring = route_hulls.to_lat_lng(np.vstack([conflict.overlap, conflict.overlap[:1]]))
+        features.append({
+            "type": "Feature",
+            "properties": {
+                "kind": "conflict",
+                "day": conflict.day,
+                "technicianA": conflict.first,
+                "technicianB": conflict.second,
+                "overlapSqMiles": round(conflict.overlap_sq_miles, 3),
+            },
+            "geometry": {"type": "Polygon", "coordinates": [np.round(ring, 6).tolist()]},
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Find overlapping technician routes per service day.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("input", help="Route assignments JSON.")
+    parser.add_argument("--min-overlap", type=float, default=0.0, help="Ignore overlaps up to this many square miles.")
+    parser.add_argument("--output", help="Conflicts JSON (default: pipeline_outputs/<input>.hull-conflicts.json).")
+    parser.add_argument("--hulls", help="Optional GeoJSON of route hulls and overlap areas.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+    source = resolve_path(data_root, args.input)
+    output = data_root / DEFAULT_PIPELINE_OUTPUT_DIR / f"{source.stem}.hull-conflicts.json"
+    if args.output:
+        output = resolve_path(data_root, args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    hulls = route_hulls(RouteAssignments.read(source).stops)
+    conflicts = route_conflicts(hulls, min_overlap_sq_miles=args.min_overlap)
+    frame = conflicts_frame(conflicts)
+    save_json_safe(json.loads(frame.to_json(orient="records")), output, "route conflicts")
+    if args.hulls:
+        save_json_safe(hulls_geojson(hulls, conflicts), resolve_path(data_root, args.hulls), "route hulls")
+    print(
+        f"{len(conflicts)} conflicting route pairs across {len(hulls.hulls)} technician-day routes "
+        f"({frame['overlapSqMiles'].sum():,.1f} sq mi overlapping) -> {output}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""Stop order and drive-distance estimate for every technician-day route.
+
+Route assignment files say who visits which account on which day, but not
+in what order, so there is no estimate of the miles a route drives.
+``sequence_route`` orders the stops of one route as an open path (there is
+no depot: technicians start from home): a nearest-neighbour construction
+from the stop farthest from the route's centroid, then 2-opt improvement
+over the haversine distance matrix. Each 2-opt round scores every segment
+reversal at once as a broadcast over the path and applies the best one,
+until no reversal shortens the path. ``sequence_routes`` does this for
+every (technician, day) group of ``RouteAssignments.stops`` across a
+process pool:
+
+    routes = RouteAssignments.read(public_dir / "route-assignments.json")
+    sequences = sequence_routes(routes.stops, workers=8)
+    summary_frame(sequences)    # technician, day, stops, miles, driveMiles
+
+Straight-line miles are turned into a drive estimate with a circuity
+factor (``DEFAULT_CIRCUITY_FACTOR``, road miles per straight-line mile).
+
+    python -m pipeline.route_sequence phoenix_territory_map/nextjs_space/public/route-assignments.json
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import DEFAULT_CIRCUITY_FACTOR, DEFAULT_PIPELINE_OUTPUT_DIR
+from pipeline.routes import UNASSIGNED_TECHNICIAN, UNKNOWN_DAY, RouteAssignments
+from pipeline.spatial_index import haversine_miles
+from pipeline.utils import resolve_path, save_csv_safe
+
+# Improvements smaller than this (miles) end the 2-opt search.
+_MIN_GAIN_MILES: float = 1e-9
+
+
+def haversine_matrix(lat: np.ndarray, lng: np.ndarray) -> np.ndarray:
+    """(n, n) great-circle miles between every pair of points."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    return haversine_miles(lat[:, None], lng[:, None], lat[None, :], lng[None, :])
+
+
+def path_miles(path: np.ndarray, distance: np.ndarray) -> float:
+    return float(distance[path[:-1], path[1:]].sum())
+
+
+def nearest_neighbour_path(distance: np.ndarray, start: int = 0) -> np.ndarray:
+    """Greedy open path: always continue to the closest unvisited point."""
+    count = len(distance)
+    path = np.empty(count, dtype=np.int64)
+    visited = np.zeros(count, dtype=bool)
+    current = start
+    for step in range(count):
+        path[step] = current
+        visited[current] = True
+        if step + 1 < count:
+            current = int(np.argmin(np.where(visited, np.inf, distance[current])))
+    return path
+
+
+def two_opt(path: np.ndarray, distance: np.ndarray, *, max_rounds: int | None = None) -> np.ndarray:
+    """Best-improvement 2-opt on an open path.
+
+    The path is padded with a virtual end point at zero distance from every
+    stop, so reversing a prefix or suffix (which moves an end of the open
+    path) is scored like any other reversal. Each round evaluates all
+    ``(i, j)`` reversals as one broadcast.
+    """
+    count = len(path)
+    if count < 3:
+        return path.copy()
+    padded = np.zeros((count + 1, count + 1), dtype=np.float64)
+    padded[:count, :count] = distance
+    tour = np.r_[count, path, count]
+    rounds = max_rounds if max_rounds is not None else count * count
+    upper = np.triu(np.ones((count, count), dtype=bool), k=1)
+    for _ in range(rounds):
+        # Reversing tour[i..j] (1 <= i < j <= count) swaps edges (i-1, i), (j, j+1)
+        # for (i-1, j), (i, j+1). Row a = i - 1, column b = j - 1.
+        before, first = tour[:-2], tour[1:-1]
+        last, after = tour[1:-1], tour[2:]
+        edge_in = padded[before, first]
+        edge_out = padded[last, after]
+        gain = (
+            padded[before[:, None], last[None, :]]
+            + padded[first[:, None], after[None, :]]
+            - edge_in[:, None]
+            - edge_out[None, :]
+        )
+        gain = np.where(upper, gain, 0.0)
+        a, b = np.unravel_index(int(np.argmin(gain)), gain.shape)
+        if gain[a, b] > -_MIN_GAIN_MILES:
+            break
+        tour[a + 1 : b + 2] = tour[a + 1 : b + 2][::-1].copy()
+    return tour[1:-1]
+
+
+def sequence_route(lat: np.ndarray, lng: np.ndarray) -> tuple[np.ndarray, float, float]:
+    """Stop order of one route plus its nearest-neighbour and final miles."""
+    lat = np.asarray(lat, dtype=np.float64)
+    lng = np.asarray(lng, dtype=np.float64)
+    if len(lat) == 0:
+        return np.empty(0, dtype=np.int64), 0.0, 0.0
+    distance = haversine_matrix(lat, lng)
+    start = int(np.argmax(haversine_miles(lat, lng, lat.mean(), lng.mean())))
+    greedy = nearest_neighbour_path(distance, start)
+    improved = two_opt(greedy, distance)
+    return improved, path_miles(greedy, distance), path_miles(improved, distance)
+
+
+@dataclass(frozen=True)
+class RouteSequence:
+    """One technician-day route: stop positions (into ``stops``) in visiting order."""
+
+    technician: str
+    day: str
+    stops: np.ndarray
+    leg_miles: np.ndarray  # miles from the previous stop (0 for the first)
+    nearest_neighbour_miles: float
+    miles: float
+
+
+def _sequence_batch(batch: list[tuple[np.ndarray, np.ndarray]]) -> list[tuple[np.ndarray, float, float]]:
+    """Sequence a batch of routes (runs in a worker process)."""
+    return [sequence_route(lat, lng) for lat, lng in batch]
+
+
+def sequence_routes(stops: pd.DataFrame, *, workers: int = 1, batch_size: int = 16) -> list[RouteSequence]:
+    """Sequence every (technician, day) route of ``stops``.
+
+    ``Unassigned`` technicians, ``Unknown`` days and stops without
+    coordinates are skipped. With ``workers > 1`` batches of routes are
+    solved by a process pool.
+    """
+    lat = stops["latitude"].to_numpy(dtype=np.float64)
+    lng = stops["longitude"].to_numpy(dtype=np.float64)
+    usable = (
+        (stops["technician"] != UNASSIGNED_TECHNICIAN).to_numpy()
+        & (stops["day"] != UNKNOWN_DAY).to_numpy()
+        & np.isfinite(lat)
+        & np.isfinite(lng)
+    )
+    # ``indices`` are positions within the usable rows; map them back to ``stops``.
+    grouped = stops.loc[usable].groupby(["technician", "day"], sort=True).indices
+    groups = [(str(technician), str(day)) for technician, day in grouped]
+    positions = [np.flatnonzero(usable)[members] for members in grouped.values()]
+    tasks = [(lat[members], lng[members]) for members in positions]
+    batches = [tasks[start : start + batch_size] for start in range(0, len(tasks), batch_size)]
+
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            solved = [result for batch in pool.map(_sequence_batch, batches) for result in batch]
+    else:
+        solved = [result for batch in batches for result in _sequence_batch(batch)]
+
+    sequences = []
+    for (technician, day), members, (order, greedy_miles, miles) in zip(groups, positions, solved):
+        ordered = members[order]
+        legs = np.r_[0.0, haversine_miles(lat[ordered[:-1]], lng[ordered[:-1]], lat[ordered[1:]], lng[ordered[1:]])]
+        sequences.append(RouteSequence(technician, day, ordered, legs, greedy_miles, miles))
+    return sequences
+
+
+def summary_frame(sequences: list[RouteSequence], *, circuity: float = DEFAULT_CIRCUITY_FACTOR) -> pd.DataFrame:
+    """One row per route: stop count, straight-line and estimated drive miles."""
+    return pd.DataFrame(
+        [
+            {
+                "technician": sequence.technician,
+                "day": sequence.day,
+                "stops": len(sequence.stops),
+                "nearestNeighbourMiles": round(sequence.nearest_neighbour_miles, 2),
+                "miles": round(sequence.miles, 2),
+                "driveMiles": round(sequence.miles * circuity, 2),
+            }
+            for sequence in sequences
+        ],
+        columns=["technician", "day", "stops", "nearestNeighbourMiles", "miles", "driveMiles"],
+    )
+
+
+def stops_frame(sequences: list[RouteSequence], stops: pd.DataFrame) -> pd.DataFrame:
+    """One row per stop in visiting order, with the leg from the previous stop."""
+    frames = [
+        pd.DataFrame({
+            "technician": sequence.technician,
+            "day": sequence.day,
+            "sequence": np.arange(1, len(sequence.stops) + 1),
+            "customerNumber": stops["customer"].to_numpy(dtype=object)[sequence.stops],
+            "latitude": stops["latitude"].to_numpy()[sequence.stops],
+            "longitude": stops["longitude"].to_numpy()[sequence.stops],
+            "legMiles": np.round(sequence.leg_miles, 3),
+        })
+        for sequence in sequences
+    ]
+    columns = ["technician", "day", "sequence", "customerNumber", "latitude", "longitude", "legMiles"]
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Order stops and estimate miles per technician-day route.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("input", help="Route assignments JSON.")
+    parser.add_argument("--circuity", type=float, default=DEFAULT_CIRCUITY_FACTOR,
+                        help="Road miles per straight-line mile.")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--summary", help="Per-route CSV (default: pipeline_outputs/<input>-route-miles.csv).")
+    parser.add_argument("--stops", help="Per-stop sequence CSV (default: pipeline_outputs/<input>-stop-sequence.csv).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+    source = resolve_path(data_root, args.input)
+    output_dir = data_root / DEFAULT_PIPELINE_OUTPUT_DIR
+    summary_path = output_dir / f"{source.stem}-route-miles.csv"
+    stops_path = output_dir / f"{source.stem}-stop-sequence.csv"
+    if args.summary:
+        summary_path = resolve_path(data_root, args.summary)
+    if args.stops:
+        stops_path = resolve_path(data_root, args.stops)
+    for path in (summary_path, stops_path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    routes = RouteAssignments.read(source)
+    sequences = sequence_routes(routes.stops, workers=args.workers)
+    summary = summary_frame(sequences, circuity=args.circuity)
+    save_csv_safe(summary, summary_path, "route miles")
+    save_csv_safe(stops_frame(sequences, routes.stops), stops_path, "stop sequence")
+    print(
+        f"{len(summary)} routes, {int(summary['stops'].sum())} stops: "
+        f"{summary['miles'].sum():,.1f} straight-line miles "
+        f"(nearest neighbour {summary['nearestNeighbourMiles'].sum():,.1f}), "
+        f"~{summary['driveMiles'].sum():,.0f} drive miles"
+    )
+
+
+if __name__ == "__main__":
+    main()
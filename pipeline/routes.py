@@ -0,0 +1,129 @@
+"""Route assignment files as one stop per (account, service day).
+
+The ``*route-assignments.json`` files name the same things differently:
+``technician`` or ``routeTech`` for the technician, and a
+``daysOfService`` list, a ``dayOfService`` string ("Monday, Thursday") or
+a ``dayOfWeek`` for the service days. ``RouteAssignments.read`` keeps the
+raw records (so they can be written back unchanged apart from
+reassignments) and derives a ``stops`` frame with uniform columns:
+
+    ``record``       position of the account in ``records``
+    ``customer``     ``customerNumber``
+    ``technician``   technician (``Unassigned`` when blank)
+    ``day``          weekday name, ``Unknown`` when unparseable
+    ``days``         number of service days of the account
+    ``latitude``/``longitude``/``revenue`` (``monthlyPrice``)
+
+    routes = RouteAssignments.read(public_dir / "route-assignments.json")
+    routes.stops.groupby(["technician", "day"]).size()
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+import json
+from pathlib import Path
+from typing import Mapping
+
+import numpy as np
+import pandas as pd
+
+TECHNICIAN_KEYS: tuple[str, ...] = ("technician", "routeTech")
+DAY_KEYS: tuple[str, ...] = ("daysOfService", "dayOfService", "dayOfWeek")
+ROUTE_KEY: str = "route"
+REVENUE_KEY: str = "monthlyPrice"
+
+WEEKDAYS: tuple[str, ...] = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday")
+UNKNOWN_DAY: str = "Unknown"
+UNASSIGNED_TECHNICIAN: str = "Unassigned"
+
+
+def parse_days(value: object) -> list[str]:
+    """Weekday names in a ``daysOfService`` list or "Monday, Thursday" string (``[Unknown]`` if none)."""
+    parts = value if isinstance(value, (list, tuple)) else str(value or "").replace("/", ",").split(",")
+    days = []
+    for part in parts:
+        name = str(part).strip().capitalize()
+        if name in WEEKDAYS and name not in days:
+            days.append(name)
+    return days or [UNKNOWN_DAY]
+
+
+def _text(value: object) -> str:
+    """Stripped string value; blank for None and NaN."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    return str(value).strip()
+
+
+def _key(records: list[Mapping[str, object]], keys: tuple[str, ...], what: str, path: Path) -> str:
+    for key in keys:
+        if any(key in record for record in records):
+            return key
+    raise ValueError(f"No {what} field ({', '.join(keys)}) in {path}")
+
+
+@dataclass(frozen=True)
+class RouteAssignments:
+    """Raw route assignment records plus their normalized stops."""
+
+    records: list[dict]
+    technician_key: str
+    day_key: str
+    stops: pd.DataFrame
+
+    @classmethod
+    def from_records(cls, records: list[dict], *, source: Path | str = "<records>") -> RouteAssignments:
+        technician_key = _key(records, TECHNICIAN_KEYS, "technician", Path(source))
+        day_key = _key(records, DAY_KEYS, "service day", Path(source))
+
+        rows = []
+        for position, record in enumerate(records):
+            days = parse_days(record.get(day_key))
+            technician = _text(record.get(technician_key)) or UNASSIGNED_TECHNICIAN
+            for day in days:
+                rows.append((position, record.get("customerNumber"), technician, day, len(days)))
+        stops = pd.DataFrame(rows, columns=["record", "customer", "technician", "day", "days"])
+        source_frame = pd.DataFrame.from_records(records)
+        for column, key in (("latitude", "latitude"), ("longitude", "longitude"), ("revenue", REVENUE_KEY)):
+            values = source_frame[key] if key in source_frame.columns else pd.Series(np.nan, index=source_frame.index)
+            stops[column] = pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)[stops["record"]]
+        stops["revenue"] = stops["revenue"].fillna(0.0)
+        return cls(records, technician_key, day_key, stops)
+
+    @classmethod
+    def read(cls, path: str | Path) -> RouteAssignments:
+        path = Path(path)
+        with path.open(encoding="utf-8") as handle:
+            records = json.load(handle)
+        if not isinstance(records, list):
+            raise ValueError(f"Route assignments must be a JSON list of records: {path}")
+        return cls.from_records(records, source=path)
+
+    def technician_routes(self) -> dict[str, str]:
+        """Most common ``route`` name of each technician (empty when the layout has none)."""
+        pairs = pd.DataFrame(
+            [(record.get(self.technician_key), record.get(ROUTE_KEY)) for record in self.records],
+            columns=["technician", "route"],
+        ).dropna()
+        if pairs.empty:
+            return {}
+        return pairs.groupby("technician")["route"].agg(lambda routes: routes.value_counts().index[0]).to_dict()
+
+    def reassigned(self, technicians: Mapping[int, str]) -> list[dict]:
+        """Copy of ``records`` with ``{record: technician}`` applied (and ``route`` kept in step)."""
+        routes = self.technician_routes()
+        records = [dict(record) for record in self.records]
+        for position, technician in technicians.items():
+            record = records[position]
+            record[self.technician_key] = technician
+            if ROUTE_KEY in record and technician in routes:
+                record[ROUTE_KEY] = routes[technician]
+        return records
+
+
+def write_records(path: str | Path, records: list[dict]) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(records, indent=2), encoding="utf-8")
+    return path
@@ -0,0 +1,429 @@
+"""Score territory/route scenarios against a baseline on one set of KPIs.
+
+Every Miami scenario file arrives with its own hand-written summary, in
+its own layout:
+
+- account lists (``miami-kml-scenario.json``, the ``customers`` of
+  ``miami-radical-reroute.json``, the ``autoReassignments`` of
+  ``miami-10pct-optimization.json``) give a territory and/or route per
+  customer number;
+- ZIP moves (the ``reassignments`` of ``scenarios/*.json``, the
+  ``zipChanges`` and ``newZipAssignments`` of the
+  ``miami-zip-optimized-*-scenario.json`` files) move every account of a
+  ZIP to a territory.
+
+``normalize_scenario`` applies either kind (ZIP moves first, then account
+overrides) to a ``Baseline`` of accounts and returns a common
+``Assignment``: one territory and one route per baseline account.
+``scenario_kpis`` then scores it: balance against the mean per territory
+and per route (within ``tolerance``), revenue share per territory, mean
+miles to the territory's office (or the nearest office), compactness as
+mean miles to the territory/route centroid, and accounts moved against the
+baseline. ``evaluate_scenarios`` loads, normalizes and scores every file
+across a process pool into one comparison table:
+
+    baseline = read_baseline(public_dir / "miami-final-territory-data.json")
+    table = evaluate_scenarios(paths, baseline, offices=load_offices(definitions, "miami"), workers=8)
+
+    python -m pipeline.scenario_eval phoenix_territory_map/nextjs_space/public/miami-final-territory-data.json \\
+        phoenix_territory_map/nextjs_space/public/scenarios/miami-*.json --location miami
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import DEFAULT_BALANCE_TOLERANCE, DEFAULT_BRANCH_DEFINITIONS, DEFAULT_PIPELINE_OUTPUT_DIR
+from pipeline.distances import Office, distance_matrix, load_offices
+from pipeline.spatial_index import haversine_miles
+from pipeline.utils import clean_zip_code, load_branch_definitions, resolve_path, save_csv_safe
+
+# Scenario payload keys holding account-level and ZIP-level assignments.
+ACCOUNT_LIST_KEYS: tuple[str, ...] = ("customers", "accounts", "autoReassignments")
+ZIP_LIST_KEYS: tuple[str, ...] = ("reassignments", "zipChanges", "newZipAssignments")
+
+# Record keys, most specific first.
+ZIP_KEYS: tuple[str, ...] = ("zip", "zipCode", "ZIP")
+ACCOUNT_TERRITORY_KEYS: tuple[str, ...] = ("assignedTerritory", "newTerritory", "territory")
+ZIP_TERRITORY_KEYS: tuple[str, ...] = ("toTerritory", "newTerritory", "territory")
+ROUTE_KEYS: tuple[str, ...] = ("assignedRoute", "newRoute", "route", "routeTech")
+UNASSIGNED_VALUES: frozenset[str] = frozenset({"", "unassigned", "nan", "none"})
+
+BASELINE_NAME: str = "baseline"
+
+
+def _value(record: Mapping[str, object], keys: Iterable[str]) -> str | None:
+    """First present key's value; None when absent or unassigned."""
+    for key in keys:
+        if key in record:
+            value = record[key]
+            if value is None or (isinstance(value, float) and np.isnan(value)):
+                return None
+            text = str(value).strip()
+            return None if text.lower() in UNASSIGNED_VALUES else text
+    return None
+
+
+def _has_any(records: Sequence[Mapping[str, object]], keys: Iterable[str]) -> bool:
+    return any(key in record for record in records for key in keys)
+
+
+@dataclass(frozen=True)
+class Baseline:
+    """Accounts the scenarios are applied to (one row per customer number)."""
+
+    customers: pd.Index
+    zips: np.ndarray
+    lat: np.ndarray
+    lng: np.ndarray
+    revenue: np.ndarray
+    territory: np.ndarray  # object, None = unassigned
+    route: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.customers)
+
+
+def baseline_from_records(records: Sequence[Mapping[str, object]]) -> Baseline:
+    """Baseline from account records; later duplicates of a customer number are dropped."""
+    records = [record for record in records if isinstance(record, Mapping) and record.get("customerNumber")]
+    customers = pd.Index([str(record["customerNumber"]) for record in records])
+    keep = ~customers.duplicated(keep="first")
+    records = [record for record, kept in zip(records, keep) if kept]
+
+    def numbers(key: str) -> np.ndarray:
+        values = pd.Series([record.get(key) for record in records], dtype=object)
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+
+    zips = clean_zip_code(pd.Series([_value(record, ZIP_KEYS) for record in records], dtype=object))
+    return Baseline(
+        customers=customers[keep],
+        zips=zips.to_numpy(dtype=object),
+        lat=numbers("latitude"),
+        lng=numbers("longitude"),
+        revenue=np.nan_to_num(numbers("monthlyPrice")),
+        territory=np.array([_value(record, ACCOUNT_TERRITORY_KEYS) for record in records], dtype=object),
+        route=np.array([_value(record, ROUTE_KEYS) for record in records], dtype=object),
+    )
+
+
+def read_baseline(path: str | Path) -> Baseline:
+    with Path(path).open(encoding="utf-8") as handle:
+        records = json.load(handle)
+    if not isinstance(records, list):
+        raise ValueError(f"Baseline must be a JSON list of account records: {path}")
+    return baseline_from_records(records)
+
+
+@dataclass(frozen=True)
+class Assignment:
+    """Territory and route of every baseline account under one scenario."""
+
+    name: str
+    territory: np.ndarray
+    route: np.ndarray
+    unmatched: int = 0  # scenario accounts not in the baseline
+
+
+def normalize_scenario(payload: object, baseline: Baseline, name: str) -> Assignment:
+    """Apply a scenario payload (any known layout) to ``baseline``.
+
+    ZIP moves are applied first and account overrides last, so a file with
+    both (``zipChanges`` plus ``autoReassignments``) ends with the
+    per-account decisions. Accounts a scenario does not mention keep their
+    baseline territory and route.
+    """
+    if isinstance(payload, list):
+        zip_lists, account_lists = [], [payload]
+    elif isinstance(payload, Mapping):
+        zip_lists = [payload[key] for key in ZIP_LIST_KEYS if isinstance(payload.get(key), list)]
+        account_lists = [payload[key] for key in ACCOUNT_LIST_KEYS if isinstance(payload.get(key), list)]
+    else:
+        raise ValueError(f"Unrecognized scenario layout: {name}")
+    if not zip_lists and not account_lists:
+        raise ValueError(f"No account or ZIP assignments in scenario: {name}")
+
+    territory = baseline.territory.copy()
+    route = baseline.route.copy()
+    for records in zip_lists:
+        records = [record for record in records if isinstance(record, Mapping)]
+        zips = clean_zip_code(pd.Series([_value(record, ZIP_KEYS) for record in records], dtype=object))
+        moves = {
+            zip_code: _value(record, ZIP_TERRITORY_KEYS)
+            for zip_code, record in zip(zips, records)
+            if not pd.isna(zip_code)
+        }
+        moved = np.flatnonzero(pd.Series(baseline.zips, dtype=object).isin(list(moves)).to_numpy())
+        territory[moved] = [moves[zip_code] for zip_code in baseline.zips[moved]]
+
+    unmatched = 0
+    for records in account_lists:
+        records = [record for record in records if isinstance(record, Mapping) and record.get("customerNumber")]
+        rows = baseline.customers.get_indexer([str(record["customerNumber"]) for record in records])
+        unmatched += int((rows < 0).sum())
+        has_territory = _has_any(records, ACCOUNT_TERRITORY_KEYS)
+        has_route = _has_any(records, ROUTE_KEYS)
+        for row, record in zip(rows, records):
+            if row < 0:
+                continue
+            if has_territory:
+                territory[row] = _value(record, ACCOUNT_TERRITORY_KEYS)
+            if has_route:
+                route[row] = _value(record, ROUTE_KEYS)
+    return Assignment(name, territory, route, unmatched)
+
+
+def read_scenario(path: str | Path, baseline: Baseline) -> Assignment:
+    path = Path(path)
+    with path.open(encoding="utf-8") as handle:
+        payload = json.load(handle)
+    name = str(payload.get("id") or path.stem) if isinstance(payload, Mapping) else path.stem
+    return normalize_scenario(payload, baseline, name)
+
+
+# ---------------------------------------------------------------------------
+# KPIs
+# ---------------------------------------------------------------------------
+
+def _codes(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Integer codes (-1 for None) and the sorted labels."""
+    codes, labels = pd.factorize(pd.Series(values, dtype=object), sort=True)
+    return codes, np.asarray(labels, dtype=object)
+
+
+def _balance(counts: np.ndarray, tolerance: float) -> tuple[float, int]:
+    """(max - min) / mean and the number of groups outside mean * (1 +/- tolerance)."""
+    if len(counts) == 0:
+        return float("nan"), 0
+    mean = counts.mean()
+    off_target = int(((counts < mean * (1 - tolerance)) | (counts > mean * (1 + tolerance))).sum())
+    return float((counts.max() - counts.min()) / mean), off_target
+
+
+def _centroid_miles(codes: np.ndarray, lat: np.ndarray, lng: np.ndarray) -> float:
+    """Mean miles from each located, assigned account to its group's centroid."""
+    located = (codes >= 0) & np.isfinite(lat) & np.isfinite(lng)
+    if not located.any():
+        return float("nan")
+    groups = codes[located]
+    weight = np.bincount(groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        centre_lat = np.bincount(groups, weights=lat[located]) / weight
+        centre_lng = np.bincount(groups, weights=lng[located]) / weight
+    return float(haversine_miles(lat[located], lng[located], centre_lat[groups], centre_lng[groups]).mean())
+
+
+@dataclass(frozen=True)
+class OfficeMiles:
+    """Baseline accounts x offices miles, with the office serving each territory name."""
+
+    miles: np.ndarray  # (accounts, offices)
+    by_territory: dict[str, int]
+
+    @classmethod
+    def build(cls, baseline: Baseline, offices: Sequence[Office]) -> OfficeMiles:
+        by_territory: dict[str, int] = {}
+        for position, office in enumerate(offices):
+            by_territory.setdefault(office.key.lower(), position)
+            by_territory.setdefault(office.name.lower(), position)
+        return cls(distance_matrix(baseline.lat, baseline.lng, offices), by_territory)
+
+    def mean_miles(self, territory: np.ndarray) -> float:
+        """Mean miles to the territory's own office, else to the nearest office."""
+        if self.miles.shape[1] == 0:
+            return float("nan")
+        assigned = np.array([value is not None for value in territory], dtype=bool)
+        own = np.array(
+            [self.by_territory.get(str(value).lower(), -1) if value is not None else -1 for value in territory],
+            dtype=np.int64,
+        )
+        nearest = np.nanmin(np.where(np.isnan(self.miles), np.inf, self.miles), axis=1)
+        own_miles = self.miles[np.arange(len(own)), np.maximum(own, 0)]
+        miles = np.where(own >= 0, own_miles, nearest)[assigned]
+        miles = miles[np.isfinite(miles)]
+        return float(miles.mean()) if len(miles) else float("nan")
+
+
+def scenario_kpis(
+    assignment: Assignment,
+    baseline: Baseline,
+    *,
+    office_miles: OfficeMiles | None = None,
+    tolerance: float = DEFAULT_BALANCE_TOLERANCE,
+) -> dict[str, object]:
+    """One comparison-table row for ``assignment``."""
+    territory_codes, territories = _codes(assignment.territory)
+    route_codes, _ = _codes(assignment.route)
+    territory_counts = np.bincount(territory_codes[territory_codes >= 0], minlength=len(territories))
+    route_counts = np.bincount(route_codes[route_codes >= 0])
+    route_counts = route_counts[route_counts > 0]
+    territory_spread, territories_off = _balance(territory_counts.astype(np.float64), tolerance)
+    route_spread, routes_off = _balance(route_counts.astype(np.float64), tolerance)
+
+    territory_moved = assignment.territory != baseline.territory
+    route_moved = assignment.route != baseline.route
+    moved = territory_moved | route_moved
+    assigned = territory_codes >= 0
+    revenue = np.bincount(territory_codes[assigned], weights=baseline.revenue[assigned], minlength=len(territories))
+    total_revenue = revenue.sum()
+
+    row: dict[str, object] = {
+        "scenario": assignment.name,
+        "accounts": len(baseline),
+        "assigned": int(assigned.sum()),
+        "unmatched": assignment.unmatched,
+        "territories": len(territories),
+        "territorySpread": round(territory_spread, 3),
+        "territoriesOffTarget": territories_off,
+        "routes": len(route_counts),
+        "routeSpread": round(route_spread, 3),
+        "routeCv": round(float(route_counts.std() / route_counts.mean()), 3) if len(route_counts) else float("nan"),
+        "routesOffTarget": routes_off,
+        "officeMiles": round(office_miles.mean_miles(assignment.territory), 2) if office_miles else float("nan"),
+        "territoryRadiusMiles": round(_centroid_miles(territory_codes, baseline.lat, baseline.lng), 2),
+        "routeRadiusMiles": round(_centroid_miles(route_codes, baseline.lat, baseline.lng), 2),
+        "territoryMoves": int(territory_moved.sum()),
+        "routeMoves": int(route_moved.sum()),
+        "accountsMoved": int(moved.sum()),
+        "revenueMoved": round(float(baseline.revenue[moved].sum()), 2),
+    }
+    for label, amount in zip(territories, revenue):
+        row[f"revenueShare.{label}"] = round(float(amount / total_revenue), 3) if total_revenue else float("nan")
+    return row
+
+
+@dataclass(frozen=True)
+class _Context:
+    baseline: Baseline
+    office_miles: OfficeMiles | None
+    tolerance: float
+
+
+def _evaluate(path: str, context: _Context) -> dict[str, object]:
+    """Load, normalize and score one scenario file (runs in a worker process)."""
+    assignment = read_scenario(path, context.baseline)
+    return scenario_kpis(assignment, context.baseline, office_miles=context.office_miles, tolerance=context.tolerance)
+
+
+def _display_path(path: Path, root: Path | None) -> str:
+    """``path`` relative to ``root`` when it lies under it, else as given."""
+    if root is not None:
+        try:
+            return path.resolve().relative_to(root.resolve()).as_posix()
+        except ValueError:
+            pass
+    return path.as_posix()
+
+
+def _unique_names(names: list[str], paths: list[Path | None], files: list[str]) -> list[str]:
+    """Prefix colliding scenario names with their file's directory, then fall back to ``files``."""
+    names = list(names)
+
+    def clashing() -> list[int]:
+        counts = pd.Series(names).value_counts()
+        return [position for position, name in enumerate(names) if counts[name] > 1 and paths[position] is not None]
+
+    for position in clashing():
+        names[position] = f"{paths[position].resolve().parent.name}/{names[position]}"
+    for position in clashing():
+        names[position] = files[position]
+    return names
+
+
+def evaluate_scenarios(
+    paths: Sequence[str | Path],
+    baseline: Baseline,
+    *,
+    offices: Sequence[Office] = (),
+    tolerance: float = DEFAULT_BALANCE_TOLERANCE,
+    workers: int = 1,
+    root: str | Path | None = None,
+) -> pd.DataFrame:
+    """Comparison table: the baseline row, then one row per scenario file in ``paths`` order.
+
+    ``file`` is each path relative to ``root`` (as given when outside it);
+    a file listed twice is scored once. Scenario names that collide (two
+    files with the same ``id`` or stem) are prefixed with their directory,
+    or replaced by the file path if that is not enough.
+    """
+    context = _Context(baseline, OfficeMiles.build(baseline, offices) if offices else None, tolerance)
+    unchanged = Assignment(BASELINE_NAME, baseline.territory, baseline.route)
+    rows = [{**scenario_kpis(unchanged, baseline, office_miles=context.office_miles, tolerance=tolerance), "file": ""}]
+    root = Path(root) if root is not None else None
+    unique: dict[Path, str] = {}
+    for path in paths:
+        unique.setdefault(Path(path).resolve(), str(path))
+    paths = list(unique.values())
+    if workers > 1 and len(paths) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            rows.extend(pool.map(_evaluate, paths, [context] * len(paths)))
+    else:
+        rows.extend(_evaluate(path, context) for path in paths)
+    for row, path in zip(rows[1:], paths):
+        row["file"] = _display_path(Path(path), root)
+    table = pd.DataFrame(rows)
+    table["scenario"] = _unique_names(
+        table["scenario"].tolist(), [None] + [Path(path) for path in paths], table["file"].tolist()
+    )
+    shares = sorted(column for column in table.columns if column.startswith("revenueShare."))
+    columns = ["scenario", "file"] + [column for column in table.columns if column not in shares + ["scenario", "file"]]
+    return table[columns + shares]
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Score scenario files against a baseline into one comparison table.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("baseline", help="Baseline account records JSON.")
+    parser.add_argument("scenarios", nargs="+", help="Scenario JSON files.")
+    parser.add_argument("--config", default=DEFAULT_BRANCH_DEFINITIONS, help="Branch definitions JSON (offices).")
+    parser.add_argument("--location", help="Location key for office distances (omit to skip).")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_BALANCE_TOLERANCE)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output",
+                        help="Comparison CSV (default: pipeline_outputs/<baseline>-scenario-comparison.csv).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+    baseline_path = resolve_path(data_root, args.baseline)
+    output = data_root / DEFAULT_PIPELINE_OUTPUT_DIR / f"{baseline_path.stem}-scenario-comparison.csv"
+    if args.output:
+        output = resolve_path(data_root, args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+
+    offices: list[Office] = []
+    if args.location:
+        definitions = load_branch_definitions(resolve_path(data_root, args.config))
+        offices = load_offices(definitions, args.location, include_future=False)
+    baseline = read_baseline(baseline_path)
+    table = evaluate_scenarios(
+        [resolve_path(data_root, path) for path in args.scenarios],
+        baseline,
+        offices=offices,
+        tolerance=args.tolerance,
+        workers=args.workers,
+        root=data_root,
+    )
+    save_csv_safe(table, output, "scenario comparison")
+    print(f"Scored {len(table) - 1} scenarios against {len(baseline)} accounts -> {output}")
+    headline = ["scenario", "accountsMoved", "territorySpread", "routeCv", "territoryRadiusMiles"]
+    print(table[headline].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,490 @@
+"""Uniform-grid spatial index over latitude/longitude points.
+
+Proximity questions ("accounts within 5 miles of this office", "the 10
+accounts closest to this customer", "nearest office for every account")
+used to be answered by scanning every point. ``SpatialIndex`` projects the
+points onto a plane (equirectangular about their mean latitude, in
+miles), buckets them into square cells and stores the bucket contents in
+CSR order, so a query only touches the cells around it:
+
+    index = SpatialIndex.from_frame(accounts, id_column="accountNumber")
+    rows, miles = index.within(33.45, -112.07, 5.0)
+    rows, miles = index.nearest(33.45, -112.07, k=10)
+    offices = SpatialIndex.from_frame(office_frame, lat_column="lat", lng_column="lng")
+    office_row, office_miles = offices.nearest_many(accounts["latitude"], accounts["longitude"])
+    index.save(".cache/accounts.npz"); index = SpatialIndex.load(".cache/accounts.npz")
+
+The grid only selects candidates; returned distances are great-circle
+(haversine) miles, and cell search bounds are widened by the projection's
+worst-case east-west shrink so no point within range is missed.
+
+    python -m pipeline.spatial_index build phoenix_territory_map/nextjs_space/public/customer-lookup.json \\
+        --id-column accountNumber --output .cache/customer-index.npz
+    python -m pipeline.spatial_index query .cache/customer-index.npz --lat 33.45 --lng -112.07 --radius 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+from pipeline.utils import load_csv_safe, resolve_path
+
+EARTH_RADIUS_MILES: float = 3958.7613
+MILES_PER_DEGREE: float = EARTH_RADIUS_MILES * np.pi / 180.0
+
+# Mean points per occupied-extent cell when no cell size is given.
+DEFAULT_POINTS_PER_CELL: int = 8
+
+
+def haversine_miles(
+    lat1: np.ndarray | float,
+    lng1: np.ndarray | float,
+    lat2: np.ndarray | float,
+    lng2: np.ndarray | float,
+) -> np.ndarray:
+    """Great-circle miles between broadcastable coordinate arrays (degrees)."""
+    phi1, phi2 = np.radians(lat1), np.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2.0
+    half_dlmb = np.radians(np.subtract(lng2, lng1)) / 2.0
+    a = np.sin(half_dphi) ** 2 + np.cos(phi1) * np.cos(phi2) * np.sin(half_dlmb) ** 2
+    return 2.0 * EARTH_RADIUS_MILES * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+class SpatialIndex:
+    """Points bucketed into a square grid on projected (mile) coordinates."""
+
+    def __init__(
+        self,
+        lat: np.ndarray,
+        lng: np.ndarray,
+        ids: np.ndarray | None,
+        *,
+        ref_lat: float,
+        cell_miles: float,
+        origin: tuple[float, float],
+        shape: tuple[int, int],
+        cell_offsets: np.ndarray,
+        order: np.ndarray,
+    ) -> None:
+        self.lat = lat
+        self.lng = lng
+        self.ids = ids
+        self.ref_lat = ref_lat
+        self.cell_miles = cell_miles
+        self.origin = origin
+        self.shape = shape
+        self.cell_offsets = cell_offsets
+        self.order = order
+        self._cos_ref = np.cos(np.radians(ref_lat))
+        finite = np.isfinite(lat)
+        self._max_abs_lat = float(np.abs(lat[finite]).max()) if finite.any() else abs(ref_lat)
+
+    # ------------------------------------------------------------------
+    # Construction
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(
+        cls,
+        lat: Iterable[float],
+        lng: Iterable[float],
+        ids: Iterable[object] | None = None,
+        *,
+        cell_miles: float | None = None,
+    ) -> SpatialIndex:
+        """Index the finite (lat, lng) pairs; query results are their positions.
+
+        Rows with missing coordinates are kept (so positions line up with
+        the input) but never returned. ``cell_miles`` defaults to a size
+        giving about ``DEFAULT_POINTS_PER_CELL`` points per cell.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        if lat.shape != lng.shape or lat.ndim != 1:
+            raise ValueError("lat and lng must be 1-D arrays of equal length")
+        if cell_miles is not None and cell_miles <= 0:
+            raise ValueError("cell_miles must be positive")
+        id_array = None if ids is None else np.asarray([str(value) for value in ids], dtype=str)
+        if id_array is not None and len(id_array) != len(lat):
+            raise ValueError("ids must align with lat and lng")
+
+        finite = np.isfinite(lat) & np.isfinite(lng)
+        ref_lat = float(lat[finite].mean()) if finite.any() else 0.0
+        x, y = _project(lat, lng, ref_lat)
+        if finite.any():
+            origin = (float(x[finite].min()), float(y[finite].min()))
+            width = float(x[finite].max()) - origin[0]
+            height = float(y[finite].max()) - origin[1]
+        else:
+            origin, width, height = (0.0, 0.0), 0.0, 0.0
+
+        count = int(finite.sum())
+        if cell_miles is None:
+            area = max(width, 1e-3) * max(height, 1e-3)
+            cell_miles = max(np.sqrt(area * DEFAULT_POINTS_PER_CELL / max(count, 1)), 1e-3)
+        # Keep the dense grid within a few cells per point on sparse, wide extents.
+        cell_miles = max(cell_miles, np.sqrt(width * height / (4 * max(count, 1) + 1)))
+        nx = int(width // cell_miles) + 1
+        ny = int(height // cell_miles) + 1
+
+        cell = np.full(len(lat), nx * ny, dtype=np.int64)  # sentinel bucket for missing coordinates
+        cx = ((x[finite] - origin[0]) // cell_miles).astype(np.int64)
+        cy = ((y[finite] - origin[1]) // cell_miles).astype(np.int64)
+        cell[finite] = np.minimum(cy, ny - 1) * nx + np.minimum(cx, nx - 1)
+        order = np.argsort(cell, kind="stable")
+        cell_offsets = np.zeros(nx * ny + 1, dtype=np.int64)
+        np.cumsum(np.bincount(cell[finite], minlength=nx * ny), out=cell_offsets[1:])
+
+        return cls(
+            lat,
+            lng,
+            id_array,
+            ref_lat=ref_lat,
+            cell_miles=float(cell_miles),
+            origin=origin,
+            shape=(nx, ny),
+            cell_offsets=cell_offsets,
+            order=order[:count],
+        )
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        *,
+        lat_column: str = "latitude",
+        lng_column: str = "longitude",
+        id_column: str | None = None,
+        cell_miles: float | None = None,
+    ) -> SpatialIndex:
+        return cls.build(
+            pd.to_numeric(frame[lat_column], errors="coerce").to_numpy(dtype=np.float64),
+            pd.to_numeric(frame[lng_column], errors="coerce").to_numpy(dtype=np.float64),
+            None if id_column is None else frame[id_column].tolist(),
+            cell_miles=cell_miles,
+        )
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def within(self, lat: float, lng: float, radius_miles: float) -> tuple[np.ndarray, np.ndarray]:
+        """(positions, miles) of points within ``radius_miles``, nearest first."""
+        if radius_miles < 0:
+            raise ValueError("radius_miles must be non-negative")
+        reach = radius_miles / self._shrink(lat, radius_miles)
+        x, y = _project(np.float64(lat), np.float64(lng), self.ref_lat)
+        nx, ny = self.shape
+        x_lo, x_hi = self._cell_range(x - reach, x + reach, self.origin[0], nx)
+        y_lo, y_hi = self._cell_range(y - reach, y + reach, self.origin[1], ny)
+        if x_lo > x_hi or y_lo > y_hi:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        rows = np.arange(y_lo, y_hi + 1)
+        candidates = self._points_in(rows[:, None] * nx + np.arange(x_lo, x_hi + 1))
+        miles = haversine_miles(lat, lng, self.lat[candidates], self.lng[candidates])
+        keep = miles <= radius_miles
+        ranked = np.argsort(miles[keep], kind="stable")
+        return candidates[keep][ranked], miles[keep][ranked]
+
+    def nearest(self, lat: float, lng: float, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """(positions, miles) of the ``k`` nearest points, nearest first."""
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        k = min(k, len(self))
+        if k == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        cx, cy = self._query_cells(np.array([lat]), np.array([lng]))
+        found = np.empty(0, dtype=np.int64)
+        found_miles = np.empty(0)
+        ring = int(_ring_start(cx, cy, self.shape)[0])
+        while True:
+            cells = _ring_cells(cx[0], cy[0], ring, self.shape)
+            candidates = self._points_in(cells)
+            if len(candidates):
+                found = np.concatenate([found, candidates])
+                found_miles = np.concatenate(
+                    [found_miles, haversine_miles(lat, lng, self.lat[candidates], self.lng[candidates])]
+                )
+            # Unvisited points are at least ``ring`` whole cells away.
+            bound = ring * self.cell_miles * self._shrink(lat, ring * self.cell_miles)
+            if len(found) >= k and np.partition(found_miles, k - 1)[k - 1] <= bound:
+                break
+            if _ring_exhausted(cx, cy, ring, self.shape)[0]:
+                break
+            ring += 1
+
+        ranked = np.argsort(found_miles, kind="stable")[:k]
+        return found[ranked], found_miles[ranked]
+
+    def nearest_many(
+        self,
+        lat: Iterable[float],
+        lng: Iterable[float],
+        *,
+        chunk_size: int = 100_000,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Nearest indexed point for every query: (positions, miles).
+
+        Queries advance ring by ring together, each ring expanded into
+        (query, point) pairs in one vectorized pass; a query drops out once
+        its best distance beats the next ring's lower bound. Queries with
+        missing coordinates (or an empty index) get position -1 and inf.
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lng = np.asarray(lng, dtype=np.float64)
+        best = np.full(len(lat), -1, dtype=np.int64)
+        best_miles = np.full(len(lat), np.inf)
+        queries = np.flatnonzero(np.isfinite(lat) & np.isfinite(lng))
+        if len(self) == 0:
+            return best, best_miles
+        for start in range(0, len(queries), chunk_size):
+            self._nearest_chunk(lat, lng, queries[start : start + chunk_size], best, best_miles)
+        return best, best_miles
+
+    def _nearest_chunk(
+        self,
+        lat: np.ndarray,
+        lng: np.ndarray,
+        active: np.ndarray,
+        best: np.ndarray,
+        best_miles: np.ndarray,
+    ) -> None:
+        cx, cy = self._query_cells(lat[active], lng[active])
+        ring = _ring_start(cx, cy, self.shape)
+        while len(active):
+            query, cells = _ring_cells_many(cx, cy, ring, self.shape)
+            starts = self.cell_offsets[cells]
+            counts = self.cell_offsets[cells + 1] - starts
+            pair_query = np.repeat(query, counts)
+            pair_first = np.repeat(np.cumsum(counts) - counts, counts)
+            points = self.order[np.repeat(starts, counts) + np.arange(len(pair_query)) - pair_first]
+
+            rows = active[pair_query]
+            miles = haversine_miles(lat[rows], lng[rows], self.lat[points], self.lng[points])
+            # Best pair per query: sort by (query, miles) and take each run's first.
+            by_query = np.lexsort((miles, pair_query))
+            first = by_query[np.r_[True, np.diff(pair_query[by_query]) != 0]] if len(by_query) else by_query
+            improved = miles[first] < best_miles[active[pair_query[first]]]
+            winners = first[improved]
+            best[active[pair_query[winners]]] = points[winners]
+            best_miles[active[pair_query[winners]]] = miles[winners]
+
+            bound = ring * self.cell_miles * self._shrink(lat[active], ring * self.cell_miles)
+            done = (best_miles[active] <= bound) | _ring_exhausted(cx, cy, ring, self.shape)
+            active, cx, cy, ring = active[~done], cx[~done], cy[~done], ring[~done] + 1
+
+    def id_of(self, positions: np.ndarray) -> np.ndarray:
+        """Ids for query result positions (-1 -> empty string)."""
+        if self.ids is None:
+            raise ValueError("index was built without ids")
+        positions = np.asarray(positions, dtype=np.int64)
+        return np.where(positions >= 0, self.ids[np.maximum(positions, 0)], "")
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        arrays = {
+            "lat": self.lat,
+            "lng": self.lng,
+            "cell_offsets": self.cell_offsets,
+            "order": self.order,
+            "grid": np.array([self.ref_lat, self.cell_miles, *self.origin, *self.shape], dtype=np.float64),
+        }
+        if self.ids is not None:
+            arrays["ids"] = self.ids
+        with path.open("wb") as handle:
+            np.savez_compressed(handle, **arrays)
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> SpatialIndex:
+        with np.load(Path(path), allow_pickle=False) as data:
+            ref_lat, cell_miles, origin_x, origin_y, nx, ny = data["grid"].tolist()
+            return cls(
+                data["lat"],
+                data["lng"],
+                data["ids"] if "ids" in data.files else None,
+                ref_lat=ref_lat,
+                cell_miles=cell_miles,
+                origin=(origin_x, origin_y),
+                shape=(int(nx), int(ny)),
+                cell_offsets=data["cell_offsets"],
+                order=data["order"],
+            )
+
+    # ------------------------------------------------------------------
+    # Grid helpers
+    # ------------------------------------------------------------------
+
+    def _shrink(self, lat: np.ndarray | float, reach_miles: float | np.ndarray) -> np.ndarray | float:
+        """Lower bound on true/projected distance for points near ``lat``.
+
+        East-west projected distances are scaled by cos(ref_lat)/cos(lat),
+        so points poleward of the reference latitude read too far apart.
+        """
+        reach_degrees = np.asarray(reach_miles) / MILES_PER_DEGREE
+        worst = np.minimum(np.maximum(np.abs(lat) + reach_degrees, self._max_abs_lat), 89.0)
+        ratio = np.cos(np.radians(worst)) / self._cos_ref
+        return np.minimum(ratio, 1.0) * 0.999
+
+    def _cell_range(self, low: float, high: float, origin: float, size: int) -> tuple[int, int]:
+        first = int(np.floor((low - origin) / self.cell_miles))
+        last = int(np.floor((high - origin) / self.cell_miles))
+        return max(first, 0), min(last, size - 1)
+
+    def _query_cells(self, lat: np.ndarray, lng: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Unclipped grid cell of each query (may lie outside the grid)."""
+        x, y = _project(lat, lng, self.ref_lat)
+        cx = np.floor((x - self.origin[0]) / self.cell_miles).astype(np.int64)
+        cy = np.floor((y - self.origin[1]) / self.cell_miles).astype(np.int64)
+        return cx, cy
+
+    def _points_in(self, cells: np.ndarray) -> np.ndarray:
+        cells = np.asarray(cells, dtype=np.int64).ravel()
+        starts = self.cell_offsets[cells]
+        counts = self.cell_offsets[cells + 1] - starts
+        first = np.repeat(np.cumsum(counts) - counts, counts)
+        return self.order[np.repeat(starts, counts) + np.arange(int(counts.sum())) - first]
+
+
+def _project(lat: np.ndarray, lng: np.ndarray, ref_lat: float) -> tuple[np.ndarray, np.ndarray]:
+    """Equirectangular (x, y) miles about ``ref_lat``."""
+    x = np.asarray(lng) * MILES_PER_DEGREE * np.cos(np.radians(ref_lat))
+    y = np.asarray(lat) * MILES_PER_DEGREE
+    return x, y
+
+
+def _ring_start(cx: np.ndarray, cy: np.ndarray, shape: tuple[int, int]) -> np.ndarray:
+    """First Chebyshev ring around (cx, cy) that touches the grid."""
+    nx, ny = shape
+    return np.maximum.reduce([np.zeros_like(cx), -cx, cx - (nx - 1), -cy, cy - (ny - 1)])
+
+
+def _ring_exhausted(cx: np.ndarray, cy: np.ndarray, ring: np.ndarray, shape: tuple[int, int]) -> np.ndarray:
+    """Whether ring ``ring`` around (cx, cy) already covers the whole grid."""
+    nx, ny = shape
+    return (cx - ring <= 0) & (cy - ring <= 0) & (cx + ring >= nx - 1) & (cy + ring >= ny - 1)
+
+
+def _ring_offsets(ring: int) -> np.ndarray:
+    """(dx, dy) of the cells at Chebyshev distance ``ring``."""
+    if ring == 0:
+        return np.zeros((1, 2), dtype=np.int64)
+    side = np.arange(-ring, ring + 1)
+    inner = side[1:-1]
+    return np.concatenate([
+        np.column_stack([side, np.full(len(side), -ring)]),
+        np.column_stack([side, np.full(len(side), ring)]),
+        np.column_stack([np.full(len(inner), -ring), inner]),
+        np.column_stack([np.full(len(inner), ring), inner]),
+    ])
+
+
+def _ring_cells(cx: int, cy: int, ring: int, shape: tuple[int, int]) -> np.ndarray:
+    nx, ny = shape
+    offsets = _ring_offsets(ring)
+    x, y = cx + offsets[:, 0], cy + offsets[:, 1]
+    inside = (x >= 0) & (x < nx) & (y >= 0) & (y < ny)
+    return y[inside] * nx + x[inside]
+
+
+def _ring_cells_many(
+    cx: np.ndarray,
+    cy: np.ndarray,
+    ring: np.ndarray,
+    shape: tuple[int, int],
+) -> tuple[np.ndarray, np.ndarray]:
+    """(query, cell) pairs for each query's current ring, grouped by ring size."""
+    queries: list[np.ndarray] = []
+    cells: list[np.ndarray] = []
+    nx, ny = shape
+    for size in np.unique(ring):
+        members = np.flatnonzero(ring == size)
+        offsets = _ring_offsets(int(size))
+        x = cx[members][:, None] + offsets[:, 0]
+        y = cy[members][:, None] + offsets[:, 1]
+        inside = (x >= 0) & (x < nx) & (y >= 0) & (y < ny)
+        queries.append(np.broadcast_to(members[:, None], x.shape)[inside])
+        cells.append((y * nx + x)[inside])
+    return np.concatenate(queries), np.concatenate(cells)
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def read_points(path: Path) -> pd.DataFrame:
+    """Records from a JSON list or a CSV file."""
+    if path.suffix.lower() == ".csv":
+        return load_csv_safe(path, "point")
+    return pd.read_json(path, orient="records", dtype=False)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build and query account spatial indexes.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build = subparsers.add_parser("build", help="Index the coordinates of a JSON or CSV file.")
+    build.add_argument("input", help="JSON list of records or CSV (relative to data root).")
+    build.add_argument("--output", required=True, help="Index file to write (.npz).")
+    build.add_argument("--lat-column", default="latitude")
+    build.add_argument("--lng-column", default="longitude")
+    build.add_argument("--id-column")
+    build.add_argument("--cell-miles", type=float)
+
+    query = subparsers.add_parser("query", help="Radius or nearest-neighbour lookup.")
+    query.add_argument("index", help="Index file written by 'build'.")
+    query.add_argument("--lat", type=float, required=True)
+    query.add_argument("--lng", type=float, required=True)
+    mode = query.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--radius", type=float, help="Miles.")
+    mode.add_argument("--nearest", type=int, help="Number of neighbours.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+
+    if args.command == "build":
+        frame = read_points(resolve_path(data_root, args.input))
+        index = SpatialIndex.from_frame(
+            frame,
+            lat_column=args.lat_column,
+            lng_column=args.lng_column,
+            id_column=args.id_column,
+            cell_miles=args.cell_miles,
+        )
+        output = index.save(resolve_path(data_root, args.output))
+        nx, ny = index.shape
+        print(f"Indexed {len(index)} points in {nx}x{ny} cells of {index.cell_miles:.2f} mi -> {output}")
+        return
+
+    index = SpatialIndex.load(resolve_path(data_root, args.index))
+    if args.radius is not None:
+        positions, miles = index.within(args.lat, args.lng, args.radius)
+    else:
+        positions, miles = index.nearest(args.lat, args.lng, args.nearest)
+    labels = index.id_of(positions) if index.ids is not None else positions
+    for label, distance in zip(labels, miles):
+        print(f"{label}\t{distance:.3f}")
+
+
+if __name__ == "__main__":
+    main()
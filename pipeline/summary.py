@@ -0,0 +1,274 @@
+"""Single-pass summary statistics for the master account assignments.
+
+The workbook, markdown report and per-market map files all need roll-ups of
+the same master frame. Instead of re-scanning the frame with separate
+groupbys and boolean masks, ``compute_assignment_metrics`` collapses it once
+into a small cube keyed by source, market, branch, area, ZIP and special flag
+(with native ``size``/``count``/``sum`` aggregations) and derives every
+summary from that cube.
+
+The frame may be plain strings or the compact encoding from
+``pipeline.encoding`` (categorical keys, ``uint8`` Special_Flag bitmask);
+the cube always groups on flag codes and decodes labels only for the
+special-flag table.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import (
+    FLAG_TUCSON_ASSOCIATED,
+    MAP_DATA_COLS,
+    MARKET_SUMMARY_COLS,
+    MASTER_COL_ACCOUNT_ID,
+    MASTER_COL_AREA,
+    MASTER_COL_BRANCH_ASSIGNMENT,
+    MASTER_COL_EMAIL,
+    MASTER_COL_MAINTENANCE_DAY,
+    MASTER_COL_MARKET,
+    MASTER_COL_ROUTE,
+    MASTER_COL_SPECIAL_FLAG,
+    MASTER_COL_SPECIAL_FLAG_OTHER,
+    MASTER_COL_ZIP_CODE,
+    SUMMARY_COLS,
+)
+from pipeline.encoding import (
+    decode_special_flags,
+    encode_special_flags,
+    flag_mask,
+    is_flag_bitmask,
+    other_special_flags,
+)
+from pipeline.utils import validate_dataframe
+
+SPECIAL_FLAG_SUMMARY_COLS: list[str] = [MASTER_COL_SPECIAL_FLAG, "Account_Count"]
+
+# Columns whose empty-string values are reported as missing data.
+MISSING_DATA_COLS: list[str] = [
+    MASTER_COL_EMAIL,
+    MASTER_COL_ROUTE,
+    MASTER_COL_MAINTENANCE_DAY,
+]
+
+UNASSIGNED: str = "Unassigned"
+
+_SOURCE_KEY = "_source"
+_FLAG_OTHER_KEY = "_flag_other"
+_CUBE_KEYS = [
+    _SOURCE_KEY,
+    MASTER_COL_MARKET,
+    MASTER_COL_BRANCH_ASSIGNMENT,
+    MASTER_COL_AREA,
+    MASTER_COL_ZIP_CODE,
+    MASTER_COL_SPECIAL_FLAG,
+    _FLAG_OTHER_KEY,
+]
+
+
+@dataclass(frozen=True)
+class AssignmentMetrics:
+    """Every aggregate consumed by the master workbook, report and map files."""
+
+    total_accounts: int
+    source_counts: dict[str, int]
+    source_assigned: dict[str, int]
+    source_unassigned: dict[str, int]
+    market_counts: dict[str, int]
+    by_branch: pd.DataFrame
+    by_market_area: pd.DataFrame
+    special_flags: pd.DataFrame
+    missing: dict[str, int]
+    unassigned_branch_accounts: int
+    tucson_associated_accounts: int
+    zip_maps: dict[str, pd.DataFrame]
+
+    def branches_for_market(self, market: str) -> pd.DataFrame:
+        """Branch summary rows whose primary market is ``market``."""
+        return self.by_branch[self.by_branch["Primary_Market"] == market]
+
+    def zip_map(self, market: str) -> pd.DataFrame:
+        """Per-ZIP map rows for ``market`` (empty frame when absent)."""
+        return self.zip_maps.get(market, pd.DataFrame(columns=MAP_DATA_COLS))
+
+
+def compute_assignment_metrics(
+    master_accounts: pd.DataFrame,
+    *,
+    source: pd.Series | Sequence[str] | None = None,
+    markets: Sequence[str] | None = None,
+) -> AssignmentMetrics:
+    """Aggregate ``master_accounts`` in one grouped pass.
+
+    ``source`` optionally labels each row with the input file it came from
+    (Phoenix accounts vs Tucson accounts), which differs from ``Market`` for
+    peripheral Tucson accounts re-homed to Phoenix East. ``markets`` limits
+    which markets get per-ZIP map tables; by default every market present.
+    """
+    validate_dataframe(
+        master_accounts,
+        [
+            MASTER_COL_ACCOUNT_ID,
+            MASTER_COL_MARKET,
+            MASTER_COL_BRANCH_ASSIGNMENT,
+            MASTER_COL_AREA,
+            MASTER_COL_ZIP_CODE,
+            MASTER_COL_SPECIAL_FLAG,
+        ],
+        context="Master accounts",
+    )
+
+    frame = master_accounts[
+        [column for column in _CUBE_KEYS[1:-1] if column in master_accounts.columns]
+        + [MASTER_COL_ACCOUNT_ID]
+    ].copy()
+    if source is None:
+        frame[_SOURCE_KEY] = frame[MASTER_COL_MARKET]
+    else:
+        frame[_SOURCE_KEY] = np.asarray(source, dtype=object)
+
+    flags = master_accounts[MASTER_COL_SPECIAL_FLAG]
+    frame[MASTER_COL_SPECIAL_FLAG] = encode_special_flags(flags)
+    # Text of flags outside SPECIAL_FLAG_BITS, so the flag table keeps their labels.
+    if MASTER_COL_SPECIAL_FLAG_OTHER in master_accounts.columns:
+        frame[_FLAG_OTHER_KEY] = master_accounts[MASTER_COL_SPECIAL_FLAG_OTHER]
+    else:
+        frame[_FLAG_OTHER_KEY] = other_special_flags(flags)
+    # Label input keeps its own notion of flagged: anything but "" (NA included).
+    frame["_flagged"] = frame[MASTER_COL_SPECIAL_FLAG].ne(0) if is_flag_bitmask(flags) else flags.ne("")
+    for column in MISSING_DATA_COLS:
+        if column in master_accounts.columns:
+            frame[f"_missing_{column}"] = master_accounts[column].eq("")
+        else:
+            frame[f"_missing_{column}"] = True
+
+    aggregations = {
+        "rows": (MASTER_COL_ACCOUNT_ID, "size"),
+        "accounts": (MASTER_COL_ACCOUNT_ID, "count"),
+        "flagged": ("_flagged", "sum"),
+    }
+    for column in MISSING_DATA_COLS:
+        aggregations[f"missing_{column}"] = (f"_missing_{column}", "sum")
+
+    cube = frame.groupby(_CUBE_KEYS, dropna=False, sort=True, observed=True).agg(**aggregations)
+    cube = cube.reset_index()
+    # The cube is small; plain object keys keep the derived tables free of
+    # categorical dtypes and unused categories.
+    for column in cube.columns:
+        if isinstance(cube[column].dtype, pd.CategoricalDtype):
+            cube[column] = cube[column].astype(object)
+
+    return _metrics_from_cube(cube, markets)
+
+
+def _metrics_from_cube(cube: pd.DataFrame, markets: Sequence[str] | None) -> AssignmentMetrics:
+    rows = cube["rows"]
+    source_counts = _sum_by(cube, _SOURCE_KEY, "rows")
+    assigned = cube[cube[MASTER_COL_AREA] != UNASSIGNED]
+    unassigned = cube[cube[MASTER_COL_AREA] == UNASSIGNED]
+    market_counts = _sum_by(cube, MASTER_COL_MARKET, "rows")
+
+    by_branch = _branch_summary(cube)
+
+    by_market_area = (
+        cube.groupby([MASTER_COL_MARKET, MASTER_COL_AREA], observed=True)["accounts"]
+        .sum()
+        .reset_index()
+    )
+    by_market_area.columns = MARKET_SUMMARY_COLS
+    by_market_area = by_market_area.sort_values(
+        [MASTER_COL_MARKET, "Account_Count"],
+        ascending=[True, False],
+        kind="stable",
+    ).reset_index(drop=True)
+
+    flagged_cube = cube[cube[MASTER_COL_SPECIAL_FLAG].ne(0)]
+    special_flags = (
+        flagged_cube.groupby([MASTER_COL_SPECIAL_FLAG, _FLAG_OTHER_KEY], dropna=False)["accounts"]
+        .sum()
+        .reset_index()
+    )
+    special_flags[MASTER_COL_SPECIAL_FLAG] = decode_special_flags(
+        special_flags[MASTER_COL_SPECIAL_FLAG], special_flags.pop(_FLAG_OTHER_KEY)
+    )
+    special_flags = special_flags.groupby(MASTER_COL_SPECIAL_FLAG, as_index=False)["accounts"].sum()
+    special_flags = special_flags.sort_values(MASTER_COL_SPECIAL_FLAG, kind="stable").reset_index(drop=True)
+    special_flags.columns = SPECIAL_FLAG_SUMMARY_COLS
+
+    branch_text = cube[MASTER_COL_BRANCH_ASSIGNMENT].astype("string")
+    tucson_associated = int(
+        rows[flag_mask(cube[MASTER_COL_SPECIAL_FLAG], FLAG_TUCSON_ASSOCIATED)].sum()
+    )
+    unassigned_branch = int(rows[branch_text.str.contains(UNASSIGNED, na=False, regex=False)].sum())
+
+    missing = {column: int(cube[f"missing_{column}"].sum()) for column in MISSING_DATA_COLS}
+
+    market_names = list(markets) if markets is not None else sorted(
+        str(market) for market in market_counts
+    )
+    zip_maps = {market: _zip_map(cube, market) for market in market_names}
+
+    return AssignmentMetrics(
+        total_accounts=int(rows.sum()),
+        source_counts=source_counts,
+        source_assigned=_sum_by(assigned, _SOURCE_KEY, "rows"),
+        source_unassigned=_sum_by(unassigned, _SOURCE_KEY, "rows"),
+        market_counts=market_counts,
+        by_branch=by_branch,
+        by_market_area=by_market_area,
+        special_flags=special_flags,
+        missing=missing,
+        unassigned_branch_accounts=unassigned_branch,
+        tucson_associated_accounts=tucson_associated,
+        zip_maps=zip_maps,
+    )
+
+
+def _sum_by(cube: pd.DataFrame, key: str, value: str) -> dict[str, int]:
+    totals = cube.groupby(key, observed=True)[value].sum()
+    return {str(name): int(total) for name, total in totals.items()}
+
+
+def _branch_summary(cube: pd.DataFrame) -> pd.DataFrame:
+    """Account count and most common market per branch."""
+    branch_market = (
+        cube.groupby([MASTER_COL_BRANCH_ASSIGNMENT, MASTER_COL_MARKET], observed=True)["rows"]
+        .sum()
+        .reset_index()
+    )
+    # Mirror Series.mode(): highest frequency wins, ties go to the smallest value.
+    primary_market = (
+        branch_market.sort_values(
+            [MASTER_COL_BRANCH_ASSIGNMENT, "rows", MASTER_COL_MARKET],
+            ascending=[True, False, True],
+            kind="stable",
+        )
+        .drop_duplicates(MASTER_COL_BRANCH_ASSIGNMENT)
+        .set_index(MASTER_COL_BRANCH_ASSIGNMENT)[MASTER_COL_MARKET]
+    )
+
+    summary = cube.groupby(MASTER_COL_BRANCH_ASSIGNMENT, observed=True)["accounts"].sum().reset_index()
+    summary["Primary_Market"] = (
+        summary[MASTER_COL_BRANCH_ASSIGNMENT].map(primary_market).fillna("").astype(object)
+    )
+    summary.columns = SUMMARY_COLS
+    return summary.sort_values("Account_Count", ascending=False, kind="stable").reset_index(drop=True)
+
+
+def _zip_map(cube: pd.DataFrame, market: str) -> pd.DataFrame:
+    market_cube = cube[cube[MASTER_COL_MARKET] == market]
+    zip_map = (
+        market_cube.groupby(
+            [MASTER_COL_ZIP_CODE, MASTER_COL_AREA, MASTER_COL_BRANCH_ASSIGNMENT],
+            observed=True,
+        )[["accounts", "flagged"]]
+        .sum()
+        .reset_index()
+    )
+    zip_map.columns = MAP_DATA_COLS
+    zip_map["Special_Flag_Count"] = zip_map["Special_Flag_Count"].astype("int64")
+    return zip_map.sort_values("Active_Accounts", ascending=False, kind="stable").reset_index(drop=True)
@@ -0,0 +1,556 @@
+"""Library API behind phoenix_territory_optimization/optimize_territories.py.
+
+Mirrors ``pipeline.master``: load -> optimize -> export, with every stage
+usable in-process. ``load_territory_inputs`` does all file parsing and
+builds the per-ZIP account counts once; ``optimize_territories`` can then
+be re-run against the same inputs with different targets:
+
+    inputs = load_territory_inputs(paths)
+    result = optimize_territories(inputs, targets)
+    outputs = export_territory_outputs(result, output_dir)
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import pandas as pd
+
+from pipeline.constants import (
+    DEFAULT_ANALYSIS_SHEET,
+    DEFAULT_ANALYSIS_WORKBOOK,
+    DEFAULT_BRANCH_DEFINITIONS,
+    DEFAULT_MAX_ITERATIONS,
+    DEFAULT_OPTIMIZE_PHOENIX_ACCOUNTS,
+    DEFAULT_TARGET_CENTRAL,
+    DEFAULT_TARGET_EAST,
+    DEFAULT_TARGET_WEST,
+    DEFAULT_TUCSON_ACCOUNTS,
+    OPTIMIZE_BRANCH_COLS,
+    OPTIMIZE_PHOENIX_COLS,
+    OPTIMIZE_TUCSON_COLS,
+    OUT_ALL_ACCOUNTS_CSV,
+    OUT_MAP_DATA_JSON,
+    OUT_OPTIMIZATION_REPORT,
+    OUT_TERRITORY_CHANGES_CSV,
+    OUT_TERRITORY_SUMMARY_CSV,
+    OUT_ZIP_ASSIGNMENTS_CSV,
+    PERIPHERAL_CITIES,
+    PHOENIX_AREAS,
+)
+from pipeline.territory_map import TerritoryGroups, group_by_territory
+from pipeline.utils import (
+    build_branch_to_area_map,
+    clean_zip_code,
+    load_branch_definitions,
+    load_csv_safe,
+    load_excel_safe,
+    resolve_path,
+    save_csv_safe,
+    save_json_safe,
+    save_text_safe,
+    validate_dataframe,
+)
+
+TERRITORY_AREAS: list[str] = ["West", "Central", "East", "Tucson"]
+
+OUTPUT_ACCOUNT_COLS: list[str] = [
+    "Customer_Number__c",
+    "Name",
+    "ShippingStreet",
+    "ShippingStateCode",
+    "ShippingPostalCode",
+    "ZipCode",
+    "Area",
+    "Source",
+]
+
+
+@dataclass(frozen=True)
+class TerritoryInputPaths:
+    """Input files for the territory optimization pipeline."""
+
+    config: Path
+    phoenix_accounts: Path
+    tucson_accounts: Path
+    analysis_workbook: Path
+    analysis_sheet: str = DEFAULT_ANALYSIS_SHEET
+
+    @classmethod
+    def from_data_root(
+        cls,
+        data_root: Path,
+        *,
+        config: str | Path = DEFAULT_BRANCH_DEFINITIONS,
+        phoenix_accounts: str | Path = DEFAULT_OPTIMIZE_PHOENIX_ACCOUNTS,
+        tucson_accounts: str | Path = DEFAULT_TUCSON_ACCOUNTS,
+        analysis_workbook: str | Path = DEFAULT_ANALYSIS_WORKBOOK,
+        analysis_sheet: str = DEFAULT_ANALYSIS_SHEET,
+    ) -> TerritoryInputPaths:
+        return cls(
+            config=resolve_path(data_root, config),
+            phoenix_accounts=resolve_path(data_root, phoenix_accounts),
+            tucson_accounts=resolve_path(data_root, tucson_accounts),
+            analysis_workbook=resolve_path(data_root, analysis_workbook),
+            analysis_sheet=analysis_sheet,
+        )
+
+    def files(self) -> list[Path]:
+        return [self.config, self.phoenix_accounts, self.tucson_accounts, self.analysis_workbook]
+
+
+@dataclass(frozen=True)
+class TerritoryInputs:
+    """Parsed accounts, previous ZIP assignments and per-ZIP account counts."""
+
+    valid_areas: set[str]
+    phoenix_accounts: pd.DataFrame
+    peripheral_accounts: pd.DataFrame
+    true_tucson_accounts: pd.DataFrame
+    zip_assignments: dict[str, str]
+    unknown_branches: set[str]
+    unknown_areas: list[str]
+    combined_zip_counts: dict[str, int]
+
+    @property
+    def tucson_account_count(self) -> int:
+        return len(self.peripheral_accounts) + len(self.true_tucson_accounts)
+
+
+@dataclass(frozen=True)
+class ZipMove:
+    zip_code: str
+    count: int
+    from_area: str
+    to_area: str
+    score: int
+
+
+@dataclass(frozen=True)
+class OptimizationResult:
+    best_assignments: dict[str, str]
+    best_score: int
+    moves: list[ZipMove]
+
+
+@dataclass(frozen=True)
+class TerritoryResult:
+    """Everything the optimize_territories exports are built from."""
+
+    targets: dict[str, int]
+    current_distribution: dict[str, int]
+    final_distribution: dict[str, int]
+    optimization: OptimizationResult
+    all_accounts: pd.DataFrame
+    groups: TerritoryGroups
+    changes: list[dict[str, object]]
+
+
+@dataclass(frozen=True)
+class TerritoryOutputs:
+    all_accounts: Path
+    summary: Path
+    zip_assignments: Path
+    changes: Path | None
+    report: Path
+    map_data: Path
+
+    def files(self) -> list[Path]:
+        files = [self.all_accounts, self.summary, self.zip_assignments]
+        if self.changes is not None:
+            files.append(self.changes)
+        return files + [self.report, self.map_data]
+
+
+# ---------------------------------------------------------------------------
+# Load
+# ---------------------------------------------------------------------------
+
+def build_zip_assignments(
+    prev_analysis: pd.DataFrame,
+    branch_to_area: dict[str, str],
+    valid_areas: set[str],
+) -> tuple[dict[str, str], set[str], list[str]]:
+    """Map ZIP -> area from the previous branch analysis.
+
+    Returns the assignments, branch names that could not be mapped (defaulted
+    to West) and areas not declared in branch_definitions.json.
+    """
+    zip_assignments: dict[str, str] = {}
+    unknown_branches: set[str] = set()
+    unknown_areas: list[str] = []
+    for zip_value, branch in zip(prev_analysis["ShippingPostalCode"], prev_analysis["ProposedBranch"]):
+        if pd.isna(zip_value) or pd.isna(branch):
+            continue
+
+        zip_code = str(zip_value).strip()
+        if zip_code in {"nan", "", "<NA>"}:
+            continue
+
+        branch_name = str(branch).strip()
+        area = branch_to_area.get(branch_name)
+        if not area and branch_name in valid_areas:
+            area = branch_name
+        if not area:
+            unknown_branches.add(branch_name)
+            area = "West"
+
+        if area not in valid_areas and valid_areas:
+            unknown_areas.append(area)
+
+        zip_assignments[zip_code] = area
+
+    return zip_assignments, unknown_branches, unknown_areas
+
+
+def load_territory_inputs(paths: TerritoryInputPaths) -> TerritoryInputs:
+    """Read, validate and index every input file."""
+    branch_definitions = load_branch_definitions(paths.config)
+    branch_to_area = build_branch_to_area_map(branch_definitions)
+    arizona_config = branch_definitions.get("locations", {}).get("arizona", {})
+    valid_areas = {
+        territory.get("area")
+        for territory in arizona_config.get("territories", [])
+        if isinstance(territory, dict)
+    }
+
+    phoenix_accounts = load_csv_safe(paths.phoenix_accounts, "Phoenix accounts")
+    tucson_accounts = load_csv_safe(paths.tucson_accounts, "Tucson accounts")
+    validate_dataframe(phoenix_accounts, OPTIMIZE_PHOENIX_COLS, context="Phoenix accounts")
+    validate_dataframe(tucson_accounts, OPTIMIZE_TUCSON_COLS, context="Tucson accounts")
+
+    if "ShippingStateCode" not in phoenix_accounts.columns:
+        if "ShippingState" in phoenix_accounts.columns:
+            phoenix_accounts["ShippingStateCode"] = phoenix_accounts["ShippingState"]
+        else:
+            phoenix_accounts["ShippingStateCode"] = "AZ"
+
+    phoenix_accounts["ZipCode"] = clean_zip_code(phoenix_accounts["ShippingPostalCode"])
+    tucson_accounts["ZipCode"] = clean_zip_code(tucson_accounts["ShippingPostalCode"])
+
+    tucson_accounts["City_Upper"] = (
+        tucson_accounts["ShippingCity"].fillna("").astype(str).str.upper().str.strip()
+    )
+    is_peripheral = tucson_accounts["City_Upper"].isin(PERIPHERAL_CITIES)
+    peripheral_accounts = tucson_accounts[is_peripheral].copy()
+    true_tucson_accounts = tucson_accounts[~is_peripheral].copy()
+
+    prev_analysis = load_excel_safe(paths.analysis_workbook, sheet_name=paths.analysis_sheet)
+    validate_dataframe(prev_analysis, OPTIMIZE_BRANCH_COLS, context="Phoenix branch analysis")
+    prev_analysis["ShippingPostalCode"] = clean_zip_code(prev_analysis["ShippingPostalCode"])
+
+    zip_assignments, unknown_branches, unknown_areas = build_zip_assignments(
+        prev_analysis,
+        branch_to_area,
+        valid_areas,
+    )
+
+    # Combine Phoenix and peripheral account counts for optimization
+    combined_zip_counts: dict[str, int] = dict(phoenix_accounts.groupby("ZipCode").size().to_dict())
+    for zip_code, count in peripheral_accounts.groupby("ZipCode").size().to_dict().items():
+        combined_zip_counts[zip_code] = combined_zip_counts.get(zip_code, 0) + count
+
+    return TerritoryInputs(
+        valid_areas=valid_areas,
+        phoenix_accounts=phoenix_accounts,
+        peripheral_accounts=peripheral_accounts,
+        true_tucson_accounts=true_tucson_accounts,
+        zip_assignments=zip_assignments,
+        unknown_branches=unknown_branches,
+        unknown_areas=unknown_areas,
+        combined_zip_counts=combined_zip_counts,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Optimize
+# ---------------------------------------------------------------------------
+
+def default_targets() -> dict[str, int]:
+    return {
+        "West": DEFAULT_TARGET_WEST,
+        "Central": DEFAULT_TARGET_CENTRAL,
+        "East": DEFAULT_TARGET_EAST,
+    }
+
+
+def calculate_distribution(assignments: dict[str, str], zip_counts: dict[str, int]) -> dict[str, int]:
+    """Calculate account distribution given zip assignments."""
+    dist = {"West": 0, "Central": 0, "East": 0}
+    for zip_code, count in zip_counts.items():
+        area = assignments.get(zip_code, "East")
+        if area in dist:
+            dist[area] += count
+    return dist
+
+
+def calculate_score(dist: dict[str, int], targets: dict[str, int]) -> int:
+    """Calculate how far we are from targets (lower is better)."""
+    return sum(abs(dist[area] - targets[area]) for area in targets)
+
+
+def optimize_zip_assignments(
+    zip_assignments: dict[str, str],
+    zip_counts: dict[str, int],
+    targets: dict[str, int],
+    *,
+    max_iterations: int = DEFAULT_MAX_ITERATIONS,
+) -> OptimizationResult:
+    """Greedily move whole ZIPs from surplus to deficit areas toward ``targets``."""
+    optimized_assignments = zip_assignments.copy()
+
+    # Movable zip codes grouped by current area, smallest first
+    movable_zips: dict[str, list[tuple[str, int]]] = {}
+    for area in PHOENIX_AREAS:
+        movable_zips[area] = [
+            (zip_code, zip_counts[zip_code])
+            for zip_code in zip_counts
+            if optimized_assignments.get(zip_code) == area
+        ]
+        movable_zips[area].sort(key=lambda x: x[1])
+
+    best_score = calculate_score(calculate_distribution(optimized_assignments, zip_counts), targets)
+    best_assignments = optimized_assignments.copy()
+    moves: list[ZipMove] = []
+
+    for _ in range(max_iterations):
+        # Try moving a zip code from areas with surplus to areas with deficit
+        improved = False
+
+        for from_area in PHOENIX_AREAS:
+            current = calculate_distribution(optimized_assignments, zip_counts)
+            if current[from_area] <= targets[from_area]:
+                continue  # This area needs more, not less
+
+            for to_area in PHOENIX_AREAS:
+                if from_area == to_area:
+                    continue
+                if current[to_area] >= targets[to_area]:
+                    continue  # This area has enough
+
+                candidates = [
+                    (zip_code, count)
+                    for zip_code, count in movable_zips[from_area]
+                    if optimized_assignments.get(zip_code) == from_area
+                ]
+
+                for zip_code, count in candidates:
+                    test_assignments = optimized_assignments.copy()
+                    test_assignments[zip_code] = to_area
+                    test_dist = calculate_distribution(test_assignments, zip_counts)
+                    test_score = calculate_score(test_dist, targets)
+
+                    if test_score < best_score:
+                        best_score = test_score
+                        best_assignments = test_assignments.copy()
+                        optimized_assignments = test_assignments.copy()
+                        improved = True
+                        moves.append(ZipMove(zip_code, count, from_area, to_area, best_score))
+                        break
+
+                if improved:
+                    break
+            if improved:
+                break
+
+        if not improved:
+            break
+
+    return OptimizationResult(
+        best_assignments=best_assignments,
+        best_score=best_score,
+        moves=moves,
+    )
+
+
+def assign_account_areas(inputs: TerritoryInputs, best_assignments: dict[str, str]) -> pd.DataFrame:
+    """Combine Phoenix, peripheral and true Tucson accounts with final areas."""
+    phoenix_final = inputs.phoenix_accounts.copy()
+    phoenix_final["Area"] = phoenix_final["ZipCode"].map(best_assignments).fillna("East")
+    phoenix_final["Source"] = "Phoenix"
+    phoenix_final = phoenix_final[OUTPUT_ACCOUNT_COLS]
+
+    peripheral_final = inputs.peripheral_accounts.copy()
+    peripheral_final["Area"] = "East"
+    peripheral_final["Source"] = "Tucson (Peripheral)"
+
+    tucson_final = inputs.true_tucson_accounts.copy()
+    tucson_final["Area"] = "Tucson"
+    tucson_final["Source"] = "Tucson"
+
+    tucson_cols = [
+        "Customer_Number__c",
+        "Name",
+        "ShippingStreet",
+        "ShippingCity",
+        "ShippingPostalCode",
+        "ZipCode",
+        "Area",
+        "Source",
+    ]
+    peripheral_final = peripheral_final[tucson_cols].copy()
+    peripheral_final["ShippingStateCode"] = "AZ"
+    tucson_final = tucson_final[tucson_cols].copy()
+    tucson_final["ShippingStateCode"] = "AZ"
+
+    phoenix_final = phoenix_final.copy()
+    phoenix_final["ShippingCity"] = ""
+
+    return pd.concat([phoenix_final, peripheral_final, tucson_final], ignore_index=True)
+
+
+def territory_changes(
+    zip_assignments: dict[str, str],
+    best_assignments: dict[str, str],
+    zip_counts: dict[str, int],
+) -> list[dict[str, object]]:
+    """ZIPs whose area differs between the previous and optimized assignments."""
+    changes: list[dict[str, object]] = []
+    for zip_code in sorted(set(zip_assignments) | set(best_assignments)):
+        old_area = zip_assignments.get(zip_code, "N/A")
+        new_area = best_assignments.get(zip_code, "N/A")
+        if old_area != new_area:
+            changes.append(
+                {
+                    "Zip Code": zip_code,
+                    "Previous Area": old_area,
+                    "New Area": new_area,
+                    "Accounts Moved": zip_counts.get(zip_code, 0),
+                }
+            )
+    return changes
+
+
+def optimize_territories(
+    inputs: TerritoryInputs,
+    targets: dict[str, int] | None = None,
+    *,
+    max_iterations: int = DEFAULT_MAX_ITERATIONS,
+) -> TerritoryResult:
+    """Rebalance Phoenix ZIPs toward ``targets`` and assign every account."""
+    targets = dict(targets) if targets is not None else default_targets()
+    current_dist = calculate_distribution(inputs.zip_assignments, inputs.combined_zip_counts)
+    optimization = optimize_zip_assignments(
+        inputs.zip_assignments,
+        inputs.combined_zip_counts,
+        targets,
+        max_iterations=max_iterations,
+    )
+    best_assignments = optimization.best_assignments
+    all_accounts = assign_account_areas(inputs, best_assignments)
+
+    return TerritoryResult(
+        targets=targets,
+        current_distribution=current_dist,
+        final_distribution=calculate_distribution(best_assignments, inputs.combined_zip_counts),
+        optimization=optimization,
+        all_accounts=all_accounts,
+        groups=group_by_territory(all_accounts, TERRITORY_AREAS),
+        changes=territory_changes(
+            inputs.zip_assignments,
+            best_assignments,
+            inputs.combined_zip_counts,
+        ),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Export
+# ---------------------------------------------------------------------------
+
+def territory_summary(all_accounts: pd.DataFrame) -> pd.DataFrame:
+    return (
+        all_accounts.groupby("Area")
+        .agg({"Customer_Number__c": "count", "ZipCode": "nunique"})
+        .rename(columns={"Customer_Number__c": "Account_Count", "ZipCode": "Unique_Zip_Codes"})
+    )
+
+
+def render_optimization_report(result: TerritoryResult) -> str:
+    targets = result.targets
+    changes = result.changes
+    report_lines = [
+        "PHOENIX TERRITORY OPTIMIZATION REPORT\n",
+        "=" * 60 + "\n\n",
+        "OBJECTIVE:\n",
+        "  Rebalance Phoenix territories to achieve target account distribution\n",
+        "  and integrate Tucson as a separate 4th area.\n\n",
+        "TARGET DISTRIBUTION:\n",
+        f"  West: {targets['West']} accounts\n",
+        f"  Central: {targets['Central']} accounts\n",
+        f"  East: {targets['East']} accounts (includes peripheral Tucson areas)\n",
+        "  Tucson: All true Tucson accounts\n\n",
+        "FINAL RESULTS:\n",
+    ]
+
+    for area, (count, zips) in result.groups.area_totals().items():
+        report_lines.append(f"  {area}:\n")
+        report_lines.append(f"    Accounts: {count}\n")
+        report_lines.append(f"    Zip Codes: {zips}\n")
+        if area != "Tucson":
+            target = targets[area]
+            diff = count - target
+            report_lines.append(f"    Target: {target}\n")
+            report_lines.append(f"    Variance: {diff:+d} ({diff/target*100:+.1f}%)\n")
+        report_lines.append("\n")
+
+    report_lines.append(f"TOTAL ACCOUNTS: {len(result.all_accounts)}\n\n")
+    report_lines.append("CHANGES MADE:\n")
+    if changes:
+        for change in changes:
+            report_lines.append(
+                f"  Zip {change['Zip Code']}: {change['Previous Area']} → {change['New Area']} "
+                f"({change['Accounts Moved']} accounts)\n"
+            )
+    else:
+        report_lines.append("  No zip codes moved (already optimized)\n")
+
+    return "".join(report_lines)
+
+
+def export_territory_outputs(result: TerritoryResult, output_dir: Path) -> TerritoryOutputs:
+    """Write every optimize_territories output file into ``output_dir``."""
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    all_accounts_path = output_dir / OUT_ALL_ACCOUNTS_CSV
+    save_csv_safe(result.all_accounts, all_accounts_path, "all accounts assignments")
+
+    summary_path = output_dir / OUT_TERRITORY_SUMMARY_CSV
+    save_csv_safe(territory_summary(result.all_accounts), summary_path, "territory summary")
+
+    zip_assignments_path = output_dir / OUT_ZIP_ASSIGNMENTS_CSV
+    save_csv_safe(result.groups.zip_counts(), zip_assignments_path, "zip code area assignments")
+
+    changes_path: Path | None = None
+    if result.changes:
+        changes_path = output_dir / OUT_TERRITORY_CHANGES_CSV
+        save_csv_safe(pd.DataFrame(result.changes), changes_path, "territory changes")
+
+    report_path = output_dir / OUT_OPTIMIZATION_REPORT
+    save_text_safe(report_path, render_optimization_report(result), "optimization report")
+
+    map_data_path = output_dir / OUT_MAP_DATA_JSON
+    save_json_safe(result.groups.map_data(result.all_accounts), map_data_path, "map data")
+
+    return TerritoryOutputs(
+        all_accounts=all_accounts_path,
+        summary=summary_path,
+        zip_assignments=zip_assignments_path,
+        changes=changes_path,
+        report=report_path,
+        map_data=map_data_path,
+    )
+
+
+def run_territory_pipeline(
+    paths: TerritoryInputPaths,
+    output_dir: Path,
+    targets: dict[str, int] | None = None,
+    *,
+    max_iterations: int = DEFAULT_MAX_ITERATIONS,
+) -> TerritoryOutputs:
+    """Load, optimize and export in one call."""
+    inputs = load_territory_inputs(paths)
+    result = optimize_territories(inputs, targets, max_iterations=max_iterations)
+    return export_territory_outputs(result, output_dir)
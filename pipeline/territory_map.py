@@ -0,0 +1,142 @@
+"""Single-pass territory -> ZIP -> account grouping for optimize_territories.
+
+``map_data.json``, ``Zip_Code_Area_Assignments.csv`` and the optimization
+report all walk the same territory/ZIP hierarchy. ``group_by_territory``
+sorts the account frame once by (territory, ZIP) and records group
+boundaries, so every emitter slices contiguous runs instead of re-filtering
+the frame per area and per ZIP.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from pipeline.utils import validate_dataframe
+
+MAP_ACCOUNT_COLS: list[str] = ["Customer_Number__c", "Name", "ShippingStreet"]
+
+
+@dataclass(frozen=True)
+class TerritoryGroups:
+    """Accounts sorted by (territory, ZIP) with one entry per ZIP group.
+
+    ``order`` holds row positions of the source frame in grouped order.
+    Group ``i`` covers ``order[starts[i]:ends[i]]``, belongs to
+    ``areas[group_area[i]]`` and has ZIP ``group_zip[i]``. Within a
+    territory, ZIP groups keep first-appearance order and accounts keep
+    their original row order.
+    """
+
+    areas: list[str]
+    order: np.ndarray
+    starts: np.ndarray
+    ends: np.ndarray
+    group_area: np.ndarray
+    group_zip: np.ndarray
+
+    @property
+    def group_sizes(self) -> np.ndarray:
+        return self.ends - self.starts
+
+    def area_totals(self) -> dict[str, tuple[int, int]]:
+        """Map each territory to ``(account_count, unique_zip_count)``."""
+        sizes = self.group_sizes
+        has_zip = ~pd.isna(self.group_zip)
+        n_areas = len(self.areas)
+        accounts = np.bincount(self.group_area, weights=sizes, minlength=n_areas)
+        zips = np.bincount(self.group_area[has_zip], minlength=n_areas)
+        return {
+            area: (int(accounts[code]), int(zips[code]))
+            for code, area in enumerate(self.areas)
+        }
+
+    def zip_counts(self) -> pd.DataFrame:
+        """ZIP -> territory lookup with account counts, ZIPs ascending per territory."""
+        frame = pd.DataFrame({
+            "_area": self.group_area,
+            "Zip Code": self.group_zip,
+            "Account Count": self.group_sizes,
+        })
+        frame = frame[frame["Zip Code"].notna()]
+        frame = frame.sort_values(["_area", "Zip Code"], kind="stable")
+        frame["Area"] = np.asarray(self.areas, dtype=object)[frame["_area"].to_numpy()]
+        return frame[["Zip Code", "Area", "Account Count"]].reset_index(drop=True)
+
+    def map_data(
+        self,
+        accounts: pd.DataFrame,
+        columns: Sequence[str] = MAP_ACCOUNT_COLS,
+    ) -> dict[str, list[dict[str, object]]]:
+        """Nested ``{"territories": [...]}`` payload for map_data.json."""
+        records = accounts.iloc[self.order][list(columns)].to_dict("records")
+        territories: list[dict[str, object]] = [
+            {"area": area, "total_accounts": 0, "zip_codes": []} for area in self.areas
+        ]
+
+        for start, end, area_code, zip_code in zip(
+            self.starts.tolist(),
+            self.ends.tolist(),
+            self.group_area.tolist(),
+            self.group_zip.tolist(),
+        ):
+            territory = territories[area_code]
+            territory["total_accounts"] += end - start
+            territory["zip_codes"].append(
+                {
+                    "zip": None if pd.isna(zip_code) else zip_code,
+                    "count": end - start,
+                    "accounts": records[start:end],
+                }
+            )
+
+        return {"territories": territories}
+
+
+def group_by_territory(
+    accounts: pd.DataFrame,
+    areas: Sequence[str],
+    *,
+    area_column: str = "Area",
+    zip_column: str = "ZipCode",
+) -> TerritoryGroups:
+    """Sort ``accounts`` once into territory/ZIP groups.
+
+    Rows whose territory is not listed in ``areas`` are left out.
+    """
+    validate_dataframe(accounts, [area_column, zip_column], context="Territory accounts")
+    area_list = list(areas)
+
+    area_codes = pd.Index(area_list).get_indexer(accounts[area_column]).astype(np.int64)
+    pair_codes = (
+        pd.DataFrame({"area": area_codes, "zip": accounts[zip_column].to_numpy()})
+        .groupby(["area", "zip"], sort=False, dropna=False)
+        .ngroup()
+        .to_numpy()
+    )
+
+    keep = np.flatnonzero(area_codes >= 0)
+    # lexsort is stable, so rows within a ZIP group keep their input order.
+    order = keep[np.lexsort((pair_codes[keep], area_codes[keep]))]
+
+    sorted_pairs = pair_codes[order]
+    if len(order):
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_pairs)) + 1))
+    else:
+        starts = np.empty(0, dtype=np.int64)
+    ends = np.append(starts[1:], len(order)).astype(np.int64)
+
+    first_rows = order[starts]
+    zip_values = accounts[zip_column].to_numpy(dtype=object)
+
+    return TerritoryGroups(
+        areas=area_list,
+        order=order,
+        starts=starts.astype(np.int64),
+        ends=ends,
+        group_area=area_codes[first_rows],
+        group_zip=zip_values[first_rows],
+    )
@@ -0,0 +1,147 @@
+"""Shared fixtures: a synthetic territory input tree, a stand-in Geocoding API and square polygons."""
+
+from __future__ import annotations
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import threading
+from urllib.parse import parse_qs, urlsplit
+
+import pandas as pd
+import pytest
+
+from pipeline.territories import TerritoryInputPaths
+
+
+def square_ring(x0: float, y0: float, size: float = 0.1, *, clockwise: bool = False) -> list[list[float]]:
+    """Closed ring of an axis-aligned square with its south-west corner at ``(x0, y0)``."""
+    ring = [[x0, y0], [x0 + size, y0], [x0 + size, y0 + size], [x0, y0 + size], [x0, y0]]
+    return ring[::-1] if clockwise else ring
+
+
+def square_polygon(x0: float, y0: float, size: float = 0.1, *, clockwise: bool = False) -> dict:
+    """GeoJSON Polygon geometry of ``square_ring``."""
+    return {"type": "Polygon", "coordinates": [square_ring(x0, y0, size, clockwise=clockwise)]}
+
+
+def _branch_definitions() -> dict:
+    return {
+        "locations": {
+            "arizona": {
+                "territories": [
+                    {"area": "West"},
+                    {"area": "Central"},
+                    {"area": "East"},
+                    {"area": "Tucson"},
+                ],
+                "consolidationMap": {
+                    "Glendale - West": "West",
+                    "Tempe": "Central",
+                    "Mesa": "East",
+                },
+            }
+        }
+    }
+
+
+@pytest.fixture
+def territory_paths(tmp_path: Path) -> TerritoryInputPaths:
+    """Phoenix has 6 West, 2 Central and 2 East accounts; Tucson has 1 + 1 peripheral."""
+    config = tmp_path / "branch_definitions.json"
+    config.write_text(json.dumps(_branch_definitions()), encoding="utf-8")
+
+    zips = ["85001"] * 4 + ["85002"] * 2 + ["85003"] * 2 + ["85004"] * 2
+    pd.DataFrame({
+        "ShippingPostalCode": zips,
+        "Customer_Number__c": [f"P{i}" for i in range(len(zips))],
+        "Name": [f"Phoenix {i}" for i in range(len(zips))],
+        "ShippingStreet": [f"{i} Main St" for i in range(len(zips))],
+    }).to_csv(tmp_path / "phoenix.csv", index=False)
+
+    pd.DataFrame({
+        "ShippingPostalCode": ["85701", "85122"],
+        "ShippingCity": ["Tucson", "Casa Grande"],
+        "Customer_Number__c": ["T1", "T2"],
+        "Name": ["Tucson 1", "Casa Grande 1"],
+        "ShippingStreet": ["1 Oracle Rd", "2 Florence Blvd"],
+    }).to_csv(tmp_path / "tucson.csv", index=False)
+
+    pd.DataFrame({
+        "ShippingPostalCode": ["85001", "85002", "85003", "85004", "85122"],
+        "ProposedBranch": ["Glendale", "Glendale - West", "Tempe", "Mesa", "Mesa"],
+    }).to_excel(tmp_path / "analysis.xlsx", sheet_name="Analysis", index=False)
+
+    return TerritoryInputPaths(
+        config=config,
+        phoenix_accounts=tmp_path / "phoenix.csv",
+        tucson_accounts=tmp_path / "tucson.csv",
+        analysis_workbook=tmp_path / "analysis.xlsx",
+        analysis_sheet="Analysis",
+    )
+
+
+# ---------------------------------------------------------------------------
+# Stand-in Geocoding API
+# ---------------------------------------------------------------------------
+
+class _GeocodeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self) -> None:  # noqa: N802 - http.server naming
+        server: FakeGeocodeServer = self.server  # type: ignore[assignment]
+        address = parse_qs(urlsplit(self.path).query).get("address", [""])[0]
+        with server.lock:
+            server.requests.append(address)
+            server.client_ports.add(self.client_address[1])
+            over_limit = server.over_limit_remaining > 0
+            if over_limit:
+                server.over_limit_remaining -= 1
+
+        if over_limit:
+            payload = {"status": "OVER_QUERY_LIMIT", "results": []}
+        elif server.status is not None:
+            payload = {"status": server.status, "results": []}
+        elif address in server.locations:
+            lat, lng = server.locations[address]
+            payload = {"status": "OK", "results": [{"geometry": {"location": {"lat": lat, "lng": lng}}}]}
+        else:
+            payload = {"status": "ZERO_RESULTS", "results": []}
+
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:  # noqa: A002
+        pass
+
+
+class FakeGeocodeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), _GeocodeHandler)
+        self.lock = threading.Lock()
+        self.locations: dict[str, tuple[float, float]] = {}
+        self.requests: list[str] = []
+        self.client_ports: set[int] = set()
+        self.over_limit_remaining = 0
+        self.status: str | None = None  # answer every request with this status (e.g. REQUEST_DENIED)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/maps/api/geocode/json"
+
+
+@pytest.fixture
+def geocode_server():
+    """Local HTTP server speaking the Geocoding API's JSON shape."""
+    server = FakeGeocodeServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
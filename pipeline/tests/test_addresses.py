@@ -0,0 +1,85 @@
+"""Unit tests for pipeline.addresses."""
+
+from __future__ import annotations
+
+import pandas as pd
+
+from pipeline.addresses import (
+    address_keys,
+    build_addresses,
+    dedupe_addresses,
+    join_addresses,
+    normalize_address,
+    normalize_addresses,
+)
+
+
+class TestNormalizeAddresses:
+    def test_spelling_variants_collapse(self):
+        variants = pd.Series([
+            "123 N Main St.",
+            "123 North Main Street",
+            "123 n. main st",
+            "123 N MAIN ST APT 4B",
+            "123 N Main St Suite 100",
+            "123 N Main St #12",
+        ])
+        assert set(normalize_addresses(variants)) == {"123 N MAIN ST"}
+
+    def test_zip_plus_four_and_separators(self):
+        result = normalize_address(" 6918 E. Monte Ave.,  Mesa,, AZ , 85209-1234 ")
+        assert result == "6918 E MONTE AVE, MESA, AZ, 85209"
+
+    def test_city_segment_not_abbreviated(self):
+        assert normalize_address("1 West Bell Road, Sun City West, AZ") == "1 W BELL RD, SUN CITY WEST, AZ"
+
+    def test_street_name_words_not_abbreviated(self):
+        assert normalize_address("10 E South St") == "10 E SOUTH ST"
+        assert normalize_address("500 Court Ave") == "500 COURT AVE"
+        assert normalize_address("10 South Street") == "10 SOUTH ST"
+        assert normalize_address("100 West North Avenue North, Phoenix") == "100 W NORTH AVE N, PHOENIX"
+
+    def test_unit_words_without_identifier_kept(self):
+        assert normalize_address("1 Space Center Drive") == "1 SPACE CENTER DR"
+
+    def test_blank_and_missing_are_na(self):
+        result = normalize_addresses(pd.Series(["", None, " , ", "1 Main St"], index=[5, 6, 7, 8]))
+        assert result.isna().tolist() == [True, True, True, False]
+        assert list(result.index) == [5, 6, 7, 8]
+        assert normalize_address(None) == ""
+
+    def test_idempotent(self):
+        once = normalize_addresses(pd.Series(["12 South Oak Avenue Unit A, Tempe, AZ, 85281"]))
+        assert normalize_addresses(once).tolist() == once.tolist()
+
+    def test_address_keys_drop_commas(self):
+        assert address_keys(["1 Main St., Mesa, AZ", None]) == ["1 MAIN ST MESA AZ", ""]
+
+
+class TestBuildAndDedupe:
+    def test_build_cleans_zip_and_skips_blanks(self):
+        frame = pd.DataFrame({
+            "street": ["1 Main Street", "1 main st", None],
+            "city": ["Mesa", "Mesa", None],
+            "state": ["AZ", None, None],
+            "zip": [85201.0, "85201-4455", None],
+        })
+        result = build_addresses(frame, ["street", "city", "state", "zip"], zip_column="zip")
+        assert result.tolist()[:2] == ["1 MAIN ST, MESA, AZ, 85201", "1 MAIN ST, MESA, 85201"]
+        assert pd.isna(result.iloc[2])
+
+    def test_join_keeps_text_as_written(self):
+        frame = pd.DataFrame({
+            "street": ["10 E South St ", "10 E South St"],
+            "city": ["Mesa", None],
+            "zip": [85201.0, None],
+        })
+        result = join_addresses(frame, ["street", "city", "zip"], zip_column="zip")
+        assert result.tolist() == ["10 E South St, Mesa, 85201", "10 E South St"]
+
+    def test_dedupe_ratio(self):
+        addresses = normalize_addresses(pd.Series(["1 Main St", "1 Main Street", "2 Oak Ave", None]))
+        codes, uniques, dedup = dedupe_addresses(addresses)
+        assert codes.tolist() == [0, 0, 1, -1]
+        assert list(uniques) == ["1 MAIN ST", "2 OAK AVE"]
+        assert (dedup.rows, dedup.unique, dedup.ratio) == (3, 2, 1.5)
@@ -0,0 +1,86 @@
+"""Unit tests for pipeline.adjacency."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from pipeline.adjacency import ZipAdjacency, main, zip_adjacency
+from pipeline.geometry import KM_PER_DEGREE, PolygonTable
+from pipeline.tests.conftest import square_polygon
+
+
+def _grid(noise: float = 0.0) -> dict:
+    """3 x 3 grid of ZIPs 33101..33109, row by row from the south-west; ``noise`` nudges each square off the grid."""
+    return {
+        f"331{row * 3 + column + 1:02d}": square_polygon(
+            -80.3 + 0.1 * column + noise * (row + column), 25.7 + 0.1 * row - noise * (row + column)
+        )
+        for row in range(3)
+        for column in range(3)
+    }
+
+
+class TestZipAdjacency:
+    def test_rook_neighbours(self):
+        adjacency = zip_adjacency(PolygonTable.from_geometries(_grid()))
+
+        assert adjacency.neighbours("33105") == ["33102", "33104", "33106", "33108"]
+        assert adjacency.neighbours("33101") == ["33102", "33104"]
+        assert adjacency.edge_count == 12
+        assert adjacency.degree().tolist() == [2, 3, 2, 3, 4, 3, 2, 3, 2]
+
+    def test_shared_border_length(self):
+        adjacency = zip_adjacency(PolygonTable.from_geometries(_grid()))
+
+        row = int(np.flatnonzero(adjacency.keys == "33101")[0])
+        shared = adjacency.shared_km[adjacency.indptr[row] : adjacency.indptr[row + 1]]
+        east = 0.1 * KM_PER_DEGREE  # north-south border with 33102
+        north = 0.1 * KM_PER_DEGREE * np.cos(np.radians(25.8))  # east-west border with 33104
+        assert shared.tolist() == pytest.approx([east, north], rel=1e-4)
+
+    def test_float_noise_is_snapped(self):
+        adjacency = zip_adjacency(PolygonTable.from_geometries(_grid(noise=1e-9)))
+
+        assert adjacency.edge_count == 12
+
+    def test_split_border_segments_still_match(self):
+        west = [[-80.3, 25.7], [-80.2, 25.7], [-80.2, 25.75], [-80.2, 25.8], [-80.3, 25.8], [-80.3, 25.7]]
+        east = [[-80.2, 25.7], [-80.1, 25.7], [-80.1, 25.8], [-80.2, 25.8], [-80.2, 25.75], [-80.2, 25.7]]
+        geometries = {
+            "33101": {"type": "Polygon", "coordinates": [west]},
+            "33102": {"type": "Polygon", "coordinates": [east]},
+            "33103": square_polygon(-79.0, 25.7),
+        }
+
+        adjacency = zip_adjacency(PolygonTable.from_geometries(geometries))
+
+        assert adjacency.to_dict() == {"33101": ["33102"], "33102": ["33101"], "33103": []}
+        assert adjacency.shared_km[0] == pytest.approx(0.1 * KM_PER_DEGREE, rel=1e-4)
+
+    def test_rejects_non_positive_tolerance(self):
+        with pytest.raises(ValueError):
+            zip_adjacency(PolygonTable.from_geometries(_grid()), tolerance=0)
+
+    def test_save_and_memory_map(self, tmp_path):
+        adjacency = zip_adjacency(PolygonTable.from_geometries(_grid()))
+
+        loaded = ZipAdjacency.load(adjacency.save(tmp_path / "adjacency"), mmap=True)
+
+        assert isinstance(loaded.indices, np.memmap)
+        assert loaded.to_dict() == adjacency.to_dict()
+        assert loaded.neighbours("33109") == ["33106", "33108"]
+
+
+class TestCli:
+    def test_build_writes_csr_and_json(self, tmp_path, capsys):
+        (tmp_path / "miami-zip-boundaries.json").write_text(json.dumps(_grid()))
+
+        main(["--data-root", str(tmp_path), "build", "--boundaries", "miami-zip-boundaries.json"])
+
+        mapping = json.loads((tmp_path / "miami_zip_adjacency.json").read_text())
+        assert mapping["33105"] == ["33102", "33104", "33106", "33108"]
+        assert len(ZipAdjacency.load(tmp_path / "miami_zip_adjacency")) == 9
+        assert "9 ZIPs, 12 adjacent pairs" in capsys.readouterr().out
@@ -0,0 +1,137 @@
+"""Tests for pipeline.daemon: warm caching and the local HTTP front end."""
+
+from __future__ import annotations
+
+import http.client
+import json
+import os
+import socket
+import threading
+
+import pytest
+
+from pipeline.daemon import PipelineSession, create_server
+from pipeline.master import MasterInputPaths
+
+TARGETS = {"West": 4, "Central": 4, "East": 3}
+
+
+@pytest.fixture
+def session(territory_paths, tmp_path):
+    # Master inputs are never touched by these tests.
+    master_paths = MasterInputPaths.from_data_root(tmp_path)
+    return PipelineSession(master_paths=master_paths, territory_paths=territory_paths, data_root=tmp_path)
+
+
+@pytest.fixture
+def server(session):
+    server = create_server(session, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _request(server, method, path, body=None):
+    host, port = server.server_address[:2]
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    try:
+        payload = None if body is None else json.dumps(body)
+        conn.request(method, path, body=payload, headers={"Content-Type": "application/json"})
+        response = conn.getresponse()
+        return response.status, json.loads(response.read())
+    finally:
+        conn.close()
+
+
+# ---------------------------------------------------------------------------
+# Session cache
+# ---------------------------------------------------------------------------
+
+class TestPipelineSession:
+    def test_inputs_loaded_once(self, session):
+        first = session.territory_inputs()
+        assert session.territory_inputs() is first
+        assert session.health()["territory_loads"] == 1
+
+    def test_reloads_when_input_changes(self, session, territory_paths):
+        first = session.territory_inputs()
+        stat = territory_paths.phoenix_accounts.stat()
+        os.utime(territory_paths.phoenix_accounts, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert session.territory_inputs() is not first
+        assert session.health()["territory_loads"] == 2
+
+    def test_explicit_reload(self, session):
+        first = session.territory_inputs()
+        session.reload()
+        assert not session.health()["territory_loaded"]
+        assert session.territory_inputs() is not first
+
+    def test_run_optimize(self, session, tmp_path):
+        payload = session.run_optimize(TARGETS, output_dir=tmp_path / "out")
+        assert payload["final_distribution"] == TARGETS
+        assert payload["score"] == 0
+        assert payload["moves"][0]["zip"] == "85002"
+        assert len(payload["files"]) == 6
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+
+class TestHttp:
+    def test_health(self, server):
+        status, body = _request(server, "GET", "/health")
+        assert status == 200
+        assert body["status"] == "ok"
+
+    def test_optimize_round_trip(self, server):
+        status, body = _request(server, "POST", "/optimize", {"targets": TARGETS})
+        assert status == 200
+        assert body["final_distribution"] == TARGETS
+        assert body["areas"]["Tucson"] == {"accounts": 1, "zip_codes": 1}
+
+        _request(server, "POST", "/optimize", {"targets": TARGETS, "max_iterations": 0})
+        assert _request(server, "GET", "/health")[1]["territory_loads"] == 1
+
+    def test_relative_output_dir_resolves_against_data_root(self, server, tmp_path):
+        status, body = _request(server, "POST", "/optimize", {"targets": TARGETS, "output_dir": "out"})
+
+        assert status == 200
+        assert body["files"] and all(path.startswith(str(tmp_path / "out")) for path in body["files"])
+
+    def test_bad_targets(self, server):
+        status, body = _request(server, "POST", "/optimize", {"targets": {"West": 1}})
+        assert status == 400
+        assert "missing areas" in body["error"]
+
+    def test_unknown_endpoint(self, server):
+        assert _request(server, "POST", "/nope")[0] == 404
+        assert _request(server, "GET", "/nope")[0] == 404
+
+    def test_reload(self, server):
+        _request(server, "POST", "/optimize", {})
+        status, body = _request(server, "POST", "/reload")
+        assert status == 200
+        assert body["territory_loaded"] is False
+
+
+@pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason="Unix sockets unavailable")
+def test_unix_socket(session, tmp_path):
+    socket_path = tmp_path / "pipeline.sock"
+    server = create_server(session, socket_path=socket_path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(socket_path))
+            client.sendall(b"GET /health HTTP/1.0\r\n\r\n")
+            response = b""
+            while chunk := client.recv(4096):
+                response += chunk
+        assert response.startswith(b"HTTP/1.0 200")
+        assert json.loads(response.split(b"\r\n\r\n", 1)[1])["status"] == "ok"
+    finally:
+        server.shutdown()
+        server.server_close()
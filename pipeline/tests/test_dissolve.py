@@ -0,0 +1,151 @@
+"""Unit tests for pipeline.dissolve."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from pipeline.dissolve import (
+    TerritoryDissolver,
+    main,
+    read_scenario_moves,
+    read_zip_territories,
+)
+from pipeline.tests.conftest import square_ring
+from pipeline.topology import extract_arcs
+
+
+def _grid() -> dict:
+    """2 x 2 ZIP grid; 33102 is stored clockwise."""
+    return {
+        "33101": {"type": "Polygon", "coordinates": [square_ring(-80.3, 25.7)]},
+        "33102": {"type": "Polygon", "coordinates": [square_ring(-80.2, 25.7, clockwise=True)]},
+        "33103": {"type": "Polygon", "coordinates": [square_ring(-80.3, 25.8)]},
+        "33104": {"type": "Polygon", "coordinates": [square_ring(-80.2, 25.8)]},
+    }
+
+
+def _ring_area(ring: list[list[float]]) -> float:
+    points = np.asarray(ring)
+    x, y = points[:, 0], points[:, 1]
+    return float((x[:-1] * y[1:] - x[1:] * y[:-1]).sum()) / 2.0
+
+
+def _area(geometry: dict) -> float:
+    return sum(_ring_area(ring) for polygon in geometry["coordinates"] for ring in polygon)
+
+
+class TestTerritoryDissolver:
+    def test_interior_borders_cancel(self):
+        dissolver = TerritoryDissolver(
+            extract_arcs(_grid()),
+            {"33101": "West", "33103": "West", "33102": "East", "33104": "East"},
+        )
+
+        outlines = dissolver.outlines()
+
+        assert sorted(outlines) == ["East", "West"]
+        for geometry in outlines.values():
+            assert len(geometry["coordinates"]) == 1
+            assert len(geometry["coordinates"][0]) == 1
+            assert _area(geometry) == pytest.approx(0.02, rel=1e-4)
+
+    def test_disjoint_zips_stay_separate_polygons(self):
+        dissolver = TerritoryDissolver(extract_arcs(_grid()), {"33101": "Diagonal", "33104": "Diagonal"})
+
+        geometry = dissolver.outline("Diagonal")
+
+        assert len(geometry["coordinates"]) == 2
+        assert _area(geometry) == pytest.approx(0.02, rel=1e-4)
+
+    def test_enclave_becomes_hole_until_merged(self):
+        outer = square_ring(-80.3, 25.7, 0.3)
+        hole = square_ring(-80.2, 25.8, 0.1, clockwise=True)
+        geometries = {
+            "33101": {"type": "Polygon", "coordinates": [outer, hole]},
+            "33102": {"type": "Polygon", "coordinates": [square_ring(-80.2, 25.8)]},
+        }
+        dissolver = TerritoryDissolver(extract_arcs(geometries), {"33101": "North", "33102": "South"})
+
+        (polygon,) = dissolver.outline("North")["coordinates"]
+        assert len(polygon) == 2
+        assert _area(dissolver.outline("North")) == pytest.approx(0.08, rel=1e-4)
+
+        dissolver.move("33102", "North")
+
+        (polygon,) = dissolver.outline("North")["coordinates"]
+        assert len(polygon) == 1
+        assert _area(dissolver.outline("North")) == pytest.approx(0.09, rel=1e-4)
+        assert dissolver.territories == ["North"]
+
+    def test_move_only_restitches_affected_territories(self):
+        dissolver = TerritoryDissolver(
+            extract_arcs(_grid()),
+            {"33101": "West", "33103": "West", "33102": "East", "33104": "Central"},
+        )
+        before = dissolver.outlines()
+
+        dissolver.move("33104", "East")
+        after = dissolver.outlines()
+
+        assert after["West"] is before["West"]
+        assert after["East"] is not before["East"]
+        assert "Central" not in after
+        assert len(after["East"]["coordinates"]) == 1
+
+    def test_missing_and_unassigned_zips(self):
+        dissolver = TerritoryDissolver(extract_arcs(_grid()), {"33101": "West", "99999": "West"})
+
+        dissolver.move("33101", None)
+
+        assert dissolver.missing == ["99999"]
+        assert dissolver.territories == []
+        assert dissolver.assignments() == {}
+
+
+class TestReaders:
+    def test_read_zip_territories(self, tmp_path):
+        path = tmp_path / "map-data.json"
+        path.write_text(json.dumps([
+            {"zip": "33101", "territory": "North"},
+            {"zip": 33101, "territory": "South"},
+            {"zipCode": "33102-1234", "territory": "South"},
+            {"zip": "33103", "territory": "Unassigned"},
+        ]))
+
+        assert read_zip_territories(path) == {"33101": "North", "33102": "South"}
+
+    def test_read_scenario_moves(self, tmp_path):
+        path = tmp_path / "scenario.json"
+        path.write_text(json.dumps({"reassignments": [
+            {"zipCode": "33101", "fromTerritory": "North", "toTerritory": "Central"},
+            {"zipCode": "33102", "fromTerritory": "South", "toTerritory": "unassigned"},
+        ]}))
+
+        assert read_scenario_moves(path) == {"33101": "Central", "33102": None}
+
+
+class TestCli:
+    def test_writes_base_and_scenario_outlines(self, tmp_path, capsys):
+        (tmp_path / "miami-zip-boundaries.json").write_text(json.dumps(_grid()))
+        (tmp_path / "miami-map-data.json").write_text(json.dumps([
+            {"zip": "33101", "territory": "West"},
+            {"zip": "33103", "territory": "West"},
+            {"zip": "33102", "territory": "East"},
+            {"zip": "33104", "territory": "East"},
+        ]))
+        (tmp_path / "shift.json").write_text(json.dumps({"reassignments": [
+            {"zipCode": "33104", "toTerritory": "West"},
+        ]}))
+
+        main(["--data-root", str(tmp_path), "miami-map-data.json", "--scenario", "shift.json"])
+
+        base = json.loads((tmp_path / "miami-map-data.outlines.json").read_text())
+        shifted = json.loads((tmp_path / "miami-map-data.shift.outlines.json").read_text())
+        assert base["type"] == "FeatureCollection"
+        assert {feature["properties"]["territory"] for feature in base["features"]} == {"East", "West"}
+        areas = {feature["properties"]["territory"]: _area(feature["geometry"]) for feature in shifted["features"]}
+        assert areas == pytest.approx({"East": 0.01, "West": 0.03}, rel=1e-4)
+        assert "2 territories from 4 ZIPs" in capsys.readouterr().out
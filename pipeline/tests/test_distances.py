@@ -0,0 +1,150 @@
+"""Unit tests for pipeline.distances."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.distances import (
+    OFFICE_FUTURE,
+    DistanceMatrixCache,
+    Office,
+    closest_offices,
+    distance_matrix,
+    load_offices,
+    main,
+    office_distance_columns,
+)
+from pipeline.spatial_index import haversine_miles
+
+DEFINITIONS = {
+    "locations": {
+        "arizona": {
+            "territories": [
+                {"key": "west", "area": "West", "office": {"lat": 33.66, "lng": -112.18}},
+                {"key": "east", "area": "East", "office": {"lat": 33.27, "lng": -111.83}},
+                {"key": "north", "area": "North"},
+            ],
+            "futureOffices": [
+                {"key": "cavecreek", "label": "APS of Cave Creek", "lat": 33.88, "lng": -111.91},
+            ],
+        },
+        "miami": {"offices": [{"zipCode": "33181", "label": "APS of Miami - Central Office", "lat": 25.88, "lng": -80.17}]},
+    }
+}
+
+
+@pytest.fixture
+def offices():
+    return load_offices(DEFINITIONS, "arizona")
+
+
+class TestLoadOffices:
+    def test_territory_offices_then_future(self, offices):
+        assert [(office.key, office.name) for office in offices] == [
+            ("west", "West"),
+            ("east", "East"),
+            ("cavecreek", "Cave Creek"),
+        ]
+        assert offices[2].status == OFFICE_FUTURE
+        assert offices[2].column == "Distance_to_Cave_Creek"
+        assert len(load_offices(DEFINITIONS, "arizona", include_future=False)) == 2
+
+    def test_offices_list_and_unknown_location(self):
+        assert [office.name for office in load_offices(DEFINITIONS, "miami")] == ["Miami"]
+        with pytest.raises(ValueError):
+            load_offices(DEFINITIONS, "atlantis")
+
+
+class TestDistanceMatrix:
+    def test_matches_haversine_and_ranks(self, offices):
+        rng = np.random.default_rng(5)
+        lat = rng.uniform(33.0, 34.0, 500)
+        lng = rng.uniform(-112.5, -111.5, 500)
+        lat[3] = np.nan
+
+        matrix = distance_matrix(lat, lng, offices)
+        assert matrix.dtype == np.float32 and matrix.shape == (500, 3)
+        expected = haversine_miles(lat[:, None], lng[:, None], [o.lat for o in offices], [o.lng for o in offices])
+        np.testing.assert_allclose(matrix, expected, rtol=1e-5)
+
+        closest = closest_offices(matrix)
+        valid = np.isfinite(lat)
+        order = np.argsort(expected[valid], axis=1)
+        assert (closest.first[valid] == order[:, 0]).all()
+        assert (closest.second[valid] == order[:, 1]).all()
+        assert (closest.first[3], closest.second[3]) == (-1, -1)
+        assert np.isnan(closest.first_miles[3])
+
+    def test_single_office_has_no_second(self):
+        closest = closest_offices(distance_matrix([33.5], [-112.0], [Office("a", "A", 33.4, -112.0)]))
+        assert (closest.first.tolist(), closest.second.tolist()) == ([0], [-1])
+
+
+class TestCacheAndColumns:
+    def test_cache_keyed_by_office_set(self, offices, tmp_path):
+        cache = DistanceMatrixCache(tmp_path)
+        lat, lng = [33.5, 33.6], [-112.0, -111.9]
+        first = cache.get(lat, lng, offices)
+        assert len(list(tmp_path.glob("*.npy"))) == 1
+        np.testing.assert_array_equal(DistanceMatrixCache(tmp_path).get(lat, lng, offices), first)
+
+        cache.get(lat, lng, offices[:2])
+        assert len(list(tmp_path.glob("*.npy"))) == 2
+
+    def test_frame_columns(self, offices, tmp_path):
+        frame = pd.DataFrame({"Latitude": [33.65, 33.28, None], "Longitude": [-112.17, -111.84, -112.0]})
+        output = office_distance_columns(frame, offices, cache=DistanceMatrixCache(tmp_path))
+
+        assert output["Closest_Office"].tolist()[:2] == ["West", "East"]
+        assert pd.isna(output["Closest_Office"].iloc[2])
+        assert output["Distance_to_Closest"].iloc[0] == output["Distance_to_West"].iloc[0]
+        assert output["Second_Closest_Office"].iloc[0] == "East"
+        assert "Distance_to_Cave_Creek" in output.columns
+        assert "Closest_Office" not in frame.columns
+
+    def test_future_offices_never_closest(self, offices):
+        frame = pd.DataFrame({"Latitude": [33.88], "Longitude": [-111.91]})  # at the Cave Creek site
+
+        output = office_distance_columns(frame, offices)
+
+        assert output["Closest_Office"].iloc[0] in {"West", "East"}
+        assert output["Closest_Future_Office"].iloc[0] == "Cave Creek"
+        assert output["Distance_to_Closest_Future"].iloc[0] == 0.0
+        current_only = office_distance_columns(frame, offices[:2])
+        assert "Closest_Future_Office" not in current_only.columns
+        assert current_only["Closest_Office"].equals(output["Closest_Office"])
+        west_only = office_distance_columns(frame, offices, closest_among=["West"])
+        assert west_only["Closest_Office"].iloc[0] == "West"
+        assert west_only["Closest_Future_Office"].iloc[0] == "Cave Creek"
+
+
+class TestCli:
+    def test_writes_separate_file_unless_in_place(self, tmp_path):
+        (tmp_path / "branches.json").write_text(json.dumps(DEFINITIONS))
+        (tmp_path / "accounts.csv").write_text("Latitude,Longitude\n33.65,-112.17\n")
+        args = ["--data-root", str(tmp_path), "--config", "branches.json", "--input", "accounts.csv",
+                "--cache-dir", "cache"]
+
+        main(args)
+        assert list(pd.read_csv(tmp_path / "accounts.csv").columns) == ["Latitude", "Longitude"]
+        assert pd.read_csv(tmp_path / "accounts-office-distances.csv")["Closest_Office"].tolist() == ["West"]
+
+        main(args + ["--in-place"])
+        assert "Closest_Future_Office" in pd.read_csv(tmp_path / "accounts.csv").columns
+
+    def test_closest_keeps_the_input_office_set(self, tmp_path):
+        (tmp_path / "branches.json").write_text(json.dumps(DEFINITIONS))
+        # Near East, but the file was only ever built against West.
+        (tmp_path / "accounts.csv").write_text("Latitude,Longitude,Distance_to_West\n33.28,-111.84,30.0\n")
+
+        main([
+            "--data-root", str(tmp_path), "--config", "branches.json",
+            "--input", "accounts.csv", "--cache-dir", "cache",
+        ])
+
+        output = pd.read_csv(tmp_path / "accounts-office-distances.csv")
+        assert (output["Closest_Office"].iloc[0], output["Closest_Future_Office"].iloc[0]) == ("West", "East")
@@ -0,0 +1,116 @@
+"""Unit tests for pipeline.encoding."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import (
+    FLAG_NO_BRANCH,
+    FLAG_OTHER,
+    FLAG_TUCSON_ASSOCIATED,
+    FLAG_UNASSIGNED_ZIP,
+    SPECIAL_FLAG_BITS,
+)
+from pipeline.encoding import (
+    concat_master_frames,
+    decode_master_frame,
+    decode_special_flags,
+    encode_master_frame,
+    encode_special_flags,
+    flag_mask,
+    other_special_flags,
+)
+
+
+def _frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Account_ID": ["a", "b", "c", "d"],
+        "Status": ["Active", "Active", "Active", np.nan],
+        "Market": ["Phoenix", "Phoenix", "Tucson", "Tucson"],
+        "Branch_Assignment": ["Phoenix East", "Unassigned", "Tucson Unassigned", "Tucson Unassigned"],
+        "Area": ["East", "Unassigned", "Unassigned", "Unassigned"],
+        "Special_Flag": [FLAG_TUCSON_ASSOCIATED, FLAG_UNASSIGNED_ZIP, FLAG_NO_BRANCH, ""],
+    })
+
+
+class TestSpecialFlags:
+    def test_bits_are_distinct_powers_of_two(self):
+        bits = list(SPECIAL_FLAG_BITS.values())
+        assert len(set(bits)) == len(bits)
+        assert all(bit and bit & (bit - 1) == 0 and bit < 256 for bit in bits)
+
+    def test_round_trip(self):
+        labels = pd.Series([FLAG_UNASSIGNED_ZIP, "", None, FLAG_TUCSON_ASSOCIATED], name="Special_Flag")
+        codes = encode_special_flags(labels)
+        assert codes.dtype == np.uint8
+        assert codes.tolist() == [2, 0, 0, 1]
+        assert decode_special_flags(codes).tolist() == [FLAG_UNASSIGNED_ZIP, "", "", FLAG_TUCSON_ASSOCIATED]
+
+    def test_combined_flags(self):
+        label = f"{FLAG_NO_BRANCH}; {FLAG_TUCSON_ASSOCIATED}"
+        codes = encode_special_flags(pd.Series([label]))
+        assert codes.tolist() == [5]
+        assert decode_special_flags(codes).tolist() == [f"{FLAG_TUCSON_ASSOCIATED}; {FLAG_NO_BRANCH}"]
+        assert flag_mask(codes, FLAG_NO_BRANCH).tolist() == [True]
+        assert flag_mask(codes, FLAG_UNASSIGNED_ZIP).tolist() == [False]
+
+    def test_encoded_input_passes_through(self):
+        codes = pd.Series([1, 4], dtype=np.uint8)
+        assert encode_special_flags(codes).tolist() == [1, 4]
+
+    def test_unknown_label_sets_other_bit(self):
+        labels = pd.Series(["Needs review", f"{FLAG_NO_BRANCH}; Manual hold", ""])
+        codes = encode_special_flags(labels)
+        other = other_special_flags(labels)
+
+        assert codes.tolist() == [SPECIAL_FLAG_BITS[FLAG_OTHER], SPECIAL_FLAG_BITS[FLAG_OTHER] | 4, 0]
+        assert other.tolist() == ["Needs review", "Manual hold", ""]
+        assert decode_special_flags(codes).tolist() == [FLAG_OTHER, f"{FLAG_NO_BRANCH}; {FLAG_OTHER}", ""]
+        assert decode_special_flags(codes, other).tolist() == labels.tolist()
+
+    def test_master_frame_keeps_unknown_labels(self):
+        frame = _frame()
+        frame.loc[3, "Special_Flag"] = "Needs review"
+
+        encoded = encode_master_frame(frame)
+
+        assert encoded["Special_Flag_Other"].tolist() == ["", "", "", "Needs review"]
+        assert decode_master_frame(encoded)["Special_Flag"].tolist()[3] == "Needs review"
+        assert "Special_Flag_Other" not in decode_master_frame(encoded).columns
+
+
+class TestMasterFrame:
+    def test_encode_dtypes(self):
+        encoded = encode_master_frame(_frame())
+        for column in ["Status", "Market", "Branch_Assignment", "Area"]:
+            assert isinstance(encoded[column].dtype, pd.CategoricalDtype)
+        assert encoded["Special_Flag"].dtype == np.uint8
+        assert encoded["Account_ID"].dtype == _frame()["Account_ID"].dtype
+
+    def test_decode_restores_labels(self):
+        frame = _frame()
+        decoded = decode_master_frame(encode_master_frame(frame))
+        pd.testing.assert_frame_equal(decoded.astype(object), frame.astype(object))
+
+    def test_encode_does_not_mutate_input(self):
+        frame = _frame()
+        encode_master_frame(frame)
+        assert frame["Special_Flag"].tolist()[0] == FLAG_TUCSON_ASSOCIATED
+        assert not isinstance(frame["Market"].dtype, pd.CategoricalDtype)
+
+    def test_concat_keeps_categoricals(self):
+        frame = _frame()
+        combined = concat_master_frames([frame.iloc[:2], frame.iloc[2:]])
+
+        assert isinstance(combined["Market"].dtype, pd.CategoricalDtype)
+        assert list(combined["Market"].cat.categories) == ["Phoenix", "Tucson"]
+        assert combined["Special_Flag"].dtype == np.uint8
+        pd.testing.assert_frame_equal(decode_master_frame(combined).astype(object), frame.astype(object))
+
+    def test_encoded_frame_is_smaller(self):
+        frame = pd.concat([_frame()] * 1000, ignore_index=True)
+        columns = ["Status", "Market", "Branch_Assignment", "Area", "Special_Flag"]
+        plain = frame[columns].memory_usage(deep=True).sum()
+        encoded = encode_master_frame(frame)[columns].memory_usage(deep=True).sum()
+        assert encoded * 10 < plain
@@ -0,0 +1,224 @@
+"""Unit tests for pipeline.geocache and geocode_batch's persistent cache."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+from unittest.mock import patch
+
+import pandas as pd
+import pytest
+
+from pipeline.geocache import (
+    STATUS_NOT_FOUND,
+    GeocodeCache,
+    geocoded_csv_records,
+    normalize_address,
+    route_assignment_records,
+    seed_cache,
+)
+from pipeline.geocoder import GeocodeResponse
+from pipeline.utils import geocode_batch
+
+
+FOUND = GeocodeResponse("OK", (1.0, 2.0))
+ZERO_RESULTS = GeocodeResponse("ZERO_RESULTS")
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with GeocodeCache(tmp_path / "geocode.sqlite") as store:
+        yield store
+
+
+def _age(cache: GeocodeCache, days: float) -> None:
+    """Backdate every entry by ``days``."""
+    with sqlite3.connect(cache.path) as conn:
+        conn.execute("UPDATE geocodes SET updated_at = updated_at - ?", (days * 86_400,))
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+class TestGeocodeCache:
+    def test_normalize_address(self):
+        assert normalize_address(" 6918 E. Monte Ave.,  Mesa, AZ, 85209 ") == "6918 E MONTE AVE MESA AZ 85209"
+        assert normalize_address("6918 East Monte Avenue Apt 4, Mesa, AZ, 85209-1234") == "6918 E MONTE AVE MESA AZ 85209"
+
+    def test_round_trip_by_normalized_key(self, cache):
+        cache.put("1 Main St., Mesa, AZ", (33.4, -111.8))
+        entry = cache.get("1 MAIN ST MESA AZ")
+        assert entry.coords == (33.4, -111.8)
+        assert entry.source == "google"
+
+    def test_get_many_returns_given_addresses(self, cache):
+        cache.put_many([("1 Main St", FOUND), ("2 Main St", ZERO_RESULTS)])
+        found = cache.get_many(["1 main st", "1 Main St.", "2 Main St", "3 Main St"])
+        assert set(found) == {"1 main st", "1 Main St.", "2 Main St"}
+        assert found["2 Main St"].status == STATUS_NOT_FOUND
+        assert not found["2 Main St"].ok
+
+    def test_lookup_is_chunked(self, cache):
+        addresses = [f"{n} Main St" for n in range(2500)]
+        cache.put_many((address, FOUND) for address in addresses)
+        assert len(cache.get_many(addresses)) == 2500
+
+    def test_hits_counted_once_per_lookup(self, cache):
+        cache.put("1 Main St", (1.0, 2.0))
+        cache.get_many(["1 Main St", "1 MAIN ST"])
+        cache.get("1 Main St")
+        assert cache.stats().total_hits == 2
+
+    def test_ttl_expiry_and_purge(self, tmp_path):
+        with GeocodeCache(tmp_path / "ttl.sqlite", ttl_days=10, negative_ttl_days=1) as cache:
+            cache.put_many([("ok", FOUND), ("bad", ZERO_RESULTS)])
+            _age(cache, 2)
+            assert set(cache.get_many(["ok", "bad"])) == {"ok"}
+            assert cache.stats().expired == 1
+            assert cache.purge_expired() == 1
+            assert len(cache) == 1
+
+    def test_failed_requests_are_not_stored(self, cache):
+        written = cache.put_many([
+            ("1 Main St", GeocodeResponse("REQUEST_DENIED")),
+            ("2 Main St", GeocodeResponse("OVER_QUERY_LIMIT")),
+            ("3 Main St", ZERO_RESULTS),
+        ])
+        assert written == 1
+        assert set(cache.get_many(["1 Main St", "2 Main St", "3 Main St"])) == {"3 Main St"}
+        assert cache.stats().not_found == 1
+
+    def test_rekeys_older_schema(self, tmp_path):
+        path = tmp_path / "old.sqlite"
+        with GeocodeCache(path) as cache:
+            cache.put("1 North Main Street", (1.0, 2.0))
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE geocodes SET address_key = '1 NORTH MAIN STREET'")
+            conn.execute("PRAGMA user_version=1")
+
+        with GeocodeCache(path) as cache:
+            assert cache.get("1 N Main St").coords == (1.0, 2.0)
+            assert len(cache) == 1
+
+    def test_rekey_keeps_street_name_words(self, tmp_path):
+        path = tmp_path / "v2.sqlite"
+        with GeocodeCache(path) as cache:
+            cache.put("10 E South St, Mesa, AZ", (1.0, 2.0))
+        with sqlite3.connect(path) as conn:
+            conn.execute("UPDATE geocodes SET address_key = '10 E S ST MESA AZ'")
+            conn.execute("PRAGMA user_version=2")
+
+        with GeocodeCache(path) as cache:
+            assert cache.get("10 E South St, Mesa, AZ").coords == (1.0, 2.0)
+            assert cache.get("10 E S St, Mesa, AZ") is None
+
+    def test_persists_across_connections(self, tmp_path):
+        path = tmp_path / "shared.sqlite"
+        with GeocodeCache(path) as first:
+            first.put("1 Main St", (1.0, 2.0))
+        with GeocodeCache(path) as second:
+            assert second.get("1 Main St").coords == (1.0, 2.0)
+
+
+# ---------------------------------------------------------------------------
+# Seeding
+# ---------------------------------------------------------------------------
+
+class TestSeeding:
+    def test_seed_does_not_overwrite_fresh_entries(self, cache):
+        cache.put("1 Main St", (1.0, 2.0))
+        assert cache.seed([("1 Main St", 9.0, 9.0), ("2 Main St", 3.0, 4.0)], source="x.csv") == 1
+        assert cache.get("1 Main St").coords == (1.0, 2.0)
+        assert cache.get("2 Main St").source == "seed:x.csv"
+
+    def test_seed_replaces_not_found_and_stale(self, cache):
+        cache.put_many([("1 Main St", ZERO_RESULTS), ("2 Main St", GeocodeResponse("OK", (0.0, 0.0)))])
+        _age(cache, 400)
+        assert cache.seed([("1 Main St", 1.0, 2.0), ("2 Main St", 3.0, 4.0)], source="x") == 2
+        assert cache.get("2 Main St").coords == (3.0, 4.0)
+
+    def test_seed_skips_missing_coordinates(self, cache):
+        assert cache.seed([("1 Main St", float("nan"), 2.0), ("", 1.0, 2.0)], source="x") == 0
+
+    def test_artifact_readers(self, cache, tmp_path):
+        csv_path = tmp_path / "geocoded.csv"
+        pd.DataFrame({
+            "Shipping Street": ["715 W Puget Ave", "No coords"],
+            "City": ["Phoenix", "Mesa"],
+            "State": ["AZ", "AZ"],
+            "Zip": [85021, 85201],
+            "Latitude": [33.55, None],
+            "Longitude": [-112.09, None],
+        }).to_csv(csv_path, index=False)
+        routes_path = tmp_path / "route-assignments.json"
+        routes_path.write_text(json.dumps([
+            {"address": "6918 E. Monte Ave.", "city": "Mesa", "zipCode": "85209",
+             "latitude": 33.37, "longitude": -111.69},
+            {"address": "1 Ocean Dr", "city": "Miami", "state": "FL", "zip": "33139",
+             "latitude": 25.77, "longitude": -80.13},
+            {"address": "", "latitude": 1.0, "longitude": 2.0},
+        ]), encoding="utf-8")
+
+        assert geocoded_csv_records(csv_path) == [("715 W Puget Ave, Phoenix, AZ, 85021", 33.55, -112.09)]
+        assert [r[0] for r in route_assignment_records(routes_path)] == [
+            "6918 E. Monte Ave., Mesa, AZ, 85209",
+            "1 Ocean Dr, Miami, FL, 33139",
+        ]
+        written = seed_cache(cache, geocoded_csvs=[csv_path], route_assignments=[routes_path])
+        assert sum(written.values()) == 3
+        assert cache.stats().seeded == 3
+
+
+# ---------------------------------------------------------------------------
+# geocode_batch integration
+# ---------------------------------------------------------------------------
+
+def _addresses() -> pd.DataFrame:
+    return pd.DataFrame({
+        "street": ["1 Main St", "2 Main St", "3 Main St", "1 Main St"],
+        "city": ["Mesa"] * 4,
+        "state": ["AZ"] * 4,
+        "zip": ["85201"] * 4,
+    })
+
+
+class TestGeocodeBatchCache:
+    def test_cache_only_without_api_key(self, cache):
+        cache.put("1 Main St, Mesa, AZ, 85201", (33.4, -111.8))
+        cache.put_many([("2 Main St, Mesa, AZ, 85201", ZERO_RESULTS)])
+        with patch.dict("os.environ", {}, clear=True):
+            result, stats = geocode_batch(_addresses(), api_key=None, cache=cache)
+        assert result["latitude"].tolist()[0] == 33.4
+        assert result["latitude"].tolist()[3] == 33.4
+        assert (stats.geocoded, stats.cached, stats.failed, stats.skipped) == (2, 2, 1, 1)
+
+    def test_api_results_written_back(self, cache, geocode_server):
+        geocode_server.locations = {
+            "1 Main St, Mesa, AZ, 85201": (1.0, 1.0),
+            "2 Main St, Mesa, AZ, 85201": (2.0, 2.0),
+        }
+        _, first = geocode_batch(_addresses(), api_key="k", cache=cache, base_url=geocode_server.url)
+        _, second = geocode_batch(_addresses(), api_key="k", cache=cache, base_url=geocode_server.url)
+
+        assert sorted(geocode_server.requests) == [
+            "1 Main St, Mesa, AZ, 85201",
+            "2 Main St, Mesa, AZ, 85201",
+            "3 Main St, Mesa, AZ, 85201",
+        ]
+        assert (first.geocoded, first.cached, first.failed) == (3, 0, 1)
+        assert (second.geocoded, second.cached, second.failed) == (3, 3, 1)
+        assert cache.get("3 Main St, Mesa, AZ, 85201").status == STATUS_NOT_FOUND
+
+    def test_request_denied_not_cached(self, cache, geocode_server):
+        geocode_server.status = "REQUEST_DENIED"
+        geocode_batch(_addresses(), api_key="bad", cache=cache, base_url=geocode_server.url)
+        assert cache.stats().not_found == 0
+
+        geocode_server.status = None
+        geocode_server.locations = {"1 Main St, Mesa, AZ, 85201": (1.0, 1.0)}
+        geocode_server.requests.clear()
+        _, stats = geocode_batch(_addresses(), api_key="fixed", cache=cache, base_url=geocode_server.url)
+
+        assert len(geocode_server.requests) == 3
+        assert stats.geocoded == 2
@@ -0,0 +1,143 @@
+"""Unit tests for pipeline.geocode_journal and resumable geocode_batch runs."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from pipeline.geocache import GeocodeCache
+from pipeline.geocode_journal import GeocodeJournal
+from pipeline.geocoder import ConcurrentGeocoder, GeocodeResponse
+from pipeline.utils import geocode_batch
+
+ZERO_RESULTS = GeocodeResponse("ZERO_RESULTS")
+
+
+def _ok(lat: float, lng: float) -> GeocodeResponse:
+    return GeocodeResponse("OK", (lat, lng))
+
+
+class TestGeocodeJournal:
+    def test_append_and_reload(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        journal = GeocodeJournal(path)
+        assert journal.append([("1 MAIN ST", _ok(1.0, 2.0)), ("9 NOWHERE", ZERO_RESULTS)]) == 2
+        assert journal.append([]) == 0
+
+        reloaded = GeocodeJournal(path)
+        assert reloaded.entries() == {"1 MAIN ST": _ok(1.0, 2.0), "9 NOWHERE": ZERO_RESULTS}
+        assert len(reloaded) == 2
+
+    def test_failed_requests_are_not_journaled(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        failed = [("1 MAIN ST", GeocodeResponse("OVER_QUERY_LIMIT")), ("2 MAIN ST", GeocodeResponse("TRANSPORT_ERROR"))]
+
+        assert GeocodeJournal(path).append(failed + [("3 MAIN ST", _ok(1.0, 2.0))]) == 1
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write('{"address": "4 MAIN ST", "latitude": null, "longitude": null}\n')  # no status: unknown
+        assert GeocodeJournal(path).entries() == {"3 MAIN ST": _ok(1.0, 2.0)}
+
+    def test_torn_final_line_is_truncated(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        GeocodeJournal(path).append([("1 MAIN ST", _ok(1.0, 2.0))])
+        with path.open("a", encoding="utf-8") as handle:
+            handle.write('{"address": "2 MAIN ST", "lati')
+
+        journal = GeocodeJournal(path)
+        assert journal.entries() == {"1 MAIN ST": _ok(1.0, 2.0)}
+        journal.append([("2 MAIN ST", _ok(3.0, 4.0))])
+        assert GeocodeJournal(path).entries() == {"1 MAIN ST": _ok(1.0, 2.0), "2 MAIN ST": _ok(3.0, 4.0)}
+
+    def test_compact_moves_entries_into_cache(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        journal = GeocodeJournal(path)
+        journal.append([("1 MAIN ST, MESA, AZ, 85201", _ok(1.0, 2.0)), ("9 NOWHERE", ZERO_RESULTS)])
+
+        with GeocodeCache(tmp_path / "cache.sqlite") as cache:
+            assert journal.compact(cache) == 2
+            assert cache.get("1 Main Street, Mesa, AZ 85201").coords == (1.0, 2.0)
+            assert not cache.get("9 Nowhere").ok
+
+        assert not path.exists()
+        assert len(journal) == 0
+
+    def test_compact_without_cache_keeps_journal(self, tmp_path):
+        path = tmp_path / "journal.jsonl"
+        journal = GeocodeJournal(path)
+        journal.append([("1 MAIN ST", _ok(1.0, 2.0))])
+
+        assert journal.compact() == 0
+        assert GeocodeJournal(path).entries() == {"1 MAIN ST": _ok(1.0, 2.0)}
+
+
+class TestResumableGeocodeBatch:
+    def test_restart_only_requests_remaining_addresses(self, geocode_server, tmp_path, monkeypatch):
+        geocode_server.locations = {f"{n} Main St": (float(n), -float(n)) for n in range(6)}
+        frame = pd.DataFrame(
+            {
+                "address": [f"{n} Main St" for n in range(6)],
+                "latitude": [pd.NA] * 6,
+                "longitude": [pd.NA] * 6,
+            }
+        )
+        journal_path = tmp_path / "journal.jsonl"
+        kwargs = dict(api_key="k", base_url=geocode_server.url, batch_size=2, max_workers=1, journal=journal_path)
+
+        original = ConcurrentGeocoder.geocode_many
+        calls = []
+
+        def crash_on_second_batch(self, addresses):
+            calls.append(list(addresses))
+            if len(calls) == 2:
+                raise KeyboardInterrupt
+            return original(self, addresses)
+
+        monkeypatch.setattr(ConcurrentGeocoder, "geocode_many", crash_on_second_batch)
+        with pytest.raises(KeyboardInterrupt):
+            geocode_batch(frame, **kwargs)
+        monkeypatch.undo()
+
+        assert len(GeocodeJournal(journal_path)) == 2
+        first_run = list(geocode_server.requests)
+        geocode_server.requests.clear()
+
+        with GeocodeCache(tmp_path / "cache.sqlite") as cache:
+            output, stats = geocode_batch(frame, cache=cache, **kwargs)
+            assert len(cache) == 6
+
+        assert output["latitude"].tolist() == [float(n) for n in range(6)]
+        assert (stats.geocoded, stats.resumed) == (6, 2)
+        assert len(geocode_server.requests) == 4
+        assert not set(first_run) & set(geocode_server.requests)
+        assert not journal_path.exists()
+
+    def test_journal_replayed_without_key_or_cache(self, tmp_path, monkeypatch):
+        monkeypatch.delenv("GOOGLE_GEOCODING_API_KEY", raising=False)
+        monkeypatch.delenv("GOOGLE_MAPS_API_KEY", raising=False)
+        frame = pd.DataFrame({"address": ["0 Main St", "1 Main St"], "latitude": [pd.NA] * 2, "longitude": [pd.NA] * 2})
+        journal_path = tmp_path / "journal.jsonl"
+        GeocodeJournal(journal_path).append([("0 MAIN ST", _ok(1.0, 2.0))])
+
+        output, stats = geocode_batch(frame, journal=journal_path)
+
+        assert output["latitude"].tolist()[0] == 1.0
+        assert (stats.geocoded, stats.resumed, stats.skipped) == (1, 1, 1)
+        assert journal_path.exists()
+
+    def test_restart_retries_requests_that_failed(self, tmp_path, geocode_server):
+        geocode_server.locations = {"0 Main St": (1.0, 2.0), "1 Main St": (3.0, 4.0)}
+        frame = pd.DataFrame({"address": ["0 Main St", "1 Main St"], "latitude": [pd.NA] * 2, "longitude": [pd.NA] * 2})
+        journal_path = tmp_path / "journal.jsonl"
+        kwargs = dict(api_key="k", base_url=geocode_server.url, journal=journal_path, max_retries=0)
+
+        geocode_server.status = "OVER_QUERY_LIMIT"
+        _, failed = geocode_batch(frame, **kwargs)
+        assert failed.failed == 2 and len(GeocodeJournal(journal_path)) == 0
+
+        geocode_server.status = None
+        with GeocodeCache(tmp_path / "cache.sqlite") as cache:
+            output, stats = geocode_batch(frame, cache=cache, **kwargs)
+            assert cache.stats().not_found == 0
+
+        assert output["latitude"].tolist() == [1.0, 3.0]
+        assert (stats.geocoded, stats.resumed) == (2, 0)
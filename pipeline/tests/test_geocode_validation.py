@@ -0,0 +1,96 @@
+"""Unit tests for pipeline.geocode_validation and geocode_batch's ZIP check."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.constants import (
+    GEOCODE_CHECK_INSIDE,
+    GEOCODE_CHECK_MISSING,
+    GEOCODE_CHECK_NEAR_BOUNDARY,
+    GEOCODE_CHECK_NO_POLYGON,
+    GEOCODE_CHECK_OUTSIDE,
+)
+from pipeline.geocache import GeocodeCache
+from pipeline.geocode_validation import ZipPolygons, main, requeue_mismatches, validate_geocodes
+from pipeline.geometry import PolygonTable
+from pipeline.utils import geocode_batch
+from pipeline.tests.conftest import square_polygon
+
+
+@pytest.fixture
+def polygons():
+    # Two 0.1-degree ZIPs side by side (about 11 km across).
+    return ZipPolygons(PolygonTable.from_geometries({
+        "85001": square_polygon(-112.0, 33.0, 0.1),
+        "85002": square_polygon(-111.9, 33.0, 0.1),
+    }))
+
+
+class TestValidateGeocodes:
+    def test_statuses_and_counts(self, polygons):
+        frame = pd.DataFrame({
+            "zip": ["85001", "85001", "85001", "99999", 85002.0],
+            "latitude": [33.05, 33.05, 33.05, 33.05, None],
+            "longitude": [-111.95, -111.85, -111.898, -111.95, -111.85],
+        })
+
+        checked, report = validate_geocodes(frame, polygons)
+
+        assert checked["geocode_check"].tolist() == [
+            GEOCODE_CHECK_INSIDE,
+            GEOCODE_CHECK_OUTSIDE,
+            GEOCODE_CHECK_NEAR_BOUNDARY,  # ~190 m past the edge
+            GEOCODE_CHECK_NO_POLYGON,
+            GEOCODE_CHECK_MISSING,
+        ]
+        assert (report.inside, report.near_boundary, report.outside) == (1, 1, 1)
+        assert report.mismatch_rate == pytest.approx(1 / 3)
+
+        requeued = requeue_mismatches(checked)
+        assert requeued["latitude"].isna().tolist() == [False, True, False, False, True]
+        assert "geocode_check" not in frame.columns
+
+    def test_zero_tolerance_flags_near_misses(self, polygons):
+        status = polygons.check(["85001"], np.array([33.05]), np.array([-111.898]), tolerance_km=0)
+        assert status.tolist() == [GEOCODE_CHECK_OUTSIDE]
+
+
+class TestCli:
+    def test_checks_json_records(self, tmp_path, capsys):
+        (tmp_path / "zips.json").write_text(json.dumps({"85001": square_polygon(-112.0, 33.0, 0.1)}))
+        (tmp_path / "accounts.json").write_text(json.dumps([
+            {"zip": "85001", "latitude": 33.05, "longitude": -111.95},
+            {"zip": "85001", "latitude": 33.05, "longitude": -111.70},
+        ]))
+
+        main([
+            "--data-root", str(tmp_path), "check", "accounts.json", "--boundaries", "zips.json",
+            "--zip-column", "zip", "--lat-column", "latitude", "--lng-column", "longitude",
+        ])
+
+        assert "2 rows: 1 inside, 0 near boundary, 1 outside" in capsys.readouterr().out
+
+
+class TestGeocodeBatchValidation:
+    def test_cached_mismatch_requeued_and_api_mismatch_rejected(self, geocode_server, polygons, tmp_path):
+        geocode_server.locations = {
+            "1 Main St, Phoenix, AZ 85001": (33.05, -111.95),
+            "2 Main St, Phoenix, AZ 85001": (32.2, -110.9),  # Tucson
+        }
+        frame = pd.DataFrame({"address": ["1 Main St, Phoenix, AZ 85001", "2 Main St, Phoenix, AZ 85001"]})
+
+        with GeocodeCache(tmp_path / "cache.sqlite") as cache:
+            cache.put("1 Main St, Phoenix, AZ 85001", (32.2, -110.9))
+            output, stats = geocode_batch(frame, api_key="k", base_url=geocode_server.url, cache=cache, polygons=polygons)
+            assert cache.get("1 Main St, Phoenix, AZ 85001").coords == (33.05, -111.95)
+            assert not cache.get("2 Main St, Phoenix, AZ 85001").ok
+
+        assert output["latitude"].tolist()[0] == 33.05
+        assert pd.isna(output["latitude"].iloc[1])
+        assert (stats.geocoded, stats.cached, stats.failed, stats.mismatched) == (1, 0, 1, 2)
+        assert len(geocode_server.requests) == 2
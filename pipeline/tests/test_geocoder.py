@@ -0,0 +1,191 @@
+"""Unit tests for pipeline.geocoder."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from pipeline.geocoder import (
+    STATUS_OK,
+    STATUS_OVER_QUERY_LIMIT,
+    STATUS_TRANSPORT_ERROR,
+    STATUS_ZERO_RESULTS,
+    ConcurrentGeocoder,
+    TokenBucket,
+    parse_geocode_payload,
+)
+from pipeline.geocache import GeocodeCache
+from pipeline.utils import geocode_batch
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps: list[float] = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def _geocoder(server, **kwargs) -> ConcurrentGeocoder:
+    kwargs.setdefault("rate_per_second", 1000.0)
+    kwargs.setdefault("backoff_seconds", 0.01)
+    return ConcurrentGeocoder("k", base_url=server.url, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Token bucket
+# ---------------------------------------------------------------------------
+
+class TestTokenBucket:
+    def test_burst_then_paced(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=2, clock=clock, sleep=clock.sleep)
+
+        for _ in range(4):
+            bucket.acquire()
+
+        # Two tokens from the initial burst, then one every 1/rate seconds.
+        assert clock.now == pytest.approx(0.2)
+
+    def test_set_rate_drain(self):
+        clock = FakeClock()
+        bucket = TokenBucket(rate=10, capacity=5, clock=clock, sleep=clock.sleep)
+        bucket.set_rate(2, drain=True)
+
+        bucket.acquire()
+
+        assert bucket.rate == 2
+        assert clock.now == pytest.approx(0.5)
+
+    def test_rejects_non_positive_rate(self):
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+# ---------------------------------------------------------------------------
+# Payload parsing
+# ---------------------------------------------------------------------------
+
+class TestParsePayload:
+    def test_ok(self):
+        body = b'{"status": "OK", "results": [{"geometry": {"location": {"lat": 33.4, "lng": -112.0}}}]}'
+        response = parse_geocode_payload(body)
+        assert response.status == STATUS_OK
+        assert response.coords == (33.4, -112.0)
+
+    def test_ok_without_results_is_zero_results(self):
+        assert parse_geocode_payload(b'{"status": "OK", "results": []}').status == STATUS_ZERO_RESULTS
+
+    def test_garbage_is_transport_error(self):
+        assert parse_geocode_payload(b"<html>").status == STATUS_TRANSPORT_ERROR
+
+
+# ---------------------------------------------------------------------------
+# Concurrent client
+# ---------------------------------------------------------------------------
+
+class TestConcurrentGeocoder:
+    def test_order_preserved_and_duplicates_requested_once(self, geocode_server):
+        geocode_server.locations = {f"{n} Main St": (float(n), -float(n)) for n in range(20)}
+        addresses = [f"{n} Main St" for n in range(20)] + ["0 Main St", "missing"]
+
+        with _geocoder(geocode_server, max_workers=4) as geocoder:
+            responses = geocoder.geocode_many(addresses)
+
+        assert [response.coords for response in responses[:20]] == [(float(n), -float(n)) for n in range(20)]
+        assert responses[20].coords == (0.0, -0.0)
+        assert responses[21].not_found and responses[21].coords is None
+        assert len(geocode_server.requests) == 21
+
+    def test_connections_are_reused(self, geocode_server):
+        geocode_server.locations = {f"{n} Main St": (1.0, 1.0) for n in range(40)}
+
+        with _geocoder(geocode_server, max_workers=3) as geocoder:
+            geocoder.geocode_many(list(geocode_server.locations))
+
+        assert geocoder.stats.requests == 40
+        assert geocoder.stats.connections_opened <= 3
+        assert len(geocode_server.client_ports) <= 3
+
+    def test_over_query_limit_lowers_rate_and_retries(self, geocode_server):
+        geocode_server.locations = {"1 Main St": (1.0, 2.0)}
+        geocode_server.over_limit_remaining = 1
+
+        with _geocoder(geocode_server, max_workers=1, rate_per_second=100.0) as geocoder:
+            responses = geocoder.geocode_many(["1 Main St"])
+
+        assert [response.coords for response in responses] == [(1.0, 2.0)]
+        assert geocoder.stats.over_query_limit == 1
+        assert geocoder.stats.retries == 1
+        assert geocoder.bucket.rate < 100.0
+        assert geocode_server.requests == ["1 Main St", "1 Main St"]
+
+    def test_zero_results_not_retried(self, geocode_server):
+        with _geocoder(geocode_server) as geocoder:
+            assert geocoder.geocode("nowhere").status == STATUS_ZERO_RESULTS
+
+        assert geocode_server.requests == ["nowhere"]
+        assert geocoder.stats.retries == 0
+
+    def test_failures_keep_their_status(self, geocode_server):
+        geocode_server.status = "REQUEST_DENIED"
+        with _geocoder(geocode_server) as geocoder:
+            response = geocoder.geocode("1 Main St")
+        assert (response.status, response.ok, response.not_found) == ("REQUEST_DENIED", False, False)
+
+        geocode_server.status = None
+        geocode_server.over_limit_remaining = 10
+        with _geocoder(geocode_server, max_retries=1) as geocoder:
+            assert geocoder.geocode("1 Main St").status == STATUS_OVER_QUERY_LIMIT
+
+    def test_unreachable_server_is_transport_failure(self):
+        geocoder = ConcurrentGeocoder(
+            "k",
+            base_url="http://127.0.0.1:9/geocode/json",
+            max_retries=0,
+            timeout=1.0,
+        )
+        with geocoder:
+            assert geocoder.geocode("1 Main St").status == STATUS_TRANSPORT_ERROR
+
+    def test_rejects_unsupported_url(self):
+        with pytest.raises(ValueError):
+            ConcurrentGeocoder("k", base_url="ftp://example.com/geocode")
+
+
+class TestGeocodeBatchConcurrent:
+    def test_fills_rows_and_shares_duplicate_lookups(self, geocode_server):
+        geocode_server.locations = {"1 Main St": (1.0, 2.0), "2 Main Street": (3.0, 4.0)}
+        frame = pd.DataFrame(
+            {
+                "address": ["1 Main St", "2 Main Street", "1 main st.", "9 Nowhere"],
+                "latitude": [pd.NA] * 4,
+                "longitude": [pd.NA] * 4,
+            }
+        )
+
+        output, stats = geocode_batch(
+            frame, api_key="k", base_url=geocode_server.url, batch_size=2, max_workers=2
+        )
+
+        assert output["latitude"].tolist()[:3] == [1.0, 3.0, 1.0]
+        assert pd.isna(output.loc[3, "latitude"])
+        assert (stats.geocoded, stats.failed, stats.skipped) == (3, 1, 0)
+        # One request per normalized address, sent as the first row wrote it.
+        assert sorted(geocode_server.requests) == ["1 Main St", "2 Main Street", "9 Nowhere"]
+        assert (stats.unique_addresses, stats.dedup_ratio) == (3, pytest.approx(4 / 3))
+
+    def test_failed_requests_are_not_persisted(self, geocode_server, tmp_path):
+        geocode_server.status = "REQUEST_DENIED"
+        frame = pd.DataFrame({"address": ["1 Main St", "2 Main St"], "latitude": [pd.NA] * 2, "longitude": [pd.NA] * 2})
+
+        with GeocodeCache(tmp_path / "cache.sqlite") as cache:
+            _, stats = geocode_batch(frame, api_key="k", base_url=geocode_server.url, cache=cache)
+            assert len(cache) == 0
+
+        assert (stats.geocoded, stats.failed) == (0, 2)
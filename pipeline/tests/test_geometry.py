@@ -0,0 +1,160 @@
+"""Unit tests for pipeline.geometry."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from pipeline.geometry import (
+    EdgeStrips,
+    PolygonTable,
+    ShapeGrid,
+    boundary_distance_km,
+    load_zip_polygons,
+    locate_points,
+    points_in_shapes,
+    polygon_centroids,
+    read_zip_geometries,
+)
+from pipeline.tests.conftest import square_polygon, square_ring
+
+
+SQUARE = {"type": "Polygon", "coordinates": [square_ring(0, 0, 2)]}
+# 4x4 square with a 2x2 hole in its left half-ish corner.
+HOLED = {"type": "Polygon", "coordinates": [square_ring(0, 0, 4), square_ring(0, 0, 2, clockwise=True)]}
+MULTI = {"type": "MultiPolygon", "coordinates": [[square_ring(0, 0, 1)], [square_ring(10, 0, 1)]]}
+
+
+class TestPolygonTable:
+    def test_flattens_rings_and_bboxes(self):
+        table = PolygonTable.from_geometries({"00001": SQUARE, "00002": MULTI})
+        assert list(table.keys) == ["00001", "00002"]
+        assert table.ring_count == 3
+        assert table.ring_offsets.tolist() == [0, 5, 10, 15]
+        assert table.bbox.tolist() == [[0, 0, 2, 2], [0, 0, 11, 1]]
+
+    def test_open_rings_are_closed(self):
+        open_ring = {"type": "Polygon", "coordinates": [[[0, 0], [1, 0], [1, 1]]]}
+        table = PolygonTable.from_geometries({"1": open_ring})
+        assert len(table.x) == 4
+        assert (table.x[0], table.y[0]) == (table.x[-1], table.y[-1])
+
+    def test_skips_non_polygons(self):
+        table = PolygonTable.from_geometries({"1": {"type": "Point", "coordinates": [0, 0]}})
+        assert len(table) == 0
+
+
+class TestCentroids:
+    def test_square_and_winding(self):
+        table = PolygonTable.from_geometries({
+            "a": SQUARE,
+            "b": {"type": "Polygon", "coordinates": [square_ring(0, 0, 2, clockwise=True)]},
+        })
+        centroids = polygon_centroids(table)
+        assert centroids[["longitude", "latitude"]].to_numpy().tolist() == [[1, 1], [1, 1]]
+
+    def test_hole_shifts_centroid(self):
+        centroid = polygon_centroids(PolygonTable.from_geometries({"h": HOLED})).iloc[0]
+        # (16 * (2, 2) - 4 * (1, 1)) / 12
+        assert centroid["longitude"] == pytest.approx(28 / 12)
+        assert centroid["latitude"] == pytest.approx(28 / 12)
+
+    def test_multipolygon_is_area_weighted(self):
+        unequal = {"type": "MultiPolygon", "coordinates": [[square_ring(0, 0, 1)], [square_ring(10, 0, 3)]]}
+        centroid = polygon_centroids(PolygonTable.from_geometries({"m": unequal})).iloc[0]
+        assert centroid["longitude"] == pytest.approx((1 * 0.5 + 9 * 11.5) / 10)
+
+    def test_area_km2(self):
+        tiny = {"type": "Polygon", "coordinates": [square_ring(-112.0, 33.0, 0.01)]}
+        area = polygon_centroids(PolygonTable.from_geometries({"z": tiny}))["area_km2"].iloc[0]
+        expected = (0.01 * 111.195) ** 2 * np.cos(np.radians(33.005))
+        assert area == pytest.approx(expected, rel=1e-6)
+
+
+class TestPointInPolygon:
+    def test_holes_multipolygons_and_unknown_shapes(self):
+        table = PolygonTable.from_geometries({"h": HOLED, "m": MULTI})
+        strips = EdgeStrips.from_table(table, edges_per_strip=1)
+        x = np.array([3.0, 1.0, 10.5, 5.0, 0.5, 3.0, np.nan])
+        y = np.array([3.0, 1.0, 0.5, 0.5, 0.5, 3.0, 1.0])
+        shapes = np.array([0, 0, 1, 1, 1, -1, 0])
+        assert points_in_shapes(strips, x, y, shapes).tolist() == [True, False, True, False, True, False, False]
+        assert table.lookup(["m", "zz", "h"]).tolist() == [1, -1, 0]
+
+    def test_matches_brute_force_across_chunks(self):
+        rng = np.random.default_rng(7)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, 60))
+        radius = rng.uniform(0.5, 1.0, 60)
+        star = np.column_stack([radius * np.cos(angles), radius * np.sin(angles)])
+        table = PolygonTable.from_geometries({"s": {"type": "Polygon", "coordinates": [star.tolist()]}})
+        x, y = rng.uniform(-1, 1, 2000), rng.uniform(-1, 1, 2000)
+
+        strips = EdgeStrips.from_table(table)
+        fast = points_in_shapes(strips, x, y, np.zeros(2000, dtype=int), chunk_pairs=500)
+        ring = np.vstack([star, star[:1]])
+        x0, y0, x1, y1 = ring[:-1, 0], ring[:-1, 1], ring[1:, 0], ring[1:, 1]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            crossings = ((y0 > y[:, None]) != (y1 > y[:, None])) & (
+                x[:, None] < x0 + (y[:, None] - y0) * (x1 - x0) / (y1 - y0)
+            )
+        assert (fast == (crossings.sum(axis=1) % 2 == 1)).all()
+
+    def test_boundary_distance(self):
+        tiny = {"type": "Polygon", "coordinates": [square_ring(-112.0, 0.0, 0.01)]}
+        strips = EdgeStrips.from_table(PolygonTable.from_geometries({"z": tiny}))
+        distance = boundary_distance_km(strips, np.array([-111.98, -112.0]), np.array([0.005, 0.02]), np.array([0, -1]))
+        assert distance[0] == pytest.approx(0.01 * 111.195, rel=1e-3)
+        assert distance[1] == np.inf
+
+
+class TestLocatePoints:
+    def test_grid_candidates_and_containing_shape(self):
+        # A 10x10 checkerboard of unit squares plus one holed shape on top.
+        geometries = {f"{i}-{j}": square_polygon(i, j, 1) for i in range(10) for j in range(10)}
+        geometries["h"] = {
+            "type": "Polygon",
+            "coordinates": [square_ring(20, 0, 4), square_ring(20, 0, 2, clockwise=True)],
+        }
+        table = PolygonTable.from_geometries(geometries)
+        grid = ShapeGrid.from_table(table)
+        assert grid.cell == 1.0
+
+        x = np.array([0.5, 3.5, 9.9, 23.0, 21.0, -5.0, np.nan])
+        y = np.array([0.5, 7.5, 9.9, 3.0, 1.0, 0.0, 1.0])
+        point, shape = grid.candidates(x, y)
+        assert set(point.tolist()) == {0, 1, 2, 3, 4}
+        assert all(np.isin(table.lookup(["0-0"]), shape[point == 0]))
+
+        located = locate_points(EdgeStrips.from_table(table), grid, x, y, chunk_size=3)
+        keys = np.append(table.keys, None)[located]
+        assert keys.tolist() == ["0-0", "3-7", "9-9", "h", None, None, None]
+
+
+class TestReadBoundaries:
+    def test_all_layouts(self, tmp_path):
+        mapping = tmp_path / "a-zip-boundaries.json"
+        mapping.write_text(json.dumps({"85001": SQUARE}))
+        records = tmp_path / "b-zip-boundaries.json"
+        records.write_text(json.dumps([{"zipCode": "85002", "geometry": SQUARE}]))
+        collection = tmp_path / "c-zip-boundaries.json"
+        collection.write_text(json.dumps({
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "properties": {"ZCTA5CE10": "85003"}, "geometry": SQUARE},
+                {"type": "Feature", "properties": {"ZCTA5CE10": "85001"}, "geometry": MULTI},
+            ],
+        }))
+
+        assert set(read_zip_geometries(collection)) == {"85003", "85001"}
+        table = load_zip_polygons([mapping, records, collection])
+        assert sorted(table.keys) == ["85001", "85002", "85003"]
+        # The first file wins for 85001.
+        assert table.ring_count == 3
+
+    def test_unknown_layout(self, tmp_path):
+        path = tmp_path / "bad.json"
+        path.write_text("42")
+        with pytest.raises(ValueError):
+            read_zip_geometries(path)
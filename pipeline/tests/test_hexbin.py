@@ -0,0 +1,112 @@
+"""Unit tests for pipeline.hexbin."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.hexbin import hex_axial, hex_center, hexbin_accounts, hexbin_frame, main
+
+
+class TestHexAxial:
+    def test_points_go_to_nearest_center(self):
+        rng = np.random.default_rng(7)
+        x, y = rng.normal(size=5000) * 20, rng.normal(size=5000) * 20
+
+        q, r = hex_axial(x, y, 1.5)
+
+        cx, cy = hex_center(q, r, 1.5)
+        distance = np.hypot(x - cx, y - cy)
+        for dq, dr in [(1, 0), (-1, 0), (0, 1), (0, -1), (1, -1), (-1, 1)]:
+            nx, ny = hex_center(q + dq, r + dr, 1.5)
+            assert (distance <= np.hypot(x - nx, y - ny) + 1e-9).all()
+
+    def test_centers_round_trip(self):
+        q = np.array([0, 3, -2, 10])
+        r = np.array([0, -1, 5, -7])
+
+        assert [array.tolist() for array in hex_axial(*hex_center(q, r, 0.5), 0.5)] == [q.tolist(), r.tolist()]
+
+
+class TestHexbinAccounts:
+    def test_counts_and_revenue(self):
+        lat = [33.45, 33.4501, 33.4502, 33.60, np.nan]
+        lng = [-112.07, -112.0701, -112.0702, -111.90, -112.0]
+
+        bins = hexbin_accounts(
+            lat,
+            lng,
+            active=[True, False, True, True, True],
+            revenue=[100.0, 50.0, np.nan, 25.0, 10.0],
+            sizes=(1.0,),
+        )
+
+        hexes = bins[1.0]
+        assert len(hexes) == 2
+        order = np.argsort(hexes.lat)
+        assert hexes.active[order].tolist() == [2, 1]
+        assert hexes.terminated[order].tolist() == [1, 0]
+        assert hexes.revenue[order].tolist() == [150.0, 25.0]
+        assert hexes.lat[order][0] == pytest.approx(33.45, abs=0.02)
+
+    def test_every_size_keeps_totals(self):
+        rng = np.random.default_rng(3)
+        lat, lng = 33 + rng.random(2000), -112 + rng.random(2000)
+
+        bins = hexbin_accounts(lat, lng, sizes=(0.25, 1.0, 4.0))
+
+        assert list(bins) == [0.25, 1.0, 4.0]
+        assert [int(hexes.active.sum()) for hexes in bins.values()] == [2000, 2000, 2000]
+        assert len(bins[0.25]) > len(bins[1.0]) > len(bins[4.0])
+
+    def test_fixed_reference_latitude_gives_stable_ids(self):
+        first = hexbin_accounts([33.45], [-112.07], sizes=(1.0,), ref_lat=33.0)[1.0]
+        second = hexbin_accounts([33.45, 40.0], [-112.07, -105.0], sizes=(1.0,), ref_lat=33.0)[1.0]
+
+        assert (first.q[0], first.r[0]) in set(zip(second.q.tolist(), second.r.tolist()))
+
+    def test_rejects_non_positive_sizes(self):
+        with pytest.raises(ValueError):
+            hexbin_accounts([33.45], [-112.07], sizes=(1.0, 0.0))
+
+
+class TestHexbinFrame:
+    def test_status_column(self):
+        frame = pd.DataFrame({
+            "latitude": [33.45, 33.45, 33.45],
+            "longitude": [-112.07, -112.07, -112.07],
+            "status": ["Active", " terminated", None],
+            "monthlyPrice": ["100", 50, None],
+        })
+
+        (hexes,) = hexbin_frame(frame, revenue_column="monthlyPrice", sizes=(1.0,)).values()
+
+        assert (hexes.active.tolist(), hexes.terminated.tolist(), hexes.revenue.tolist()) == ([1], [2], [150.0])
+
+    def test_missing_status_column_counts_active(self):
+        frame = pd.DataFrame({"latitude": [33.45, 33.46], "longitude": [-112.07, -112.07]})
+
+        (hexes,) = hexbin_frame(frame, sizes=(4.0,)).values()
+
+        assert hexes.active.tolist() == [2]
+
+
+class TestCli:
+    def test_writes_file_per_size(self, tmp_path, capsys):
+        source = tmp_path / "customer-lookup.json"
+        source.write_text(json.dumps([
+            {"latitude": 33.45, "longitude": -112.07, "status": "Active", "monthlyPrice": 150},
+            {"latitude": 33.62, "longitude": -111.92, "status": "Terminated", "monthlyPrice": 90},
+        ]))
+
+        main(["--data-root", str(tmp_path), source.name, "--sizes", "0.5", "2", "--revenue-column", "monthlyPrice"])
+
+        small = json.loads((tmp_path / "customer-lookup.hex-0.5mi.json").read_text())
+        assert small["sizeMiles"] == 0.5
+        assert small["refLat"] == 34.0
+        assert sorted(small["active"]) == [0, 1] and sum(small["revenue"]) == 240
+        assert (tmp_path / "customer-lookup.hex-2mi.json").exists()
+        assert "1 active, 1 terminated" in capsys.readouterr().out
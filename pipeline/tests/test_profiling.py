@@ -0,0 +1,130 @@
+"""Unit tests for pipeline.profiling."""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import pstats
+import tracemalloc
+
+from pipeline.profiling import StageProfiler, collapse_stats
+
+
+def _leaf(n: int) -> int:
+    return sum(range(n))
+
+
+def _branch(n: int) -> int:
+    return _leaf(n) + _leaf(n)
+
+
+class TestStageProfiler:
+    def test_records_time_memory_and_rows(self):
+        profiler = StageProfiler()
+        with profiler.stage("load") as stage:
+            data = [bytearray(1024) for _ in range(1000)]
+            stage.rows = len(data)
+
+        (record,) = profiler.records
+        assert record.name == "load"
+        assert record.wall_s > 0
+        assert record.cpu_s >= 0
+        assert record.peak_bytes >= 1_000_000
+        assert record.rows == 1000
+        assert record.rows_per_s > 0
+        assert not tracemalloc.is_tracing()
+
+    def test_nested_stage_peak_folds_into_parent(self):
+        profiler = StageProfiler()
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                data = bytearray(2_000_000)
+                del data
+            small = bytearray(10)
+
+        outer, inner = profiler.records
+        assert (outer.depth, inner.depth) == (0, 1)
+        assert inner.peak_bytes >= 2_000_000
+        assert outer.peak_bytes >= inner.peak_bytes
+        assert outer.wall_s >= inner.wall_s
+        del small
+
+    def test_disabled_profiler_records_nothing(self):
+        profiler = StageProfiler(enabled=False)
+        with profiler.stage("load") as stage:
+            stage.rows = 5
+        assert profiler.records == []
+        assert not tracemalloc.is_tracing()
+
+    def test_stage_recorded_when_body_raises(self):
+        profiler = StageProfiler()
+        try:
+            with profiler.stage("boom"):
+                raise RuntimeError("fail")
+        except RuntimeError:
+            pass
+        assert profiler.records[0].name == "boom"
+        assert not tracemalloc.is_tracing()
+
+    def test_write_json(self, tmp_path):
+        profiler = StageProfiler(trace_memory=False)
+        with profiler.stage("a") as stage:
+            stage.rows = 3
+        with profiler.stage("b"):
+            pass
+
+        path = tmp_path / "profile.json"
+        profiler.write_json(path)
+        payload = json.loads(path.read_text(encoding="utf-8"))
+        assert [entry["name"] for entry in payload["stages"]] == ["a", "b"]
+        assert payload["stages"][0]["rows"] == 3
+        assert payload["stages"][1]["peak_bytes"] is None
+        assert payload["total_wall_s"] >= payload["stages"][0]["wall_s"]
+
+    def test_format_table_indents_nested(self):
+        profiler = StageProfiler(trace_memory=False)
+        with profiler.stage("outer"):
+            with profiler.stage("inner"):
+                pass
+        lines = profiler.format_table().splitlines()
+        assert lines[1].startswith("outer")
+        assert lines[2].startswith("  inner")
+
+
+class TestCollapsedStacks:
+    def test_stage_prefixed_stacks(self, tmp_path):
+        profiler = StageProfiler(cprofile=True, trace_memory=False)
+        with profiler.stage("work"):
+            _branch(200_000)
+
+        lines = profiler.collapsed_stacks()
+        assert lines
+        assert all(line.startswith("work;") for line in lines)
+        assert any("_branch (test_profiling.py" in line and "_leaf (test_profiling.py" in line for line in lines)
+
+        path = tmp_path / "stacks.collapsed"
+        profiler.write_collapsed(path)
+        for line in path.read_text(encoding="utf-8").splitlines():
+            stack, value = line.rsplit(" ", 1)
+            assert int(value) > 0
+
+    def test_collapse_conserves_time(self):
+        profile = cProfile.Profile()
+        profile.enable()
+        _branch(200_000)
+        profile.disable()
+        stats = pstats.Stats(profile)
+
+        root_cumtime = sum(
+            entry[3] for entry in stats.stats.values()
+            if not any(caller in stats.stats for caller in entry[4])
+        )
+
+        for min_fraction in (0.0, 2.0):
+            lines = collapse_stats(stats, min_fraction=min_fraction)
+            total_us = sum(int(line.rsplit(" ", 1)[1]) for line in lines)
+            assert abs(total_us - root_cumtime * 1_000_000) <= len(lines) + 1
+
+        # Above every path's share, all time folds into the root frames.
+        assert not any(";" in line for line in collapse_stats(stats, min_fraction=2.0))
+        assert any("_leaf" in line for line in collapse_stats(stats, min_fraction=0.0))
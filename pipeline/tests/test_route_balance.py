@@ -0,0 +1,145 @@
+"""Unit tests for pipeline.route_balance."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.route_balance import BalanceResult, RouteMove, balance_routes, main, workload
+from pipeline.routes import RouteAssignments
+
+
+def _records(rng, technician, lat, lng, count, day="Monday"):
+    return [
+        {
+            "customerNumber": f"{technician}-{number}",
+            "technician": technician,
+            "route": f"Route - {technician}",
+            "daysOfService": [day],
+            "monthlyPrice": 100,
+            "latitude": lat + rng.normal() * 0.01,
+            "longitude": lng + rng.normal() * 0.01,
+        }
+        for number in range(count)
+    ]
+
+
+@pytest.fixture
+def routes():
+    """Ann is overloaded next to Bo; Cy is far away and light."""
+    rng = np.random.default_rng(5)
+    records = (
+        _records(rng, "Ann", 33.45, -112.07, 30)
+        + _records(rng, "Bo", 33.45, -112.03, 10)
+        + _records(rng, "Cy", 33.80, -111.70, 10)
+    )
+    return RouteAssignments.from_records(records)
+
+
+class TestBalanceRoutes:
+    def test_reaches_targets_with_nearby_moves(self, routes):
+        result = balance_routes(routes.stops, tolerance=0.1, neighbours=12)
+
+        after = result.after.set_index("technician")["stops"]
+        assert after.sum() == 50
+        assert after["Ann"] < 30 and after["Bo"] <= 50 / 3 * 1.1 and after["Cy"] == 10
+        assert {move.to_technician for move in result.moves} == {"Bo"}
+        assert {move.from_technician for move in result.moves} == {"Ann"}
+        assert result.before.set_index("technician")["stops"]["Ann"] == 30
+
+    def test_absolute_targets_and_max_moves(self, routes):
+        result = balance_routes(routes.stops, max_stops=25, max_revenue=1e9)
+        assert result.after["stops"].max() <= 25
+
+        limited = balance_routes(routes.stops, max_stops=25, max_revenue=1e9, max_moves=2)
+        assert len(limited.moves) == 2
+
+    def test_fixed_stops_never_move(self):
+        records = [
+            {"customerNumber": f"A-{n}", "technician": "Ann", "daysOfService": ["Monday", "Thursday"],
+             "latitude": 33.45, "longitude": -112.07}
+            for n in range(5)
+        ] + [
+            {"customerNumber": "B-1", "technician": "Bo", "daysOfService": ["Monday"], "latitude": 33.45, "longitude": -112.06},
+            {"customerNumber": "U-1", "technician": "", "daysOfService": ["Monday"], "latitude": 33.45, "longitude": -112.06},
+        ]
+
+        result = balance_routes(RouteAssignments.from_records(records).stops)
+
+        assert result.moves == []
+        assert "Unassigned" not in set(result.after["technician"])
+
+    def test_changes_and_reassigned_records(self, routes):
+        result = balance_routes(routes.stops, neighbours=12)
+
+        changes = result.changes()
+        records = routes.reassigned(result.reassignments())
+        assert len(changes) == len(result.moves) > 0
+        assert list(changes.columns) == ["customerNumber", "day", "fromTechnician", "toTechnician", "detourMiles"]
+        moved = [record for record in records if record["customerNumber"] in set(changes["customerNumber"])]
+        assert {(record["technician"], record["route"]) for record in moved} == {("Bo", "Route - Bo")}
+        assert (result.technicians == RouteAssignments.from_records(records).stops["technician"].to_numpy()).all()
+
+    def test_moves_back_are_netted_out(self):
+        def move(stop, source, target, detour):
+            return RouteMove(stop, stop, f"C-{stop}", "Monday", source, target, detour)
+
+        empty = pd.DataFrame()
+        moves = [
+            move(1, "Ann", "Bo", 0.5),
+            move(2, "Ann", "Bo", 1.0),
+            move(1, "Bo", "Ann", 0.25),  # back where it started
+            move(2, "Bo", "Cy", 0.5),
+        ]
+        result = BalanceResult(np.array([]), moves, empty, empty, empty)
+
+        assert result.reassignments() == {2: "Cy"}
+        (change,) = result.changes().to_dict("records")
+        assert (change["customerNumber"], change["fromTechnician"], change["toTechnician"]) == ("C-2", "Ann", "Cy")
+        assert change["detourMiles"] == 1.5
+
+    def test_day_summary(self, routes):
+        result = balance_routes(routes.stops, tolerance=0.1, neighbours=12)
+
+        (row,) = result.day_summary().to_dict("records")
+        assert (row["day"], row["technicians"]) == ("Monday", 3)
+        assert row["maxStops"] == pytest.approx(50 / 3 * 1.1)
+        assert row["overBefore"] == 1 and row["overAfter"] <= row["overBefore"]
+        assert row["stopSpreadBefore"] == pytest.approx((30 - 10) / (50 / 3))
+        assert row["stopSpreadAfter"] < row["stopSpreadBefore"]
+
+    def test_validation(self, routes):
+        with pytest.raises(ValueError):
+            balance_routes(routes.stops, tolerance=-0.1)
+
+
+class TestWorkload:
+    def test_groups_by_technician_day(self):
+        stops = pd.DataFrame({
+            "record": [0, 1, 2, 3],
+            "technician": ["Ann", "Ann", "Bo", "Unassigned"],
+            "day": ["Monday", "Tuesday", "Monday", "Monday"],
+            "revenue": [10.0, 20.0, 30.0, 40.0],
+        })
+
+        frame = workload(stops)
+
+        assert frame.values.tolist() == [["Ann", "Monday", 1, 10.0], ["Ann", "Tuesday", 1, 20.0], ["Bo", "Monday", 1, 30.0]]
+
+
+class TestCli:
+    def test_writes_assignments_and_changes(self, routes, tmp_path, capsys):
+        (tmp_path / "route-assignments.json").write_text(json.dumps(routes.records))
+
+        main(["--data-root", str(tmp_path), "route-assignments.json", "--neighbours", "12"])
+
+        balanced = json.loads((tmp_path / "pipeline_outputs" / "route-assignments-balanced.json").read_text())
+        changes = pd.read_csv(tmp_path / "pipeline_outputs" / "route-assignments-changes.csv")
+        assert len(balanced) == 50 and len(changes) > 0
+        assert sum(record["technician"] == "Ann" for record in balanced) == 30 - len(changes)
+        out = capsys.readouterr().out
+        assert f"{len(changes)} stops reassigned; technician-days over their day's target 1 ->" in out
+        assert "Monday: over target 1 ->" in out
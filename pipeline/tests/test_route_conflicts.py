@@ -0,0 +1,135 @@
+"""Unit tests for pipeline.route_conflicts."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from pipeline.route_conflicts import (
+    bbox_candidates,
+    clip_convex,
+    convex_hull,
+    main,
+    points_in_convex,
+    polygon_area,
+    route_conflicts,
+    route_hulls,
+)
+from pipeline.routes import RouteAssignments
+
+SQUARE = np.array([[0.0, 0.0], [2.0, 0.0], [2.0, 2.0], [0.0, 2.0]])
+
+
+def _square_route(technician, day, lat, lng, size=0.02):
+    corners = [(0, 0), (size, 0), (size, size), (0, size), (size / 2, size / 2)]
+    return [
+        {"customerNumber": f"{technician}-{day}-{n}", "technician": technician, "daysOfService": [day],
+         "latitude": lat + dlat, "longitude": lng + dlng}
+        for n, (dlat, dlng) in enumerate(corners)
+    ]
+
+
+class TestGeometry:
+    def test_convex_hull(self):
+        rng = np.random.default_rng(1)
+        points = np.vstack([SQUARE, rng.random((50, 2)) * 2])
+
+        hull = convex_hull(points)
+
+        assert sorted(map(tuple, hull.tolist())) == sorted(map(tuple, SQUARE.tolist()))
+        assert polygon_area(hull) == pytest.approx(4.0)
+        assert len(convex_hull(np.array([[0.0, 0.0], [1.0, 1.0], [0.0, 0.0]]))) == 2
+
+    def test_clip_convex(self):
+        shifted = SQUARE + [1.0, 1.0]
+
+        assert polygon_area(clip_convex(SQUARE, shifted)) == pytest.approx(1.0)
+        assert polygon_area(clip_convex(SQUARE, SQUARE + [3.0, 0.0])) == 0.0
+        assert polygon_area(clip_convex(SQUARE, SQUARE * 0.5 + 0.5)) == pytest.approx(1.0)
+
+    def test_points_in_convex(self):
+        points = np.array([[1.0, 1.0], [2.0, 1.0], [2.5, 1.0]])
+
+        assert points_in_convex(points, SQUARE).tolist() == [True, True, False]
+
+
+class TestBboxCandidates:
+    def test_matches_all_pairs(self):
+        rng = np.random.default_rng(8)
+        low = rng.random((300, 2)) * 10
+        boxes = np.hstack([low, low + rng.random((300, 2))])
+
+        first, second = bbox_candidates(boxes)
+
+        expected = {
+            (i, j)
+            for i in range(300)
+            for j in range(i + 1, 300)
+            if boxes[i, 0] <= boxes[j, 2] and boxes[j, 0] <= boxes[i, 2]
+            and boxes[i, 1] <= boxes[j, 3] and boxes[j, 1] <= boxes[i, 3]
+        }
+        assert set(zip(first.tolist(), second.tolist())) == expected
+
+    def test_fewer_than_two_boxes(self):
+        assert [len(side) for side in bbox_candidates(np.zeros((1, 4)))] == [0, 0]
+
+
+class TestRouteConflicts:
+    @pytest.fixture
+    def hulls(self):
+        records = (
+            _square_route("Ann", "Monday", 33.40, -112.10)
+            + _square_route("Bo", "Monday", 33.41, -112.09)   # overlaps Ann by a quarter
+            + _square_route("Cy", "Monday", 33.60, -111.80)   # far away
+            + _square_route("Bo", "Tuesday", 33.40, -112.10)  # same ground as Ann, other day
+        )
+        return route_hulls(RouteAssignments.from_records(records).stops)
+
+    def test_only_same_day_overlaps(self, hulls):
+        conflicts = route_conflicts(hulls)
+
+        assert [(conflict.day, conflict.first, conflict.second) for conflict in conflicts] == [("Monday", "Ann", "Bo")]
+        (conflict,) = conflicts
+        assert conflict.overlap_share == pytest.approx(0.25, rel=0.01)
+        assert (conflict.first_stops_in_second, conflict.second_stops_in_first) == (2, 2)
+
+    def test_min_overlap_keeps_stops_inside(self, hulls):
+        area = route_conflicts(hulls)[0].overlap_sq_miles
+
+        assert route_conflicts(hulls, min_overlap_sq_miles=area * 2) != []
+
+    def test_min_overlap_drops_small_crossings(self):
+        def rectangle(technician, lat, lng, height, width):
+            corners = [(0, 0), (height, 0), (height, width), (0, width)]
+            return [
+                {"technician": technician, "daysOfService": ["Monday"], "latitude": lat + dlat, "longitude": lng + dlng}
+                for dlat, dlng in corners
+            ]
+
+        # A thin east-west route crossed by a thin north-south one: no stop inside the other hull.
+        records = rectangle("Ann", 33.40, -112.10, 0.002, 0.02) + rectangle("Bo", 33.39, -112.091, 0.022, 0.002)
+        hulls = route_hulls(RouteAssignments.from_records(records).stops)
+
+        (crossing,) = route_conflicts(hulls)
+        assert (crossing.first_stops_in_second, crossing.second_stops_in_first) == (0, 0)
+        assert crossing.overlap_sq_miles > 0
+        assert route_conflicts(hulls, min_overlap_sq_miles=crossing.overlap_sq_miles * 2) == []
+
+
+class TestCli:
+    def test_writes_conflicts_and_hulls(self, tmp_path, capsys):
+        records = _square_route("Ann", "Monday", 33.40, -112.10) + _square_route("Bo", "Monday", 33.41, -112.09)
+        (tmp_path / "miami-route-assignments.json").write_text(json.dumps(records))
+
+        main(["--data-root", str(tmp_path), "miami-route-assignments.json", "--hulls", "hulls.geojson"])
+
+        output = tmp_path / "pipeline_outputs" / "miami-route-assignments.hull-conflicts.json"
+        conflicts = json.loads(output.read_text())
+        assert [(row["technicianA"], row["technicianB"]) for row in conflicts] == [("Ann", "Bo")]
+        features = json.loads((tmp_path / "hulls.geojson").read_text())["features"]
+        assert [feature["properties"]["kind"] for feature in features] == ["route", "route", "conflict"]
+        ring = features[0]["geometry"]["coordinates"][0]
+        assert ring[0] == ring[-1] and -112.11 < ring[0][0] < -112.07 and 33.39 < ring[0][1] < 33.43
+        assert "1 conflicting route pairs across 2" in capsys.readouterr().out
@@ -0,0 +1,132 @@
+"""Unit tests for pipeline.route_sequence."""
+
+from __future__ import annotations
+
+from itertools import permutations
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.route_sequence import (
+    haversine_matrix,
+    main,
+    nearest_neighbour_path,
+    path_miles,
+    sequence_route,
+    sequence_routes,
+    summary_frame,
+    two_opt,
+)
+from pipeline.routes import RouteAssignments
+
+
+def _brute_force_miles(distance: np.ndarray) -> float:
+    return min(path_miles(np.array(order), distance) for order in permutations(range(len(distance))))
+
+
+def _route(rng, technician, day, count, lat=33.45, lng=-112.07):
+    return [
+        {
+            "customerNumber": f"{technician}-{day}-{number}",
+            "technician": technician,
+            "daysOfService": [day],
+            "latitude": lat + rng.random() * 0.1,
+            "longitude": lng + rng.random() * 0.1,
+        }
+        for number in range(count)
+    ]
+
+
+class TestConstruction:
+    def test_nearest_neighbour_on_a_line(self):
+        distance = haversine_matrix(np.full(5, 33.0), np.array([0.0, 0.3, 0.1, 0.4, 0.2]) - 112.0)
+
+        assert nearest_neighbour_path(distance, start=0).tolist() == [0, 2, 4, 1, 3]
+
+    def test_two_opt_untangles_crossing(self):
+        # Square visited corner-to-opposite-corner: the crossing is removed.
+        lat = np.array([0.0, 1.0, 1.0, 0.0]) + 33.0
+        lng = np.array([0.0, 1.0, 0.0, 1.0]) - 112.0
+        distance = haversine_matrix(lat, lng)
+
+        path = two_opt(np.array([0, 1, 2, 3]), distance)
+
+        assert path_miles(path, distance) < path_miles(np.array([0, 1, 2, 3]), distance)
+        assert path_miles(path, distance) == pytest.approx(_brute_force_miles(distance))
+
+    @pytest.mark.parametrize("seed", range(5))
+    def test_near_optimal_and_two_opt_local_optimum(self, seed):
+        rng = np.random.default_rng(seed)
+        lat, lng = 33.4 + rng.random(7) * 0.2, -112.1 + rng.random(7) * 0.2
+        distance = haversine_matrix(lat, lng)
+
+        order, greedy_miles, miles = sequence_route(lat, lng)
+
+        assert sorted(order.tolist()) == list(range(7))
+        assert miles == pytest.approx(path_miles(order, distance))
+        assert _brute_force_miles(distance) - 1e-9 <= miles <= greedy_miles + 1e-9
+        assert miles <= _brute_force_miles(distance) * 1.1
+        for i in range(7):
+            for j in range(i + 1, 7):
+                reversed_path = np.r_[order[:i], order[i : j + 1][::-1], order[j + 1 :]]
+                assert path_miles(reversed_path, distance) >= miles - 1e-9
+
+    def test_tiny_routes(self):
+        assert sequence_route([], [])[2] == 0.0
+        order, _, miles = sequence_route([33.45], [-112.07])
+        assert order.tolist() == [0] and miles == 0.0
+
+
+class TestSequenceRoutes:
+    @pytest.fixture
+    def stops(self):
+        rng = np.random.default_rng(2)
+        records = (
+            _route(rng, "Ann", "Monday", 12)
+            + _route(rng, "Ann", "Thursday", 9)
+            + _route(rng, "Bo", "Monday", 15, lat=33.6)
+            + [{"customerNumber": "U-1", "technician": "", "daysOfService": ["Monday"], "latitude": 33.5, "longitude": -112.0}]
+        )
+        return RouteAssignments.from_records(records).stops
+
+    def test_every_route_sequenced(self, stops):
+        sequences = sequence_routes(stops)
+
+        assert [(sequence.technician, sequence.day) for sequence in sequences] == [
+            ("Ann", "Monday"), ("Ann", "Thursday"), ("Bo", "Monday"),
+        ]
+        for sequence in sequences:
+            assert set(stops["technician"].iloc[sequence.stops]) == {sequence.technician}
+            assert set(stops["day"].iloc[sequence.stops]) == {sequence.day}
+            assert sequence.leg_miles.sum() == pytest.approx(sequence.miles)
+        assert sum(len(sequence.stops) for sequence in sequences) == 36
+
+    def test_parallel_matches_serial(self, stops):
+        serial = sequence_routes(stops, workers=1)
+        parallel = sequence_routes(stops, workers=2, batch_size=1)
+
+        assert [sequence.stops.tolist() for sequence in parallel] == [sequence.stops.tolist() for sequence in serial]
+
+    def test_summary_applies_circuity(self, stops):
+        summary = summary_frame(sequence_routes(stops), circuity=1.5)
+
+        assert summary["stops"].tolist() == [12, 9, 15]
+        assert (summary["driveMiles"] - summary["miles"] * 1.5).abs().max() < 0.02
+        assert (summary["miles"] <= summary["nearestNeighbourMiles"]).all()
+
+
+class TestCli:
+    def test_writes_summary_and_stop_sequence(self, tmp_path, capsys):
+        rng = np.random.default_rng(4)
+        (tmp_path / "route-assignments.json").write_text(json.dumps(_route(rng, "Ann", "Monday", 6)))
+
+        main(["--data-root", str(tmp_path), "route-assignments.json", "--workers", "1"])
+
+        summary = pd.read_csv(tmp_path / "pipeline_outputs" / "route-assignments-route-miles.csv")
+        stops = pd.read_csv(tmp_path / "pipeline_outputs" / "route-assignments-stop-sequence.csv")
+        assert summary[["technician", "day", "stops"]].values.tolist() == [["Ann", "Monday", 6]]
+        assert stops["sequence"].tolist() == [1, 2, 3, 4, 5, 6]
+        assert stops["legMiles"].sum() == pytest.approx(summary["miles"].iloc[0], abs=0.01)
+        assert "1 routes, 6 stops" in capsys.readouterr().out
@@ -0,0 +1,70 @@
+"""Unit tests for pipeline.routes."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from pipeline.routes import RouteAssignments, parse_days, write_records
+
+
+class TestParseDays:
+    @pytest.mark.parametrize(
+        "value, expected",
+        [
+            (["Tuesday", "Friday"], ["Tuesday", "Friday"]),
+            ("Monday, Thursday", ["Monday", "Thursday"]),
+            ("wednesday", ["Wednesday"]),
+            ("Every  weeks o", ["Unknown"]),
+            (None, ["Unknown"]),
+        ],
+    )
+    def test_variants(self, value, expected):
+        assert parse_days(value) == expected
+
+
+class TestRouteAssignments:
+    def test_days_of_service_layout(self):
+        routes = RouteAssignments.from_records([
+            {"customerNumber": "A-1", "technician": "Ann", "route": "R1 - Ann", "daysOfService": ["Monday", "Thursday"],
+             "monthlyPrice": 120, "latitude": 33.4, "longitude": -112.0},
+            {"customerNumber": "A-2", "technician": "", "daysOfService": ["Unknown"], "latitude": 33.5, "longitude": -112.1},
+            {"customerNumber": "A-3", "technician": float("nan"), "daysOfService": ["Friday"]},
+        ])
+
+        stops = routes.stops
+        assert (routes.technician_key, routes.day_key) == ("technician", "daysOfService")
+        assert stops["day"].tolist() == ["Monday", "Thursday", "Unknown", "Friday"]
+        assert stops["days"].tolist() == [2, 2, 1, 1]
+        assert stops["technician"].tolist() == ["Ann", "Ann", "Unassigned", "Unassigned"]
+        assert stops["revenue"].tolist() == [120.0, 120.0, 0.0, 0.0]
+        assert stops["latitude"].tolist()[:3] == [33.4, 33.4, 33.5]
+
+    def test_route_tech_layout(self):
+        routes = RouteAssignments.from_records([
+            {"customerNumber": "M-1", "routeTech": "Bo", "dayOfService": "Tuesday, Friday"},
+        ])
+
+        assert (routes.technician_key, routes.day_key) == ("routeTech", "dayOfService")
+        assert routes.stops["day"].tolist() == ["Tuesday", "Friday"]
+        assert routes.stops["latitude"].isna().all()
+
+    def test_missing_fields(self):
+        with pytest.raises(ValueError, match="technician"):
+            RouteAssignments.from_records([{"customerNumber": "A-1", "dayOfWeek": "Monday"}])
+
+    def test_reassigned_keeps_route_in_step(self, tmp_path):
+        source = tmp_path / "route-assignments.json"
+        source.write_text(json.dumps([
+            {"customerNumber": "A-1", "technician": "Ann", "route": "R1 - Ann", "daysOfService": ["Monday"]},
+            {"customerNumber": "A-2", "technician": "Bo", "route": "R2 - Bo", "daysOfService": ["Monday"]},
+        ]))
+        routes = RouteAssignments.read(source)
+
+        records = routes.reassigned({1: "Ann"})
+
+        assert records[1] == {"customerNumber": "A-2", "technician": "Ann", "route": "R1 - Ann", "daysOfService": ["Monday"]}
+        assert routes.records[1]["technician"] == "Bo"
+        written = write_records(tmp_path / "out" / "balanced.json", records)
+        assert json.loads(written.read_text()) == records
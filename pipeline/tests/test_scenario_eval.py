@@ -0,0 +1,187 @@
+"""Unit tests for pipeline.scenario_eval."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.distances import Office
+from pipeline.scenario_eval import (
+    OfficeMiles,
+    baseline_from_records,
+    evaluate_scenarios,
+    main,
+    normalize_scenario,
+    scenario_kpis,
+)
+
+ACCOUNTS = [
+    {"customerNumber": "A-1", "zip": "33181", "latitude": 25.90, "longitude": -80.16, "monthlyPrice": 100,
+     "route": "R1", "newTerritory": "North"},
+    {"customerNumber": "A-2", "zip": "33181", "latitude": 25.91, "longitude": -80.17, "monthlyPrice": 100,
+     "route": "R1", "newTerritory": "North"},
+    {"customerNumber": "A-3", "zip": "33137", "latitude": 25.81, "longitude": -80.19, "monthlyPrice": 200,
+     "route": "R2", "newTerritory": "South"},
+    {"customerNumber": "A-4", "zip": "33137", "latitude": 25.80, "longitude": -80.18, "monthlyPrice": 200,
+     "route": "R2", "newTerritory": "South"},
+    {"customerNumber": "A-4", "zip": "99999", "route": "R9", "newTerritory": "North"},  # duplicate: dropped
+]
+
+
+@pytest.fixture
+def baseline():
+    return baseline_from_records(ACCOUNTS)
+
+
+class TestNormalize:
+    def test_baseline(self, baseline):
+        assert list(baseline.customers) == ["A-1", "A-2", "A-3", "A-4"]
+        assert baseline.territory.tolist() == ["North", "North", "South", "South"]
+        assert baseline.zips.tolist() == ["33181", "33181", "33137", "33137"]
+
+    def test_zip_moves(self, baseline):
+        scenario = {"reassignments": [
+            {"zipCode": "33137", "fromTerritory": "South", "toTerritory": "Central"},
+            {"zipCode": "33181", "fromTerritory": "North", "toTerritory": "unassigned"},
+        ]}
+
+        assignment = normalize_scenario(scenario, baseline, "zip")
+
+        assert assignment.territory.tolist() == [None, None, "Central", "Central"]
+        assert assignment.route.tolist() == baseline.route.tolist()
+
+    def test_account_list(self, baseline):
+        scenario = [
+            {"customerNumber": "A-2", "territory": "South", "route": "R2"},
+            {"customerNumber": "Z-9", "territory": "South", "route": "R2"},
+        ]
+
+        assignment = normalize_scenario(scenario, baseline, "accounts")
+
+        assert assignment.territory.tolist() == ["North", "South", "South", "South"]
+        assert assignment.route.tolist() == ["R1", "R2", "R2", "R2"]
+        assert assignment.unmatched == 1
+
+    def test_route_only_overrides_keep_territory(self, baseline):
+        scenario = {"autoReassignments": [{"customerNumber": "A-3", "oldRoute": "R2", "newRoute": "R1"}]}
+
+        assignment = normalize_scenario(scenario, baseline, "routes")
+
+        assert assignment.territory.tolist() == baseline.territory.tolist()
+        assert assignment.route.tolist() == ["R1", "R1", "R1", "R2"]
+
+    def test_zip_moves_then_account_overrides(self, baseline):
+        scenario = {
+            "zipChanges": [{"zip": "33181", "newTerritory": "Central"}],
+            "customers": [{"customerNumber": "A-1", "assignedTerritory": "South", "assignedRoute": "R2"}],
+        }
+
+        assignment = normalize_scenario(scenario, baseline, "mixed")
+
+        assert assignment.territory.tolist() == ["South", "Central", "South", "South"]
+
+    def test_rejects_unknown_layouts(self, baseline):
+        with pytest.raises(ValueError):
+            normalize_scenario({"summary": {}}, baseline, "summary")
+        with pytest.raises(ValueError):
+            normalize_scenario("text", baseline, "text")
+
+
+class TestKpis:
+    def test_baseline_row(self, baseline):
+        unchanged = normalize_scenario({"reassignments": []}, baseline, "unchanged")
+
+        row = scenario_kpis(unchanged, baseline, tolerance=0.1)
+
+        assert (row["accounts"], row["assigned"], row["territories"], row["routes"]) == (4, 4, 2, 2)
+        assert (row["territorySpread"], row["territoriesOffTarget"], row["accountsMoved"]) == (0.0, 0, 0)
+        assert row["revenueShare.North"] == pytest.approx(1 / 3, abs=1e-3)
+        assert row["territoryRadiusMiles"] == pytest.approx(0.45, abs=0.1)
+
+    def test_moves_and_balance(self, baseline):
+        moved = normalize_scenario([{"customerNumber": "A-3", "territory": "North", "route": "R1"}], baseline, "m")
+
+        row = scenario_kpis(moved, baseline, tolerance=0.1)
+
+        assert (row["territoryMoves"], row["routeMoves"], row["accountsMoved"]) == (1, 1, 1)
+        assert row["revenueMoved"] == 200.0
+        assert row["territorySpread"] == pytest.approx(1.0)
+        assert row["routesOffTarget"] == 2
+        unchanged = scenario_kpis(normalize_scenario([], baseline, "unchanged"), baseline)
+        assert row["routeRadiusMiles"] > unchanged["routeRadiusMiles"]
+
+    def test_office_miles_prefers_territory_office(self, baseline):
+        offices = [Office("north", "North", 25.95, -80.16), Office("hq", "HQ", 25.80, -80.18)]
+        office_miles = OfficeMiles.build(baseline, offices)
+
+        own = office_miles.mean_miles(np.array(["North", "North", "South", "South"], dtype=object))
+        swapped = office_miles.mean_miles(np.array(["South", "South", "North", "North"], dtype=object))
+
+        assert own < swapped
+        assert np.isnan(office_miles.mean_miles(np.array([None] * 4, dtype=object)))
+
+
+class TestEvaluate:
+    @pytest.fixture
+    def scenario_files(self, tmp_path):
+        first = tmp_path / "zip-scenario.json"
+        first.write_text(json.dumps({"id": "zip-move", "reassignments": [{"zipCode": "33137", "toTerritory": "North"}]}))
+        second = tmp_path / "route-scenario.json"
+        second.write_text(json.dumps({"autoReassignments": [{"customerNumber": "A-1", "newRoute": "R2"}]}))
+        return [first, second]
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_comparison_table(self, baseline, scenario_files, tmp_path, workers):
+        table = evaluate_scenarios(scenario_files, baseline, workers=workers, root=tmp_path)
+
+        assert table["scenario"].tolist() == ["baseline", "zip-move", "route-scenario"]
+        assert table["file"].tolist() == ["", "zip-scenario.json", "route-scenario.json"]
+        assert table["territoryMoves"].tolist() == [0, 2, 0]
+        assert table["routeMoves"].tolist() == [0, 0, 1]
+        assert table.columns[-1].startswith("revenueShare.")
+        assert table["officeMiles"].isna().all()
+
+    def test_colliding_names_and_repeated_files(self, baseline, scenario_files, tmp_path):
+        (tmp_path / "scenarios").mkdir()
+        copy = tmp_path / "scenarios" / "route-scenario.json"
+        copy.write_text(json.dumps([{"customerNumber": "A-3", "territory": "North"}]))
+        other = tmp_path / "other"
+        other.mkdir()
+        (other / "route-scenario.json").write_text(json.dumps([]))
+        (other / "zip-scenario.json").write_text(json.dumps({"id": "zip-move", "reassignments": []}))
+        paths = scenario_files + [copy, scenario_files[0], other / "route-scenario.json", other / "zip-scenario.json"]
+
+        table = evaluate_scenarios(paths, baseline, root=tmp_path)
+
+        assert table["file"].tolist() == [
+            "", "zip-scenario.json", "route-scenario.json", "scenarios/route-scenario.json",
+            "other/route-scenario.json", "other/zip-scenario.json",
+        ]
+        assert table["scenario"].tolist() == [
+            "baseline", f"{tmp_path.name}/zip-move", f"{tmp_path.name}/route-scenario",
+            "scenarios/route-scenario", "other/route-scenario", "other/zip-move",
+        ]
+        assert table["scenario"].is_unique
+        assert table["accountsMoved"].tolist()[2:4] == [1, 1]
+
+
+class TestCli:
+    def test_writes_comparison(self, tmp_path, capsys):
+        (tmp_path / "accounts.json").write_text(json.dumps(ACCOUNTS))
+        (tmp_path / "scenario.json").write_text(json.dumps([{"customerNumber": "A-1", "territory": "South"}]))
+        (tmp_path / "branches.json").write_text(json.dumps({"locations": {"miami": {
+            "offices": [{"zipCode": "33181", "label": "APS of Miami - Central Office", "lat": 25.88, "lng": -80.17}],
+        }}}))
+
+        main([
+            "--data-root", str(tmp_path), "accounts.json", "scenario.json",
+            "--config", "branches.json", "--location", "miami", "--workers", "1",
+        ])
+
+        table = pd.read_csv(tmp_path / "pipeline_outputs" / "accounts-scenario-comparison.csv")
+        assert table["accountsMoved"].tolist() == [0, 1]
+        assert table["officeMiles"].notna().all()
+        assert "Scored 1 scenarios against 4 accounts" in capsys.readouterr().out
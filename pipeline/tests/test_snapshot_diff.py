@@ -0,0 +1,156 @@
+"""Unit tests for pipeline.snapshot_diff."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.snapshot_diff import (
+    ADDED,
+    BLANK,
+    REMOVED,
+    diff_snapshots,
+    hash_join,
+    main,
+    read_snapshot,
+    snapshot_from_frame,
+)
+
+OLD = pd.DataFrame({
+    "Customer_Number__c": ["A-1", "A-2", "A-3", "A-4", "A-5"],
+    "New_Territory": ["West", "West", "East", "East", "Central"],
+    "Route": ["R1", "R1", "R2", "R2", "R3"],
+    "Name": ["a", "b", "c", "d", "e"],
+})
+NEW = [
+    {"customerNumber": "A-1", "territory": "West", "route": "R1", "technician": "Ann"},
+    {"customerNumber": "A-2", "territory": "Central", "route": "R3", "technician": "Cy"},
+    {"customerNumber": "A-3", "territory": "East ", "route": "R9", "technician": "Bo"},
+    {"customerNumber": "A-6", "territory": "East", "route": "R2", "technician": "Bo"},
+    {"customerNumber": "A-5", "territory": "West", "route": "R3", "technician": "Cy"},
+    {"customerNumber": "A-5", "territory": "Central", "route": "R3", "technician": "Cy"},  # last row wins
+]
+
+
+class TestSnapshot:
+    def test_aliases_and_blanks(self):
+        frame = pd.DataFrame({"Customer_Number": [" A-1", "A-2", None], "Area": [" West", "", None]})
+
+        snapshot = snapshot_from_frame(frame)
+
+        assert list(snapshot.fields) == ["territory"]
+        assert snapshot.keys.tolist() == [b"A-1", b"A-2", b""]
+        assert list(snapshot.fields["territory"]) == ["West", BLANK, BLANK]
+
+    def test_requires_key(self):
+        with pytest.raises(ValueError):
+            snapshot_from_frame(pd.DataFrame({"territory": ["West"]}))
+
+    def test_csv_reads_only_needed_columns(self, tmp_path):
+        OLD.to_csv(tmp_path / "old.csv", index=False)
+
+        snapshot = read_snapshot(tmp_path / "old.csv", ["territory", "route", "technician"])
+
+        assert list(snapshot.fields) == ["territory", "route"]
+        assert len(snapshot) == 5
+
+    def test_csv_chunks_match_whole_frame(self, tmp_path, monkeypatch):
+        OLD.to_csv(tmp_path / "old.csv", index=False)
+        monkeypatch.setattr("pipeline.snapshot_diff.DEFAULT_SNAPSHOT_CHUNK_ROWS", 2)
+
+        chunked = read_snapshot(tmp_path / "old.csv")
+        whole = snapshot_from_frame(OLD)
+
+        assert chunked.keys.tolist() == whole.keys.tolist()
+        for field in ("territory", "route"):
+            assert list(chunked.fields[field]) == list(whole.fields[field])
+
+
+class TestHashJoin:
+    @pytest.mark.parametrize("partitions", [1, 3])
+    def test_positions(self, partitions):
+        old = np.array(["a", "b", "c", "d"], dtype=object)
+        new = np.array(["d", "x", "a", "c"], dtype=object)
+
+        assert hash_join(old, new, partitions=partitions).tolist() == [3, -1, 0, 2]
+
+    @pytest.mark.parametrize("partitions", [1, 3])
+    def test_byte_keys_of_different_widths(self, partitions):
+        old = np.array([b"C-1", b"C-10000000", "Zoë".encode()], dtype=bytes)
+        new = np.array(["Zoë".encode(), b"C-1", b"C-10"], dtype=bytes)
+
+        assert hash_join(old, new, partitions=partitions).tolist() == [2, 0, -1]
+
+
+class TestDiff:
+    @pytest.fixture
+    def diff(self):
+        return diff_snapshots(snapshot_from_frame(OLD), snapshot_from_frame(pd.DataFrame(NEW)))
+
+    def test_moved(self, diff):
+        assert diff.fields == ["territory", "route"]
+        moved = diff.moved.set_index("customerNumber")
+        assert moved.index.tolist() == ["A-2", "A-3"]
+        assert moved.loc["A-2", ["territoryOld", "territoryNew", "changed"]].tolist() == [
+            "West", "Central", "territory,route"
+        ]
+        assert moved.loc["A-3", "changed"] == "route"
+        assert diff.duplicates == (0, 1)
+
+    def test_added_and_removed(self, diff):
+        assert diff.added.to_dict("records") == [{"customerNumber": "A-6", "territory": "East", "route": "R2"}]
+        assert diff.removed["customerNumber"].tolist() == ["A-4"]
+
+    def test_flows(self, diff):
+        flows = {(row["from"], row["to"]): row["accounts"] for row in diff.flows.to_dict("records")}
+
+        assert flows == {("West", "Central"): 1, (ADDED, "East"): 1, ("East", REMOVED): 1}
+        matrix = diff.flow_matrix()
+        assert matrix.loc["West", "Central"] == 1 and matrix.loc["West", "East"] == 0
+
+    def test_flow_field_falls_back_to_shared_field(self):
+        old = snapshot_from_frame(pd.DataFrame({"customerNumber": ["A-1"], "route": ["R1"]}))
+        new = snapshot_from_frame(pd.DataFrame({"customerNumber": ["A-1"], "route": ["R2"]}))
+
+        diff = diff_snapshots(old, new)
+
+        assert diff.flow_field == "route"
+        assert diff.flows.to_dict("records") == [{"from": "R1", "to": "R2", "accounts": 1}]
+
+    def test_partitioned_matches_single(self):
+        rng = np.random.default_rng(5)
+        keys = np.array([f"C-{n}" for n in range(2_000)], dtype=object)
+        old = pd.DataFrame({"customerNumber": keys, "territory": rng.choice(list("ABCD"), 2_000)})
+        new = old.sample(frac=0.9, random_state=1).copy()
+        new.loc[new.index[:300], "territory"] = rng.choice(list("ABCDE"), 300)
+        old_snapshot, new_snapshot = snapshot_from_frame(old), snapshot_from_frame(new)
+
+        single = diff_snapshots(old_snapshot, new_snapshot, partitions=1)
+        split = diff_snapshots(old_snapshot, new_snapshot, partitions=7)
+
+        pd.testing.assert_frame_equal(single.flows, split.flows)
+        for name in ("moved", "added", "removed"):
+            left, right = getattr(single, name), getattr(split, name)
+            pd.testing.assert_frame_equal(
+                left.sort_values("customerNumber", ignore_index=True),
+                right.sort_values("customerNumber", ignore_index=True),
+            )
+        assert len(single.removed) == 200
+
+
+class TestCli:
+    def test_writes_diff(self, tmp_path, capsys):
+        OLD.to_csv(tmp_path / "old.csv", index=False)
+        (tmp_path / "new.json").write_text(json.dumps(NEW))
+
+        main(["--data-root", str(tmp_path), "old.csv", "new.json"])
+
+        output = tmp_path / "pipeline_outputs" / "new-vs-old"
+        assert pd.read_csv(output / "moved.csv")["customerNumber"].tolist() == ["A-2", "A-3"]
+        assert pd.read_csv(output / "removed.csv")["customerNumber"].tolist() == ["A-4"]
+        assert pd.read_csv(output / "flows.csv")["accounts"].sum() == 3
+        assert pd.read_csv(output / "flow-matrix.csv", index_col=0).loc["West", "Central"] == 1
+        assert "2 moved, 1 added, 1 removed" in capsys.readouterr().out
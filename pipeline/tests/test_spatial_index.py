@@ -0,0 +1,86 @@
+"""Unit tests for pipeline.spatial_index against brute-force distances."""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.spatial_index import SpatialIndex, haversine_miles
+
+
+@pytest.fixture
+def points():
+    rng = np.random.default_rng(3)
+    lat = rng.uniform(33.2, 33.9, 800)
+    lng = rng.uniform(-112.6, -111.6, 800)
+    lat[[5, 17]] = np.nan  # missing coordinates are kept but never returned
+    return lat, lng
+
+
+def _brute(lat, lng, qlat, qlng):
+    return haversine_miles(qlat, qlng, lat, lng)
+
+
+class TestHaversine:
+    def test_known_distance(self):
+        # Phoenix Sky Harbor to Tucson International, about 110 miles.
+        assert haversine_miles(33.4342, -112.0116, 32.1161, -110.9410) == pytest.approx(109.9, abs=1.0)
+        assert haversine_miles(10.0, 20.0, 10.0, 20.0) == 0.0
+
+
+class TestSpatialIndex:
+    def test_within_matches_brute_force(self, points):
+        lat, lng = points
+        index = SpatialIndex.build(lat, lng)
+        assert len(index) == 798
+        for qlat, qlng, radius in [(33.5, -112.0, 3.0), (33.2, -112.6, 10.0), (34.5, -112.0, 50.0), (33.5, -112.0, 0.0)]:
+            positions, miles = index.within(qlat, qlng, radius)
+            expected = np.flatnonzero(_brute(lat, lng, qlat, qlng) <= radius)
+            assert sorted(positions.tolist()) == expected.tolist()
+            assert (np.diff(miles) >= 0).all()
+
+    def test_nearest_matches_brute_force(self, points):
+        lat, lng = points
+        index = SpatialIndex.build(lat, lng, cell_miles=1.0)
+        for qlat, qlng, k in [(33.5, -112.0, 1), (33.55, -111.9, 12), (25.8, -80.2, 3)]:
+            positions, miles = index.nearest(qlat, qlng, k)
+            distances = _brute(lat, lng, qlat, qlng)
+            assert miles.tolist() == pytest.approx(np.sort(distances[np.isfinite(distances)])[:k].tolist())
+            assert positions[0] == np.nanargmin(distances)
+
+    def test_nearest_many_matches_brute_force(self, points):
+        lat, lng = points
+        offices = SpatialIndex.build([33.66, 33.27, 33.62, 33.45], [-112.18, -111.83, -111.95, -112.07])
+        qlat = np.append(lat, [np.nan, 40.0])
+        qlng = np.append(lng, [-112.0, -100.0])
+
+        positions, miles = offices.nearest_many(qlat, qlng, chunk_size=97)
+
+        distances = haversine_miles(qlat[:, None], qlng[:, None], offices.lat[None, :], offices.lng[None, :])
+        finite = np.isfinite(qlat)
+        assert (positions[finite] == distances[finite].argmin(axis=1)).all()
+        assert miles[finite] == pytest.approx(distances[finite].min(axis=1))
+        assert positions[~finite].tolist() == [-1, -1, -1]
+
+    def test_save_and_load(self, points, tmp_path):
+        lat, lng = points
+        frame = pd.DataFrame({"latitude": lat, "longitude": lng, "account": [f"A-{n:04d}" for n in range(len(lat))]})
+        index = SpatialIndex.from_frame(frame, id_column="account")
+        loaded = SpatialIndex.load(index.save(tmp_path / "index.npz"))
+
+        positions, miles = loaded.nearest(33.5, -112.0, 5)
+        assert positions.tolist() == index.nearest(33.5, -112.0, 5)[0].tolist()
+        assert loaded.id_of(positions).tolist() == [f"A-{n:04d}" for n in positions]
+        assert loaded.shape == index.shape
+
+    def test_rejects_bad_arguments(self, points):
+        index = SpatialIndex.build(*points)
+        with pytest.raises(ValueError):
+            index.nearest(33.5, -112.0, 0)
+        with pytest.raises(ValueError):
+            index.within(33.5, -112.0, -1.0)
+        with pytest.raises(ValueError):
+            index.id_of(np.array([0]))
+        with pytest.raises(ValueError):
+            SpatialIndex.build([1.0, 2.0], [3.0])
@@ -0,0 +1,149 @@
+"""Unit tests for pipeline.summary.
+
+Checks the single-pass metrics against the per-table groupbys they replace.
+"""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from pipeline.encoding import encode_master_frame
+from pipeline.summary import AssignmentMetrics, compute_assignment_metrics
+
+
+def _master() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Account_ID": ["a", "b", "c", "d", "e", "f", None],
+        "Zip_Code": ["85001", "85001", "85140", "85701", "85701", pd.NA, "85002"],
+        "Market": ["Phoenix", "Phoenix", "Phoenix", "Tucson", "Tucson", "Phoenix", "Phoenix"],
+        "Branch_Assignment": [
+            "Phoenix West",
+            "Phoenix West",
+            "Phoenix East",
+            "Tucson Area 1 - East & North",
+            "Tucson Unassigned",
+            "Unassigned",
+            "Phoenix West",
+        ],
+        "Area": ["West", "West", "East", "Area 1 - East & North", "Unassigned", "Unassigned", "West"],
+        "Special_Flag": [
+            "",
+            "",
+            "Tucson-Associated (Phoenix East)",
+            "",
+            "No branch assignment found",
+            "Unassigned ZIP Code",
+            "",
+        ],
+        "Email": ["x@y.com", "", "", "", "", "", "z@y.com"],
+        "Route": ["R1", "", "", "", "", "", ""],
+        "Maintenance_Day": ["Mon", "Tue", "", "", "", "", "Wed"],
+    })
+
+
+@pytest.fixture
+def metrics() -> AssignmentMetrics:
+    source = ["Phoenix", "Phoenix", "Tucson", "Tucson", "Tucson", "Phoenix", "Phoenix"]
+    return compute_assignment_metrics(_master(), source=source, markets=["Phoenix", "Tucson"])
+
+
+class TestAssignmentMetrics:
+    def test_totals(self, metrics: AssignmentMetrics):
+        assert metrics.total_accounts == 7
+        assert metrics.source_counts == {"Phoenix": 4, "Tucson": 3}
+        assert metrics.market_counts == {"Phoenix": 5, "Tucson": 2}
+
+    def test_assigned_by_source(self, metrics: AssignmentMetrics):
+        assert metrics.source_assigned == {"Phoenix": 3, "Tucson": 2}
+        assert metrics.source_unassigned == {"Phoenix": 1, "Tucson": 1}
+
+    def test_branch_summary_matches_groupby(self, metrics: AssignmentMetrics):
+        master = _master()
+        expected = master.groupby("Branch_Assignment")["Account_ID"].count()
+        actual = metrics.by_branch.set_index("Branch_Assignment")["Account_Count"]
+        assert actual.sort_index().to_dict() == expected.sort_index().to_dict()
+        assert list(metrics.by_branch.columns) == ["Branch_Assignment", "Account_Count", "Primary_Market"]
+        assert metrics.by_branch["Account_Count"].is_monotonic_decreasing
+
+    def test_primary_market(self, metrics: AssignmentMetrics):
+        primary = metrics.by_branch.set_index("Branch_Assignment")["Primary_Market"]
+        assert primary["Phoenix West"] == "Phoenix"
+        assert primary["Tucson Unassigned"] == "Tucson"
+        assert set(metrics.branches_for_market("Tucson")["Branch_Assignment"]) == {
+            "Tucson Area 1 - East & North",
+            "Tucson Unassigned",
+        }
+
+    def test_market_area_summary(self, metrics: AssignmentMetrics):
+        first = metrics.by_market_area.iloc[0]
+        assert (first["Market"], first["Area"], first["Account_Count"]) == ("Phoenix", "West", 2)
+
+    def test_special_flags_exclude_blank(self, metrics: AssignmentMetrics):
+        flags = dict(zip(metrics.special_flags["Special_Flag"], metrics.special_flags["Account_Count"]))
+        assert flags == {
+            "No branch assignment found": 1,
+            "Tucson-Associated (Phoenix East)": 1,
+            "Unassigned ZIP Code": 1,
+        }
+        assert metrics.tucson_associated_accounts == 1
+        assert metrics.unassigned_branch_accounts == 2
+
+    def test_missing_data(self, metrics: AssignmentMetrics):
+        assert metrics.missing == {"Email": 5, "Route": 6, "Maintenance_Day": 4}
+
+    def test_zip_map(self, metrics: AssignmentMetrics):
+        phoenix = metrics.zip_map("Phoenix")
+        assert list(phoenix.columns) == [
+            "Zip_Code",
+            "Area",
+            "Branch_Assignment",
+            "Active_Accounts",
+            "Special_Flag_Count",
+        ]
+        # Rows with a missing ZIP are dropped, null Account_IDs are not counted.
+        assert phoenix["Zip_Code"].tolist() == ["85001", "85140", "85002"]
+        assert phoenix["Active_Accounts"].tolist() == [2, 1, 0]
+        assert phoenix["Special_Flag_Count"].tolist() == [0, 1, 0]
+
+    def test_unknown_market_zip_map_is_empty(self, metrics: AssignmentMetrics):
+        assert metrics.zip_map("Dallas").empty
+
+    def test_encoded_frame_gives_same_metrics(self, metrics: AssignmentMetrics):
+        source = ["Phoenix", "Phoenix", "Tucson", "Tucson", "Tucson", "Phoenix", "Phoenix"]
+        encoded = compute_assignment_metrics(
+            encode_master_frame(_master()),
+            source=source,
+            markets=["Phoenix", "Tucson"],
+        )
+        assert encoded.source_counts == metrics.source_counts
+        assert encoded.tucson_associated_accounts == metrics.tucson_associated_accounts
+        assert encoded.unassigned_branch_accounts == metrics.unassigned_branch_accounts
+        pd.testing.assert_frame_equal(encoded.by_branch, metrics.by_branch)
+        pd.testing.assert_frame_equal(encoded.by_market_area, metrics.by_market_area)
+        pd.testing.assert_frame_equal(encoded.special_flags, metrics.special_flags)
+        pd.testing.assert_frame_equal(encoded.zip_map("Phoenix"), metrics.zip_map("Phoenix"))
+
+    def test_unknown_and_missing_flags(self):
+        master = _master()
+        master.loc[0, "Special_Flag"] = "Needs review"
+        master.loc[1, "Special_Flag"] = None
+
+        metrics = compute_assignment_metrics(master, markets=["Phoenix"])
+
+        flags = dict(zip(metrics.special_flags["Special_Flag"], metrics.special_flags["Account_Count"]))
+        assert flags["Needs review"] == 1
+        # A missing label counts as flagged (as before encoding) but has no row of its own.
+        assert sum(flags.values()) == 4
+        assert metrics.zip_map("Phoenix")["Special_Flag_Count"].tolist() == [2, 1, 0]
+
+        encoded = compute_assignment_metrics(encode_master_frame(master), markets=["Phoenix"])
+        assert "Needs review" in encoded.special_flags["Special_Flag"].tolist()
+
+    def test_source_defaults_to_market(self):
+        metrics = compute_assignment_metrics(_master())
+        assert metrics.source_counts == metrics.market_counts
+
+    def test_requires_master_columns(self):
+        with pytest.raises(ValueError, match="missing required columns"):
+            compute_assignment_metrics(pd.DataFrame({"Account_ID": ["a"]}))
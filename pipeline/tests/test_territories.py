@@ -0,0 +1,106 @@
+"""Unit tests for pipeline.territories."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from pipeline.territories import (
+    calculate_distribution,
+    calculate_score,
+    export_territory_outputs,
+    load_territory_inputs,
+    optimize_territories,
+    optimize_zip_assignments,
+)
+
+TARGETS = {"West": 4, "Central": 4, "East": 3}
+
+
+class TestLoadTerritoryInputs:
+    def test_zip_assignments_from_branch_analysis(self, territory_paths):
+        inputs = load_territory_inputs(territory_paths)
+        assert inputs.zip_assignments == {
+            "85001": "West",
+            "85002": "West",
+            "85003": "Central",
+            "85004": "East",
+            "85122": "East",
+        }
+        assert inputs.unknown_branches == set()
+
+    def test_peripheral_split_and_counts(self, territory_paths):
+        inputs = load_territory_inputs(territory_paths)
+        assert inputs.peripheral_accounts["Customer_Number__c"].tolist() == ["T2"]
+        assert inputs.true_tucson_accounts["Customer_Number__c"].tolist() == ["T1"]
+        assert inputs.tucson_account_count == 2
+        assert inputs.combined_zip_counts["85122"] == 1
+        assert inputs.combined_zip_counts["85001"] == 4
+
+
+class TestOptimize:
+    def test_distribution_defaults_unknown_zips_to_east(self):
+        dist = calculate_distribution({"1": "West"}, {"1": 2, "2": 3})
+        assert dist == {"West": 2, "Central": 0, "East": 3}
+        assert calculate_score(dist, {"West": 2, "Central": 1, "East": 3}) == 1
+
+    def test_moves_smallest_surplus_zip(self):
+        result = optimize_zip_assignments(
+            {"a": "West", "b": "West", "c": "Central"},
+            {"a": 4, "b": 2, "c": 2},
+            {"West": 4, "Central": 4, "East": 0},
+        )
+        assert result.best_assignments == {"a": "West", "b": "Central", "c": "Central"}
+        assert result.best_score == 0
+        assert [(m.zip_code, m.from_area, m.to_area) for m in result.moves] == [("b", "West", "Central")]
+
+    def test_inputs_are_reusable_across_targets(self, territory_paths):
+        inputs = load_territory_inputs(territory_paths)
+        balanced = optimize_territories(inputs, TARGETS)
+        unchanged = optimize_territories(inputs, {"West": 6, "Central": 2, "East": 3})
+
+        assert balanced.final_distribution == TARGETS
+        assert balanced.changes == [
+            {"Zip Code": "85002", "Previous Area": "West", "New Area": "Central", "Accounts Moved": 2}
+        ]
+        assert unchanged.changes == []
+        assert "Area" not in inputs.phoenix_accounts.columns
+
+    def test_account_areas(self, territory_paths):
+        result = optimize_territories(load_territory_inputs(territory_paths), TARGETS)
+        areas = dict(zip(result.all_accounts["Customer_Number__c"], result.all_accounts["Area"]))
+        assert areas["P4"] == "Central"
+        assert areas["T1"] == "Tucson"
+        assert areas["T2"] == "East"
+        assert result.groups.area_totals() == {
+            "West": (4, 1),
+            "Central": (4, 2),
+            "East": (3, 2),
+            "Tucson": (1, 1),
+        }
+
+
+class TestExport:
+    def test_writes_every_output(self, territory_paths, tmp_path):
+        result = optimize_territories(load_territory_inputs(territory_paths), TARGETS)
+        outputs = export_territory_outputs(result, tmp_path / "out")
+
+        assert all(path.exists() for path in outputs.files())
+        assert outputs.changes is not None
+        map_data = json.loads(outputs.map_data.read_text(encoding="utf-8"))
+        assert [t["area"] for t in map_data["territories"]] == ["West", "Central", "East", "Tucson"]
+        assert "Zip 85002: West → Central (2 accounts)" in outputs.report.read_text(encoding="utf-8")
+
+    def test_no_changes_file_when_nothing_moves(self, territory_paths, tmp_path):
+        inputs = load_territory_inputs(territory_paths)
+        result = optimize_territories(inputs, {"West": 6, "Central": 2, "East": 3})
+        outputs = export_territory_outputs(result, tmp_path / "out")
+        assert outputs.changes is None
+        assert len(outputs.files()) == 5
+
+
+def test_missing_input_raises(territory_paths):
+    territory_paths.phoenix_accounts.unlink()
+    with pytest.raises(FileNotFoundError):
+        load_territory_inputs(territory_paths)
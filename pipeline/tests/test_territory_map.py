@@ -0,0 +1,97 @@
+"""Unit tests for pipeline.territory_map."""
+
+from __future__ import annotations
+
+import pandas as pd
+import pytest
+
+from pipeline.territory_map import group_by_territory
+from pipeline.utils import clean_zip_code
+
+AREAS = ["West", "Central", "East", "Tucson"]
+
+
+def _accounts() -> pd.DataFrame:
+    return pd.DataFrame({
+        "Customer_Number__c": ["A1", "A2", "A3", "A4", "A5", "A6", "A7"],
+        "Name": ["n1", "n2", "n3", "n4", "n5", "n6", "n7"],
+        "ShippingStreet": ["s1", "s2", "s3", "s4", "s5", "s6", "s7"],
+        "ZipCode": ["85003", "85001", "85003", "85001", "85701", "85002", "85001"],
+        "Area": ["West", "West", "West", "East", "Tucson", "Elsewhere", "West"],
+    })
+
+
+def _reference_map_data(all_accounts: pd.DataFrame) -> dict:
+    """The per-area / per-ZIP filtering loop the grouped emitter replaces."""
+    map_data = {"territories": []}
+    for area in AREAS:
+        area_accounts = all_accounts[all_accounts["Area"] == area]
+        zip_data = []
+        for zip_code in area_accounts["ZipCode"].unique():
+            zip_accounts = area_accounts[area_accounts["ZipCode"] == zip_code]
+            zip_data.append({
+                "zip": zip_code,
+                "count": len(zip_accounts),
+                "accounts": zip_accounts[["Customer_Number__c", "Name", "ShippingStreet"]].to_dict(
+                    "records"
+                ),
+            })
+        map_data["territories"].append(
+            {"area": area, "total_accounts": len(area_accounts), "zip_codes": zip_data}
+        )
+    return map_data
+
+
+class TestGroupByTerritory:
+    def test_map_data_matches_filter_loop(self):
+        accounts = _accounts()
+        groups = group_by_territory(accounts, AREAS)
+        assert groups.map_data(accounts) == _reference_map_data(accounts)
+
+    def test_zip_order_is_first_appearance_within_area(self):
+        accounts = _accounts()
+        west = group_by_territory(accounts, AREAS).map_data(accounts)["territories"][0]
+        assert [entry["zip"] for entry in west["zip_codes"]] == ["85003", "85001"]
+        assert [a["Customer_Number__c"] for a in west["zip_codes"][1]["accounts"]] == ["A2", "A7"]
+
+    def test_unlisted_areas_are_dropped(self):
+        groups = group_by_territory(_accounts(), AREAS)
+        assert len(groups.order) == 6
+
+    def test_area_totals(self):
+        totals = group_by_territory(_accounts(), AREAS).area_totals()
+        assert totals == {"West": (4, 2), "Central": (0, 0), "East": (1, 1), "Tucson": (1, 1)}
+
+    def test_zip_counts_sorted_by_zip_within_area(self):
+        counts = group_by_territory(_accounts(), AREAS).zip_counts()
+        assert list(counts.columns) == ["Zip Code", "Area", "Account Count"]
+        assert counts.values.tolist() == [
+            ["85001", "West", 2],
+            ["85003", "West", 2],
+            ["85001", "East", 1],
+            ["85701", "Tucson", 1],
+        ]
+
+    def test_missing_zip_emitted_as_null(self):
+        accounts = _accounts()
+        accounts["ZipCode"] = clean_zip_code(pd.Series(["85003", "", "85003", "85001", "85701", "1", ""]))
+        groups = group_by_territory(accounts, AREAS)
+        west = groups.map_data(accounts)["territories"][0]
+        assert [entry["zip"] for entry in west["zip_codes"]] == ["85003", None]
+        assert west["zip_codes"][1]["count"] == 2
+        assert groups.area_totals()["West"] == (4, 1)
+        assert "West" in groups.zip_counts()["Area"].tolist()
+
+    def test_empty_frame(self):
+        accounts = _accounts().iloc[0:0]
+        groups = group_by_territory(accounts, AREAS)
+        assert groups.map_data(accounts)["territories"][0] == {
+            "area": "West",
+            "total_accounts": 0,
+            "zip_codes": [],
+        }
+        assert groups.zip_counts().empty
+
+    def test_requires_columns(self):
+        with pytest.raises(ValueError, match="missing required columns"):
+            group_by_territory(pd.DataFrame({"Area": ["West"]}), AREAS)
@@ -0,0 +1,118 @@
+"""Unit tests for pipeline.tiles."""
+
+from __future__ import annotations
+
+import json
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.tiles import main, mercator_pixels, tile_points, write_tiles
+
+
+def _tile_of(lat: float, lng: float, zoom: int) -> tuple[int, int]:
+    """Reference slippy-map tile formula."""
+    n = 2**zoom
+    x = int((lng + 180.0) / 360.0 * n)
+    phi = math.radians(lat)
+    y = int((1.0 - math.asinh(math.tan(phi)) / math.pi) / 2.0 * n)
+    return x, y
+
+
+@pytest.fixture
+def accounts():
+    rng = np.random.default_rng(11)
+    return pd.DataFrame({
+        "latitude": np.r_[33.3 + rng.random(400) * 0.4, np.nan],
+        "longitude": np.r_[-112.2 + rng.random(400) * 0.4, -112.0],
+        "customerNumber": [f"A-{number:06d}" for number in range(401)],
+        "monthlyPrice": np.r_[rng.integers(50, 300, 400), 100],
+        "daysOfService": [["Tuesday"]] * 401,
+    })
+
+
+class TestMercator:
+    @pytest.mark.parametrize("lat, lng", [(33.45, -112.07), (25.77, -80.19), (-33.87, 151.21)])
+    def test_matches_tile_formula(self, lat, lng):
+        px, py = mercator_pixels(np.array([lat]), np.array([lng]), 12)
+
+        assert (int(px[0] // 256), int(py[0] // 256)) == _tile_of(lat, lng, 12)
+
+
+class TestTilePoints:
+    def test_max_zoom_keeps_every_point_in_its_tile(self, accounts):
+        pyramid = tile_points(accounts, min_zoom=13, max_zoom=13)
+
+        rows = np.concatenate([tile.rows for tile in pyramid.tiles])
+        assert sorted(rows.tolist()) == list(range(400))
+        for tile in pyramid.tiles:
+            for row in tile.rows:
+                point = accounts.iloc[row]
+                assert _tile_of(point["latitude"], point["longitude"], 13) == (tile.x, tile.y)
+            assert (tile.count == 1).all()
+
+    def test_low_zooms_are_thinned_with_counts(self, accounts):
+        pyramid = tile_points(accounts, min_zoom=8, max_zoom=12, cell_px=16)
+
+        for zoom in range(8, 13):
+            tiles = [tile for tile in pyramid.tiles if tile.z == zoom]
+            assert sum(int(tile.count.sum()) for tile in tiles) == 400
+        kept = {zoom: sum(len(tile.rows) for tile in pyramid.tiles if tile.z == zoom) for zoom in range(8, 13)}
+        assert kept[8] < kept[10] < kept[12] == 400
+
+    def test_priority_picks_representative(self, accounts):
+        pyramid = tile_points(accounts, priority_column="monthlyPrice", min_zoom=0, max_zoom=1, cell_px=256)
+
+        (top,) = [tile for tile in pyramid.tiles if tile.z == 0]
+        assert accounts["monthlyPrice"].iloc[top.rows[0]] == accounts["monthlyPrice"].iloc[:400].max()
+        assert top.count.tolist() == [400]
+
+    def test_validation(self, accounts):
+        with pytest.raises(ValueError):
+            tile_points(accounts, min_zoom=10, max_zoom=9)
+        with pytest.raises(ValueError):
+            tile_points(accounts, cell_px=0)
+        with pytest.raises(ValueError):
+            tile_points(accounts, fields=["route"])
+
+
+class TestWriteTiles:
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_writes_tiles_and_index(self, accounts, tmp_path, workers):
+        pyramid = tile_points(accounts, fields=["customerNumber", "daysOfService"], min_zoom=9, max_zoom=11)
+
+        written = write_tiles(pyramid, tmp_path, workers=workers, batch_size=4)
+
+        index = json.loads((tmp_path / "index.json").read_text())
+        assert written == len(pyramid) == sum(len(tiles) for tiles in index["tiles"].values())
+        assert index["fields"] == ["customerNumber", "daysOfService"]
+        total = 0
+        for x, y in index["tiles"]["11"]:
+            tile = json.loads((tmp_path / "11" / str(x) / f"{y}.json").read_text())
+            assert "count" not in tile
+            assert len(tile["lat"]) == len(tile["customerNumber"]) == len(tile["daysOfService"])
+            total += len(tile["lat"])
+        assert total == 400
+        x, y = index["tiles"]["9"][0]
+        assert "count" in json.loads((tmp_path / "9" / str(x) / f"{y}.json").read_text())
+
+
+class TestCli:
+    def test_tiles_json_input(self, tmp_path, capsys):
+        (tmp_path / "route-assignments.json").write_text(json.dumps([
+            {"latitude": 33.45, "longitude": -112.07, "customerNumber": "A-1"},
+            {"latitude": 33.46, "longitude": -112.06, "customerNumber": "A-2"},
+        ]))
+
+        main([
+            "--data-root", str(tmp_path), "route-assignments.json",
+            "--fields", "customerNumber", "--min-zoom", "10", "--max-zoom", "10", "--workers", "1",
+            "--output-dir", "tiles",
+        ])
+
+        x, y = _tile_of(33.45, -112.07, 10)
+        tile = json.loads((tmp_path / "tiles" / "10" / str(x) / f"{y}.json").read_text())
+        assert tile["customerNumber"] == ["A-1", "A-2"]
+        assert "Wrote 1 tiles" in capsys.readouterr().out
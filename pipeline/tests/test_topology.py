@@ -0,0 +1,143 @@
+"""Unit tests for pipeline.topology."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pytest
+
+from pipeline.topology import (
+    build_topology,
+    decode_topology,
+    encode_topology,
+    extract_arcs,
+    main,
+    zoom_threshold,
+)
+
+
+def _border(steps: int = 200) -> list[list[float]]:
+    """Wiggly north-south border at x = -80.2 from y = 25.7 to 25.8."""
+    ys = np.linspace(25.7, 25.8, steps)
+    xs = -80.2 + 0.002 * np.sin(ys * 2000)
+    return [[float(x), float(y)] for x, y in zip(xs, ys)]
+
+
+def _neighbours() -> dict:
+    border = _border()
+    west = [[-80.3, 25.7]] + border + [[-80.3, 25.8], [-80.3, 25.7]]
+    east =[border[-1]] + border[::-1][1:] + [[-80.1, 25.7], [-80.1, 25.8], border[-1]]
+    return {
+        "33101": {"type": "Polygon", "coordinates": [west]},
+        "33102": {"type": "Polygon", "coordinates": [east]},
+    }
+
+
+def _with_enclave() -> dict:
+    outer = [[-80.3, 25.7], [-80.1, 25.7], [-80.1, 25.9], [-80.3, 25.9], [-80.3, 25.7]]
+    hole = [[-80.25, 25.75], [-80.25, 25.85], [-80.15, 25.85], [-80.15, 25.75], [-80.25, 25.75]]
+    enclave = [[-80.25, 25.75], [-80.15, 25.75], [-80.15, 25.85], [-80.25, 25.85], [-80.25, 25.75]]
+    island = [[-80.0, 25.7], [-79.9999, 25.7], [-79.9999, 25.7001], [-80.0, 25.7001], [-80.0, 25.7]]
+    return {
+        "33101": {"type": "Polygon", "coordinates": [outer, hole]},
+        "33102": {"type": "Polygon", "coordinates": [enclave]},
+        "33103": {"type": "Polygon", "coordinates": [island]},
+    }
+
+
+def _border_points(ring: list[list[float]]) -> set[tuple[float, float]]:
+    return {(x, y) for x, y in ring if -80.21 <= x <= -80.19}
+
+
+class TestExtractArcs:
+    def test_shared_border_is_one_arc(self):
+        topology = extract_arcs(_neighbours())
+
+        west = topology.shapes["33101"][0][0]
+        east = topology.shapes["33102"][0][0]
+        shared = {arc if arc >= 0 else ~arc for arc in west} & {arc if arc >= 0 else ~arc for arc in east}
+        assert len(shared) == 1
+        (arc,) = shared
+        assert len(topology.arcs[arc]) >= 200
+        # Each neighbour walks the border in its own direction.
+        assert (arc in west) != (arc in east)
+
+    def test_enclave_hole_references_enclave_ring(self):
+        topology = extract_arcs(_with_enclave())
+
+        hole = topology.shapes["33101"][0][1]
+        enclave = topology.shapes["33102"][0][0]
+        assert len(hole) == len(enclave) == 1
+        assert hole[0] == ~enclave[0] or enclave[0] == ~hole[0]
+
+    def test_arc_endpoints_are_never_dropped(self):
+        topology = extract_arcs(_neighbours())
+
+        for weights in topology.weights:
+            assert np.isinf(weights[0]) and np.isinf(weights[-1])
+
+
+class TestEncodeTopology:
+    def test_round_trip_at_full_detail(self):
+        geometries = _neighbours()
+        topology = extract_arcs(geometries, quantization=1_000_000)
+
+        decoded = decode_topology(encode_topology(topology, 0.0))
+
+        for key, geometry in geometries.items():
+            original = np.asarray(geometry["coordinates"][0])
+            ring = np.asarray(decoded[key]["coordinates"][0])
+            assert len(ring) == len(original)
+            assert ring[0].tolist() == ring[-1].tolist()
+            assert {tuple(np.round(point, 5)) for point in ring} == {
+                tuple(np.round(point, 5)) for point in original
+            }
+
+    @pytest.mark.parametrize("zoom", [8, 11, 14])
+    def test_neighbours_share_simplified_border(self, zoom):
+        decoded = decode_topology(build_topology(_neighbours(), [zoom])[zoom])
+
+        west = _border_points(decoded["33101"]["coordinates"][0])
+        east = _border_points(decoded["33102"]["coordinates"][0])
+        assert west == east
+        assert len(west) >= 2
+
+    def test_lower_zoom_keeps_fewer_points(self):
+        topologies = build_topology(_neighbours(), [8, 14])
+
+        def points(topology: dict) -> int:
+            return sum(len(arc) for arc in topology["arcs"])
+
+        assert points(topologies[8]) < points(topologies[14])
+
+    def test_small_rings_never_collapse(self):
+        topology = extract_arcs(_with_enclave())
+
+        decoded = decode_topology(encode_topology(topology, zoom_threshold(0, topology.scale, 10.0)))
+
+        for geometry in decoded.values():
+            for ring in geometry["coordinates"]:
+                assert len({tuple(point) for point in ring}) >= 3
+
+    def test_topojson_layout(self):
+        topology = build_topology(_with_enclave(), [10])[10]
+
+        assert topology["type"] == "Topology"
+        assert set(topology["transform"]) == {"scale", "translate"}
+        geometries = topology["objects"]["zips"]["geometries"]
+        assert [geometry["id"] for geometry in geometries] == ["33101", "33102", "33103"]
+        assert all(isinstance(value, int) for arc in topology["arcs"] for point in arc for value in point)
+
+
+class TestCli:
+    def test_build_writes_topology_per_zoom(self, tmp_path, capsys):
+        source = tmp_path / "miami-zip-boundaries.json"
+        source.write_text(json.dumps(_neighbours()), encoding="utf-8")
+
+        main(["--data-root", str(tmp_path), "build", "--boundaries", source.name, "--zoom", "9", "12"])
+
+        for zoom in (9, 12):
+            output = tmp_path / f"miami-zip-boundaries.z{zoom}.topo.json"
+            assert set(decode_topology(json.loads(output.read_text()))) == {"33101", "33102"}
+        assert "smaller than miami-zip-boundaries.json" in capsys.readouterr().out
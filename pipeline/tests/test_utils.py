@@ -15,6 +15,7 @@ from unittest.mock import patch
 import pandas as pd
 import pytest
 
+from pipeline.geocache import GeocodeCache
 from pipeline.utils import (
     build_branch_to_area_map,
     clean_zip_code,
@@ -219,3 +220,59 @@ class TestGeocodeBatch:
             result_df, stats = geocode_batch(df, api_key=None)
         assert stats.skipped == 1
         assert stats.geocoded == 0
+
+    def test_falls_back_to_next_address_set(self, tmp_path: Path):
+        df = pd.DataFrame({
+            "address": ["1 Main St, Mesa, AZ", None],
+            "street": [None, "2 North Oak Avenue"],
+            "city": [None, "Tempe"],
+            "state": [None, "AZ"],
+            "zip": [None, 85281.0],
+        })
+        with GeocodeCache(tmp_path / "cache.sqlite") as cache:
+            cache.put("1 Main St, Mesa, AZ", (1.0, 2.0))
+            cache.put("2 N Oak Ave, Tempe, AZ, 85281", (3.0, 4.0))
+            result_df, stats = geocode_batch(df, api_key=None, cache=cache)
+        assert result_df["latitude"].tolist() == [1.0, 3.0]
+        assert result_df["longitude"].tolist() == [2.0, 4.0]
+        assert stats.geocoded == 2
+
+    def test_write_back_aligns_with_index(self, tmp_path: Path):
+        df = pd.DataFrame(
+            {
+                "address": ["1 Main St", "2 Main St", "1 Main Street", "9 Unknown Rd"],
+                "latitude": [pd.NA, 50.0, pd.NA, pd.NA],
+                "longitude": [pd.NA, 60.0, pd.NA, pd.NA],
+            },
+            index=[10, 5, 7, 3],
+        )
+        with GeocodeCache(tmp_path / "cache.sqlite") as cache:
+            cache.put("1 Main St", (1.0, 2.0))
+            cache.put("2 Main St", (8.0, 9.0))
+            result_df, stats = geocode_batch(df, api_key=None, cache=cache)
+        assert result_df.loc[[10, 5, 7], "latitude"].tolist() == [1.0, 50.0, 1.0]
+        assert pd.isna(result_df.loc[3, "latitude"])
+        assert (stats.geocoded, stats.cached, stats.skipped, stats.unique_addresses) == (2, 2, 2, 2)
+        assert stats.dedup_ratio == 1.5
+
+    def test_write_back_with_duplicate_index(self, tmp_path: Path):
+        df = pd.DataFrame(
+            {
+                "address": ["1 Main St", "2 Main St", None, "9 Unknown Rd"],
+                "street": [None, None, "2 Main Street", None],
+                "city": [None, None, "Mesa", None],
+                "state": [None, None, "AZ", None],
+                "zip": [None, None, None, None],
+                "latitude": [pd.NA, 50.0, pd.NA, pd.NA],
+                "longitude": [pd.NA, 60.0, pd.NA, pd.NA],
+            },
+            index=[0, 0, 1, 1],
+        )
+        with GeocodeCache(tmp_path / "cache.sqlite") as cache:
+            cache.put("1 Main St", (1.0, 2.0))
+            cache.put("2 Main St, Mesa, AZ", (8.0, 9.0))
+            result_df, stats = geocode_batch(df, api_key=None, cache=cache)
+        assert result_df.index.tolist() == [0, 0, 1, 1]
+        assert result_df["latitude"].tolist()[:3] == [1.0, 50.0, 8.0]
+        assert pd.isna(result_df["latitude"].iloc[3])
+        assert stats.geocoded == 2
@@ -0,0 +1,83 @@
+"""Unit tests for pipeline.zip_assignment."""
+
+from __future__ import annotations
+
+import json
+
+import pandas as pd
+import pytest
+
+from pipeline.geocode_validation import ZipPolygons
+from pipeline.geometry import PolygonTable
+from pipeline.master import account_zip_codes
+from pipeline.zip_assignment import assign_zip_codes, main
+from pipeline.tests.conftest import square_polygon
+
+
+@pytest.fixture
+def polygons():
+    return ZipPolygons(PolygonTable.from_geometries({
+        "85044": square_polygon(-112.1, 33.3, 0.1),
+        "85045": square_polygon(-112.2, 33.3, 0.1),
+    }))
+
+
+@pytest.fixture
+def accounts():
+    return pd.DataFrame({
+        "ShippingPostalCode": ["85044", "85044-1234", 85044.0, None, "85044", "85044"],
+        "Latitude": [33.35, 33.35, 33.35, 33.35, 40.0, None],
+        "Longitude": [-112.05, -112.15, -112.05, -112.15, -100.0, -112.05],
+    })
+
+
+class TestAssignZipCodes:
+    def test_reports_disagreements(self, polygons, accounts):
+        assigned, report = assign_zip_codes(accounts, polygons)
+
+        assert assigned["ZIP_Polygon"].tolist()[:4] == ["85044", "85045", "85044", "85045"]
+        assert assigned["ZIP_Polygon"].iloc[4:].isna().all()
+        assert assigned["ZIP_Mismatch"].tolist() == [False, True, False, True, False, False]
+        assert assigned["ZIP_Clean"].isna().tolist() == [False, False, False, True, False, False]
+        assert (report.located, report.agreed, report.disagreed) == (4, 2, 2)
+        assert (report.unlocated, report.missing_coordinates, report.overridden) == (1, 1, 0)
+        assert report.disagreement_rate == 0.5
+
+    def test_override_replaces_clean_zip(self, polygons, accounts):
+        assigned, report = assign_zip_codes(accounts, polygons, override=True)
+
+        assert assigned["ZIP_Clean"].tolist() == ["85044", "85045", "85044", "85045", "85044", "85044"]
+        assert report.overridden == 2
+        assert "ZIP_Clean" not in accounts.columns
+
+
+class TestMasterZipRepair:
+    def test_account_zip_codes_apply_polygons(self, polygons, accounts):
+        postal = account_zip_codes(accounts, None, "accounts")
+        assert postal.isna().tolist() == [False, False, False, True, False, False]
+
+        repaired = account_zip_codes(accounts, polygons, "accounts")
+
+        assert repaired.tolist() == ["85044", "85045", "85044", "85045", "85044", "85044"]
+
+    def test_accounts_without_coordinates_keep_postal_code(self, polygons):
+        frame = pd.DataFrame({"ShippingPostalCode": ["85045-0001"]})
+
+        assert account_zip_codes(frame, polygons, "accounts").tolist() == ["85045"]
+
+
+class TestCli:
+    def test_reads_json_records(self, tmp_path, capsys):
+        (tmp_path / "zips.json").write_text(json.dumps({"33101": square_polygon(-80.2, 25.7, 0.1)}))
+        (tmp_path / "accounts.json").write_text(json.dumps([
+            {"zip": "33101", "latitude": 25.75, "longitude": -80.15},
+            {"zip": "33199", "latitude": 25.75, "longitude": -80.15},
+        ]))
+
+        main([
+            "--data-root", str(tmp_path), "accounts.json", "--boundaries", "zips.json", "--zip-column", "zip",
+            "--lat-column", "latitude", "--lng-column", "longitude", "--disagreements", "out/disagree.csv",
+        ])
+
+        assert "2 rows: 2 inside a ZIP polygon, 1 disagree" in capsys.readouterr().out
+        assert pd.read_csv(tmp_path / "out" / "disagree.csv", dtype=str)["zip"].tolist() == ["33199"]
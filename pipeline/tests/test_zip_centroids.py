@@ -0,0 +1,96 @@
+"""Unit tests for pipeline.zip_centroids and geocode_batch's offline fallback."""
+
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from pipeline.constants import GEOCODE_PRECISION_ADDRESS, GEOCODE_PRECISION_ZIP_CENTROID
+from pipeline.geocache import GeocodeCache
+from pipeline.utils import geocode_batch
+from pipeline.zip_centroids import (
+    SOURCE_POINTS,
+    SOURCE_POLYGON,
+    ZipCentroids,
+    build_zip_centroids,
+    zip_point_records,
+)
+
+SQUARE = {
+    "type": "Polygon",
+    "coordinates": [[[-112.0, 33.0], [-111.9, 33.0], [-111.9, 33.1], [-112.0, 33.1], [-112.0, 33.0]]],
+}
+
+
+@pytest.fixture
+def sources(tmp_path):
+    boundaries = tmp_path / "az-zip-boundaries.json"
+    boundaries.write_text(json.dumps({"85001": SQUARE}))
+    density = tmp_path / "density-data.json"
+    density.write_text(json.dumps([
+        {"zipCode": "85001", "latitude": 40.0, "longitude": -100.0},
+        {"zipCode": "85002", "latitude": 33.5, "longitude": -112.1},
+    ]))
+    ancillary = tmp_path / "ancillary-sales-data.json"
+    ancillary.write_text(json.dumps({"view1": [
+        {"zip": "85002", "latitude": 33.7, "longitude": -112.3},
+        {"zip": "85002", "latitude": 33.6, "longitude": -112.2},
+    ]}))
+    csv = tmp_path / "assignments.csv"
+    pd.DataFrame({"Zip_Code": [5001], "Longitude": [-72.5], "Latitude": [42.1]}).to_csv(csv, index=False)
+    return [boundaries], [density, ancillary, csv]
+
+
+class TestBuildZipCentroids:
+    def test_polygons_take_precedence_over_points(self, sources):
+        table = build_zip_centroids(*sources).set_index("zip")
+        assert table.loc["85001", "source"] == SOURCE_POLYGON
+        assert (table.loc["85001", "latitude"], table.loc["85001", "longitude"]) == (33.05, -111.95)
+        assert table.loc["85002", "source"] == SOURCE_POINTS
+        assert table.loc["85002", "latitude"] == pytest.approx(33.6)  # median of three points
+        assert table.loc["05001", "longitude"] == -72.5
+
+    def test_point_records_ignore_unrelated_files(self, tmp_path):
+        path = tmp_path / "other.json"
+        path.write_text(json.dumps([{"name": "x"}]))
+        assert zip_point_records(path).empty
+
+    def test_round_trip_and_lookup(self, sources, tmp_path):
+        path = tmp_path / "zip_centroids.csv"
+        build_zip_centroids(*sources).to_csv(path, index=False)
+        centroids = ZipCentroids.load(path)
+
+        lat, lng = centroids.lookup(["85001", 85002.0, "99999", None, "5001"])
+        assert lat[:2].tolist() == [33.05, pytest.approx(33.6)]
+        assert np.isnan(lat[2:4]).all()
+        assert lng[4] == -72.5
+        assert "85001" in centroids and len(centroids) == 3
+
+
+class TestOfflineGeocode:
+    def test_centroids_fill_uncached_rows(self, sources, tmp_path):
+        centroids = ZipCentroids(build_zip_centroids(*sources))
+        frame = pd.DataFrame({
+            "street": ["1 Main St", "2 Oak Ave", "3 Elm St", "4 Pine St"],
+            "city": ["Phoenix"] * 4,
+            "state": ["AZ"] * 4,
+            "zip": ["85001", "85002", "85009", None],
+        })
+        with GeocodeCache(tmp_path / "cache.sqlite") as cache:
+            cache.put("1 Main St, Phoenix, AZ, 85001", (33.01, -111.99))
+            output, stats = geocode_batch(frame, api_key="unused", offline=True, cache=cache, centroids=centroids)
+
+        assert output["latitude"].tolist()[:2] == [33.01, pytest.approx(33.6)]
+        assert output["geocode_precision"].tolist()[:2] == [GEOCODE_PRECISION_ADDRESS, GEOCODE_PRECISION_ZIP_CENTROID]
+        assert output.loc[2:, "latitude"].isna().all()
+        assert (stats.geocoded, stats.approximate, stats.cached, stats.skipped) == (1, 1, 1, 2)
+
+    def test_without_cache_or_key(self, sources):
+        centroids = ZipCentroids(build_zip_centroids(*sources))
+        frame = pd.DataFrame({"address": ["9 Any Rd, Phoenix, AZ 85001"]})
+        output, stats = geocode_batch(frame, offline=True, centroids=centroids)
+        assert (output["latitude"].iloc[0], output["longitude"].iloc[0]) == (33.05, -111.95)
+        assert stats.approximate == 1 and stats.geocoded == 0
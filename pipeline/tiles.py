@@ -0,0 +1,253 @@
+"""Account points cut into a slippy-map (z/x/y) tile pyramid.
+
+The route and customer views download every account point
+(``route-assignments.json`` is 864 KB) before drawing anything.
+``tile_points`` assigns each point to its Web Mercator tile at every zoom
+in ``min_zoom..max_zoom`` and thins low zooms: within each
+``cell_px`` x ``cell_px`` pixel cell only the highest-priority point is
+kept, carrying a ``count`` of the points it stands for. The deepest zoom
+keeps every point. All of it is vectorized per zoom (project once, pack
+cell keys, one ``np.unique``), and the per-tile files are encoded and
+written by a process pool:
+
+    tiles = tile_points(frame, fields=["customerNumber", "territory"], max_zoom=14)
+    write_tiles(tiles, public_dir / "tiles" / "route-assignments", workers=8)
+
+Each tile is ``<z>/<x>/<y>.json`` with columnar ``lat``/``lng``/``count``
+and the requested fields, and ``index.json`` lists the zoom range, bounds
+and the tiles that exist, so the client fetches only visible, non-empty
+tiles:
+
+    python -m pipeline.tiles phoenix_territory_map/nextjs_space/public/route-assignments.json \\
+        --fields customerNumber customerName territory route
+"""
+
+from __future__ import annotations
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+import json
+import os
+from pathlib import Path
+from typing import Sequence
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import (
+    DEFAULT_TILE_CELL_PX,
+    DEFAULT_TILE_MAX_ZOOM,
+    DEFAULT_TILE_MIN_ZOOM,
+    DEFAULT_WEB_PUBLIC_DIR,
+)
+from pipeline.spatial_index import read_points
+from pipeline.utils import resolve_path
+
+TILE_SIZE: int = 256
+MAX_MERCATOR_LAT: float = 85.05112878
+
+
+def mercator_pixels(lat: np.ndarray, lng: np.ndarray, zoom: int) -> tuple[np.ndarray, np.ndarray]:
+    """Global Web Mercator pixel coordinates at ``zoom``."""
+    phi = np.radians(np.clip(lat, -MAX_MERCATOR_LAT, MAX_MERCATOR_LAT))
+    x = (np.asarray(lng, dtype=np.float64) + 180.0) / 360.0
+    y = (1.0 - np.log(np.tan(phi) + 1.0 / np.cos(phi)) / np.pi) / 2.0
+    world = TILE_SIZE * 2.0**zoom
+    return np.clip(x * world, 0, world - 1e-9), np.clip(y * world, 0, world - 1e-9)
+
+
+@dataclass(frozen=True)
+class Tile:
+    """Points of one tile: row positions into the source frame plus thinning counts."""
+
+    z: int
+    x: int
+    y: int
+    rows: np.ndarray
+    count: np.ndarray
+
+
+@dataclass(frozen=True)
+class TilePyramid:
+    tiles: list[Tile]
+    frame: pd.DataFrame
+    fields: list[str]
+    lat_column: str
+    lng_column: str
+    min_zoom: int
+    max_zoom: int
+
+    def __len__(self) -> int:
+        return len(self.tiles)
+
+    def index(self) -> dict:
+        """``index.json`` payload: zoom range, bounds and ``[x, y]`` of every tile per zoom."""
+        lat = pd.to_numeric(self.frame[self.lat_column], errors="coerce")
+        lng = pd.to_numeric(self.frame[self.lng_column], errors="coerce")
+        tiles: dict[str, list[list[int]]] = {}
+        for tile in self.tiles:
+            tiles.setdefault(str(tile.z), []).append([tile.x, tile.y])
+        return {
+            "minzoom": self.min_zoom,
+            "maxzoom": self.max_zoom,
+            "bounds": [float(lng.min()), float(lat.min()), float(lng.max()), float(lat.max())],
+            "fields": self.fields,
+            "template": "{z}/{x}/{y}.json",
+            "tiles": tiles,
+        }
+
+
+def tile_points(
+    df: pd.DataFrame,
+    *,
+    lat_column: str = "latitude",
+    lng_column: str = "longitude",
+    fields: Sequence[str] = (),
+    priority_column: str | None = None,
+    min_zoom: int = DEFAULT_TILE_MIN_ZOOM,
+    max_zoom: int = DEFAULT_TILE_MAX_ZOOM,
+    cell_px: int = DEFAULT_TILE_CELL_PX,
+) -> TilePyramid:
+    """Tiles for every zoom; below ``max_zoom`` one point per ``cell_px`` pixel cell.
+
+    The kept point of a cell is the one with the highest ``priority_column``
+    value (first in frame order when omitted or tied).
+    """
+    if not 0 <= min_zoom <= max_zoom:
+        raise ValueError("Zoom range must satisfy 0 <= min_zoom <= max_zoom")
+    if cell_px < 1:
+        raise ValueError("cell_px must be at least 1")
+    missing = [field for field in fields if field not in df.columns]
+    if missing:
+        raise ValueError(f"Unknown tile fields: {missing}")
+
+    lat = pd.to_numeric(df[lat_column], errors="coerce").to_numpy(dtype=np.float64)
+    lng = pd.to_numeric(df[lng_column], errors="coerce").to_numpy(dtype=np.float64)
+    valid = np.flatnonzero(np.isfinite(lat) & np.isfinite(lng))
+    if priority_column:
+        priority = pd.to_numeric(df[priority_column], errors="coerce").to_numpy(dtype=np.float64)[valid]
+        valid = valid[np.argsort(-np.nan_to_num(priority, nan=-np.inf), kind="stable")]
+
+    tiles: list[Tile] = []
+    for zoom in range(min_zoom, max_zoom + 1):
+        px, py = mercator_pixels(lat[valid], lng[valid], zoom)
+        if zoom < max_zoom:
+            cells = (px // cell_px).astype(np.int64) << 32 | (py // cell_px).astype(np.int64)
+            _, first, inverse = np.unique(cells, return_index=True, return_inverse=True)
+            counts = np.bincount(inverse)
+            kept, px, py = valid[first], px[first], py[first]
+        else:
+            kept, counts = valid, np.ones(len(valid), dtype=np.int64)
+        tx, ty = (px // TILE_SIZE).astype(np.int64), (py // TILE_SIZE).astype(np.int64)
+        order = np.lexsort((kept, ty, tx))
+        tx, ty, kept, counts = tx[order], ty[order], kept[order], counts[order]
+        breaks = np.flatnonzero((np.diff(tx) != 0) | (np.diff(ty) != 0)) + 1
+        for start, end in zip(np.r_[0, breaks], np.r_[breaks, len(kept)]):
+            if end > start:
+                tiles.append(Tile(zoom, int(tx[start]), int(ty[start]), kept[start:end], counts[start:end]))
+    return TilePyramid(tiles, df, list(fields), lat_column, lng_column, min_zoom, max_zoom)
+
+
+# ---------------------------------------------------------------------------
+# Writing
+# ---------------------------------------------------------------------------
+
+def _json_value(value: object) -> object:
+    if value is None or value is pd.NA or (isinstance(value, float) and np.isnan(value)):
+        return None
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def _write_batch(directory: str, batch: list[tuple[int, int, int, dict[str, np.ndarray]]]) -> int:
+    """Encode and write a batch of tiles (runs in a worker process)."""
+    written = 0
+    for z, x, y, columns in batch:
+        path = Path(directory) / str(z) / str(x) / f"{y}.json"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {name: [_json_value(value) for value in values] for name, values in columns.items()}
+        path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        written += 1
+    return written
+
+
+def write_tiles(pyramid: TilePyramid, directory: str | Path, *, workers: int = 1, batch_size: int = 64) -> int:
+    """Write ``<z>/<x>/<y>.json`` per tile plus ``index.json``; returns the tile count.
+
+    With ``workers > 1`` batches of tiles are encoded and written by a
+    process pool.
+    """
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    lat = pd.to_numeric(pyramid.frame[pyramid.lat_column], errors="coerce").to_numpy(dtype=np.float64)
+    lng = pd.to_numeric(pyramid.frame[pyramid.lng_column], errors="coerce").to_numpy(dtype=np.float64)
+    field_values = {field: pyramid.frame[field].to_numpy(dtype=object) for field in pyramid.fields}
+
+    def columns(tile: Tile) -> dict[str, np.ndarray]:
+        result = {"lat": np.round(lat[tile.rows], 6), "lng": np.round(lng[tile.rows], 6)}
+        if tile.z < pyramid.max_zoom:
+            result["count"] = tile.count
+        for field, values in field_values.items():
+            result[field] = values[tile.rows]
+        return result
+
+    batches: list[list[tuple[int, int, int, dict[str, np.ndarray]]]] = []
+    for start in range(0, len(pyramid.tiles), batch_size):
+        batches.append([(tile.z, tile.x, tile.y, columns(tile)) for tile in pyramid.tiles[start : start + batch_size]])
+
+    if workers > 1 and len(batches) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            written = sum(pool.map(_write_batch, [str(directory)] * len(batches), batches))
+    else:
+        written = sum(_write_batch(str(directory), batch) for batch in batches)
+    (directory / "index.json").write_text(json.dumps(pyramid.index(), separators=(",", ":")), encoding="utf-8")
+    return written
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Cut account points into z/x/y tiles.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("input", help="Accounts JSON (list of records) or CSV.")
+    parser.add_argument("--lat-column", default="latitude")
+    parser.add_argument("--lng-column", default="longitude")
+    parser.add_argument("--fields", nargs="*", default=[], help="Record fields to include per point.")
+    parser.add_argument("--priority-column", help="Keep the highest value per cell when thinning.")
+    parser.add_argument("--min-zoom", type=int, default=DEFAULT_TILE_MIN_ZOOM)
+    parser.add_argument("--max-zoom", type=int, default=DEFAULT_TILE_MAX_ZOOM)
+    parser.add_argument("--cell-px", type=int, default=DEFAULT_TILE_CELL_PX)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--output-dir", help="Tile directory (default: <web public>/tiles/<input stem>).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+    source = resolve_path(data_root, args.input)
+    if args.output_dir:
+        output_dir = resolve_path(data_root, args.output_dir)
+    else:
+        output_dir = data_root / DEFAULT_WEB_PUBLIC_DIR / "tiles" / source.stem
+
+    pyramid = tile_points(
+        read_points(source),
+        lat_column=args.lat_column,
+        lng_column=args.lng_column,
+        fields=args.fields,
+        priority_column=args.priority_column,
+        min_zoom=args.min_zoom,
+        max_zoom=args.max_zoom,
+        cell_px=args.cell_px,
+    )
+    written = write_tiles(pyramid, output_dir, workers=args.workers)
+    per_zoom = pd.Series([tile.z for tile in pyramid.tiles], dtype=np.int64).value_counts().sort_index()
+    summary = ", ".join(f"z{zoom}: {count}" for zoom, count in per_zoom.items())
+    print(f"Wrote {written} tiles to {output_dir} ({summary})")
+
+
+if __name__ == "__main__":
+    main()
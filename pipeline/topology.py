@@ -0,0 +1,361 @@
+"""Build stage: ZIP boundaries as simplified, quantized TopoJSON per zoom level.
+
+The ``*-zip-boundaries.json`` files hold full-precision GeoJSON rings
+(2.1 MB for Miami) and every border between two ZIPs is stored twice.
+``build_topology`` turns one boundary file into TopoJSON topologies:
+
+* coordinates are quantized to a ``quantization`` x ``quantization``
+  integer grid over the file's bbox, which also snaps the two copies of a
+  border onto identical points;
+* rings are cut at junctions (vertices where the neighbouring ZIP
+  changes) into arcs, and each shared border is stored once and
+  referenced by both ZIPs (``~i`` for the reversed direction);
+* every arc is simplified with Visvalingam-Whyatt to the tolerance of each
+  zoom level. Arc endpoints stay fixed and both neighbours draw the same
+  simplified arc, so simplification cannot open gaps between ZIPs;
+* arcs are delta-encoded, as in TopoJSON.
+
+Output is standard TopoJSON (``objects.zips`` is a GeometryCollection
+with each ZIP as ``id``), one file per zoom level, readable in the browser
+with ``topojson-client``'s ``feature()``:
+
+    python -m pipeline.topology build                  # public/*-zip-boundaries.z{9,11,13}.topo.json
+    python -m pipeline.topology build --zoom 10 12 --quantization 100000
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import heapq
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Mapping, Sequence
+
+import numpy as np
+
+from pipeline.constants import (
+    DEFAULT_TOPOLOGY_QUANTIZATION,
+    DEFAULT_TOPOLOGY_TOLERANCE_PX,
+    DEFAULT_TOPOLOGY_ZOOMS,
+    DEFAULT_WEB_PUBLIC_DIR,
+    ZIP_BOUNDARY_GLOB,
+)
+from pipeline.geometry import _polygons, read_zip_geometries
+from pipeline.utils import resolve_path
+
+TOPOLOGY_OBJECT: str = "zips"
+_TILE_SIZE: int = 256
+
+
+@dataclass(frozen=True)
+class ArcTopology:
+    """Quantized rings cut into shared arcs, before simplification.
+
+    ``arcs`` hold absolute quantized points; ``weights`` the Visvalingam
+    effective area of each point (inf at arc ends and protected points).
+    ``shapes`` maps each key to polygons -> rings -> signed arc indexes.
+    """
+
+    arcs: list[np.ndarray]
+    weights: list[np.ndarray]
+    shapes: dict[str, list[list[list[int]]]]
+    scale: tuple[float, float]
+    translate: tuple[float, float]
+
+
+# ---------------------------------------------------------------------------
+# Quantization and arc extraction
+# ---------------------------------------------------------------------------
+
+def _quantized_rings(
+    geometries: Mapping[str, Mapping[str, object]],
+    quantization: int,
+) -> tuple[dict[str, list[list[np.ndarray]]], tuple[float, float], tuple[float, float]]:
+    """Open integer rings per key (closing vertex and repeats dropped)."""
+    polygons = {key: _polygons(geometry) for key, geometry in geometries.items()}
+    points = [
+        np.asarray(ring, dtype=np.float64).reshape(-1, 2)[:, :2]
+        for shape in polygons.values()
+        for polygon in shape
+        for ring in polygon
+        if len(ring)
+    ]
+    if not points:
+        return {}, (1.0, 1.0), (0.0, 0.0)
+    stacked = np.vstack(points)
+    low, high = stacked.min(axis=0), stacked.max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    scale = span / (quantization - 1)
+
+    rings: dict[str, list[list[np.ndarray]]] = {}
+    for key, shape in polygons.items():
+        quantized_polygons = []
+        for polygon in shape:
+            quantized = []
+            for ring in polygon:
+                coords = np.asarray(ring, dtype=np.float64).reshape(-1, 2)[:, :2]
+                q = np.round((coords - low) / scale).astype(np.int64)
+                keep = np.r_[True, (np.diff(q, axis=0) != 0).any(axis=1)]
+                q = q[keep]
+                if len(q) > 1 and (q[0] == q[-1]).all():
+                    q = q[:-1]
+                if len(q) >= 3:
+                    quantized.append(q)
+            if quantized and len(quantized[0]) >= 3:
+                quantized_polygons.append(quantized)
+        if quantized_polygons:
+            rings[str(key)] = quantized_polygons
+    return rings, (float(scale[0]), float(scale[1])), (float(low[0]), float(low[1]))
+
+
+def _junctions(rings: Sequence[np.ndarray]) -> set[int]:
+    """Packed points where the neighbouring rings change.
+
+    A point is a junction when its (previous, next) neighbours differ
+    between the rings that pass through it: that is where one shared
+    border ends and the next begins.
+    """
+    packed = [ring[:, 0] << 32 | ring[:, 1] for ring in rings]
+    point = np.concatenate(packed)
+    before = np.concatenate([np.roll(ring, 1) for ring in packed])
+    after = np.concatenate([np.roll(ring, -1) for ring in packed])
+    low, high = np.minimum(before, after), np.maximum(before, after)
+
+    order = np.lexsort((high, low, point))
+    point, low, high = point[order], low[order], high[order]
+    same_point = point[1:] == point[:-1]
+    changed = same_point & ((low[1:] != low[:-1]) | (high[1:] != high[:-1]))
+    return set(point[1:][changed].tolist())
+
+
+def extract_arcs(
+    geometries: Mapping[str, Mapping[str, object]],
+    *,
+    quantization: int = DEFAULT_TOPOLOGY_QUANTIZATION,
+) -> ArcTopology:
+    """Quantize ``{key: geometry}`` and cut its rings into shared arcs."""
+    rings, scale, translate = _quantized_rings(geometries, quantization)
+    all_rings = [ring for shape in rings.values() for polygon in shape for ring in polygon]
+    junctions = _junctions(all_rings) if all_rings else set()
+
+    arcs: list[np.ndarray] = []
+    index: dict[bytes, int] = {}
+
+    def arc_id(points: np.ndarray) -> int:
+        forward = points.tobytes()
+        if forward in index:
+            return index[forward]
+        backward = points[::-1].tobytes()
+        if backward in index:
+            return ~index[backward]
+        index[forward] = len(arcs)
+        arcs.append(points)
+        return len(arcs) - 1
+
+    shapes: dict[str, list[list[list[int]]]] = {}
+    all_ring_arcs: list[list[int]] = []
+    for key, polygons in rings.items():
+        shape_arcs = []
+        for polygon in polygons:
+            polygon_arcs = []
+            for ring in polygon:
+                packed = (ring[:, 0] << 32 | ring[:, 1]).tolist()
+                cuts = [position for position, value in enumerate(packed) if value in junctions]
+                if not cuts:
+                    # A ring touching no other ring the same way (an island, or an
+                    # enclave and its hole): one closed arc from a canonical start, so
+                    # the hole matches the enclave ring reversed.
+                    rotated = np.roll(ring, -int(np.argmin(packed)), axis=0)
+                    ring_arcs = [arc_id(np.vstack([rotated, rotated[:1]]))]
+                else:
+                    rotated = np.roll(ring, -cuts[0], axis=0)
+                    offsets = [position - cuts[0] for position in cuts] + [len(ring)]
+                    closed = np.vstack([rotated, rotated[:1]])
+                    ring_arcs = [arc_id(closed[a : b + 1]) for a, b in zip(offsets[:-1], offsets[1:])]
+                polygon_arcs.append(ring_arcs)
+                all_ring_arcs.append(ring_arcs)
+            shape_arcs.append(polygon_arcs)
+        shapes[key] = shape_arcs
+
+    weights = [_visvalingam_weights(points) for points in arcs]
+    # Rings made of one or two arcs keep an interior point per arc so they
+    # cannot collapse to a line at any zoom level.
+    for ring_arcs in all_ring_arcs:
+        if len(ring_arcs) <= 2:
+            for arc in ring_arcs:
+                arc_weights = weights[arc if arc >= 0 else ~arc]
+                protect = 2 if len(ring_arcs) == 1 else 1
+                interior = np.argsort(arc_weights[1:-1])[::-1][:protect] + 1
+                arc_weights[interior] = np.inf
+    return ArcTopology(arcs=arcs, weights=weights, shapes=shapes, scale=scale, translate=translate)
+
+
+# ---------------------------------------------------------------------------
+# Simplification
+# ---------------------------------------------------------------------------
+
+def _visvalingam_weights(points: np.ndarray) -> np.ndarray:
+    """Effective area of each point (inf at the ends), as in Visvalingam-Whyatt.
+
+    Removing points in ascending weight order reproduces the algorithm;
+    weights never decrease along that order, so any threshold keeps a
+    consistent subset.
+    """
+    count = len(points)
+    weights = np.full(count, np.inf)
+    if count <= 2:
+        return weights
+    x = points[:, 0].astype(np.float64)
+    y = points[:, 1].astype(np.float64)
+
+    def area(a: int, b: int, c: int) -> float:
+        return abs((x[b] - x[a]) * (y[c] - y[a]) - (x[c] - x[a]) * (y[b] - y[a])) / 2.0
+
+    previous = list(range(-1, count - 1))
+    following = list(range(1, count + 1))
+    current = [np.inf] * count
+    heap = []
+    for i in range(1, count - 1):
+        current[i] = area(i - 1, i, i + 1)
+        heap.append((current[i], i))
+    heapq.heapify(heap)
+
+    floor = 0.0
+    while heap:
+        value, i = heapq.heappop(heap)
+        if value != current[i] or weights[i] != np.inf:
+            continue
+        floor = max(floor, value)
+        weights[i] = floor
+        left, right = previous[i], following[i]
+        following[left], previous[right] = right, left
+        for j in (left, right):
+            if 0 < j < count - 1 and weights[j] == np.inf:
+                current[j] = area(previous[j], j, following[j])
+                heapq.heappush(heap, (current[j], j))
+    return weights
+
+
+def zoom_threshold(zoom: int, scale: tuple[float, float], tolerance_px: float) -> float:
+    """Minimum effective area (quantized units²) kept at ``zoom``.
+
+    A triangle is dropped when its area is below that of a
+    ``tolerance_px``-pixel square at the zoom's degrees per pixel.
+    """
+    degrees_per_pixel = 360.0 / (_TILE_SIZE * 2**zoom)
+    side = tolerance_px * degrees_per_pixel
+    return (side / scale[0]) * (side / scale[1])
+
+
+def encode_topology(topology: ArcTopology, threshold: float) -> dict:
+    """TopoJSON dict keeping points whose weight is at least ``threshold``."""
+    encoded_arcs = []
+    for points, weights in zip(topology.arcs, topology.weights):
+        kept = points[weights >= threshold]
+        encoded_arcs.append(np.diff(kept, axis=0, prepend=np.zeros((1, 2), dtype=kept.dtype)).tolist())
+
+    geometries = []
+    for key, polygons in topology.shapes.items():
+        if len(polygons) == 1:
+            geometries.append({"type": "Polygon", "id": key, "arcs": polygons[0]})
+        else:
+            geometries.append({"type": "MultiPolygon", "id": key, "arcs": polygons})
+    return {
+        "type": "Topology",
+        "transform": {"scale": list(topology.scale), "translate": list(topology.translate)},
+        "objects": {TOPOLOGY_OBJECT: {"type": "GeometryCollection", "geometries": geometries}},
+        "arcs": encoded_arcs,
+    }
+
+
+def build_topology(
+    geometries: Mapping[str, Mapping[str, object]],
+    zooms: Iterable[int] = DEFAULT_TOPOLOGY_ZOOMS,
+    *,
+    quantization: int = DEFAULT_TOPOLOGY_QUANTIZATION,
+    tolerance_px: float = DEFAULT_TOPOLOGY_TOLERANCE_PX,
+) -> dict[int, dict]:
+    """``{zoom: TopoJSON dict}`` for one set of ZIP geometries."""
+    topology = extract_arcs(geometries, quantization=quantization)
+    return {
+        zoom: encode_topology(topology, zoom_threshold(zoom, topology.scale, tolerance_px))
+        for zoom in zooms
+    }
+
+
+def decode_topology(topology: Mapping[str, object]) -> dict[str, dict]:
+    """``{id: GeoJSON geometry}`` back from a topology written by ``encode_topology``."""
+    scale = np.asarray(topology["transform"]["scale"], dtype=np.float64)
+    translate = np.asarray(topology["transform"]["translate"], dtype=np.float64)
+    arcs = [np.cumsum(np.asarray(arc, dtype=np.int64), axis=0) * scale + translate for arc in topology["arcs"]]
+
+    def ring(indexes: Sequence[int]) -> list[list[float]]:
+        points: list[np.ndarray] = []
+        for arc in indexes:
+            coords = arcs[arc] if arc >= 0 else arcs[~arc][::-1]
+            points.append(coords if not points else coords[1:])
+        return np.vstack(points).tolist()
+
+    geometries = {}
+    for geometry in topology["objects"][TOPOLOGY_OBJECT]["geometries"]:
+        if geometry["type"] == "Polygon":
+            coordinates = [ring(indexes) for indexes in geometry["arcs"]]
+        else:
+            coordinates = [[ring(indexes) for indexes in polygon] for polygon in geometry["arcs"]]
+        geometries[geometry["id"]] = {"type": geometry["type"], "coordinates": coordinates}
+    return geometries
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def topology_path(boundary_path: Path, zoom: int, output_dir: Path | None = None) -> Path:
+    """``miami-zip-boundaries.json`` -> ``miami-zip-boundaries.z11.topo.json``."""
+    directory = output_dir or boundary_path.parent
+    return directory / f"{boundary_path.stem}.z{zoom}.topo.json"
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build simplified TopoJSON ZIP boundaries per zoom level.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Write <boundaries>.z<zoom>.topo.json files.")
+    build.add_argument("--boundaries", action="append", help="ZIP boundary JSON (default: web public dir).")
+    build.add_argument("--output-dir", help="Directory for topology files (default: next to each input).")
+    build.add_argument("--zoom", type=int, nargs="+", default=list(DEFAULT_TOPOLOGY_ZOOMS))
+    build.add_argument("--quantization", type=int, default=DEFAULT_TOPOLOGY_QUANTIZATION)
+    build.add_argument("--tolerance-px", type=float, default=DEFAULT_TOPOLOGY_TOLERANCE_PX)
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+    if args.boundaries:
+        boundaries = [resolve_path(data_root, path) for path in args.boundaries]
+    else:
+        boundaries = sorted((data_root / DEFAULT_WEB_PUBLIC_DIR).glob(ZIP_BOUNDARY_GLOB))
+    output_dir = resolve_path(data_root, args.output_dir) if args.output_dir else None
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+    for path in boundaries:
+        topologies = build_topology(
+            read_zip_geometries(path),
+            args.zoom,
+            quantization=args.quantization,
+            tolerance_px=args.tolerance_px,
+        )
+        original = path.stat().st_size
+        for zoom, topology in topologies.items():
+            output = topology_path(path, zoom, output_dir)
+            output.write_text(json.dumps(topology, separators=(",", ":")), encoding="utf-8")
+            size = output.stat().st_size
+            print(f"{output.name}: {size / 1024:.0f} KB ({original / size:.1f}x smaller than {path.name})")
+
+
+if __name__ == "__main__":
+    main()
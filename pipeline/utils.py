@@ -7,13 +7,29 @@ import json
 import logging
 import os
 from pathlib import Path
-import time
-from typing import Iterable, Mapping, Sequence
-from urllib.parse import urlencode
-from urllib.request import urlopen
+from typing import TYPE_CHECKING, Iterable, Mapping, Sequence
 
+import numpy as np
 import pandas as pd
 
+from pipeline.constants import (
+    DEFAULT_GEOCODE_RATE_PER_SECOND,
+    DEFAULT_GEOCODE_URL,
+    DEFAULT_GEOCODE_WORKERS,
+    GEOCODE_CHECK_OUTSIDE,
+    GEOCODE_PRECISION_ADDRESS,
+    GEOCODE_PRECISION_ZIP_CENTROID,
+)
+from pipeline.geocode_journal import GeocodeJournal
+from pipeline.geocoder import STATUS_ZERO_RESULTS, ConcurrentGeocoder, GeocodeResponse
+
+if TYPE_CHECKING:
+    from openpyxl import Workbook
+
+    from pipeline.geocache import GeocodeCache
+    from pipeline.geocode_validation import ZipPolygons
+    from pipeline.zip_centroids import ZipCentroids
+
 logger = logging.getLogger(__name__)
 
 
@@ -47,6 +63,60 @@ def load_excel_safe(path: str | Path, sheet_name: str) -> pd.DataFrame:
         ) from exc
 
 
+def resolve_path(data_root: Path, value: str | Path) -> Path:
+    """Resolve ``value`` against ``data_root`` unless it is already absolute."""
+    path = Path(value).expanduser()
+    return path if path.is_absolute() else data_root / path
+
+
+def load_csv_safe(path: Path, context: str) -> pd.DataFrame:
+    try:
+        return pd.read_csv(path)
+    except FileNotFoundError as exc:
+        raise FileNotFoundError(f"{context} file not found: {path}") from exc
+    except Exception as exc:  # pragma: no cover - defensive
+        raise RuntimeError(f"Failed to read {context} file: {path}\n{exc}") from exc
+
+
+def load_excel_file_safe(path: Path, context: str) -> pd.DataFrame:
+    try:
+        return pd.read_excel(path)
+    except FileNotFoundError as exc:
+        raise FileNotFoundError(f"{context} file not found: {path}") from exc
+    except Exception as exc:  # pragma: no cover - defensive
+        raise RuntimeError(f"Failed to read {context} file: {path}\n{exc}") from exc
+
+
+def save_csv_safe(df: pd.DataFrame, path: Path, context: str) -> None:
+    try:
+        df.to_csv(path, index=False)
+    except Exception as exc:  # pragma: no cover - defensive
+        raise RuntimeError(f"Failed to write {context} CSV: {path}\n{exc}") from exc
+
+
+def save_json_safe(payload: object, path: Path, context: str) -> None:
+    try:
+        with path.open("w", encoding="utf-8") as handle:
+            json.dump(payload, handle, indent=2)
+    except Exception as exc:  # pragma: no cover - defensive
+        raise RuntimeError(f"Failed to write {context} JSON: {path}\n{exc}") from exc
+
+
+def save_workbook_safe(workbook: Workbook, path: Path, context: str) -> None:
+    try:
+        workbook.save(path)
+    except Exception as exc:  # pragma: no cover - defensive
+        raise RuntimeError(f"Failed to write {context} workbook: {path}\n{exc}") from exc
+
+
+def save_text_safe(path: Path, content: str, context: str) -> None:
+    try:
+        with path.open("w", encoding="utf-8") as handle:
+            handle.write(content)
+    except Exception as exc:  # pragma: no cover - defensive
+        raise RuntimeError(f"Failed to write {context} text: {path}\n{exc}") from exc
+
+
 def load_branch_definitions(path: str | Path) -> dict:
     """Load shared branch/territory definitions from JSON."""
     file_path = Path(path)
@@ -100,27 +170,89 @@ class GeocodeStats:
     geocoded: int
     skipped: int
     failed: int
+    cached: int = 0
+    unique_addresses: int = 0
+    dedup_ratio: float = 1.0  # candidate rows per unique normalized address
+    approximate: int = 0  # rows given their ZIP centroid instead of a geocode
+    resumed: int = 0  # rows resolved from an earlier run's journal
+    mismatched: int = 0  # rows whose geocode fell outside their ZIP polygon
 
 
 def geocode_batch(
     df: pd.DataFrame,
     *,
     api_key: str | None = None,
-    batch_size: int = 10,
-    batch_delay_seconds: float = 1.1,
+    batch_size: int = 100,
+    batch_delay_seconds: float | None = None,
     max_retries: int = 2,
     address_columns: Sequence[str] | None = None,
     lat_column: str = "latitude",
     lng_column: str = "longitude",
+    cache: GeocodeCache | None = None,
+    max_workers: int = DEFAULT_GEOCODE_WORKERS,
+    rate_per_second: float = DEFAULT_GEOCODE_RATE_PER_SECOND,
+    base_url: str = DEFAULT_GEOCODE_URL,
+    offline: bool = False,
+    centroids: ZipCentroids | None = None,
+    precision_column: str = "geocode_precision",
+    journal: GeocodeJournal | str | Path | None = None,
+    polygons: ZipPolygons | None = None,
 ) -> tuple[pd.DataFrame, GeocodeStats]:
-    """Batch geocode rows that lack coordinates using Google Geocoding API."""
+    """Batch geocode rows that lack coordinates using Google Geocoding API.
+
+    Unique addresses are resolved concurrently by
+    ``pipeline.geocoder.ConcurrentGeocoder`` (``max_workers`` keep-alive
+    connections sharing a ``rate_per_second`` token bucket), ``batch_size``
+    addresses at a time. Passing ``batch_delay_seconds`` keeps the old
+    pacing of ``batch_size`` requests per delay instead.
+
+    With a persistent ``cache`` (``pipeline.geocache.GeocodeCache``), cached
+    addresses are filled in one batched lookup before any API call, and new
+    API results are written back after each batch. Cache hits count toward
+    ``geocoded`` and are also reported as ``cached``.
+
+    Candidate rows and their addresses are selected with column operations
+    (``pipeline.addresses.join_addresses``) and deduplicated on their
+    normalized form, so spelling variants of one location share a single
+    lookup; ``unique_addresses`` and ``dedup_ratio`` on the returned stats
+    report how much that saved. The normalized form is only the cache and
+    journal key: the API is sent the first row's address as written.
+    Coordinates are written back in one aligned assignment per column.
+
+    ``offline=True`` never calls the API. With ``centroids``
+    (``pipeline.zip_centroids.ZipCentroids``), addresses still unresolved
+    after the cache and API get their ZIP's centroid; those rows are
+    counted as ``approximate`` rather than ``geocoded`` and
+    ``precision_column`` records which rows are approximate.
+
+    With a ``journal`` (``pipeline.geocode_journal.GeocodeJournal`` or a
+    path), each API batch is appended and fsynced to the journal instead of
+    the cache, addresses already in the journal are not requested again,
+    and the journal is compacted into ``cache`` once the run completes (and
+    kept when there is no cache). A crashed run restarted with the same
+    journal only pays for the remaining addresses, even without an API key.
+
+    With ``polygons`` (``pipeline.geocode_validation.ZipPolygons``), every
+    coordinate is checked against the boundary of the address's ZIP. Cached
+    or journaled coordinates outside it are requested again; API results
+    outside it are treated (and cached) as not found, so they fall back to
+    the ZIP centroid when ``centroids`` is given. ``mismatched`` counts the
+    rows affected.
+    """
     resolved_key = api_key or os.getenv("GOOGLE_GEOCODING_API_KEY") or os.getenv(
         "GOOGLE_MAPS_API_KEY"
     )
-    if not resolved_key:
+    if offline:
+        resolved_key = None
+    if journal is not None and not isinstance(journal, GeocodeJournal):
+        journal = GeocodeJournal(journal)
+    if not resolved_key and cache is None and centroids is None and journal is None:
         logger.warning("No Google Geocoding API key found; skipping geocoding.")
         return df, GeocodeStats(processed=len(df), geocoded=0, skipped=len(df), failed=0)
 
+    # Imported here: pipeline.addresses depends on clean_zip_code above.
+    from pipeline.addresses import address_zip_codes, dedupe_addresses
+
     output = df.copy()
     if lat_column not in output.columns:
         output[lat_column] = pd.NA
@@ -140,109 +272,267 @@ def geocode_batch(
     if address_columns:
         address_sets.insert(0, tuple(address_columns))
 
-    cache: dict[str, tuple[float, float] | None] = {}
-    needs_geocoding: list[tuple[int, str]] = []
+    # Rows are tracked by position so a repeated index label cannot misalign the write-back.
+    missing_rows = np.flatnonzero((output[lat_column].isna() | output[lng_column].isna()).to_numpy())
+    # Deduplicated on the normalized key so spelling variants of one location
+    # share a single lookup; the API gets the first row's text as written.
+    text, candidates = _candidate_addresses(output.iloc[missing_rows].reset_index(drop=True), address_sets)
+    has_address = candidates.notna().to_numpy()
+    pending = candidates[has_address]
+    pending_rows = missing_rows[has_address]
+    codes, uniques, dedup = dedupe_addresses(pending)
+    first_rows = np.empty(len(uniques), dtype=np.int64)
+    first_rows[codes[::-1]] = np.arange(len(codes) - 1, -1, -1)
+    if dedup.rows:
+        logger.info(
+            "Geocoding %d rows -> %d unique addresses (dedup ratio %.2f)",
+            dedup.rows,
+            dedup.unique,
+            dedup.ratio,
+        )
 
-    for index, row in output.iterrows():
-        if _has_coordinates(row, lat_column, lng_column):
-            continue
-        address = _extract_address(row, address_sets)
-        if address:
-            needs_geocoding.append((index, address))
+    results = _UniqueResults.for_addresses(uniques, text[has_address].to_numpy(dtype=object)[first_rows])
+    if polygons is not None:
+        results.zips = address_zip_codes(pd.Series(results.addresses)).to_numpy(dtype=object)
+    unresolved = list(results.addresses)
+    if cache is not None:
+        unresolved = _fill_from_cache(results, unresolved, cache)
+    if journal is not None:
+        unresolved = _replay_journal(results, unresolved, journal)
+    if polygons is not None:
+        unresolved += _requeue_mismatches(results, polygons)
+
+    if not resolved_key and unresolved:
+        if offline:
+            logger.info("Offline geocoding: %d uncached addresses not sent to the API.", len(unresolved))
+        else:
+            logger.warning("No Google Geocoding API key found; %d uncached addresses skipped.", len(unresolved))
+        results.skipped[[results.position[address] for address in unresolved]] = True
+        unresolved = []
+
+    if unresolved:
+        if batch_delay_seconds is not None and batch_delay_seconds > 0:
+            rate_per_second = batch_size / batch_delay_seconds
+        with ConcurrentGeocoder(
+            resolved_key,
+            base_url=base_url,
+            max_workers=max_workers,
+            rate_per_second=rate_per_second,
+            max_retries=max_retries,
+        ) as geocoder:
+            _request_geocodes(
+                results, unresolved, geocoder, batch_size=batch_size, cache=cache, journal=journal, polygons=polygons
+            )
+
+    if journal is not None:
+        journal.compact(cache)
+    if centroids is not None:
+        _fill_centroids(results, centroids)
+
+    row_lat = results.lat[codes]
+    row_ok = ~np.isnan(row_lat)
+    row_approximate = results.approximate[codes]
+    row_skipped = results.skipped[codes]
+    if row_ok.any():
+        filled = pending_rows[row_ok]
+        output.iloc[filled, output.columns.get_loc(lat_column)] = row_lat[row_ok]
+        output.iloc[filled, output.columns.get_loc(lng_column)] = results.lng[codes][row_ok]
+        if centroids is not None:
+            if precision_column not in output.columns:
+                output[precision_column] = pd.Series(pd.NA, index=output.index, dtype=object)
+            output.iloc[filled, output.columns.get_loc(precision_column)] = np.where(
+                row_approximate[row_ok], GEOCODE_PRECISION_ZIP_CENTROID, GEOCODE_PRECISION_ADDRESS
+            )
 
     processed = len(output)
-    geocoded = 0
-    failed = 0
-    skipped = processed - len(needs_geocoding)
-
-    for start in range(0, len(needs_geocoding), batch_size):
-        batch = needs_geocoding[start : start + batch_size]
-
-        for index, address in batch:
-            coords = cache.get(address)
-            if coords is None and address in cache:
-                failed += 1
-                continue
-
-            if coords is None:
-                coords = _geocode_with_retry(address, resolved_key, max_retries)
-                cache[address] = coords
-
-            if coords:
-                output.at[index, lat_column] = coords[0]
-                output.at[index, lng_column] = coords[1]
-                geocoded += 1
-            else:
-                failed += 1
-
-        if start + batch_size < len(needs_geocoding):
-            time.sleep(batch_delay_seconds)
+    approximate = int(row_approximate.sum())
+    geocoded = int(row_ok.sum()) - approximate
+    cached = int(results.cached[codes].sum())
+    resumed = int((results.resumed[codes] & row_ok & ~row_approximate).sum())
+    mismatched = int(results.rejected[codes].sum())
+    skipped = processed - len(pending) + int(row_skipped.sum())
+    failed = len(pending) - geocoded - approximate - int(row_skipped.sum())
 
     return output, GeocodeStats(
         processed=processed,
         geocoded=geocoded,
         skipped=skipped,
         failed=failed,
+        cached=cached,
+        unique_addresses=dedup.unique,
+        dedup_ratio=dedup.ratio,
+        approximate=approximate,
+        resumed=resumed,
+        mismatched=mismatched,
     )
 
 
-def _has_coordinates(row: pd.Series, lat_column: str, lng_column: str) -> bool:
-    lat = row.get(lat_column)
-    lng = row.get(lng_column)
-    return pd.notna(lat) and pd.notna(lng)
+@dataclass
+class _UniqueResults:
+    """Coordinates and outcome flags per unique address; rows pick theirs up through their codes.
+
+    ``addresses`` are normalized keys; ``queries`` the text sent to the API for each.
+    """
+
+    addresses: np.ndarray
+    queries: np.ndarray
+    position: dict[str, int]
+    lat: np.ndarray
+    lng: np.ndarray
+    cached: np.ndarray
+    skipped: np.ndarray
+    resumed: np.ndarray
+    rejected: np.ndarray
+    approximate: np.ndarray
+    zips: np.ndarray | None = None  # ZIP per address, set when validating against polygons
+
+    @classmethod
+    def for_addresses(cls, uniques: Sequence[str], queries: Sequence[str] | None = None) -> _UniqueResults:
+        addresses = np.asarray(uniques, dtype=object)
+        count = len(addresses)
+        return cls(
+            addresses,
+            addresses if queries is None else np.asarray(queries, dtype=object),
+            {address: i for i, address in enumerate(addresses)},
+            np.full(count, np.nan),
+            np.full(count, np.nan),
+            *(np.zeros(count, dtype=bool) for _ in range(5)),
+        )
 
+    def query(self, address: str) -> str:
+        return self.queries[self.position[address]]
+
+    def record(self, address: str, coords: tuple[float, float] | None) -> None:
+        if coords:
+            self.lat[self.position[address]], self.lng[self.position[address]] = coords
+
+    def reject_mismatches(self, indices: np.ndarray, polygons: ZipPolygons) -> np.ndarray:
+        """Clear coordinates at ``indices`` outside their ZIP polygon; returns that mask."""
+        status = polygons.check(self.zips[indices], self.lat[indices], self.lng[indices])
+        outside = status == GEOCODE_CHECK_OUTSIDE
+        self.lat[indices[outside]] = np.nan
+        self.lng[indices[outside]] = np.nan
+        self.rejected[indices[outside]] = True
+        return outside
+
+
+def _fill_from_cache(results: _UniqueResults, unresolved: list[str], cache: GeocodeCache) -> list[str]:
+    """Fill cached addresses in one batched lookup; returns the addresses still unresolved."""
+    if not unresolved:
+        return unresolved
+    hits = cache.get_many(unresolved, normalized=True)
+    for address, entry in hits.items():
+        results.record(address, entry.coords)
+        results.cached[results.position[address]] = entry.ok
+    return [address for address in unresolved if address not in hits]
+
+
+def _replay_journal(results: _UniqueResults, unresolved: list[str], journal: GeocodeJournal) -> list[str]:
+    """Fill addresses an earlier (interrupted) run journaled; returns the rest."""
+    if not unresolved:
+        return unresolved
+    recorded = journal.entries()
+    for address in unresolved:
+        if address in recorded:
+            results.record(address, recorded[address].coords)
+            results.resumed[results.position[address]] = True
+    remaining = [address for address in unresolved if address not in recorded]
+    if len(remaining) < len(unresolved):
+        logger.info("Resuming from %s: %d addresses already geocoded", journal.path, len(unresolved) - len(remaining))
+    return remaining
+
+
+def _requeue_mismatches(results: _UniqueResults, polygons: ZipPolygons) -> list[str]:
+    """Addresses whose stored coordinates fall outside their ZIP, cleared for a new request."""
+    known = np.flatnonzero(~np.isnan(results.lat))
+    requeue = known[results.reject_mismatches(known, polygons)]
+    if len(requeue):
+        logger.info("Re-requesting %d stored geocodes that fall outside their ZIP.", len(requeue))
+        results.cached[requeue] = False
+        results.resumed[requeue] = False
+    return list(results.addresses[requeue])
+
+
+# An API result outside its ZIP polygon is kept as "not found" so it can fall back to the centroid.
+_NOT_IN_ZIP = GeocodeResponse(STATUS_ZERO_RESULTS)
+
+
+def _request_geocodes(
+    results: _UniqueResults,
+    unresolved: list[str],
+    geocoder: ConcurrentGeocoder,
+    *,
+    batch_size: int,
+    cache: GeocodeCache | None,
+    journal: GeocodeJournal | None,
+    polygons: ZipPolygons | None,
+) -> None:
+    """Geocode ``unresolved`` in batches, persisting each batch to the journal (or else the cache).
+
+    Each address is requested as its query text and persisted under its normalized key.
 
-def _extract_address(row: pd.Series, address_sets: Iterable[Sequence[str]]) -> str | None:
+    Only answers are persisted: coordinates, and ZERO_RESULTS as a negative
+    result. Failed requests (denied, invalid, transport errors, retries
+    exhausted) stay unresolved so the next run asks again.
+    """
+    failed = 0
+    for start in range(0, len(unresolved), batch_size):
+        batch = unresolved[start : start + batch_size]
+        responses = geocoder.geocode_many([results.query(address) for address in batch])
+        answered = [(address, found) for address, found in zip(batch, responses) if found.ok or found.not_found]
+        failed += len(batch) - len(answered)
+        for address, response in answered:
+            results.record(address, response.coords)
+        if polygons is not None and answered:
+            indices = np.array([results.position[address] for address, _ in answered])
+            outside = results.reject_mismatches(indices, polygons)
+            answered = [(address, _NOT_IN_ZIP if bad else found) for (address, found), bad in zip(answered, outside)]
+        if journal is not None:
+            journal.append(answered)
+        elif cache is not None:
+            cache.put_many(answered, normalized=True)
+    if failed:
+        logger.warning("%d geocoding requests failed; they are not cached and will be retried.", failed)
+
+
+def _fill_centroids(results: _UniqueResults, centroids: ZipCentroids) -> None:
+    """Give addresses still without coordinates their ZIP centroid, marked approximate."""
+    from pipeline.addresses import address_zip_codes
+
+    fallback = np.flatnonzero(np.isnan(results.lat))
+    if not len(fallback):
+        return
+    centroid_lat, centroid_lng = centroids.lookup(address_zip_codes(pd.Series(results.addresses[fallback])))
+    found = ~np.isnan(centroid_lat)
+    results.lat[fallback[found]] = centroid_lat[found]
+    results.lng[fallback[found]] = centroid_lng[found]
+    results.approximate[fallback[found]] = True
+    results.skipped[fallback[found]] = False
+
+
+def _candidate_addresses(frame: pd.DataFrame, address_sets: Iterable[Sequence[str]]) -> tuple[pd.Series, pd.Series]:
+    """Joined address text and its normalized key per row, from the first column set that yields one.
+
+    Sets whose columns are all present are tried in order; a row blank in
+    one set falls through to the next.
+    """
+    from pipeline.addresses import join_addresses, normalize_addresses
+
+    text = pd.Series(pd.NA, index=frame.index, dtype="string")
+    keys = pd.Series(pd.NA, index=frame.index, dtype="string")
     for columns in address_sets:
-        if not all(column in row for column in columns):
+        if not all(column in frame.columns for column in columns):
             continue
-        parts = [str(row[column]).strip() for column in columns if pd.notna(row[column])]
-        parts = [part for part in parts if part]
-        if len(parts) >= 1:
-            return ", ".join(parts)
-    return None
-
-
-def _geocode_with_retry(address: str, api_key: str, max_retries: int) -> tuple[float, float] | None:
-    delay_seconds = 0.5
-    for attempt in range(max_retries + 1):
-        result = _geocode_once(address, api_key)
-        if result:
-            return result
-
-        time.sleep(delay_seconds)
-        delay_seconds = min(delay_seconds * 2, 2.0)
-
-    logger.warning("Geocoding failed for address after retries: %s", address)
-    return None
-
-
-def _geocode_once(address: str, api_key: str) -> tuple[float, float] | None:
-    query = urlencode({"address": address, "key": api_key})
-    url = f"https://maps.googleapis.com/maps/api/geocode/json?{query}"
-
-    try:
-        with urlopen(url, timeout=10) as response:
-            payload = json.loads(response.read().decode("utf-8"))
-    except Exception as exc:  # noqa: BLE001 - keep pipeline resilient
-        logger.warning("Geocoding request failed for %s: %s", address, exc)
-        return None
-
-    if payload.get("status") != "OK":
-        status = payload.get("status")
-        if status and status != "ZERO_RESULTS":
-            logger.warning("Geocoding status for %s: %s", address, status)
-        return None
-
-    results = payload.get("results") or []
-    if not results:
-        return None
-
-    location = results[0].get("geometry", {}).get("location", {})
-    lat = location.get("lat")
-    lng = location.get("lng")
-
-    if lat is None or lng is None:
-        return None
-
-    return float(lat), float(lng)
+        remaining = keys.isna()
+        if not remaining.any():
+            break
+        zip_columns = [column for column in columns if _is_zip_column(column)]
+        joined = join_addresses(frame.loc[remaining], columns, zip_column=zip_columns[0] if zip_columns else None)
+        text[remaining] = joined.astype("string")
+        keys[remaining] = normalize_addresses(joined).astype("string")
+    return text, keys
+
+
+def _is_zip_column(column: str) -> bool:
+    name = column.lower()
+    return "zip" in name or "postal" in name
@@ -0,0 +1,161 @@
+"""Assign geocoded accounts to the ZIP polygon that contains them.
+
+Wrong ``ShippingPostalCode`` values put accounts in the wrong territory
+(see ``Account_Zip_Code_Corrections_Summary.txt``); so far they were found
+and fixed by hand. ``assign_zip_codes`` locates every geocoded account in
+the local ``*-zip-boundaries.json`` polygons (``ZipPolygons.locate``: a
+grid over polygon bounding boxes picks the candidate ZIPs, then one
+vectorized ray-casting pass tests them) and compares the result with the
+cleaned postal code:
+
+    polygons = ZipPolygons.load(public_dir.glob("*-zip-boundaries.json"))
+    assigned, report = assign_zip_codes(accounts, polygons, override=True)
+    assigned.loc[assigned["ZIP_Mismatch"]]    # accounts whose postal code disagrees
+
+With ``override=True`` the polygon ZIP replaces ``ZIP_Clean`` wherever a
+polygon contains the account. Accounts outside every polygon, or without
+coordinates, keep their cleaned postal code. ``pipeline.master`` applies
+this before assignment when ``load_master_inputs`` is given
+``zip_polygons`` (``create_master_assignments.py --zip-boundaries``).
+
+Boundary files currently cover Florida only, so the Miami accounts are the
+ones that can be checked:
+
+    python -m pipeline.zip_assignment phoenix_territory_map/nextjs_space/public/miami-final-territory-data.json \\
+        --zip-column zip --lat-column latitude --lng-column longitude --disagreements zip_disagreements.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+from dataclasses import dataclass
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import DEFAULT_WEB_PUBLIC_DIR, ZIP_BOUNDARY_GLOB
+from pipeline.geocode_validation import ZipPolygons
+from pipeline.spatial_index import read_points
+from pipeline.utils import clean_zip_code, resolve_path, save_csv_safe
+
+COL_ZIP_CLEAN: str = "ZIP_Clean"
+COL_ZIP_POLYGON: str = "ZIP_Polygon"
+COL_ZIP_MISMATCH: str = "ZIP_Mismatch"
+
+
+@dataclass(frozen=True)
+class ZipAssignmentReport:
+    """How the polygon ZIPs compare with the postal codes."""
+
+    rows: int
+    located: int
+    agreed: int
+    disagreed: int
+    unlocated: int  # coordinates present but outside every polygon
+    missing_coordinates: int
+    overridden: int = 0
+
+    @property
+    def disagreement_rate(self) -> float:
+        return self.disagreed / self.located if self.located else 0.0
+
+
+def assign_zip_codes(
+    df: pd.DataFrame,
+    polygons: ZipPolygons,
+    *,
+    zip_column: str = "ShippingPostalCode",
+    lat_column: str = "Latitude",
+    lng_column: str = "Longitude",
+    override: bool = False,
+) -> tuple[pd.DataFrame, ZipAssignmentReport]:
+    """Copy of ``df`` with ``ZIP_Clean``, ``ZIP_Polygon`` and ``ZIP_Mismatch`` columns.
+
+    ``ZIP_Clean`` is ``clean_zip_code(df[zip_column])``, replaced by the
+    polygon ZIP where one was found when ``override`` is set.
+    ``ZIP_Mismatch`` is True where a polygon was found and its ZIP differs
+    from the cleaned postal code (a missing postal code counts as a
+    mismatch).
+    """
+    output = df.copy()
+    lat = pd.to_numeric(output[lat_column], errors="coerce").to_numpy(dtype=np.float64)
+    lng = pd.to_numeric(output[lng_column], errors="coerce").to_numpy(dtype=np.float64)
+    postal = clean_zip_code(output[zip_column]).to_numpy(dtype=object)
+    postal_values = np.where(pd.isna(postal), None, postal)
+
+    located_zip = polygons.locate(lat, lng)
+    located = pd.notna(located_zip)
+    mismatch = located & (located_zip != postal_values)
+
+    output[COL_ZIP_POLYGON] = located_zip
+    output[COL_ZIP_MISMATCH] = mismatch
+    output[COL_ZIP_CLEAN] = np.where(mismatch, located_zip, postal_values) if override else postal_values
+
+    has_coordinates = np.isfinite(lat) & np.isfinite(lng)
+    return output, ZipAssignmentReport(
+        rows=len(output),
+        located=int(located.sum()),
+        agreed=int((located & ~mismatch).sum()),
+        disagreed=int(mismatch.sum()),
+        unlocated=int((has_coordinates & ~located).sum()),
+        missing_coordinates=int((~has_coordinates).sum()),
+        overridden=int(mismatch.sum()) if override else 0,
+    )
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Assign accounts to the ZIP polygon that contains them.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument("input", help="Geocoded accounts CSV or JSON list of records (relative to data root).")
+    parser.add_argument("--zip-column", default="ShippingPostalCode")
+    parser.add_argument("--lat-column", default="Latitude")
+    parser.add_argument("--lng-column", default="Longitude")
+    parser.add_argument("--boundaries", action="append", help="ZIP boundary JSON (default: web public dir).")
+    parser.add_argument("--override", action="store_true", help="Replace ZIP_Clean with the polygon ZIP.")
+    parser.add_argument("--output", help="Write every row with the ZIP columns here.")
+    parser.add_argument("--disagreements", help="Write only rows whose postal code disagrees here.")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+
+    if args.boundaries:
+        boundaries = [resolve_path(data_root, path) for path in args.boundaries]
+    else:
+        boundaries = sorted((data_root / DEFAULT_WEB_PUBLIC_DIR).glob(ZIP_BOUNDARY_GLOB))
+    polygons = ZipPolygons.load(boundaries)
+
+    frame = read_points(resolve_path(data_root, args.input))
+    assigned, report = assign_zip_codes(
+        frame,
+        polygons,
+        zip_column=args.zip_column,
+        lat_column=args.lat_column,
+        lng_column=args.lng_column,
+        override=args.override,
+    )
+    print(
+        f"{report.rows} rows: {report.located} inside a ZIP polygon, {report.disagreed} disagree with "
+        f"{args.zip_column} ({report.disagreement_rate:.1%}), {report.unlocated} outside every polygon, "
+        f"{report.missing_coordinates} without coordinates"
+    )
+    if args.output:
+        output = resolve_path(data_root, args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        save_csv_safe(assigned, output, "ZIP assignment")
+    if args.disagreements:
+        disagreements = resolve_path(data_root, args.disagreements)
+        disagreements.parent.mkdir(parents=True, exist_ok=True)
+        save_csv_safe(assigned.loc[assigned[COL_ZIP_MISMATCH]], disagreements, "ZIP disagreement")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""Precomputed ZIP centroid table for offline (approximate) geocoding.
+
+Without a Geocoding API key, rows that are not in the geocode cache used to
+be skipped and then dropped from the maps. ``ZipCentroids`` assigns such
+rows the centroid of their ZIP instead, which ``geocode_batch`` marks as
+approximate (``GEOCODE_PRECISION_ZIP_CENTROID``).
+
+The table is built once from files already in the repo and stored as
+``zip_centroids.csv``:
+
+* area-weighted centroids of the ``*-zip-boundaries.json`` polygons, and
+* for ZIPs without a polygon, the median of ZIP-level coordinates in the
+  density, map and ancillary-sales data and ``phoenix_territory_assignments.csv``.
+
+    python -m pipeline.zip_centroids build
+    centroids = ZipCentroids.load(data_root / DEFAULT_ZIP_CENTROIDS_CSV)
+    geocoded, stats = geocode_batch(frame, cache=cache, centroids=centroids, offline=True)
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from pathlib import Path
+from typing import Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from pipeline.constants import (
+    DEFAULT_WEB_PUBLIC_DIR,
+    DEFAULT_ZIP_CENTROIDS_CSV,
+    DEFAULT_ZIP_POINT_CSVS,
+    ZIP_BOUNDARY_GLOB,
+    ZIP_POINT_GLOBS,
+)
+from pipeline.geometry import load_zip_polygons, polygon_centroids
+from pipeline.utils import clean_zip_code, load_csv_safe, resolve_path, save_csv_safe
+
+SOURCE_POLYGON: str = "polygon"
+SOURCE_POINTS: str = "points"
+
+CENTROID_COLS: list[str] = ["zip", "latitude", "longitude", "area_km2", "source"]
+
+_ZIP_KEYS: tuple[str, ...] = ("zip", "zipcode", "zip_code", "postalcode")
+_LAT_KEYS: tuple[str, ...] = ("latitude", "lat")
+_LNG_KEYS: tuple[str, ...] = ("longitude", "lng", "lon", "long")
+
+
+class ZipCentroids:
+    """ZIP -> (latitude, longitude) lookup over the centroid table."""
+
+    def __init__(self, frame: pd.DataFrame) -> None:
+        zips = clean_zip_code(frame["zip"])
+        keep = zips.notna().to_numpy()
+        self.frame = frame.loc[keep].reset_index(drop=True)
+        self._index = pd.Index(zips[keep].to_numpy(dtype=object))
+        self._lat = self.frame["latitude"].to_numpy(dtype=np.float64)
+        self._lng = self.frame["longitude"].to_numpy(dtype=np.float64)
+
+    @classmethod
+    def load(cls, path: Path) -> ZipCentroids:
+        return cls(load_csv_safe(path, "ZIP centroid").astype({"zip": str}))
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, zip_code: object) -> bool:
+        return str(zip_code).zfill(5) in self._index
+
+    def lookup(self, zips: Iterable[object]) -> tuple[np.ndarray, np.ndarray]:
+        """(latitude, longitude) arrays aligned with ``zips``; NaN when unknown."""
+        cleaned = clean_zip_code(pd.Series(list(zips), dtype=object))
+        positions = self._index.get_indexer(cleaned.fillna("").to_numpy(dtype=object))
+        found = positions >= 0
+        lat = np.full(len(positions), np.nan)
+        lng = np.full(len(positions), np.nan)
+        lat[found] = self._lat[positions[found]]
+        lng[found] = self._lng[positions[found]]
+        return lat, lng
+
+
+# ---------------------------------------------------------------------------
+# Building the table
+# ---------------------------------------------------------------------------
+
+def _pick(columns: Sequence[str], candidates: Sequence[str]) -> str | None:
+    lowered = {column.lower(): column for column in columns}
+    return next((lowered[key] for key in candidates if key in lowered), None)
+
+
+def zip_point_records(path: Path) -> pd.DataFrame:
+    """ZIP-level (zip, latitude, longitude) rows from a JSON or CSV data file.
+
+    JSON files may hold a list of records or a mapping of named record
+    lists (``ancillary-sales-data.json``). Files without ZIP and coordinate
+    fields yield an empty frame.
+    """
+    if path.suffix.lower() == ".csv":
+        frame = load_csv_safe(path, "ZIP coordinate")
+    else:
+        with path.open(encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if isinstance(payload, dict):
+            records = [
+                record
+                for value in payload.values()
+                if isinstance(value, list)
+                for record in value
+                if isinstance(record, dict)
+            ]
+        elif isinstance(payload, list):
+            records = [record for record in payload if isinstance(record, dict)]
+        else:
+            records = []
+        frame = pd.DataFrame.from_records(records)
+
+    zip_column = _pick(frame.columns, _ZIP_KEYS)
+    lat_column = _pick(frame.columns, _LAT_KEYS)
+    lng_column = _pick(frame.columns, _LNG_KEYS)
+    if not (zip_column and lat_column and lng_column):
+        return pd.DataFrame(columns=["zip", "latitude", "longitude"])
+
+    points = pd.DataFrame(
+        {
+            "zip": clean_zip_code(frame[zip_column]),
+            "latitude": pd.to_numeric(frame[lat_column], errors="coerce"),
+            "longitude": pd.to_numeric(frame[lng_column], errors="coerce"),
+        }
+    )
+    return points.dropna()
+
+
+def build_zip_centroids(
+    boundary_paths: Iterable[Path],
+    point_paths: Iterable[Path] = (),
+) -> pd.DataFrame:
+    """Centroid table: polygon centroids first, then median ZIP-level points."""
+    table = load_zip_polygons(boundary_paths)
+    polygons = polygon_centroids(table)
+    polygons["source"] = SOURCE_POLYGON
+
+    frames = [zip_point_records(path) for path in point_paths]
+    frames = [frame for frame in frames if not frame.empty]
+    if frames:
+        points = pd.concat(frames, ignore_index=True)
+        points = points[~points["zip"].isin(polygons["zip"])]
+        points = points.groupby("zip", as_index=False)[["latitude", "longitude"]].median()
+        points["area_km2"] = np.nan
+        points["source"] = SOURCE_POINTS
+        centroids = pd.concat([polygons, points], ignore_index=True)
+    else:
+        centroids = polygons
+
+    centroids = centroids[CENTROID_COLS].sort_values("zip", ignore_index=True)
+    return centroids.round({"latitude": 6, "longitude": 6, "area_km2": 3})
+
+
+def default_sources(data_root: Path) -> tuple[list[Path], list[Path]]:
+    """(boundary files, ZIP-level point files) shipped with the repo."""
+    public_dir = data_root / DEFAULT_WEB_PUBLIC_DIR
+    boundaries = sorted(public_dir.glob(ZIP_BOUNDARY_GLOB))
+    points = sorted({path for pattern in ZIP_POINT_GLOBS for path in public_dir.glob(pattern)})
+    points += [data_root / name for name in DEFAULT_ZIP_POINT_CSVS if (data_root / name).exists()]
+    return boundaries, points
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build the offline ZIP centroid table.")
+    parser.add_argument("--data-root", default=os.getcwd(), help="Root directory for data files.")
+    parser.add_argument(
+        "--output",
+        default=DEFAULT_ZIP_CENTROIDS_CSV,
+        help="Centroid CSV to write (relative to data root).",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Compute centroids from boundary and ZIP data files.")
+    build.add_argument("--boundaries", action="append", help="ZIP boundary JSON (default: web public dir).")
+    build.add_argument("--points", action="append", help="ZIP-level coordinate JSON/CSV (default: web public dir).")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    data_root = Path(args.data_root).expanduser().resolve()
+
+    boundaries, points = default_sources(data_root)
+    if args.boundaries:
+        boundaries = [resolve_path(data_root, path) for path in args.boundaries]
+    if args.points:
+        points = [resolve_path(data_root, path) for path in args.points]
+
+    centroids = build_zip_centroids(boundaries, points)
+    output = resolve_path(data_root, args.output)
+    save_csv_safe(centroids, output, "ZIP centroid")
+    counts = centroids["source"].value_counts()
+    print(
+        f"Wrote {len(centroids)} ZIP centroids to {output} "
+        f"({counts.get(SOURCE_POLYGON, 0)} from polygons, {counts.get(SOURCE_POINTS, 0)} from points)"
+    )
+
+
+if __name__ == "__main__":
+    main()